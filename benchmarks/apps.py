@@ -0,0 +1,355 @@
+# coding: utf-8
+"""
+Benchmark applications: a same small users API (list users with a payload
+size given in path, create user from body) built for each supported context
+and processor, and clients able to send requests to them in process.
+"""
+from collections import OrderedDict
+import io
+import typing
+
+from hapic import Hapic
+
+# Count of users returned by list endpoint for each payload size
+PAYLOAD_SIZES = OrderedDict([("small", 1), ("medium", 100), ("large", 2000)])
+CONTEXTS = ("agnostic", "bottle", "flask", "pyramid", "wsgi", "aiohttp", "asgi")
+PROCESSORS = ("marshmallow", "serpyco")
+
+USER_PAYLOAD = (
+    b'{"id": 1, "first_name": "Damien", "last_name": "Accorsi", '
+    b'"email_address": "damien.accorsi@algoo.fr", "display_name": "Damien Accorsi", '
+    b'"company": "Algoo"}'
+)
+
+
+def get_user_dict(user_id: int) -> typing.Dict[str, typing.Any]:
+    return {
+        "id": user_id,
+        "first_name": "Damien",
+        "last_name": "Accorsi",
+        "email_address": "damien.accorsi@algoo.fr",
+        "display_name": "Damien Accorsi",
+        "company": "Algoo",
+    }
+
+
+class Client(object):
+    """
+    Send requests to a benchmark application without network
+    """
+
+    def request(self, method: str, path: str, body: typing.Optional[bytes] = None) -> int:
+        """
+        Send request and read the whole response.
+        :return: response http code
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class WsgiClient(Client):
+    def __init__(self, wsgi_app: typing.Callable[..., typing.Any]) -> None:
+        self._wsgi_app = wsgi_app
+
+    def request(self, method: str, path: str, body: typing.Optional[bytes] = None) -> int:
+        body = body or b""
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "localhost",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        result = self._wsgi_app(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+        return int(statuses[0].split(" ", 1)[0])
+
+
+class AgnosticClient(Client):
+    def __init__(self, context: typing.Any) -> None:
+        self._context = context
+
+    def request(self, method: str, path: str, body: typing.Optional[bytes] = None) -> int:
+        body_parameters = self._context.json_backend.loads(body) if body else {}
+        response = self._context.dispatch(method, path, body_parameters=body_parameters)
+        return int(response.status_code)
+
+
+class AiohttpClient(Client):
+    def __init__(self, app: typing.Any) -> None:
+        import asyncio
+
+        from aiohttp.test_utils import TestClient
+        from aiohttp.test_utils import TestServer
+
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._client = TestClient(TestServer(app), loop=self._loop)
+        self._loop.run_until_complete(self._client.start_server())
+
+    async def _request(self, method: str, path: str, body: typing.Optional[bytes]) -> int:
+        response = await self._client.request(
+            method, path, data=body, headers={"Content-Type": "application/json"}
+        )
+        await response.read()
+        return response.status
+
+    def request(self, method: str, path: str, body: typing.Optional[bytes] = None) -> int:
+        return self._loop.run_until_complete(self._request(method, path, body))
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self._client.close())
+        self._loop.close()
+
+
+class AsgiClient(Client):
+    def __init__(self, app: typing.Any) -> None:
+        import asyncio
+
+        self._app = app
+        self._loop = asyncio.new_event_loop()
+
+    async def _request(self, method: str, path: str, body: typing.Optional[bytes]) -> int:
+        scope = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [[b"content-type", b"application/json"]],
+        }
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": body or b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await self._app(scope, receive, send)
+        return statuses[0]
+
+    def request(self, method: str, path: str, body: typing.Optional[bytes] = None) -> int:
+        return self._loop.run_until_complete(self._request(method, path, body))
+
+    def close(self) -> None:
+        self._loop.close()
+
+
+def get_hapic_schemas(processor_name: str) -> typing.Dict[str, typing.Any]:
+    """
+    :return: processor class and schemas used by benchmark controllers
+    """
+    if processor_name == "marshmallow":
+        import marshmallow
+
+        from hapic.processor.marshmallow import MarshmallowProcessor
+
+        class UsersPathSchema(marshmallow.Schema):
+            count = marshmallow.fields.Int(required=True)
+
+        class UserSchema(marshmallow.Schema):
+            id = marshmallow.fields.Int(required=True)
+            first_name = marshmallow.fields.String(required=True)
+            last_name = marshmallow.fields.String(required=True)
+            email_address = marshmallow.fields.Email(required=True)
+            display_name = marshmallow.fields.String(required=False)
+            company = marshmallow.fields.String(required=False)
+
+        return {
+            "processor_class": MarshmallowProcessor,
+            "path": UsersPathSchema(),
+            "user": UserSchema(),
+            "users": UserSchema(many=True),
+            "get_user": get_user_dict,
+            "get_count": lambda path: path["count"],
+        }
+
+    if processor_name == "serpyco":
+        import dataclasses
+
+        from hapic.processor.serpyco import SerpycoProcessor
+
+        @dataclasses.dataclass
+        class UsersPath(object):
+            # Path parameters are not converted by serpyco
+            count: str
+
+        @dataclasses.dataclass
+        class User(object):
+            id: int
+            first_name: str
+            last_name: str
+            email_address: str
+            display_name: typing.Optional[str] = None
+            company: typing.Optional[str] = None
+
+        return {
+            "processor_class": SerpycoProcessor,
+            "path": UsersPath,
+            "user": User,
+            "users": User,
+            "users_processor": SerpycoProcessor(many=True),
+            "get_user": lambda user_id: User(**get_user_dict(user_id)),
+            "get_count": lambda path: int(path.count),
+        }
+
+    raise ValueError('Unknown processor "{}"'.format(processor_name))
+
+
+def decorate_controllers(
+    hapic: Hapic,
+    schemas: typing.Dict[str, typing.Any],
+    get_users: typing.Callable[..., typing.Any],
+    add_user: typing.Callable[..., typing.Any],
+) -> typing.Tuple[typing.Callable[..., typing.Any], typing.Callable[..., typing.Any]]:
+    get_users = hapic.output_body(schemas["users"], processor=schemas.get("users_processor"))(
+        get_users
+    )
+    get_users = hapic.input_path(schemas["path"])(get_users)
+    get_users = hapic.with_api_doc()(get_users)
+    add_user = hapic.output_body(schemas["user"])(add_user)
+    add_user = hapic.input_body(schemas["user"])(add_user)
+    add_user = hapic.with_api_doc()(add_user)
+    return get_users, add_user
+
+
+def build_client(context_name: str, processor_name: str) -> Client:
+    """
+    Build benchmark application for given context and processor.
+    :param context_name: one of CONTEXTS
+    :param processor_name: one of PROCESSORS
+    :return: Client sending requests to built application
+    """
+    schemas = get_hapic_schemas(processor_name)
+    processor_class = schemas["processor_class"]
+    get_user = schemas["get_user"]
+    get_count = schemas["get_count"]
+    users_by_count = {
+        count: [get_user(user_id) for user_id in range(count)] for count in PAYLOAD_SIZES.values()
+    }
+
+    if context_name in ("aiohttp", "asgi"):
+        hapic = Hapic(processor_class=processor_class, async_=True)
+
+        async def async_get_users(request, hapic_data=None):
+            return users_by_count[get_count(hapic_data.path)]
+
+        async def async_add_user(request, hapic_data=None):
+            return hapic_data.body
+
+        get_users, add_user = decorate_controllers(hapic, schemas, async_get_users, async_add_user)
+
+    if context_name == "asgi":
+        from hapic.ext.asgi.context import AsgiContext
+
+        context = AsgiContext()
+        context.app.add_route("GET", "/users/{count}", get_users)
+        context.app.add_route("POST", "/users", add_user)
+        hapic.set_context(context)
+        return AsgiClient(context.app)
+
+    if context_name == "aiohttp":
+        from aiohttp import web
+
+        from hapic.ext.aiohttp.context import AiohttpContext
+
+        app = web.Application()
+        app.router.add_get("/users/{count}", get_users)
+        app.router.add_post("/users", add_user)
+        hapic.set_context(AiohttpContext(app))
+        return AiohttpClient(app)
+
+    hapic = Hapic(processor_class=processor_class)
+
+    def sync_get_users(*args, hapic_data=None, **kwargs):
+        return users_by_count[get_count(hapic_data.path)]
+
+    def sync_add_user(*args, hapic_data=None, **kwargs):
+        return hapic_data.body
+
+    get_users, add_user = decorate_controllers(hapic, schemas, sync_get_users, sync_add_user)
+
+    if context_name == "agnostic":
+        from hapic.ext.agnostic.context import AgnosticApp
+        from hapic.ext.agnostic.context import AgnosticContext
+
+        app = AgnosticApp()
+        app.route("/users/<count>", "GET", get_users)
+        app.route("/users", "POST", add_user)
+        context = AgnosticContext(
+            app=app, default_error_builder=processor_class.get_default_error_builder()
+        )
+        hapic.set_context(context)
+        return AgnosticClient(context)
+
+    if context_name == "bottle":
+        import bottle
+
+        from hapic.ext.bottle import BottleContext
+
+        app = bottle.Bottle()
+        app.route("/users/<count>", method="GET", callback=get_users)
+        app.route("/users", method="POST", callback=add_user)
+        hapic.set_context(BottleContext(app))
+        return WsgiClient(app)
+
+    if context_name == "flask":
+        import flask
+
+        from hapic.ext.flask import FlaskContext
+
+        app = flask.Flask(__name__)
+        app.add_url_rule("/users/<count>", view_func=get_users, methods=["GET"])
+        app.add_url_rule("/users", view_func=add_user, methods=["POST"])
+        hapic.set_context(FlaskContext(app))
+        return WsgiClient(app)
+
+    if context_name == "pyramid":
+        from pyramid.config import Configurator
+
+        from hapic.ext.pyramid import PyramidContext
+
+        configurator = Configurator()
+        configurator.add_route("get_users", "/users/{count}", request_method="GET")
+        configurator.add_view(get_users, route_name="get_users")
+        configurator.add_route("add_user", "/users", request_method="POST")
+        configurator.add_view(add_user, route_name="add_user")
+        hapic.set_context(PyramidContext(configurator))
+        return WsgiClient(configurator.make_wsgi_app())
+
+    if context_name == "wsgi":
+        from hapic.ext.wsgi.context import WsgiContext
+
+        context = WsgiContext()
+        context.app.route("/users/<count>", "GET", get_users)
+        context.app.route("/users", "POST", add_user)
+        hapic.set_context(context)
+        return WsgiClient(context.app)
+
+    raise ValueError('Unknown context "{}"'.format(context_name))
@@ -0,0 +1,206 @@
+# coding: utf-8
+"""
+Run benchmark scenarios on each context and processor combination and save
+results as JSON. Run it from repository root:
+
+    python -m benchmarks --out results.json
+
+Then compare with results of a previous release:
+
+    python -m benchmarks --out results.json --compare previous-results.json
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import typing
+
+from benchmarks.apps import CONTEXTS
+from benchmarks.apps import PAYLOAD_SIZES
+from benchmarks.apps import PROCESSORS
+from benchmarks.apps import USER_PAYLOAD
+from benchmarks.apps import Client
+from benchmarks.apps import build_client
+from hapic.infos import __version__
+
+# Count of requests traced to compute allocations per request
+ALLOCATIONS_REQUESTS_COUNT = 20
+
+
+class Scenario(object):
+    def __init__(
+        self, name: str, method: str, path: str, body: typing.Optional[bytes] = None
+    ) -> None:
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+
+
+def get_scenarios() -> typing.List[Scenario]:
+    scenarios = [
+        Scenario("list_users_{}".format(size_name), "GET", "/users/{}".format(count))
+        for size_name, count in PAYLOAD_SIZES.items()
+    ]
+    scenarios.append(Scenario("create_user", "POST", "/users", USER_PAYLOAD))
+    return scenarios
+
+
+def get_percentile(sorted_values: typing.List[float], percentile: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def send_request(client: Client, scenario: Scenario) -> None:
+    http_code = client.request(scenario.method, scenario.path, scenario.body)
+    if http_code != 200:
+        raise RuntimeError(
+            'Scenario "{}" responded with http code {}'.format(scenario.name, http_code)
+        )
+
+
+def measure_scenario(
+    client: Client, scenario: Scenario, requests_count: int, warmup_count: int
+) -> typing.Dict[str, typing.Any]:
+    """
+    Send given scenario requests and compute its statistics.
+    :return: dict of requests/sec, latencies in milliseconds and mean peak
+        of memory allocated by one request in bytes
+    """
+    for _ in range(warmup_count):
+        send_request(client, scenario)
+
+    latencies = []
+    started_at = time.perf_counter()
+    for _ in range(requests_count):
+        request_started_at = time.perf_counter()
+        send_request(client, scenario)
+        latencies.append(time.perf_counter() - request_started_at)
+    elapsed = time.perf_counter() - started_at
+
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(requests_count, ALLOCATIONS_REQUESTS_COUNT)):
+            tracemalloc.clear_traces()
+            send_request(client, scenario)
+            allocations.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "requests": requests_count,
+        "requests_per_second": requests_count / elapsed,
+        "latency_mean_ms": sum(latencies) / len(latencies) * 1000,
+        "latency_p50_ms": get_percentile(latencies, 50) * 1000,
+        "latency_p99_ms": get_percentile(latencies, 99) * 1000,
+        "allocated_bytes_per_request": sum(allocations) // len(allocations),
+    }
+
+
+def run(
+    contexts: typing.Iterable[str] = CONTEXTS,
+    processors: typing.Iterable[str] = PROCESSORS,
+    requests_count: int = 500,
+    warmup_count: int = 50,
+    output: typing.TextIO = sys.stdout,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Run all scenarios on each given context and processor combination.
+    Combinations with missing dependencies are skipped.
+    :return: results dict, ready to be dumped as JSON
+    """
+    results = []
+    for context_name in contexts:
+        for processor_name in processors:
+            try:
+                client = build_client(context_name, processor_name)
+            except ImportError as exc:
+                output.write("skip {} {}: {}\n".format(context_name, processor_name, exc))
+                continue
+
+            try:
+                for scenario in get_scenarios():
+                    result = measure_scenario(client, scenario, requests_count, warmup_count)
+                    result.update(
+                        {
+                            "context": context_name,
+                            "processor": processor_name,
+                            "scenario": scenario.name,
+                        }
+                    )
+                    results.append(result)
+                    output.write(
+                        "{context:<9} {processor:<12} {scenario:<19} "
+                        "{requests_per_second:>9.1f} req/s  p99 {latency_p99_ms:>8.3f} ms  "
+                        "{allocated_bytes_per_request:>9} B/req\n".format(**result)
+                    )
+            finally:
+                client.close()
+
+    return {
+        "hapic_version": __version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.utcnow().isoformat(),
+        "results": results,
+    }
+
+
+def compare(
+    previous: typing.Dict[str, typing.Any],
+    current: typing.Dict[str, typing.Any],
+    output: typing.TextIO = sys.stdout,
+) -> None:
+    """
+    Write requests/sec and p99 latency changes between two results dicts.
+    """
+
+    def get_key(result: typing.Dict[str, typing.Any]) -> typing.Tuple[str, str, str]:
+        return result["context"], result["processor"], result["scenario"]
+
+    previous_results = {get_key(result): result for result in previous["results"]}
+    output.write(
+        "Compared with hapic {} ({})\n".format(previous["hapic_version"], previous["date"])
+    )
+    for result in current["results"]:
+        previous_result = previous_results.get(get_key(result))
+        if previous_result is None:
+            continue
+
+        output.write(
+            "{:<9} {:<12} {:<19} req/s {:>+7.1%}  p99 {:>+7.1%}\n".format(
+                result["context"],
+                result["processor"],
+                result["scenario"],
+                result["requests_per_second"] / previous_result["requests_per_second"] - 1,
+                result["latency_p99_ms"] / previous_result["latency_p99_ms"] - 1,
+            )
+        )
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Hapic benchmarks")
+    parser.add_argument("--contexts", nargs="+", choices=CONTEXTS, default=list(CONTEXTS))
+    parser.add_argument("--processors", nargs="+", choices=PROCESSORS, default=list(PROCESSORS))
+    parser.add_argument("--requests", type=int, default=500, help="Requests count by scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Warmup requests by scenario")
+    parser.add_argument("--out", help="JSON results file path")
+    parser.add_argument("--compare", help="JSON results file of a previous run")
+    args = parser.parse_args(argv)
+
+    results = run(args.contexts, args.processors, args.requests, args.warmup)
+
+    if args.out:
+        with open(args.out, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as previous_results_file:
+            compare(json.load(previous_results_file), results)
+
+    return 0
@@ -1,36 +1,72 @@
 # -*- coding: utf-8 -*-
+import importlib
+import sys
+import typing
+
 from hapic.data import HapicData  # noqa: F401
 from hapic.hapic import Hapic
 from hapic.infos import __version__  # noqa: F401
 
-# To make a default hapic instance, must determine processor
-try:
-    from hapic.processor.marshmallow import MarshmallowProcessor
-
-    default_processor_class = MarshmallowProcessor
-except ImportError:
-    try:
-        from hapic.processor.serpyco import SerpycoProcessor
-
-        default_processor_class = SerpycoProcessor
-    except ImportError:
-        default_processor_class = None
-
-_hapic_default = Hapic(processor_class=default_processor_class)
-
-with_api_doc = _hapic_default.with_api_doc
-input_headers = _hapic_default.input_headers
-input_body = _hapic_default.input_body
-input_path = _hapic_default.input_path
-input_query = _hapic_default.input_query
-input_forms = _hapic_default.input_forms
-input_files = _hapic_default.input_files
-output_headers = _hapic_default.output_headers
-output_body = _hapic_default.output_body
-output_file = _hapic_default.output_file
-generate_doc = _hapic_default.generate_doc
-set_context = _hapic_default.set_context
-reset_context = _hapic_default.reset_context
-add_documentation_view = _hapic_default.add_documentation_view
-handle_exception = _hapic_default.handle_exception
-output_stream = _hapic_default.output_stream
+# Methods of default hapic instance exposed as module functions
+HAPIC_DEFAULT_METHODS = (
+    "with_api_doc",
+    "input_headers",
+    "input_body",
+    "input_path",
+    "input_query",
+    "input_forms",
+    "input_files",
+    "output_headers",
+    "output_body",
+    "output_file",
+    "generate_doc",
+    "set_context",
+    "reset_context",
+    "add_documentation_view",
+    "handle_exception",
+    "output_stream",
+)
+# Processors exposed by this module, with the module who define them. They
+# are imported at first use: a processor dependencies (marshmallow,
+# serpyco, ...) are not imported if it is not used.
+LAZY_PROCESSORS = {
+    "MarshmallowProcessor": "hapic.processor.marshmallow",
+    "SerpycoProcessor": "hapic.processor.serpyco",
+}
+
+
+def _get_default_processor_class() -> typing.Optional[type]:
+    # To make a default hapic instance, must determine processor
+    for processor_name in ("MarshmallowProcessor", "SerpycoProcessor"):
+        try:
+            return getattr(importlib.import_module(LAZY_PROCESSORS[processor_name]), processor_name)
+        except ImportError:
+            pass
+
+    return None
+
+
+def __getattr__(name: str) -> typing.Any:
+    """
+    Build default hapic instance and import processors at first use
+    (see PEP 562). Returned values are then kept as module attributes.
+    """
+    if name in LAZY_PROCESSORS:
+        value = getattr(importlib.import_module(LAZY_PROCESSORS[name]), name)
+    elif name == "default_processor_class":
+        value = _get_default_processor_class()
+    elif name == "_hapic_default":
+        value = Hapic(processor_class=__getattr__("default_processor_class"))
+    elif name in HAPIC_DEFAULT_METHODS:
+        value = getattr(__getattr__("_hapic_default"), name)
+    else:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+    globals()[name] = value
+    return value
+
+
+# Module __getattr__ is not supported before python 3.7
+if sys.version_info < (3, 7):
+    for _name in ("default_processor_class", "_hapic_default") + HAPIC_DEFAULT_METHODS:
+        __getattr__(_name)
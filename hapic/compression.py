@@ -0,0 +1,507 @@
+# coding: utf-8
+"""
+Response compression negotiated from Accept-Encoding request header: gzip
+(python zlib module), brotli (brotli package must be installed) and zstd
+(zstandard package must be installed).
+"""
+import abc
+import hashlib
+import typing
+import zlib
+
+from hapic.exception import ConfigurationException
+from hapic.util import LruCache
+
+# Content codings by preference order, used when several are accepted with
+# same quality value
+DEFAULT_ENCODINGS = ("br", "zstd", "gzip")
+# Mimetypes (without parameters) compressed in addition of text/*,
+# */*+json and */*+xml mimetypes
+DEFAULT_COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-yaml",
+    "application/yaml",
+)
+
+
+class StreamCompressor(metaclass=abc.ABCMeta):
+    """
+    Compress a content chunk by chunk
+    """
+
+    @abc.abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """
+        :param data: next chunk of content
+        :return: compressed bytes available (can be empty)
+        """
+
+    @abc.abstractmethod
+    def flush(self) -> bytes:
+        """
+        :return: compressed bytes of all given chunks not returned yet, so
+        client can decompress them without waiting next chunks
+        """
+
+    @abc.abstractmethod
+    def finish(self) -> bytes:
+        """
+        :return: end of compressed content
+        """
+
+
+class Compressor(metaclass=abc.ABCMeta):
+    """
+    Compressor produce a content coding (see Content-Encoding header).
+    """
+
+    # Content coding name, as used in Accept-Encoding and Content-Encoding
+    encoding = None  # type: str
+
+    @abc.abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """
+        :param data: whole content
+        :return: compressed content
+        """
+
+    @abc.abstractmethod
+    def get_stream_compressor(self) -> StreamCompressor:
+        """
+        :return: new StreamCompressor to compress a content chunk by chunk
+        """
+
+
+class ZlibStreamCompressor(StreamCompressor):
+    def __init__(self, compressobj: typing.Any) -> None:
+        self._compressobj = compressobj
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressobj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressobj.flush(zlib.Z_FINISH)
+
+
+class GzipCompressor(Compressor):
+    """
+    Compressor using python zlib module: always available.
+    """
+
+    encoding = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        """
+        :param level: compression level, from 1 (fast) to 9 (small)
+        """
+        self._level = level
+
+    def _get_compressobj(self) -> typing.Any:
+        # INFO - wbits 16 + 15 produce a gzip header and trailer
+        return zlib.compressobj(self._level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        compressobj = self._get_compressobj()
+        return compressobj.compress(data) + compressobj.flush(zlib.Z_FINISH)
+
+    def get_stream_compressor(self) -> StreamCompressor:
+        return ZlibStreamCompressor(self._get_compressobj())
+
+
+class BrotliStreamCompressor(StreamCompressor):
+    def __init__(self, compressor: typing.Any) -> None:
+        self._compressor = compressor
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class BrotliCompressor(Compressor):
+    """
+    Compressor using brotli package (must be installed).
+    """
+
+    encoding = "br"
+
+    def __init__(self, quality: int = 4) -> None:
+        """
+        :param quality: compression quality, from 0 (fast) to 11 (small).
+            Highest qualities are too slow for dynamic responses.
+        """
+        import brotli
+
+        self._brotli = brotli
+        self._quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.compress(data, quality=self._quality)
+
+    def get_stream_compressor(self) -> StreamCompressor:
+        return BrotliStreamCompressor(self._brotli.Compressor(quality=self._quality))
+
+
+class ZstdStreamCompressor(StreamCompressor):
+    def __init__(self, compressobj: typing.Any, flush_block: int) -> None:
+        self._compressobj = compressobj
+        self._flush_block = flush_block
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressobj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressobj.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressobj.flush()
+
+
+class ZstdCompressor(Compressor):
+    """
+    Compressor using zstandard package (must be installed).
+    """
+
+    encoding = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        """
+        :param level: compression level, from 1 (fast) to 22 (small)
+        """
+        import zstandard
+
+        self._zstandard = zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def get_stream_compressor(self) -> StreamCompressor:
+        return ZstdStreamCompressor(
+            self._compressor.compressobj(), self._zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+
+COMPRESSOR_CLASSES = {
+    GzipCompressor.encoding: GzipCompressor,
+    BrotliCompressor.encoding: BrotliCompressor,
+    ZstdCompressor.encoding: ZstdCompressor,
+}  # type: typing.Dict[str, typing.Type[Compressor]]
+
+
+def parse_accept_encoding(value: str) -> typing.Dict[str, float]:
+    """
+    :param value: Accept-Encoding header value, eg. "gzip, br;q=0.8"
+    :return: quality value of each given content coding (lower case)
+    """
+    qvalues = {}
+    for item in value.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        qvalue = 1.0
+        for parameter in parameters.split(";"):
+            name, _, parameter_value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    qvalue = float(parameter_value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding] = qvalue
+
+    return qvalues
+
+
+def get_vary_headers(headers: typing.Optional[typing.Dict[str, str]]) -> typing.Dict[str, str]:
+    """
+    :param headers: response headers
+    :return: new headers dict with Accept-Encoding in Vary header, so
+    shared caches keep a response by content coding
+    """
+    vary_headers = {}
+    vary = None
+    for name, value in (headers or {}).items():
+        if name.lower() == "vary":
+            vary = value
+        else:
+            vary_headers[name] = value
+
+    if not vary:
+        vary_headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        vary_headers["Vary"] = "{}, Accept-Encoding".format(vary)
+    else:
+        vary_headers["Vary"] = vary
+    return vary_headers
+
+
+def get_compressed_headers(
+    headers: typing.Optional[typing.Dict[str, str]], encoding: str
+) -> typing.Dict[str, str]:
+    """
+    :param headers: headers of not compressed response
+    :param encoding: content coding applied on response body
+    :return: new headers dict for compressed response: Content-Encoding and
+    Vary are set, Content-Length is removed and a strong ETag become weak
+    (compressed bytes are not the same for each content coding)
+    """
+    compressed_headers = {}
+    for name, value in get_vary_headers(headers).items():
+        lower_name = name.lower()
+        if lower_name == "content-length":
+            continue
+        if lower_name == "etag" and not value.startswith("W/"):
+            value = "W/{}".format(value)
+        compressed_headers[name] = value
+
+    compressed_headers["Content-Encoding"] = encoding
+    return compressed_headers
+
+
+class CompressionPolicy(object):
+    """
+    Define which responses are compressed by contexts: content coding is
+    negotiated from Accept-Encoding request header, only compressible
+    mimetypes are compressed and only if body is larger than min_size.
+    Compressed bytes of static responses (responses with an ETag header,
+    like documentation spec) are cached, by digest of their content.
+    """
+
+    def __init__(
+        self,
+        encodings: typing.Optional[typing.Sequence[str]] = None,
+        min_size: int = 1024,
+        compressible_mimetypes: typing.Sequence[str] = DEFAULT_COMPRESSIBLE_MIMETYPES,
+        cache_size: int = 32,
+        compressors: typing.Optional[typing.Sequence[Compressor]] = None,
+        cache_max_body_size: int = 1024 * 1024,
+    ) -> None:
+        """
+        :param encodings: content codings to use, by preference order. If not
+            given, "br", "zstd" and "gzip" who are available (brotli and
+            zstandard packages are optional).
+        :param min_size: size in bytes under which bodies are not compressed
+        :param compressible_mimetypes: mimetypes to compress in addition of
+            text/*, */*+json and */*+xml
+        :param cache_size: count of compressed static responses kept
+        :param compressors: Compressor instances to use instead of
+            encodings, by preference order (eg. to change compression levels)
+        :param cache_max_body_size: size in bytes above which compressed
+            static responses are not cached
+        """
+        if min_size < 0 or cache_size < 0 or cache_max_body_size < 0:
+            raise ConfigurationException(
+                "min_size, cache_size and cache_max_body_size must be positive"
+            )
+
+        if compressors is None:
+            compressors = self._get_compressors(encodings)
+
+        self.min_size = min_size
+        self.compressors = list(compressors)
+        self.compressible_mimetypes = frozenset(compressible_mimetypes)
+        self._compressors_by_accept_encoding = LruCache(256)
+        self._compressed_static_bodies = LruCache(cache_size)
+        self._cache_max_body_size = cache_max_body_size
+
+    @staticmethod
+    def _get_compressors(
+        encodings: typing.Optional[typing.Sequence[str]],
+    ) -> typing.List[Compressor]:
+        compressors = []
+        for encoding in encodings or DEFAULT_ENCODINGS:
+            try:
+                compressor_class = COMPRESSOR_CLASSES[encoding]
+            except KeyError:
+                raise ConfigurationException('Unknown content coding "{}"'.format(encoding))
+
+            try:
+                compressors.append(compressor_class())
+            except ImportError as exc:
+                if encodings is not None:
+                    raise ConfigurationException(
+                        'Content coding "{}" is not available: {}'.format(encoding, exc)
+                    ) from exc
+
+        return compressors
+
+    def is_compressible(self, mimetype: typing.Optional[str]) -> bool:
+        """
+        :param mimetype: response Content-Type
+        :return: True if content of this mimetype should be compressed
+        """
+        if not mimetype:
+            return False
+
+        mimetype = mimetype.partition(";")[0].strip().lower()
+        return (
+            mimetype.startswith("text/")
+            or mimetype.endswith("+json")
+            or mimetype.endswith("+xml")
+            or mimetype in self.compressible_mimetypes
+        )
+
+    def get_uncompressed_headers(
+        self, mimetype: typing.Optional[str], headers: typing.Optional[typing.Dict[str, str]]
+    ) -> typing.Optional[typing.Dict[str, str]]:
+        """
+        :param mimetype: response Content-Type
+        :param headers: headers of response sent without compression
+        :return: headers to send: Vary is set if response is compressible,
+        because it would be compressed with another Accept-Encoding
+        """
+        if not self.is_compressible(mimetype):
+            return headers
+        if headers and any(name.lower() == "content-encoding" for name in headers):
+            return headers
+        return get_vary_headers(headers)
+
+    def negotiate(self, accept_encoding: typing.Optional[str]) -> typing.Optional[Compressor]:
+        """
+        :param accept_encoding: Accept-Encoding request header value
+        :return: Compressor of accepted content coding with highest
+        quality value, None if response must not be compressed
+        """
+        if not accept_encoding:
+            return None
+
+        try:
+            return self._compressors_by_accept_encoding.get(accept_encoding)[0]
+        except TypeError:
+            pass
+
+        qvalues = parse_accept_encoding(accept_encoding)
+        best_compressor = None
+        best_qvalue = 0.0
+        for compressor in self.compressors:
+            qvalue = qvalues.get(compressor.encoding, qvalues.get("*", 0.0))
+            if qvalue > best_qvalue:
+                best_compressor = compressor
+                best_qvalue = qvalue
+
+        # INFO - Stored in a tuple to cache None values too
+        self._compressors_by_accept_encoding.set(accept_encoding, (best_compressor,))
+        return best_compressor
+
+    def get_compressor(
+        self,
+        accept_encoding: typing.Optional[str],
+        mimetype: typing.Optional[str],
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        size: typing.Optional[int] = None,
+    ) -> typing.Optional[Compressor]:
+        """
+        :param accept_encoding: Accept-Encoding request header value
+        :param mimetype: response Content-Type
+        :param headers: response headers
+        :param size: response body size, None if unknown (streams)
+        :return: Compressor to use, None if response must not be compressed
+        """
+        if size is not None and size < self.min_size:
+            return None
+        if not self.is_compressible(mimetype):
+            return None
+        if headers and any(name.lower() == "content-encoding" for name in headers):
+            return None
+        return self.negotiate(accept_encoding)
+
+    def compress(self, data: bytes, compressor: Compressor, static: bool = False) -> bytes:
+        """
+        :param data: whole response body
+        :param compressor: Compressor to use
+        :param static: True if body is a static content: compressed bytes
+            are then cached
+        :return: compressed body
+        """
+        if not static or len(data) > self._cache_max_body_size:
+            return compressor.compress(data)
+
+        # INFO - Keyed by digest to not keep whole bodies as keys
+        key = (compressor.encoding, hashlib.sha1(data).digest())
+        compressed_data = self._compressed_static_bodies.get(key)
+        if compressed_data is None:
+            compressed_data = compressor.compress(data)
+            self._compressed_static_bodies.set(key, compressed_data)
+        return compressed_data
+
+    def compress_stream(
+        self, chunks: typing.Iterable[bytes], compressor: Compressor, flush: bool = True
+    ) -> typing.Iterator[bytes]:
+        """
+        Compress given chunks lazily. Given chunks iterator is closed when
+        returned iterator is closed.
+        :param chunks: response body chunks
+        :param compressor: Compressor to use
+        :param flush: if True, each chunk is flushed so client can
+            decompress it at reception (eg. for output streams)
+        :return: compressed chunks
+        """
+        stream_compressor = compressor.get_stream_compressor()
+        try:
+            for chunk in chunks:
+                data = stream_compressor.compress(chunk)
+                if flush:
+                    data += stream_compressor.flush()
+                if data:
+                    yield data
+            yield stream_compressor.finish()
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def compress_response(
+        self,
+        response: typing.Union[str, bytes],
+        mimetype: typing.Optional[str],
+        headers: typing.Optional[typing.Dict[str, str]],
+        accept_encoding: typing.Optional[str],
+    ) -> typing.Tuple[typing.Union[str, bytes], typing.Optional[typing.Dict[str, str]]]:
+        """
+        Compress given response body if it must be.
+        :return: response body and headers to send
+        """
+        data = response.encode("utf-8") if isinstance(response, str) else response
+        compressor = self.get_compressor(accept_encoding, mimetype, headers, len(data))
+        if compressor is None:
+            return response, self.get_uncompressed_headers(mimetype, headers)
+
+        static = bool(headers) and any(name.lower() == "etag" for name in headers)
+        return (
+            self.compress(data, compressor, static=static),
+            get_compressed_headers(headers, compressor.encoding),
+        )
+
+    def compress_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        mimetype: typing.Optional[str],
+        headers: typing.Optional[typing.Dict[str, str]],
+        accept_encoding: typing.Optional[str],
+        size: typing.Optional[int] = None,
+        flush: bool = True,
+    ) -> typing.Tuple[typing.Iterable[bytes], typing.Optional[typing.Dict[str, str]]]:
+        """
+        Compress given response body chunks if they must be.
+        :param size: whole body size, if known
+        :param flush: see compress_stream
+        :return: response body chunks and headers to send
+        """
+        compressor = self.get_compressor(accept_encoding, mimetype, headers, size)
+        if compressor is None:
+            return stream, self.get_uncompressed_headers(mimetype, headers)
+
+        return (
+            self.compress_stream(stream, compressor, flush=flush),
+            get_compressed_headers(headers, compressor.encoding),
+        )
@@ -0,0 +1,366 @@
+# coding: utf-8
+"""
+Framework agnostic evaluation of conditional (If-None-Match,
+If-Modified-Since) and Range (If-Range, single and multiple ranges) request
+headers against a HapicFile: see RFC 7232 and RFC 7233.
+"""
+from datetime import datetime
+from datetime import timezone
+from email.utils import formatdate
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+import os
+import typing
+import uuid
+
+from hapic.data import HapicFile
+
+# Size of chunks read from files
+FILE_CHUNK_SIZE = 256 * 1024
+# Above this count of (merged) ranges, Range header is ignored
+MAX_RANGES_COUNT = 100
+
+# Inclusive first and last byte positions
+TYPE_RANGE = typing.Tuple[int, int]
+
+
+def get_file_content_length(hapic_file: HapicFile) -> typing.Optional[int]:
+    """
+    :return: given content_length, else size of file from its current
+    position, or None if it can't be known without reading file
+    """
+    if hapic_file.content_length is not None:
+        return hapic_file.content_length
+    if hapic_file.file_path:
+        return os.path.getsize(hapic_file.file_path)
+
+    try:
+        if hapic_file.file_object.seekable():
+            position = hapic_file.file_object.tell()
+            size = hapic_file.file_object.seek(0, os.SEEK_END)
+            hapic_file.file_object.seek(position)
+            return size - position
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    try:
+        return os.fstat(hapic_file.file_object.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    return None
+
+
+def get_file_last_modified(hapic_file: HapicFile) -> typing.Optional[datetime]:
+    """
+    :return: given last_modified, else modification time of file path
+    """
+    if hapic_file.last_modified:
+        return hapic_file.last_modified
+    if hapic_file.file_path:
+        return datetime.fromtimestamp(os.path.getmtime(hapic_file.file_path), tz=timezone.utc)
+    return None
+
+
+def is_seekable(hapic_file: HapicFile) -> bool:
+    if hapic_file.file_path:
+        return True
+    try:
+        return bool(hapic_file.file_object.seekable())
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def get_timestamp(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def parse_http_date(value: typing.Optional[str]) -> typing.Optional[int]:
+    """
+    :return: timestamp of given HTTP date or None if invalid
+    """
+    if not value:
+        return None
+    try:
+        return get_timestamp(parsedate_to_datetime(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_etags(value: str) -> typing.List[str]:
+    return [etag.strip() for etag in value.split(",") if etag.strip()]
+
+
+def is_etag_matching(etag: str, etags: typing.List[str], weak: bool) -> bool:
+    """
+    :param etag: ETag header value of file
+    :param etags: request ETags
+    :param weak: if True, use weak comparison, else strong comparison
+    """
+    if "*" in etags:
+        return True
+    if not weak and etag.startswith("W/"):
+        return False
+
+    for request_etag in etags:
+        if request_etag.startswith("W/"):
+            if not weak:
+                continue
+            request_etag = request_etag[2:]
+        if request_etag == (etag[2:] if etag.startswith("W/") else etag):
+            return True
+
+    return False
+
+
+def parse_range_header(
+    value: typing.Optional[str], content_length: int
+) -> typing.Optional[typing.List[TYPE_RANGE]]:
+    """
+    Parse a Range header value.
+    :return: None if header is missing or invalid (must be ignored), else
+    list of satisfiable ranges, sorted and merged (can be empty)
+    """
+    unit, _, specs = (value or "").partition("=")
+    if unit.strip() != "bytes":
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        first, sep, last = spec.partition("-")
+        try:
+            if not sep:
+                return None
+            if not first:
+                suffix_length = int(last)
+                if suffix_length <= 0 or content_length <= 0:
+                    continue
+                ranges.append((max(0, content_length - suffix_length), content_length - 1))
+                continue
+
+            start = int(first)
+            end = int(last) if last else None
+        except ValueError:
+            return None
+
+        if start < 0 or (end is not None and end < start):
+            return None
+        if start < content_length:
+            last_position = content_length - 1
+            ranges.append((start, last_position if end is None else min(end, last_position)))
+
+    merged_ranges = []  # type: typing.List[TYPE_RANGE]
+    for start, end in sorted(ranges):
+        if merged_ranges and start <= merged_ranges[-1][1] + 1:
+            merged_ranges[-1] = (merged_ranges[-1][0], max(end, merged_ranges[-1][1]))
+        else:
+            merged_ranges.append((start, end))
+
+    if len(merged_ranges) > MAX_RANGES_COUNT:
+        return None
+    return merged_ranges
+
+
+class ConditionalFileResponse(object):
+    """
+    Response to send for a HapicFile, once conditional and Range request
+    headers are evaluated: http code, headers and which parts of file to
+    send. Build it with evaluate_file_request.
+    """
+
+    def __init__(
+        self,
+        hapic_file: HapicFile,
+        http_code: int,
+        headers: typing.Dict[str, str],
+        ranges: typing.Optional[typing.List[TYPE_RANGE]] = None,
+        content_length: typing.Optional[int] = None,
+        with_body: bool = True,
+    ) -> None:
+        """
+        :param hapic_file: file to send
+        :param http_code: http code of response
+        :param headers: headers of response
+        :param ranges: ranges of file to send, None to send whole file
+        :param content_length: length of whole file, if known
+        :param with_body: False if response has no body (304, 416)
+        """
+        self.hapic_file = hapic_file
+        self.http_code = int(http_code)
+        self.headers = headers
+        self.ranges = ranges
+        self.content_length = content_length
+        self.with_body = with_body
+        self._boundary = None  # type: typing.Optional[str]
+        if ranges is not None and len(ranges) > 1:
+            self._boundary = uuid.uuid4().hex
+            self.headers["Content-Type"] = "multipart/byteranges; boundary={}".format(
+                self._boundary
+            )
+            self.headers["Content-Length"] = str(
+                sum(len(header) + end - start + 1 + 2 for header, (start, end) in self._parts())
+                + len(self._get_closing_boundary())
+            )
+
+    @property
+    def is_whole_file(self) -> bool:
+        """
+        :return: True if whole file must be sent as response body
+        """
+        return self.with_body and self.ranges is None
+
+    def _parts(self) -> typing.Iterator[typing.Tuple[bytes, TYPE_RANGE]]:
+        content_type = self.hapic_file.get_mimetype()
+        for start, end in self.ranges:
+            part_header = (
+                "--{}\r\nContent-Type: {}\r\nContent-Range: bytes {}-{}/{}\r\n\r\n".format(
+                    self._boundary, content_type, start, end, self.content_length
+                )
+            )
+            yield part_header.encode("ascii"), (start, end)
+
+    def _get_closing_boundary(self) -> bytes:
+        return "--{}--\r\n".format(self._boundary).encode("ascii")
+
+    def _open(self) -> typing.Any:
+        if self.hapic_file.file_path:
+            return open(self.hapic_file.file_path, "rb")
+        return self.hapic_file.file_object
+
+    @staticmethod
+    def _iter_file(
+        file_object: typing.Any, length: typing.Optional[int], chunk_size: int
+    ) -> typing.Iterator[bytes]:
+        while length is None or length > 0:
+            chunk = file_object.read(chunk_size if length is None else min(chunk_size, length))
+            if not chunk:
+                return
+            if length is not None:
+                length -= len(chunk)
+            yield chunk
+
+    def iter_body(self, chunk_size: int = FILE_CHUNK_SIZE) -> typing.Iterator[bytes]:
+        """
+        Read response body chunk by chunk: only requested ranges are read.
+        Ranges are relative to file object position when reading starts.
+        File is closed at end.
+        """
+        if not self.with_body:
+            return
+
+        file_object = self._open()
+        try:
+            offset = 0 if self.ranges is None else file_object.tell()
+            if self.ranges is None:
+                yield from self._iter_file(file_object, None, chunk_size)
+            elif self._boundary is None:
+                start, end = self.ranges[0]
+                file_object.seek(offset + start)
+                yield from self._iter_file(file_object, end - start + 1, chunk_size)
+            else:
+                for part_header, (start, end) in self._parts():
+                    yield part_header
+                    file_object.seek(offset + start)
+                    yield from self._iter_file(file_object, end - start + 1, chunk_size)
+                    yield b"\r\n"
+                yield self._get_closing_boundary()
+        finally:
+            file_object.close()
+
+
+def evaluate_file_request(
+    hapic_file: HapicFile,
+    request_headers: typing.Mapping[str, str],
+    http_code: int = HTTPStatus.OK,
+) -> ConditionalFileResponse:
+    """
+    Evaluate conditional and Range request headers against given file.
+    File is not read: only its size and validators (etag, last_modified)
+    are used.
+    :param hapic_file: file to send
+    :param request_headers: request headers, case insensitive mapping
+    :param http_code: http code of response when whole file is sent
+    :return: ConditionalFileResponse with http code 304 (not modified),
+    206 (partial content), 416 (range not satisfiable) or given http_code
+    """
+    content_length = get_file_content_length(hapic_file)
+    last_modified = get_file_last_modified(hapic_file)
+    headers = hapic_file.get_headers()
+    headers["Content-Type"] = hapic_file.get_mimetype()
+    if content_length is not None:
+        headers["Content-Length"] = str(content_length)
+    if last_modified:
+        headers["Last-Modified"] = formatdate(get_timestamp(last_modified), usegmt=True)
+
+    accept_ranges = (
+        hapic_file.use_conditional_response
+        and content_length is not None
+        and is_seekable(hapic_file)
+    )
+    headers["Accept-Ranges"] = "bytes" if accept_ranges else "none"
+
+    if not hapic_file.use_conditional_response or http_code != HTTPStatus.OK:
+        return ConditionalFileResponse(hapic_file, http_code, headers, None, content_length)
+
+    etag = hapic_file.get_etag_header_value()
+    if_none_match = request_headers.get("If-None-Match")
+    if if_none_match is not None:
+        not_modified = etag is not None and is_etag_matching(
+            etag, parse_etags(if_none_match), weak=True
+        )
+    else:
+        if_modified_since = parse_http_date(request_headers.get("If-Modified-Since"))
+        not_modified = (
+            if_modified_since is not None
+            and last_modified is not None
+            and get_timestamp(last_modified) <= if_modified_since
+        )
+
+    if not_modified:
+        not_modified_headers = {
+            name: value for name, value in headers.items() if name in ("ETag", "Last-Modified")
+        }
+        return ConditionalFileResponse(
+            hapic_file, HTTPStatus.NOT_MODIFIED, not_modified_headers, with_body=False
+        )
+
+    if not accept_ranges:
+        return ConditionalFileResponse(hapic_file, http_code, headers, None, content_length)
+
+    # A Range with a not matching If-Range must be ignored: whole file is sent
+    if_range = request_headers.get("If-Range")
+    if if_range:
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            range_allowed = etag is not None and is_etag_matching(etag, [if_range], weak=False)
+        else:
+            range_allowed = last_modified is not None and get_timestamp(
+                last_modified
+            ) == parse_http_date(if_range)
+        if not range_allowed:
+            return ConditionalFileResponse(hapic_file, http_code, headers, None, content_length)
+
+    ranges = parse_range_header(request_headers.get("Range"), content_length)
+    if ranges is None:
+        return ConditionalFileResponse(hapic_file, http_code, headers, None, content_length)
+
+    if not ranges:
+        return ConditionalFileResponse(
+            hapic_file,
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+            {"Content-Range": "bytes */{}".format(content_length), "Content-Length": "0"},
+            with_body=False,
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = "bytes {}-{}/{}".format(start, end, content_length)
+        headers["Content-Length"] = str(end - start + 1)
+
+    return ConditionalFileResponse(
+        hapic_file, HTTPStatus.PARTIAL_CONTENT, headers, ranges, content_length
+    )
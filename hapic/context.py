@@ -1,16 +1,22 @@
 # -*- coding: utf-8 -*-
-import json
 import typing
 
+from hapic.compression import CompressionPolicy
+from hapic.compression import get_compressed_headers
+from hapic.conditional import ConditionalFileResponse
 from hapic.data import HapicFile
 from hapic.error.main import ErrorBuilderInterface
 from hapic.exception import ConfigurationException
 from hapic.exception import OutputValidationException
 from hapic.exception import ProcessException
 from hapic.exception import ValidationException
+from hapic.instrumentation import Instrumentation
+from hapic.json_backend import JsonBackend
+from hapic.json_backend import StdlibJsonBackend
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
+from hapic.util import LruCache
 
 try:  # Python 3.5+
     from http import HTTPStatus
@@ -19,8 +25,12 @@ except ImportError:
 
 
 if typing.TYPE_CHECKING:
+    from hapic.decorator import ControllerReference
     from hapic.decorator import DecoratedController
 
+# Maximum count of encoded static errors kept by contexts
+ENCODED_ERRORS_CACHE_SIZE = 256
+
 
 class RouteRepresentation(object):
     def __init__(self, rule: str, method: str, original_route_object: typing.Any = None) -> None:
@@ -29,6 +39,48 @@ class RouteRepresentation(object):
         self.original_route_object = original_route_object
 
 
+class RouteIndex(object):
+    """
+    Index of framework routes by their callback and by hapic decoration
+    token. Built once from framework routes, it permit to find routes of
+    decorated controllers without scanning all routes for each controller.
+    """
+
+    def __init__(self, routes: typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]) -> None:
+        """
+        :param routes: (callback, route) tuples in framework routes order.
+            route can be any object given back by find method.
+        """
+        # Import here to prevent circular import
+        from hapic.decorator import DECORATION_ATTRIBUTE_NAME
+
+        self._by_callback = {}  # type: typing.Dict[typing.Callable, typing.List[tuple]]
+        self._by_token = {}  # type: typing.Dict[str, typing.List[tuple]]
+
+        for position, (callback, route) in enumerate(routes):
+            indexed_route = (position, route)
+            token = getattr(callback, DECORATION_ATTRIBUTE_NAME, None)
+            if token is not None:
+                self._by_token.setdefault(token, []).append(indexed_route)
+
+            try:
+                self._by_callback.setdefault(callback, []).append(indexed_route)
+            except TypeError:
+                # Unhashable callback can only be found by token
+                pass
+
+    def find(self, reference: "ControllerReference") -> typing.List[typing.Any]:
+        """
+        :param reference: reference of decorated controller
+        :return: routes matching controller wrapper, wrapped function or
+            decoration token, in framework routes order
+        """
+        indexed_routes = dict(self._by_callback.get(reference.wrapper, []))
+        indexed_routes.update(self._by_callback.get(reference.wrapped, []))
+        indexed_routes.update(self._by_token.get(reference.token, []))
+        return [indexed_routes[position] for position in sorted(indexed_routes)]
+
+
 class ContextInterface(object):
     def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
         raise NotImplementedError()
@@ -46,15 +98,49 @@ class ContextInterface(object):
     def get_response(
         self,
         # TODO BS 20171228: rename into response_content
-        response: str,
+        response: typing.Union[str, bytes],
         http_code: int,
         mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
     ) -> typing.Any:
+        """
+        Build framework response
+        :param response: response content
+        :param http_code: response http code
+        :param mimetype: response content type
+        :param headers: additional response headers
+        :return: framework response
+        """
         raise NotImplementedError()
 
     def get_file_response(self, file_response: HapicFile, http_code: int) -> typing.Any:
         raise NotImplementedError()
 
+    def get_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        http_code: int,
+        mimetype: str = "text/plain; charset=utf-8",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> typing.Any:
+        """
+        Build framework streaming response: given stream is consumed by
+        the framework while response is sent.
+        :param stream: iterable of encoded response chunks
+        :param http_code: response http code
+        :param mimetype: response content type
+        :param headers: additional response headers
+        :return: framework response
+        """
+        raise NotImplementedError()
+
+    def get_stream_item_bytes(self, serialized_item: typing.Any) -> bytes:
+        """
+        :param serialized_item: dumped stream item
+        :return: item encoded as a JSON line
+        """
+        raise NotImplementedError()
+
     def get_validation_error_response(
         self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
     ) -> typing.Any:
@@ -63,6 +149,13 @@ class ContextInterface(object):
     def find_route(self, decorated_controller: "DecoratedController") -> RouteRepresentation:
         raise NotImplementedError()
 
+    def invalidate_route_index(self) -> None:
+        """
+        Drop routes index used by find_route, if any. Called before each
+        doc generation. Do nothing by default.
+        """
+        pass
+
     # TODO BS 20171228: rename into openapi !
     def get_swagger_path(self, contextualised_rule: str) -> str:
         """
@@ -101,6 +194,58 @@ class ContextInterface(object):
         """
         raise NotImplementedError()
 
+    @property
+    def json_backend(self) -> JsonBackend:
+        """
+        Return the JsonBackend used to encode JSON responses and decode
+        JSON request bodies
+        :return: JsonBackend instance
+        """
+        raise NotImplementedError()
+
+    @json_backend.setter
+    def json_backend(self, json_backend: JsonBackend) -> None:
+        """
+        Set the JsonBackend to use in this context
+        :param json_backend: JsonBackend instance
+        """
+        raise NotImplementedError()
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        Return the Instrumentation receiving request processing stages
+        durations
+        :return: Instrumentation instance
+        """
+        raise NotImplementedError()
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation: Instrumentation) -> None:
+        """
+        Set the Instrumentation to use in this context
+        :param instrumentation: Instrumentation instance
+        """
+        raise NotImplementedError()
+
+    @property
+    def compression_policy(self) -> typing.Optional[CompressionPolicy]:
+        """
+        Return the CompressionPolicy applied on responses
+        :return: CompressionPolicy instance or None if responses are not
+        compressed
+        """
+        raise NotImplementedError()
+
+    @compression_policy.setter
+    def compression_policy(self, compression_policy: typing.Optional[CompressionPolicy]) -> None:
+        """
+        Set the CompressionPolicy to use in this context
+        :param compression_policy: CompressionPolicy instance or None to not
+            compress responses
+        """
+        raise NotImplementedError()
+
     def add_view(
         self, route: str, http_method: str, view_func: typing.Callable[..., typing.Any]
     ) -> None:
@@ -201,11 +346,63 @@ class HandledException(object):
         self.http_code = http_code
 
 
+class HandledExceptionResolver(object):
+    """
+    Find the HandledException of a raised exception by its class MRO: the
+    handled exception of the most specific class is used (the last added
+    one for a same class). Resolutions are cached per exception class:
+    cache is filled for handled classes and their known subclasses when an
+    handled exception is added, and for other classes at first resolution.
+    """
+
+    def __init__(self) -> None:
+        self._handled_exceptions = {}  # type: typing.Dict[type, HandledException]
+        self._resolved = {}  # type: typing.Dict[type, typing.Optional[HandledException]]
+
+    def add(self, handled_exception: HandledException) -> None:
+        """
+        :param handled_exception: HandledException to use for its exception
+            class and subclasses
+        """
+        self._handled_exceptions[handled_exception.exception_class] = handled_exception
+        self._resolved = {}
+
+        for exception_class in list(self._handled_exceptions.keys()):
+            classes = [exception_class]
+            while classes:
+                current_class = classes.pop()
+                if current_class not in self._resolved:
+                    self.resolve(current_class)
+                    classes.extend(current_class.__subclasses__())
+
+    def resolve(
+        self, exception_class: typing.Type[BaseException]
+    ) -> typing.Optional[HandledException]:
+        """
+        :param exception_class: class of raised exception
+        :return: HandledException to use, None if exception is not handled
+        """
+        try:
+            return self._resolved[exception_class]
+        except KeyError:
+            pass
+
+        handled_exception = None
+        for parent_class in exception_class.__mro__:
+            handled_exception = self._handled_exceptions.get(parent_class)
+            if handled_exception is not None:
+                break
+
+        self._resolved[exception_class] = handled_exception
+        return handled_exception
+
+
 class BaseContext(ContextInterface):
     def __init__(
         self,
         processor_class: typing.Optional[typing.Type[Processor]] = None,
         default_error_builder: ErrorBuilderInterface = None,
+        json_backend: typing.Optional[JsonBackend] = None,
     ) -> None:
         """
         Set processor_class of the context. It will be used to validate
@@ -214,9 +411,18 @@ class BaseContext(ContextInterface):
         `hapic.context.BaseContext#set_processor_class` in
         `hapic.hapic.Hapic#set_context`.
         :param processor_class: Processor class
+        :param json_backend: JsonBackend to use, python json module based
+            backend if not given
         """
         self._processor_class = processor_class
         self._default_error_builder = default_error_builder
+        self._json_backend = json_backend or StdlibJsonBackend()
+        self._instrumentation = Instrumentation()
+        self._compression_policy = None  # type: typing.Optional[CompressionPolicy]
+        self._error_processors = {}  # type: typing.Dict[ErrorBuilderInterface, Processor]
+        self._encoded_errors = LruCache(ENCODED_ERRORS_CACHE_SIZE)
+        self._route_index = None  # type: typing.Optional[RouteIndex]
+        self._handled_exception_resolver = HandledExceptionResolver()
 
     @property
     def default_error_builder(self) -> ErrorBuilderInterface:
@@ -232,6 +438,38 @@ class BaseContext(ContextInterface):
         see hapic.context.ContextInterface#set_default_error_builder
         """
         self._default_error_builder = error_builder
+        self._encoded_errors.clear()
+
+    @property
+    def json_backend(self) -> JsonBackend:
+        """ see hapic.context.ContextInterface#json_backend"""
+        return self._json_backend
+
+    @json_backend.setter
+    def json_backend(self, json_backend: JsonBackend) -> None:
+        """ see hapic.context.ContextInterface#json_backend"""
+        self._json_backend = json_backend
+        self._encoded_errors.clear()
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """ see hapic.context.ContextInterface#instrumentation"""
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation: Instrumentation) -> None:
+        """ see hapic.context.ContextInterface#instrumentation"""
+        self._instrumentation = instrumentation
+
+    @property
+    def compression_policy(self) -> typing.Optional[CompressionPolicy]:
+        """ see hapic.context.ContextInterface#compression_policy"""
+        return self._compression_policy
+
+    @compression_policy.setter
+    def compression_policy(self, compression_policy: typing.Optional[CompressionPolicy]) -> None:
+        """ see hapic.context.ContextInterface#compression_policy"""
+        self._compression_policy = compression_policy
 
     def set_processor_class(self, processor_class: typing.Type[Processor]) -> None:
         """
@@ -240,15 +478,129 @@ class BaseContext(ContextInterface):
         :param processor_class: Processor subclass
         """
         self._processor_class = processor_class
+        self._error_processors.clear()
+        self._encoded_errors.clear()
 
     def handle_exception(self, exception_class: typing.Type[Exception], http_code: int) -> None:
         self._add_exception_class_to_catch(exception_class, http_code)
+        self._handled_exception_resolver.add(HandledException(exception_class, http_code))
+
+    def get_stream_item_bytes(self, serialized_item: typing.Any) -> bytes:
+        # FIXME BS 2018-07-25: need \n :/
+        return self.json_backend.dumps(serialized_item) + b"\n"
+
+    def _get_accept_encoding(self) -> typing.Optional[str]:
+        """
+        :return: Accept-Encoding header of current request, None if there
+        is no current request or if context can't know it
+        """
+        return None
+
+    def _compress_response(
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: typing.Optional[str],
+        headers: typing.Optional[typing.Dict[str, str]],
+    ) -> typing.Tuple[typing.Union[str, bytes], typing.Optional[typing.Dict[str, str]]]:
+        """
+        Compress given response body as defined by compression_policy.
+        :return: response body and headers to send
+        """
+        if self._compression_policy is None or http_code in (
+            HTTPStatus.NO_CONTENT,
+            HTTPStatus.NOT_MODIFIED,
+        ):
+            return response, headers
+
+        return self._compression_policy.compress_response(
+            response, mimetype, headers, self._get_accept_encoding()
+        )
+
+    def _compress_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        mimetype: typing.Optional[str],
+        headers: typing.Optional[typing.Dict[str, str]],
+    ) -> typing.Tuple[typing.Iterable[bytes], typing.Optional[typing.Dict[str, str]]]:
+        """
+        Compress given response body chunks as defined by
+        compression_policy. Each chunk is flushed.
+        :return: response body chunks and headers to send
+        """
+        if self._compression_policy is None:
+            return stream, headers
+
+        return self._compression_policy.compress_stream_response(
+            stream, mimetype, headers, self._get_accept_encoding()
+        )
+
+    def _compress_file_response(
+        self, conditional_response: ConditionalFileResponse
+    ) -> typing.Optional[typing.Iterable[bytes]]:
+        """
+        Compress body of given file response as defined by
+        compression_policy. Only whole files are compressed. Response
+        headers are updated if body is compressed.
+        :return: compressed body chunks, or None if file must be sent as is
+        """
+        if self._compression_policy is None:
+            return None
+
+        headers = conditional_response.headers
+        mimetype = headers.get("Content-Type")
+        compressor = None
+        if conditional_response.is_whole_file:
+            compressor = self._compression_policy.get_compressor(
+                self._get_accept_encoding(),
+                mimetype,
+                headers,
+                conditional_response.content_length,
+            )
+        if compressor is None:
+            conditional_response.headers = self._compression_policy.get_uncompressed_headers(
+                mimetype, headers
+            )
+            return None
+
+        conditional_response.headers = get_compressed_headers(headers, compressor.encoding)
+        return self._compression_policy.compress_stream(
+            conditional_response.iter_body(), compressor, flush=False
+        )
+
+    def invalidate_route_index(self) -> None:
+        """
+        Drop routes index. It will be built again at next routes search.
+        Doc generation call it, else it must be called when framework routes
+        are changed.
+        """
+        self._route_index = None
+
+    def _find_routes(self, decorated_controller: "DecoratedController") -> typing.List[typing.Any]:
+        """
+        Return framework routes of given decorated controller by using
+        routes index, built at first search after an invalidate_route_index
+        call. Controllers without route are not searched again until next
+        invalidation.
+        :param decorated_controller: decorated controller to search
+        :return: routes produced by _get_routes, in framework routes order
+        """
+        if self._route_index is None:
+            self._route_index = RouteIndex(self._get_routes())
+        return self._route_index.find(decorated_controller.reference)
+
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        """
+        Must return (callback, route) tuples for all framework routes. route
+        is the object given to find_route by _find_routes.
+        """
+        raise NotImplementedError()
 
     def handle_exceptions(
         self, exception_classes: typing.List[typing.Type[Exception]], http_code: int
     ) -> None:
         for exception_class in exception_classes:
-            self._add_exception_class_to_catch(exception_class, http_code)
+            self.handle_exception(exception_class, http_code)
 
     def _get_dumped_error_from_exception_error(self, exception: Exception) -> typing.Any:
         """
@@ -262,7 +614,7 @@ class BaseContext(ContextInterface):
         error_body = error_builder.build_from_exception(
             exception, include_traceback=self.is_debug()
         )
-        processor = self._processor_class(error_builder.get_schema())
+        processor = self._get_error_processor(error_builder)
 
         try:
             return processor.dump(error_body)
@@ -281,7 +633,7 @@ class BaseContext(ContextInterface):
         """
         error_builder = self.default_error_builder
         error_content = error_builder.build_from_validation_error(error)
-        processor = self._processor_class(error_builder.get_schema())
+        processor = self._get_error_processor(error_builder)
 
         try:
             return processor.dump(error_content)
@@ -290,6 +642,46 @@ class BaseContext(ContextInterface):
                 "Validation error of error response: {}".format(str(exc))
             ) from exc
 
+    def _get_encoded_error_from_exception_error(self, exception: Exception) -> bytes:
+        """
+        Build JSON encoded error from given exception. Encoded errors which
+        only depend on exception type and message are cached.
+        Raise OutputValidationException if error built from error_builder is
+        not valid.
+        :param exception: exception to use to build error
+        :return: JSON encoded error
+        """
+        static_error_key = self.default_error_builder.get_static_error_key(
+            exception, include_traceback=self.is_debug()
+        )
+        if static_error_key is not None:
+            encoded_error = self._encoded_errors.get(static_error_key)
+            if encoded_error is not None:
+                return encoded_error
+
+        dumped_error = self._get_dumped_error_from_exception_error(exception)
+        encoded_error = self.json_backend.dumps(dumped_error)
+
+        if static_error_key is not None:
+            self._encoded_errors.set(static_error_key, encoded_error)
+
+        return encoded_error
+
+    def _get_error_processor(self, error_builder: ErrorBuilderInterface) -> Processor:
+        """
+        Return processor able to dump errors built by given error builder.
+        Processors are built once per error builder: schema returned by
+        error builder must not change.
+        :param error_builder: error builder who will build dumped errors
+        :return: Processor instance
+        """
+        try:
+            return self._error_processors[error_builder]
+        except KeyError:
+            processor = self._processor_class(error_builder.get_schema())
+            self._error_processors[error_builder] = processor
+            return processor
+
     def handle_exceptions_decorator_builder(
         self, func: typing.Callable[..., typing.Any]
     ) -> typing.Callable[..., typing.Any]:
@@ -305,18 +697,16 @@ class BaseContext(ContextInterface):
             try:
                 return func(*args, **kwargs)
             except Exception as exc:
-                # Reverse list to read first user given exception before
-                # the hapic default Exception catch
-                handled_exceptions = reversed(self._get_handled_exception_class_and_http_codes())
-                # TODO BS 2018-05-04: How to be attentive to hierarchy ?
-                for handled_exception in handled_exceptions:
-                    if isinstance(exc, handled_exception.exception_class):
-                        self.global_exception_caught(exc, *args, **kwargs)
-                        dumped_error = self._get_dumped_error_from_exception_error(exc)
-                        return self.get_response(
-                            json.dumps(dumped_error), handled_exception.http_code
-                        )
-                raise exc
+                # Most specific handled exception class is used
+                handled_exception = self._handled_exception_resolver.resolve(type(exc))
+                if handled_exception is None:
+                    raise exc
+
+                self.global_exception_caught(exc, *args, **kwargs)
+                return self.get_response(
+                    self._get_encoded_error_from_exception_error(exc),
+                    handled_exception.http_code,
+                )
 
         return decorator
 
@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
+import calendar
 from datetime import datetime
+from email.utils import formatdate
+import mimetypes
 import typing
 import urllib.parse
 
+if typing.TYPE_CHECKING:
+    from hapic.processor.main import RequestParameters  # noqa: F401
+
 
 class HapicData(object):
     def __init__(self):
@@ -12,6 +18,9 @@ class HapicData(object):
         self.headers = {}
         self.forms = {}
         self.files = {}
+        # Request parameters built by context once per request and shared by
+        # all input decorators of the view
+        self.request_parameters = None  # type: typing.Optional[RequestParameters]
 
 
 class HapicFile(object):
@@ -72,3 +81,49 @@ class HapicFile(object):
                 disposition, ascii_filename, urlencoded_unicode_filename
             )
         return disposition
+
+    def get_mimetype(self) -> str:
+        """
+        :return: given mimetype or mimetype guessed from file path
+        """
+        if self.mimetype:
+            return self.mimetype
+        if self.file_path:
+            return mimetypes.guess_type(self.file_path)[0] or "application/octet-stream"
+        return "application/octet-stream"
+
+    def get_etag_header_value(self) -> typing.Optional[str]:
+        """
+        :return: etag as an ETag header value (quoted) or None if no etag
+        """
+        if not self.etag:
+            return None
+        if self.etag.startswith('"') or self.etag.startswith('W/"'):
+            return self.etag
+        return '"{}"'.format(self.etag)
+
+    def get_last_modified_header_value(self) -> typing.Optional[str]:
+        """
+        :return: last_modified as a HTTP date (naive datetime is considered
+        as UTC) or None if no last_modified
+        """
+        if not self.last_modified:
+            return None
+        timestamp = calendar.timegm(self.last_modified.utctimetuple())
+        return formatdate(timestamp, usegmt=True)
+
+    def get_headers(self) -> typing.Dict[str, str]:
+        """
+        :return: response headers describing the file: Content-Disposition
+        and, if given, Content-Length, Last-Modified and ETag
+        """
+        headers = {"Content-Disposition": self.get_content_disposition_header_value()}
+        if self.content_length is not None:
+            headers["Content-Length"] = str(self.content_length)
+        last_modified = self.get_last_modified_header_value()
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        etag = self.get_etag_header_value()
+        if etag:
+            headers["ETag"] = etag
+        return headers
@@ -1,24 +1,42 @@
 # -*- coding: utf-8 -*-
 import functools
-import json
+import inspect
 import logging
+import time
 import traceback
 import typing
 
 from multidict import MultiDict
 
+from hapic.context import ENCODED_ERRORS_CACHE_SIZE
 from hapic.context import ContextInterface
 from hapic.data import HapicData
 from hapic.description import ControllerDescription
 from hapic.error.main import ErrorBuilderInterface
 from hapic.exception import OutputValidationException
 from hapic.exception import ProcessException
+from hapic.exception import UploadTooLargeException
 from hapic.exception import ValidationException
+from hapic.instrumentation import STAGE_DUMP
+from hapic.instrumentation import STAGE_ENCODE
+from hapic.instrumentation import STAGE_LOAD
+from hapic.instrumentation import STAGE_REQUEST_PARAMETERS
+from hapic.instrumentation import STAGE_RESPONSE
+from hapic.instrumentation import STAGE_VIEW
+from hapic.instrumentation import Instrumentation
+from hapic.json_backend import JsonBackend
+from hapic.processor.main import OffloadPolicy
 from hapic.processor.main import Processor
+from hapic.processor.main import ProcessLoadResult
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
+from hapic.stream import StreamBatchPolicy
+from hapic.stream import StreamBatcher
 from hapic.type import TYPE_SCHEMA
+from hapic.upload import UploadPolicy
+from hapic.upload import get_file_size
 from hapic.util import LOGGER_NAME
+from hapic.util import LruCache
 
 try:  # Python 3.5+
     from http import HTTPStatus
@@ -29,6 +47,14 @@ except ImportError:
 # TODO: Ensure usage of DECORATION_ATTRIBUTE_NAME is documented and
 # var names correctly choose.  see #6
 DECORATION_ATTRIBUTE_NAME = "_hapic_decoration_token"
+# Attribute set on functions returned by ControllerWrapper.get_wrapper. It
+# references the ControllerWrapper who produced the function and permit to
+# fuse decorators chain (see ControllerPipeline).
+CONTROLLER_WRAPPER_ATTRIBUTE_NAME = "_hapic_controller_wrapper"
+# Attribute set on functions returned by input files wrappers. It references
+# their UploadPolicy, so outer input wrappers (who may read request body
+# first) give it to request parameters.
+UPLOAD_POLICY_ATTRIBUTE_NAME = "_hapic_upload_policy"
 
 
 class ControllerReference(object):
@@ -61,6 +87,22 @@ class ControllerReference(object):
         return ""
 
 
+def dump_and_encode(
+    processor: Processor, json_backend: JsonBackend, data: typing.Any
+) -> typing.Tuple[bytes, float, float]:
+    """
+    Dump given data with processor and encode it with json backend. This
+    function is run by executors of OffloadPolicy, so its arguments must be
+    picklable.
+    :return: encoded data, dump duration and encoding duration
+    """
+    started_at = time.perf_counter()
+    dumped_data = processor.dump(data)
+    dumped_at = time.perf_counter()
+    encoded_data = json_backend.dumps(dumped_data)
+    return encoded_data, dumped_at - started_at, time.perf_counter() - dumped_at
+
+
 class ControllerWrapper(object):
     def __init__(
         self,
@@ -80,6 +122,7 @@ class ControllerWrapper(object):
         self._context = context
         self._processor_factory = processor_factory
         self._processor = None  # type: Processor
+        self._controller_name = ""
         self.error_http_code = error_http_code
         self.default_http_code = default_http_code
 
@@ -106,6 +149,16 @@ class ControllerWrapper(object):
 
         return self._processor
 
+    def warm_up(self) -> Processor:
+        """
+        Build wrapper processor and its internal objects now instead of at
+        first request.
+        :return: the warmed up processor
+        """
+        processor = self.processor
+        processor.warm_up()
+        return processor
+
     def before_wrapped_func(
         self, func_args: typing.Tuple[typing.Any, ...], func_kwargs: typing.Dict[str, typing.Any]
     ) -> typing.Union[None, typing.Any]:
@@ -115,6 +168,8 @@ class ControllerWrapper(object):
         return response
 
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_observed_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -123,21 +178,112 @@ class ControllerWrapper(object):
             if replacement_response is not None:
                 return replacement_response
 
-            response = self._execute_wrapped_function(func, args, kwargs)
+            response = self._execute_wrapped_function(view, args, kwargs)
             new_response = self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
+
+    def _update_wrapper(
+        self, wrapper: typing.Callable[..., typing.Any], func: typing.Callable[..., typing.Any]
+    ) -> typing.Callable[..., typing.Any]:
+        """
+        Update given wrapper to look like wrapped function and mark it as
+        produced by this ControllerWrapper.
+        :param wrapper: the wrapper function produced by get_wrapper
+        :param func: the wrapped function
+        :return: the updated wrapper
+        """
+        wrapper = functools.update_wrapper(wrapper, func)
+        setattr(wrapper, CONTROLLER_WRAPPER_ATTRIBUTE_NAME, self)
+        self._controller_name = getattr(func, "__qualname__", "")
+        return wrapper
 
     def _execute_wrapped_function(self, func, func_args, func_kwargs) -> typing.Any:
         return func(*func_args, **func_kwargs)
 
+    @staticmethod
+    def _is_view(func: typing.Callable[..., typing.Any]) -> bool:
+        """
+        :return: True if given wrapped function is the view itself and not
+            the wrapper of another ControllerWrapper
+        """
+        return getattr(func, CONTROLLER_WRAPPER_ATTRIBUTE_NAME, None) is None
+
+    def _get_observed_view(
+        self, func: typing.Callable[..., typing.Any]
+    ) -> typing.Callable[..., typing.Any]:
+        """
+        Return given wrapped function, timed as view stage if it is the view.
+        This is how view stage is observed when decorators are nested instead
+        of fused in a ControllerPipeline (eg. with a foreign decorator).
+        """
+        if not self._is_view(func):
+            return func
+
+        def view(*args, **kwargs) -> typing.Any:
+            instrumentation = self.context.instrumentation
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+
+            started_at = time.perf_counter()
+            response = func(*args, **kwargs)
+            self._observe_view(instrumentation, func, time.perf_counter() - started_at)
+            return response
+
+        return view
+
+    def _get_async_observed_view(
+        self, func: typing.Callable[..., typing.Any]
+    ) -> typing.Callable[..., typing.Any]:
+        """
+        Async version of _get_observed_view
+        """
+        if not self._is_view(func):
+            return func
+
+        async def view(*args, **kwargs) -> typing.Any:
+            instrumentation = self.context.instrumentation
+            if not instrumentation.enabled:
+                return await func(*args, **kwargs)
+
+            started_at = time.perf_counter()
+            response = await func(*args, **kwargs)
+            self._observe_view(instrumentation, func, time.perf_counter() - started_at)
+            return response
+
+        return view
+
+    def _observe_view(
+        self,
+        instrumentation: Instrumentation,
+        func: typing.Callable[..., typing.Any],
+        duration: float,
+    ) -> None:
+        instrumentation.observe_stage(STAGE_VIEW, duration, getattr(func, "__qualname__", ""), None)
+
+    def _observe_stage(
+        self,
+        instrumentation: Instrumentation,
+        stage: str,
+        duration: float,
+        payload_size: typing.Optional[int] = None,
+    ) -> None:
+        instrumentation.observe_stage(
+            stage, duration, self._controller_name, type(self).__name__, payload_size
+        )
+
 
 class InputOutputControllerWrapper(ControllerWrapper):
     pass
 
 
 class InputControllerWrapper(InputOutputControllerWrapper):
+    # UploadPolicy of input files wrappers
+    upload_policy = None  # type: typing.Optional[UploadPolicy]
+    # UploadPolicy of endpoint input files, set when decorating
+    _request_upload_policy = None  # type: typing.Optional[UploadPolicy]
+
     def before_wrapped_func(
         self, func_args: typing.Tuple[typing.Any, ...], func_kwargs: typing.Dict[str, typing.Any]
     ) -> typing.Any:
@@ -148,12 +294,15 @@ class InputControllerWrapper(InputOutputControllerWrapper):
         request_parameters = self.get_request_parameters(func_args, func_kwargs)
 
         try:
-            processed_data = self.get_processed_data(request_parameters)
-            self.update_hapic_data(hapic_data, processed_data)
-        except ProcessException as exc:
-            self.context.input_validation_error_caught(request_parameters, exc)
-            error_response = self.get_error_response(request_parameters)
-            return error_response
+            load_result = self.get_load_result(request_parameters)
+        except UploadTooLargeException as exc:
+            return self.get_upload_too_large_response(request_parameters, exc)
+        if load_result.valid:
+            self.update_hapic_data(hapic_data, load_result.data)
+            return None
+
+        self.context.input_validation_error_caught(request_parameters, load_result.exception)
+        return self.get_validation_error_response(load_result.error)
 
     @classmethod
     def ensure_hapic_data(cls, func_kwargs: typing.Dict[str, typing.Any]) -> HapicData:
@@ -168,12 +317,67 @@ class InputControllerWrapper(InputOutputControllerWrapper):
     def get_request_parameters(
         self, func_args: typing.Tuple[typing.Any, ...], func_kwargs: typing.Dict[str, typing.Any]
     ) -> RequestParameters:
-        return self.context.get_request_parameters(*func_args, **func_kwargs)
+        # Request parameters are built once per request then shared by all
+        # input wrappers through hapic_data
+        hapic_data = self.ensure_hapic_data(func_kwargs)
+        if hapic_data.request_parameters is None:
+            hapic_data.request_parameters = self.context.get_request_parameters(
+                *func_args, **func_kwargs
+            )
+            if self._request_upload_policy is not None:
+                hapic_data.request_parameters.upload_policy = self._request_upload_policy
+
+        return hapic_data.request_parameters
+
+    def _update_wrapper(
+        self, wrapper: typing.Callable[..., typing.Any], func: typing.Callable[..., typing.Any]
+    ) -> typing.Callable[..., typing.Any]:
+        # Inner decorators are applied first: given function carry UploadPolicy
+        # of an inner input files decorator (functools.update_wrapper copy
+        # it to produced wrapper)
+        self._request_upload_policy = getattr(func, UPLOAD_POLICY_ATTRIBUTE_NAME, None)
+        wrapper = super()._update_wrapper(wrapper, func)
+        if self.upload_policy is not None:
+            self._request_upload_policy = self.upload_policy
+            setattr(wrapper, UPLOAD_POLICY_ATTRIBUTE_NAME, self.upload_policy)
+        return wrapper
 
     def get_processed_data(self, request_parameters: RequestParameters) -> typing.Any:
+        """
+        Former override point of input loading, kept for compatibility:
+        when overridden, get_load_result use it.
+        :raise ProcessException: if input data is not valid
+        """
+        load_result = self._get_load_result(request_parameters)
+        if not load_result.valid:
+            raise load_result.exception
+        return load_result.data
+
+    def get_load_result(self, request_parameters: RequestParameters) -> ProcessLoadResult:
+        if type(self).get_processed_data is not InputControllerWrapper.get_processed_data:
+            try:
+                return ProcessLoadResult(data=self.get_processed_data(request_parameters))
+            except ProcessException as exc:
+                parameters_data = self.get_parameters_data(request_parameters)
+                return ProcessLoadResult(
+                    error=self._get_processor_error(parameters_data), exception=exc
+                )
+
+        return self._get_load_result(request_parameters)
+
+    def _get_load_result(self, request_parameters: RequestParameters) -> ProcessLoadResult:
+        instrumentation = self.context.instrumentation
+        if not instrumentation.enabled:
+            parameters_data = self.get_parameters_data(request_parameters)
+            return self._load_with_result(parameters_data)
+
+        started_at = time.perf_counter()
         parameters_data = self.get_parameters_data(request_parameters)
-        processed_data = self.processor.load(parameters_data)
-        return processed_data
+        loaded_at = time.perf_counter()
+        load_result = self._load_with_result(parameters_data)
+        self._observe_stage(instrumentation, STAGE_REQUEST_PARAMETERS, loaded_at - started_at)
+        self._observe_stage(instrumentation, STAGE_LOAD, time.perf_counter() - loaded_at)
+        return load_result
 
     def get_parameters_data(self, request_parameters: RequestParameters) -> dict:
         raise NotImplementedError()
@@ -186,20 +390,38 @@ class InputControllerWrapper(InputOutputControllerWrapper):
     def get_error_response(self, request_parameters: RequestParameters) -> typing.Any:
         parameters_data = self.get_parameters_data(request_parameters)
         error = self._get_processor_error(parameters_data)
-        error_response = self.context.get_validation_error_response(
-            error, http_code=self.error_http_code
+        return self.get_validation_error_response(error)
+
+    def get_validation_error_response(self, error: ProcessValidationError) -> typing.Any:
+        return self.context.get_validation_error_response(error, http_code=self.error_http_code)
+
+    def get_upload_too_large_response(
+        self, request_parameters: RequestParameters, exc: UploadTooLargeException
+    ) -> typing.Any:
+        """
+        Return 413 error response. Limits of endpoint UploadPolicy can be
+        exceeded while any input wrapper read request body.
+        """
+        self.context.input_validation_error_caught(request_parameters, exc)
+        return self.context.get_validation_error_response(
+            ProcessValidationError(str(exc), {}, original_exception=exc),
+            http_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
         )
-        return error_response
 
     def _get_processor_error(self, parameters_data: typing.Any) -> ProcessValidationError:
         return self.processor.get_input_validation_error(parameters_data)
 
+    def _load_with_result(self, parameters_data: typing.Any) -> ProcessLoadResult:
+        return self.processor.load_with_result(parameters_data)
+
 
 # TODO BS 2018-07-23: This class is an async version of InputControllerWrapper
 # (and ControllerWrapper.get_wrapper rewrite) to permit async compatibility.
 # Please re-think about code refact. TAG: REFACT_ASYNC
 class AsyncInputControllerWrapper(InputControllerWrapper):
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_async_observed_view(func)
+
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
             # by reference here
@@ -207,11 +429,11 @@ class AsyncInputControllerWrapper(InputControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            response = await self._execute_wrapped_function(func, args, kwargs)
+            response = await self._execute_wrapped_function(view, args, kwargs)
             new_response = self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
 
     async def before_wrapped_func(
         self, func_args: typing.Tuple[typing.Any, ...], func_kwargs: typing.Dict[str, typing.Any]
@@ -223,17 +445,53 @@ class AsyncInputControllerWrapper(InputControllerWrapper):
         request_parameters = self.get_request_parameters(func_args, func_kwargs)
 
         try:
-            processed_data = await self.get_processed_data(request_parameters)
-            self.update_hapic_data(hapic_data, processed_data)
-        except ProcessException as exc:
-            self.context.input_validation_error_caught(request_parameters, exc)
-            error_response = await self.get_error_response(request_parameters)
-            return error_response
+            load_result = await self.get_load_result(request_parameters)
+        except UploadTooLargeException as exc:
+            return self.get_upload_too_large_response(request_parameters, exc)
+        if load_result.valid:
+            self.update_hapic_data(hapic_data, load_result.data)
+            return None
+
+        self.context.input_validation_error_caught(request_parameters, load_result.exception)
+        return self.get_validation_error_response(load_result.error)
 
     async def get_processed_data(self, request_parameters: RequestParameters) -> typing.Any:
+        """see InputControllerWrapper#get_processed_data"""
+        load_result = await self._get_load_result(request_parameters)
+        if not load_result.valid:
+            raise load_result.exception
+        return load_result.data
+
+    async def get_load_result(self, request_parameters: RequestParameters) -> ProcessLoadResult:
+        if type(self).get_processed_data is not AsyncInputControllerWrapper.get_processed_data:
+            try:
+                return ProcessLoadResult(data=await self.get_processed_data(request_parameters))
+            except ProcessException as exc:
+                parameters_data = await self.get_parameters_data(request_parameters)
+                return ProcessLoadResult(
+                    error=self._get_processor_error(parameters_data), exception=exc
+                )
+
+        return await self._get_load_result(request_parameters)
+
+    async def _get_load_result(self, request_parameters: RequestParameters) -> ProcessLoadResult:
+        instrumentation = self.context.instrumentation
+        if not instrumentation.enabled:
+            parameters_data = await self.get_parameters_data(request_parameters)
+            return await self._load_with_result_async(request_parameters, parameters_data)
+
+        started_at = time.perf_counter()
         parameters_data = await self.get_parameters_data(request_parameters)
-        processed_data = self.processor.load(parameters_data)
-        return processed_data
+        loaded_at = time.perf_counter()
+        load_result = await self._load_with_result_async(request_parameters, parameters_data)
+        self._observe_stage(instrumentation, STAGE_REQUEST_PARAMETERS, loaded_at - started_at)
+        self._observe_stage(instrumentation, STAGE_LOAD, time.perf_counter() - loaded_at)
+        return load_result
+
+    async def _load_with_result_async(
+        self, request_parameters: RequestParameters, parameters_data: typing.Any
+    ) -> ProcessLoadResult:
+        return self._load_with_result(parameters_data)
 
 
 class OutputControllerWrapper(InputOutputControllerWrapper):
@@ -258,9 +516,13 @@ class OutputControllerWrapper(InputOutputControllerWrapper):
             if self.context.by_pass_output_wrapping(response):
                 return response
 
+            instrumentation = self.context.instrumentation
+            if instrumentation.enabled:
+                return self._get_measured_response(instrumentation, response)
+
             processed_response = self.processor.dump(response)
             prepared_response = self.context.get_response(
-                json.dumps(processed_response), self.default_http_code
+                self.context.json_backend.dumps(processed_response), self.default_http_code
             )
             return prepared_response
         except ProcessException as exc:
@@ -270,6 +532,29 @@ class OutputControllerWrapper(InputOutputControllerWrapper):
             error_response = self.get_error_response(response)
             return error_response
 
+    def _get_measured_response(
+        self, instrumentation: Instrumentation, response: typing.Any
+    ) -> typing.Any:
+        """
+        Same as after_wrapped_function nominal case, but observe dump,
+        encode and response stages with given instrumentation.
+        """
+        started_at = time.perf_counter()
+        processed_response = self.processor.dump(response)
+        dumped_at = time.perf_counter()
+        encoded_response = self.context.json_backend.dumps(processed_response)
+        encoded_at = time.perf_counter()
+        prepared_response = self.context.get_response(encoded_response, self.default_http_code)
+        responded_at = time.perf_counter()
+
+        payload_size = len(encoded_response)
+        self._observe_stage(instrumentation, STAGE_DUMP, dumped_at - started_at)
+        self._observe_stage(instrumentation, STAGE_ENCODE, encoded_at - dumped_at, payload_size)
+        self._observe_stage(
+            instrumentation, STAGE_RESPONSE, responded_at - encoded_at, payload_size
+        )
+        return prepared_response
+
 
 class DecoratedController(object):
     def __init__(
@@ -301,7 +586,25 @@ class OutputBodyControllerWrapper(OutputControllerWrapper):
 # to permit async compatibility.
 # Please re-think about code refact. TAG: REFACT_ASYNC
 class AsyncOutputBodyControllerWrapper(OutputControllerWrapper):
+    def __init__(
+        self,
+        context: typing.Union[ContextInterface, typing.Callable[[], ContextInterface]],
+        processor_factory: typing.Callable[[typing.Optional[TYPE_SCHEMA]], Processor],
+        error_http_code: HTTPStatus = HTTPStatus.INTERNAL_SERVER_ERROR,
+        default_http_code: HTTPStatus = HTTPStatus.OK,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
+    ) -> None:
+        """
+        :param offload_policy: OffloadPolicy defining when response must be
+            dumped and encoded in an executor. If not given, response is
+            always dumped in event loop.
+        """
+        super().__init__(context, processor_factory, error_http_code, default_http_code)
+        self.offload_policy = offload_policy
+
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_async_observed_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -310,11 +613,91 @@ class AsyncOutputBodyControllerWrapper(OutputControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            response = await self._execute_wrapped_function(func, args, kwargs)
-            new_response = self.after_wrapped_function(response)
+            response = await self._execute_wrapped_function(view, args, kwargs)
+            new_response = await self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
+
+    async def after_wrapped_function(self, response: typing.Any) -> typing.Any:
+        if (
+            self.offload_policy is None
+            or not self.offload_policy.must_offload_data(response)
+            or self.context.by_pass_output_wrapping(response)
+        ):
+            return super().after_wrapped_function(response)
+
+        try:
+            # Context can't be given to executor (it may be a process pool):
+            # only dump and encoding are offloaded, response is built here
+            encoded_response, dump_duration, encode_duration = await self.offload_policy.run(
+                dump_and_encode, self.processor, self.context.json_backend, response
+            )
+        except ProcessException as exc:
+            self.context.output_validation_error_caught(response, exc)
+            return self.get_error_response(response)
+
+        instrumentation = self.context.instrumentation
+        if not instrumentation.enabled:
+            return self.context.get_response(encoded_response, self.default_http_code)
+
+        started_at = time.perf_counter()
+        prepared_response = self.context.get_response(encoded_response, self.default_http_code)
+        payload_size = len(encoded_response)
+        self._observe_stage(instrumentation, STAGE_DUMP, dump_duration)
+        self._observe_stage(instrumentation, STAGE_ENCODE, encode_duration, payload_size)
+        self._observe_stage(
+            instrumentation, STAGE_RESPONSE, time.perf_counter() - started_at, payload_size
+        )
+        return prepared_response
+
+
+class OutputStreamControllerWrapper(OutputControllerWrapper):
+    """
+    This controller wrapper produce a wrapper who return a streaming response
+    from the http view items iterable (typically a generator): items are
+    checked, serialized and encoded one by one while response is sent.
+    """
+
+    def __init__(
+        self,
+        context: typing.Union[ContextInterface, typing.Callable[[], ContextInterface]],
+        processor_factory: typing.Callable[[typing.Optional[TYPE_SCHEMA]], Processor],
+        error_http_code: HTTPStatus = HTTPStatus.INTERNAL_SERVER_ERROR,
+        default_http_code: HTTPStatus = HTTPStatus.OK,
+        ignore_on_error: bool = True,
+    ) -> None:
+        """
+        :param ignore_on_error: if True, items failing serialization are
+            not sent, else stream is stopped at first failing item
+        """
+        super().__init__(context, processor_factory, error_http_code, default_http_code)
+        self.ignore_on_error = ignore_on_error
+
+    def after_wrapped_function(self, response: typing.Any) -> typing.Any:
+        if self.context.by_pass_output_wrapping(response):
+            return response
+
+        return self.context.get_stream_response(
+            self._get_stream_chunks(response), self.default_http_code
+        )
+
+    def _get_stream_chunks(self, items: typing.Iterable[typing.Any]) -> typing.Iterator[bytes]:
+        """
+        Lazily serialize and encode given items: an item is read from view
+        iterable only when framework ask for the next response chunk.
+        """
+        for item in items:
+            try:
+                serialized_item = self.processor.dump(item)
+            except ValidationException:
+                # Response is already started: stopping stream is the only
+                # way to report a failing item
+                if not self.ignore_on_error:
+                    return
+                continue
+
+            yield self.context.get_stream_item_bytes(serialized_item)
 
 
 class AsyncOutputStreamControllerWrapper(OutputControllerWrapper):
@@ -330,11 +713,27 @@ class AsyncOutputStreamControllerWrapper(OutputControllerWrapper):
         error_http_code: HTTPStatus = HTTPStatus.INTERNAL_SERVER_ERROR,
         default_http_code: HTTPStatus = HTTPStatus.OK,
         ignore_on_error: bool = True,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
+        batch_policy: typing.Optional[StreamBatchPolicy] = None,
     ) -> None:
+        """
+        :param ignore_on_error: if True, items failing serialization are
+            not sent
+        :param offload_policy: OffloadPolicy defining when an item must be
+            dumped in an executor. If not given, items are always dumped in
+            event loop.
+        :param batch_policy: StreamBatchPolicy defining how items are
+            coalesced before being written. If not given, each item is
+            written alone.
+        """
         super().__init__(context, processor_factory, error_http_code, default_http_code)
         self.ignore_on_error = ignore_on_error
+        self.offload_policy = offload_policy
+        self.batch_policy = batch_policy
 
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        is_view = self._is_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -343,41 +742,95 @@ class AsyncOutputStreamControllerWrapper(OutputControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            stream_response = await self.context.get_stream_response_object(args, kwargs)
+            instrumentation = self.context.instrumentation
+            if not is_view or not instrumentation.enabled:
+                return await self.stream_wrapped_function(func, args, kwargs)
+
+            # As in AsyncControllerPipeline, view stage is the whole stream
+            started_at = time.perf_counter()
+            response = await self.stream_wrapped_function(func, args, kwargs)
+            self._observe_view(instrumentation, func, time.perf_counter() - started_at)
+            return response
+
+        return self._update_wrapper(wrapper, func)
 
-            response_object = self._execute_wrapped_function(func, args, kwargs)
+    async def stream_wrapped_function(
+        self,
+        func: typing.Callable[..., typing.Any],
+        func_args: typing.Tuple[typing.Any, ...],
+        func_kwargs: typing.Dict[str, typing.Any],
+    ) -> typing.Any:
+        """
+        Execute given view and feed a stream response with each produced
+        (and serialized) item.
+        :return: the stream response object
+        """
+        stream_response = await self.context.get_stream_response_object(func_args, func_kwargs)
+
+        response_object = self._execute_wrapped_function(func, func_args, func_kwargs)
+
+        # To be compatible with python3.5 and python3.7, we must inspect
+        # the object. If it is an async_generator, nothing to do. Else,
+        # we must await it.
+        # To see example, in python3.5:
+        #    tests.ext.unit.test_aiohttp.TestAiohttpExt#test_aiohttp_output_stream__ok__nominal_case
+        # In python 3.6+:
+        #    tests.ext.unit.test_aiohttp.TestAiohttpExt#test_aiohttp_output_stream__ok__py37
+        # TODO BS 2018-11-19: A cleaner way to test if it is an
+        # async_generator object ?
+        if type(response_object).__name__ == "async_generator":
+            iterable_response_object = response_object
+        else:
+            iterable_response_object = await response_object
+
+        if self.batch_policy is None:
+            feed = functools.partial(self.context.feed_stream_response, stream_response)
+            batcher = None
+        else:
+            batcher = StreamBatcher(
+                functools.partial(self.context.write_stream_response, stream_response),
+                self.batch_policy,
+            )
 
-            # To be compatible with python3.5 and python3.7, we must inspect
-            # the object. If it is an async_generator, nothing to do. Else,
-            # we must await it.
-            # To see example, in python3.5:
-            #    tests.ext.unit.test_aiohttp.TestAiohttpExt#test_aiohttp_output_stream__ok__nominal_case
-            # In python 3.6+:
-            #    tests.ext.unit.test_aiohttp.TestAiohttpExt#test_aiohttp_output_stream__ok__py37
-            # TODO BS 2018-11-19: A cleaner way to test if it is an
-            # async_generator object ?
-            if type(response_object).__name__ == "async_generator":
-                iterable_response_object = response_object
-            else:
-                iterable_response_object = await response_object
+            async def feed(serialized_item: typing.Any) -> None:
+                await batcher.add(self.context.get_stream_item_bytes(serialized_item))
 
+        items_count = 0
+        try:
             async for stream_item in iterable_response_object:
                 try:
-                    serialized_item = self._get_serialized_item(stream_item)
-                    await self.context.feed_stream_response(stream_response, serialized_item)
+                    serialized_item = await self._get_serialized_item_async(
+                        stream_item, items_count
+                    )
+                    items_count += 1
+                    await feed(serialized_item)
                 except ValidationException:
                     if not self.ignore_on_error:
                         # TODO BS 2018-07-31: Something should inform about
                         # error, a log ?
                         return stream_response
+        finally:
+            if batcher is not None:
+                await batcher.close()
 
-            return stream_response
+        return stream_response
 
-        return functools.update_wrapper(wrapper, func)
+    def after_wrapped_function(self, response: typing.Any) -> typing.Any:
+        # Stream response is already fed with serialized items
+        return response
 
     def _get_serialized_item(self, item_object: typing.Any) -> dict:
         return self.processor.dump(item_object)
 
+    async def _get_serialized_item_async(self, item_object: typing.Any, items_count: int) -> dict:
+        """
+        :param items_count: count of items already sent in stream
+        """
+        if self.offload_policy is not None and self.offload_policy.must_offload_stream(items_count):
+            return await self.offload_policy.run(self.processor.dump, item_object)
+
+        return self._get_serialized_item(item_object)
+
 
 class OutputHeadersControllerWrapper(OutputControllerWrapper):
     pass
@@ -419,6 +872,8 @@ class OutputFileControllerWrapper(OutputControllerWrapper):
 # Please re-think about code refact. TAG: REFACT_ASYNC
 class AsyncOutputFileControllerWrapper(OutputFileControllerWrapper):
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_async_observed_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -427,11 +882,11 @@ class AsyncOutputFileControllerWrapper(OutputFileControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            response = await self._execute_wrapped_function(func, args, kwargs)
+            response = await self._execute_wrapped_function(view, args, kwargs)
             new_response = self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
 
 
 class InputPathControllerWrapper(InputControllerWrapper):
@@ -448,6 +903,8 @@ class InputPathControllerWrapper(InputControllerWrapper):
 #  TAG: REFACT_ASYNC
 class AsyncInputPathControllerWrapper(InputPathControllerWrapper):
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_async_observed_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -456,11 +913,11 @@ class AsyncInputPathControllerWrapper(InputPathControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            response = await self._execute_wrapped_function(func, args, kwargs)
+            response = await self._execute_wrapped_function(view, args, kwargs)
             new_response = self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
 
     async def _execute_wrapped_function(self, func, func_args, func_kwargs) -> typing.Any:
         return await func(*func_args, **func_kwargs)
@@ -508,6 +965,8 @@ class InputQueryControllerWrapper(InputControllerWrapper):
 # TAG: REFACT_ASYNC
 class AsyncInputQueryControllerWrapper(InputQueryControllerWrapper):
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_async_observed_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -516,11 +975,11 @@ class AsyncInputQueryControllerWrapper(InputQueryControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            response = await self._execute_wrapped_function(func, args, kwargs)
+            response = await self._execute_wrapped_function(view, args, kwargs)
             new_response = self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
 
     async def _execute_wrapped_function(self, func, func_args, func_kwargs) -> typing.Any:
         return await func(*func_args, **func_kwargs)
@@ -538,12 +997,38 @@ class InputBodyControllerWrapper(InputControllerWrapper):
 # to permit async compatibility. Please re-think about code refact
 # TAG: REFACT_ASYNC
 class AsyncInputBodyControllerWrapper(AsyncInputControllerWrapper):
+    def __init__(
+        self,
+        context: typing.Union[ContextInterface, typing.Callable[[], ContextInterface]],
+        processor_factory: typing.Callable[[typing.Optional[TYPE_SCHEMA]], Processor],
+        error_http_code: HTTPStatus = HTTPStatus.BAD_REQUEST,
+        default_http_code: HTTPStatus = HTTPStatus.OK,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
+    ) -> None:
+        """
+        :param offload_policy: OffloadPolicy defining when body must be
+            loaded in an executor. If not given, body is always loaded in
+            event loop.
+        """
+        super().__init__(context, processor_factory, error_http_code, default_http_code)
+        self.offload_policy = offload_policy
+
     def update_hapic_data(self, hapic_data: HapicData, processed_data: typing.Any) -> None:
         hapic_data.body = processed_data
 
     async def get_parameters_data(self, request_parameters: RequestParameters) -> dict:
         return await request_parameters.body_parameters
 
+    async def _load_with_result_async(
+        self, request_parameters: RequestParameters, parameters_data: typing.Any
+    ) -> ProcessLoadResult:
+        if self.offload_policy is not None and self.offload_policy.must_offload_body(
+            request_parameters.body_size
+        ):
+            return await self.offload_policy.run(self.processor.load_with_result, parameters_data)
+
+        return self._load_with_result(parameters_data)
+
     async def get_error_response(self, request_parameters: RequestParameters) -> typing.Any:
         parameters_data = await self.get_parameters_data(request_parameters)
         error = self.processor.get_input_validation_error(parameters_data)
@@ -570,40 +1055,87 @@ class InputFormsControllerWrapper(InputControllerWrapper):
 
 
 class InputFilesControllerWrapper(InputControllerWrapper):
+    def __init__(
+        self,
+        context: typing.Union[ContextInterface, typing.Callable[[], ContextInterface]],
+        processor_factory: typing.Callable[[typing.Optional[TYPE_SCHEMA]], Processor],
+        error_http_code: HTTPStatus = HTTPStatus.BAD_REQUEST,
+        default_http_code: HTTPStatus = HTTPStatus.OK,
+        upload_policy: typing.Optional[UploadPolicy] = None,
+    ) -> None:
+        """
+        :param upload_policy: UploadPolicy defining size limits of files.
+            Files are read by framework (who spool them on disk).
+        """
+        super().__init__(context, processor_factory, error_http_code, default_http_code)
+        self.upload_policy = upload_policy
+
     def update_hapic_data(self, hapic_data: HapicData, processed_data: typing.Any) -> None:
         hapic_data.files = processed_data
 
-    def get_processed_data(self, request_parameters: RequestParameters) -> typing.Any:
-        parameters_data = self.get_parameters_data(request_parameters)
-        processed_data = self.processor.load_files_input(parameters_data)
-        return processed_data
-
     def get_parameters_data(self, request_parameters: RequestParameters) -> dict:
-        return request_parameters.files_parameters
+        if self.upload_policy is None:
+            return request_parameters.files_parameters
+
+        # Body size is checked before framework read files
+        self.upload_policy.check_total_size(request_parameters.body_size)
+        files_parameters = request_parameters.files_parameters
+        for name, file in files_parameters.items():
+            self.upload_policy.check_file_size(name, get_file_size(file))
+        return files_parameters
 
     def _get_processor_error(self, parameters_data: typing.Any) -> ProcessValidationError:
         return self.processor.get_input_files_validation_error(parameters_data)
 
+    def _load_with_result(self, parameters_data: typing.Any) -> ProcessLoadResult:
+        return self.processor.load_files_input_with_result(parameters_data)
+
 
 # TODO BS 2019-01-11: This class is an async version of
 # InputFilesControllerWrapper to permit async compatibility.
 # Please re-think about code refact
 # TAG: REFACT_ASYNC
 class AsyncInputFilesControllerWrapper(AsyncInputControllerWrapper):
+    def __init__(
+        self,
+        context: typing.Union[ContextInterface, typing.Callable[[], ContextInterface]],
+        processor_factory: typing.Callable[[typing.Optional[TYPE_SCHEMA]], Processor],
+        error_http_code: HTTPStatus = HTTPStatus.BAD_REQUEST,
+        default_http_code: HTTPStatus = HTTPStatus.OK,
+        upload_policy: typing.Optional[UploadPolicy] = None,
+    ) -> None:
+        """
+        :param upload_policy: UploadPolicy defining how files are streamed
+            (spool size, sink) and their size limits. If not given, whole
+            request body is read in memory.
+        """
+        super().__init__(context, processor_factory, error_http_code, default_http_code)
+        self.upload_policy = upload_policy
+
     def update_hapic_data(self, hapic_data: HapicData, processed_data: typing.Any) -> None:
         hapic_data.files = processed_data
 
-    async def get_processed_data(self, request_parameters: RequestParameters) -> typing.Any:
-        parameters_data = await self.get_parameters_data(request_parameters)
-        processed_data = self.processor.load_files_input(parameters_data)
-        return processed_data
-
     async def get_parameters_data(self, request_parameters: RequestParameters) -> dict:
-        return await request_parameters.files_parameters
+        if self.upload_policy is None:
+            return await request_parameters.files_parameters
+
+        return await request_parameters.stream_files_parameters(self.upload_policy)
+
+    async def get_load_result(self, request_parameters: RequestParameters) -> ProcessLoadResult:
+        load_result = await super().get_load_result(request_parameters)
+        if not load_result.valid and self.upload_policy is not None:
+            # Request is rejected: streamed files content must be dropped
+            files = await request_parameters.stream_files_parameters(self.upload_policy)
+            for uploaded_file in files.values():
+                await uploaded_file.abort()
+        return load_result
 
     def _get_processor_error(self, parameters_data: typing.Any) -> ProcessValidationError:
         return self.processor.get_input_files_validation_error(parameters_data)
 
+    def _load_with_result(self, parameters_data: typing.Any) -> ProcessLoadResult:
+        return self.processor.load_files_input_with_result(parameters_data)
+
     async def get_error_response(self, request_parameters: RequestParameters) -> typing.Any:
         parameters_data = await self.get_parameters_data(request_parameters)
         error = self._get_processor_error(parameters_data)
@@ -643,6 +1175,8 @@ class ExceptionHandlerControllerWrapper(ControllerWrapper):
             description or self.handled_exception_class.__doc__ or default_description
         )  # DFV
         self._error_builder = error_builder
+        self._error_processors = {}  # type: typing.Dict[ErrorBuilderInterface, Processor]
+        self._encoded_errors = LruCache(ENCODED_ERRORS_CACHE_SIZE)
 
     @property
     def context(self) -> ContextInterface:
@@ -660,23 +1194,30 @@ class ExceptionHandlerControllerWrapper(ControllerWrapper):
         try:
             return super()._execute_wrapped_function(func, func_args, func_kwargs)
         except self.handled_exception_class as exc:
-            self.context.local_exception_caught(exc, *func_args, **func_kwargs)
-            return self._build_error_response(exc)
+            return self.get_exception_response(exc, func_args, func_kwargs)
+
+    def get_exception_response(
+        self,
+        exc: Exception,
+        func_args: typing.Tuple[typing.Any, ...],
+        func_kwargs: typing.Dict[str, typing.Any],
+    ) -> typing.Any:
+        """
+        Return the error response for given caught exception. Must be called
+        when handling the exception (traceback is read from current
+        exception context).
+        :param exc: caught exception (instance of handled_exception_class)
+        :param func_args: arguments given to the view
+        :param func_kwargs: keyword arguments given to the view
+        :return: error response
+        """
+        self.context.local_exception_caught(exc, *func_args, **func_kwargs)
+        return self._build_error_response(exc)
 
     def _build_error_response(self, exc: Exception) -> typing.Any:
-        response_content = self.error_builder.build_from_exception(
-            exc, include_traceback=self.context.is_debug()
+        error_response = self.context.get_response(
+            self._get_encoded_error(exc), self.error_http_code
         )
-        processor = self._processor_factory(self.error_builder.get_schema())
-        # Check error format
-        try:
-            dumped = processor.dump(response_content)
-        except ValidationException as exc:
-            raise OutputValidationException(
-                "Validation error during dump " "of error response: {}".format(str(exc))
-            ) from exc
-
-        error_response = self.context.get_response(json.dumps(dumped), self.error_http_code)
         self._logger = logging.getLogger(LOGGER_NAME)
         self._logger.info(
             "Exception {exc} occured, return "
@@ -689,6 +1230,59 @@ class ExceptionHandlerControllerWrapper(ControllerWrapper):
         self._logger.debug(traceback.format_exc())
         return error_response
 
+    def _get_encoded_error(self, exc: Exception) -> bytes:
+        """
+        Build JSON encoded error from given exception. Encoded errors which
+        only depend on exception type and message are cached.
+        :param exc: handled exception
+        :return: JSON encoded error
+        """
+        error_builder = self.error_builder
+        include_traceback = self.context.is_debug()
+        static_error_key = error_builder.get_static_error_key(
+            exc, include_traceback=include_traceback
+        )
+        if static_error_key is not None:
+            encoded_error = self._encoded_errors.get((error_builder, static_error_key))
+            if encoded_error is not None:
+                return encoded_error
+
+        response_content = error_builder.build_from_exception(
+            exc, include_traceback=include_traceback
+        )
+        processor = self._get_error_processor(error_builder)
+        # Check error format
+        try:
+            dumped = processor.dump(response_content)
+        except ValidationException as exc:
+            raise OutputValidationException(
+                "Validation error during dump " "of error response: {}".format(str(exc))
+            ) from exc
+
+        encoded_error = self.context.json_backend.dumps(dumped)
+        if static_error_key is not None:
+            self._encoded_errors.set((error_builder, static_error_key), encoded_error)
+
+        return encoded_error
+
+    def warm_up(self) -> Processor:
+        """see hapic.decorator.ControllerWrapper#warm_up"""
+        processor = self._get_error_processor(self.error_builder)
+        processor.warm_up()
+        return processor
+
+    def _get_error_processor(self, error_builder: ErrorBuilderInterface) -> Processor:
+        """
+        :param error_builder: error builder who will build dumped errors
+        :return: Processor instance built once per error builder
+        """
+        try:
+            return self._error_processors[error_builder]
+        except KeyError:
+            processor = self._processor_factory(error_builder.get_schema())
+            self._error_processors[error_builder] = processor
+            return processor
+
 
 # TODO BS 2018-07-23: This class is an async version of
 # ExceptionHandlerControllerWrapper
@@ -696,6 +1290,8 @@ class ExceptionHandlerControllerWrapper(ControllerWrapper):
 # TAG: REFACT_ASYNC
 class AsyncExceptionHandlerControllerWrapper(ExceptionHandlerControllerWrapper):
     def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        view = self._get_async_observed_view(func)
+
         # async def wrapper(*args, **kwargs) -> typing.Any:
         async def wrapper(*args, **kwargs) -> typing.Any:
             # Note: Design of before_wrapped_func can be to update kwargs
@@ -704,15 +1300,281 @@ class AsyncExceptionHandlerControllerWrapper(ExceptionHandlerControllerWrapper):
             if replacement_response is not None:
                 return replacement_response
 
-            response = await self._execute_wrapped_function(func, args, kwargs)
+            response = await self._execute_wrapped_function(view, args, kwargs)
             new_response = self.after_wrapped_function(response)
             return new_response
 
-        return functools.update_wrapper(wrapper, func)
+        return self._update_wrapper(wrapper, func)
 
     async def _execute_wrapped_function(self, func, func_args, func_kwargs) -> typing.Any:
         try:
             return await func(*func_args, **func_kwargs)
         except self.handled_exception_class as exc:
-            self.context.local_exception_caught(exc, *func_args, **func_kwargs)
-            return self._build_error_response(exc)
+            return self.get_exception_response(exc, func_args, func_kwargs)
+
+
+class ControllerPipeline(object):
+    """
+    Fused version of a chain of ControllerWrapper: instead of nesting one
+    wrapper function per decorator, all the stages (inputs processing, view
+    execution, output processing and exception handling) of the given
+    wrappers are run in a single function frame. Behaviour is the same as the
+    nested wrappers chain.
+    """
+
+    def __init__(self, wrappers: typing.List[ControllerWrapper]) -> None:
+        """
+        :param wrappers: ControllerWrapper list, ordered from the outermost
+            to the innermost (the first applied decorator is the last one)
+        """
+        self.wrappers = wrappers
+        # Not overridden stages are set to None to not be called at all
+        self._before_stages = [
+            wrapper.before_wrapped_func
+            if type(wrapper).before_wrapped_func is not ControllerWrapper.before_wrapped_func
+            else None
+            for wrapper in wrappers
+        ]
+        self._after_stages = [
+            wrapper.after_wrapped_function
+            if type(wrapper).after_wrapped_function is not ControllerWrapper.after_wrapped_function
+            else None
+            for wrapper in wrappers
+        ]
+        self._exception_handlers = [
+            wrapper if isinstance(wrapper, ExceptionHandlerControllerWrapper) else None
+            for wrapper in wrappers
+        ]
+
+    @classmethod
+    def unwrap(
+        cls, func: typing.Callable[..., typing.Any]
+    ) -> typing.Tuple[typing.List[ControllerWrapper], typing.Callable[..., typing.Any]]:
+        """
+        Walk given decorated function to collect the ControllerWrapper chain
+        who produced it.
+        :param func: function returned by the outermost hapic decorator
+        :return: the ControllerWrapper list (from outermost to innermost) and
+            the first function not produced by a ControllerWrapper. If a
+            foreign decorator is found in chain, returned list stop at it.
+        """
+        wrappers = []  # type: typing.List[ControllerWrapper]
+        functions = []  # type: typing.List[typing.Callable[..., typing.Any]]
+        while True:
+            wrapper = getattr(func, CONTROLLER_WRAPPER_ATTRIBUTE_NAME, None)
+            wrapped = getattr(func, "__wrapped__", None)
+
+            # A foreign decorator using functools.wraps copy the attribute of
+            # the hapic wrapper it decorate, so a same ControllerWrapper
+            # appear twice: first occurrence is the foreign decorator
+            if wrapper in wrappers:
+                foreign_index = wrappers.index(wrapper)
+                return wrappers[:foreign_index], functions[foreign_index]
+
+            if wrapper is None or wrapped is None:
+                return wrappers, func
+
+            wrappers.append(wrapper)
+            functions.append(func)
+            func = wrapped
+
+    def _get_exception_handler_index(self, exc: Exception, depth: int) -> typing.Optional[int]:
+        """
+        Return index of the innermost exception handler able to catch given
+        exception raised at given depth.
+        :param exc: raised exception
+        :param depth: index of the stage who raised the exception
+        :return: exception handler index or None if exception is not handled
+        """
+        for index in range(depth - 1, -1, -1):
+            handler = self._exception_handlers[index]
+            if handler is not None and isinstance(exc, handler.handled_exception_class):
+                return index
+
+        return None
+
+    def _handle_exception(
+        self,
+        exc: Exception,
+        depth: int,
+        func_args: typing.Tuple[typing.Any, ...],
+        func_kwargs: typing.Dict[str, typing.Any],
+    ) -> typing.Optional[typing.Tuple[typing.Any, int]]:
+        """
+        Build the error response of given exception with the matching
+        exception handler. Must be called when handling the exception.
+        :return: None if not handled, else the error response and the
+            number of stages to run after_wrapped_function from
+        """
+        handler_index = self._get_exception_handler_index(exc, depth)
+        if handler_index is None:
+            return None
+
+        handler = self._exception_handlers[handler_index]
+        try:
+            response = handler.get_exception_response(exc, func_args, func_kwargs)
+        except Exception as handler_exc:
+            handled = self._handle_exception(handler_exc, handler_index, func_args, func_kwargs)
+            if handled is None:
+                raise
+            return handled
+
+        return response, handler_index + 1
+
+    def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        before_stages = self._before_stages
+        after_stages = self._after_stages
+        stages_count = len(self.wrappers)
+        first_wrapper = self.wrappers[0]
+
+        def wrapper(*args, **kwargs) -> typing.Any:
+            # depth is the index of running stage (stages_count is the view)
+            # entered is the count of stages to run after_wrapped_function
+            depth = 0
+            entered = 0
+            response = None
+            handling = False
+
+            while True:
+                try:
+                    if not handling:
+                        while entered < stages_count:
+                            depth = entered
+                            before = before_stages[entered]
+                            entered += 1
+                            if before is None:
+                                continue
+
+                            # Note: Design of before_wrapped_func can be to
+                            # update kwargs by reference here
+                            replacement_response = before(args, kwargs)
+                            if replacement_response is not None:
+                                response = replacement_response
+                                entered -= 1
+                                break
+                        else:
+                            depth = stages_count
+                            instrumentation = first_wrapper.context.instrumentation
+                            if instrumentation.enabled:
+                                started_at = time.perf_counter()
+                                response = func(*args, **kwargs)
+                                first_wrapper._observe_view(
+                                    instrumentation, func, time.perf_counter() - started_at
+                                )
+                            else:
+                                response = func(*args, **kwargs)
+
+                    while entered:
+                        entered -= 1
+                        depth = entered
+                        after = after_stages[entered]
+                        if after is not None:
+                            response = after(response)
+
+                    return response
+                except Exception as exc:
+                    handled = self._handle_exception(exc, depth, args, kwargs)
+                    if handled is None:
+                        raise
+                    response, entered = handled
+                    handling = True
+
+        return functools.update_wrapper(wrapper, func)
+
+
+class AsyncControllerPipeline(ControllerPipeline):
+    """
+    Async version of ControllerPipeline: coroutine stages and the view are
+    awaited, and an output stream wrapper feeds its stream response from
+    the view items.
+    """
+
+    def __init__(self, wrappers: typing.List[ControllerWrapper]) -> None:
+        super().__init__(wrappers)
+        self._async_before_stages = [
+            inspect.iscoroutinefunction(before) if before is not None else False
+            for before in self._before_stages
+        ]
+        self._async_after_stages = [
+            inspect.iscoroutinefunction(after) if after is not None else False
+            for after in self._after_stages
+        ]
+        self._stream_wrapper = None  # type: AsyncOutputStreamControllerWrapper
+        for wrapper in wrappers:
+            if isinstance(wrapper, AsyncOutputStreamControllerWrapper):
+                self._stream_wrapper = wrapper
+
+    def get_wrapper(self, func: "typing.Callable") -> "typing.Callable":
+        before_stages = self._before_stages
+        async_before_stages = self._async_before_stages
+        after_stages = self._after_stages
+        async_after_stages = self._async_after_stages
+        stages_count = len(self.wrappers)
+        first_wrapper = self.wrappers[0]
+        stream_wrapper = self._stream_wrapper
+
+        async def wrapper(*args, **kwargs) -> typing.Any:
+            # depth is the index of running stage (stages_count is the view)
+            # entered is the count of stages to run after_wrapped_function
+            depth = 0
+            entered = 0
+            response = None
+            handling = False
+
+            while True:
+                try:
+                    if not handling:
+                        while entered < stages_count:
+                            depth = entered
+                            before = before_stages[entered]
+                            is_async_before = async_before_stages[entered]
+                            entered += 1
+                            if before is None:
+                                continue
+
+                            # Note: Design of before_wrapped_func can be to
+                            # update kwargs by reference here
+                            if is_async_before:
+                                replacement_response = await before(args, kwargs)
+                            else:
+                                replacement_response = before(args, kwargs)
+                            if replacement_response is not None:
+                                response = replacement_response
+                                entered -= 1
+                                break
+                        else:
+                            depth = stages_count
+                            instrumentation = first_wrapper.context.instrumentation
+                            started_at = time.perf_counter() if instrumentation.enabled else 0.0
+                            if stream_wrapper is not None:
+                                response = await stream_wrapper.stream_wrapped_function(
+                                    func, args, kwargs
+                                )
+                            else:
+                                response = await func(*args, **kwargs)
+                            if instrumentation.enabled:
+                                first_wrapper._observe_view(
+                                    instrumentation, func, time.perf_counter() - started_at
+                                )
+
+                    while entered:
+                        entered -= 1
+                        depth = entered
+                        after = after_stages[entered]
+                        if after is None:
+                            continue
+
+                        if async_after_stages[entered]:
+                            response = await after(response)
+                        else:
+                            response = after(response)
+
+                    return response
+                except Exception as exc:
+                    handled = self._handle_exception(exc, depth, args, kwargs)
+                    if handled is None:
+                        raise
+                    response, entered = handled
+                    handling = True
+
+        return functools.update_wrapper(wrapper, func)
@@ -86,3 +86,22 @@ class ControllerDescription(object):
         self.tags = tags or []
         self.disable_doc = disable_doc
         self.deprecated = deprecated
+
+    @property
+    def wrappers(self) -> typing.List["ControllerWrapper"]:
+        """
+        :return: ControllerWrapper of each described decoration
+        """
+        descriptions = [
+            self.input_path,
+            self.input_query,
+            self.input_body,
+            self.input_headers,
+            self.input_forms,
+            self.input_files,
+            self.output_body,
+            self.output_stream,
+            self.output_file,
+            self.output_headers,
+        ] + self.errors
+        return [description.wrapper for description in descriptions if description is not None]
@@ -0,0 +1,115 @@
+# coding: utf-8
+"""
+Encoded documentation kept between doc views requests. This module does not
+import documentation dependencies (apispec), so a prebuilt documentation file
+can be served without them. yaml is imported at first use.
+"""
+import hashlib
+import json
+import typing
+
+
+def dump_doc_yaml(dict_doc: dict) -> str:
+    """
+    Dump given apispec documentation dict in YAML format
+    :param dict_doc: apispec documentation dict
+    :return: YAML documentation
+    """
+    import yaml
+
+    # We dump then load with json to use real scalar dict.
+    # If not, yaml dump dict-like objects
+    clean_dict_doc = json.loads(json.dumps(dict_doc))
+    return yaml.dump(clean_dict_doc, default_flow_style=False)
+
+
+class CachedDoc(object):
+    """
+    Generated documentation with its encoded versions. Encoded versions are
+    produced at first access then kept.
+    """
+
+    def __init__(self, doc: dict) -> None:
+        """
+        :param doc: apispec documentation dict
+        """
+        self.doc = doc
+        self._json = None  # type: typing.Optional[bytes]
+        self._yaml = None  # type: typing.Optional[bytes]
+        self._etag = None  # type: typing.Optional[str]
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "CachedDoc":
+        """
+        Load a previously generated documentation file. File content is
+        kept as is and served without being encoded again.
+        :param file_path: path of a JSON or YAML (.yml, .yaml) documentation
+        :return: CachedDoc instance
+        """
+        with open(file_path, "rb") as doc_file:
+            content = doc_file.read()
+
+        if file_path.endswith((".yml", ".yaml")):
+            import yaml
+
+            cached_doc = cls(yaml.safe_load(content))
+            cached_doc._yaml = content
+        else:
+            cached_doc = cls(json.loads(content.decode("utf-8")))
+            cached_doc._json = content
+
+        return cached_doc
+
+    def save_in_file(self, file_path: str) -> None:
+        """
+        Write documentation in given file, in YAML format if file path
+        ends with .yml or .yaml, else in JSON format.
+        :param file_path: path of file to write
+        """
+        content = self.yaml if file_path.endswith((".yml", ".yaml")) else self.json
+        with open(file_path, "wb") as doc_file:
+            doc_file.write(content)
+
+    @property
+    def json(self) -> bytes:
+        """
+        :return: UTF-8 JSON encoded documentation
+        """
+        if self._json is None:
+            self._json = json.dumps(self.doc).encode("utf-8")
+        return self._json
+
+    @property
+    def yaml(self) -> bytes:
+        """
+        :return: UTF-8 YAML encoded documentation
+        """
+        if self._yaml is None:
+            self._yaml = dump_doc_yaml(self.doc).encode("utf-8")
+        return self._yaml
+
+    @property
+    def etag(self) -> str:
+        """
+        :return: quoted ETag value identifying documentation content
+        """
+        if self._etag is None:
+            self._etag = '"{}"'.format(hashlib.sha1(self.json).hexdigest())
+        return self._etag
+
+    def match_etag(self, if_none_match: typing.Optional[str]) -> bool:
+        """
+        :param if_none_match: If-None-Match request header value
+        :return: True if given header value match documentation ETag
+        """
+        if not if_none_match:
+            return False
+
+        for etag in if_none_match.split(","):
+            etag = etag.strip()
+            if etag.startswith("W/"):
+                etag = etag[2:]
+            if etag == "*" or etag == self.etag:
+                return True
+
+        return False
@@ -0,0 +1,90 @@
+# coding: utf-8
+import argparse
+import importlib
+import sys
+import typing
+
+from hapic.exception import ConfigurationException
+
+if typing.TYPE_CHECKING:
+    from hapic.hapic import Hapic
+
+
+def get_hapic(reference: str) -> "Hapic":
+    """
+    Import and return Hapic instance from given reference.
+    :param reference: "module.path:attribute" reference, eg. "myapp:hapic".
+    Attribute can be a dotted path and can be a callable returning
+    Hapic instance.
+    :return: Hapic instance
+    """
+    from hapic.hapic import Hapic
+
+    module_name, _, attribute_path = reference.partition(":")
+    if not module_name or not attribute_path:
+        raise ConfigurationException(
+            'Invalid hapic reference "{}", must be like "module:attribute"'.format(reference)
+        )
+
+    hapic = importlib.import_module(module_name)
+    for attribute_name in attribute_path.split("."):
+        hapic = getattr(hapic, attribute_name)
+
+    if not isinstance(hapic, Hapic) and callable(hapic):
+        hapic = hapic()
+
+    if not isinstance(hapic, Hapic):
+        raise ConfigurationException('"{}" is not an Hapic instance'.format(reference))
+
+    return hapic
+
+
+def build(
+    reference: str, out: str, title: str = "", description: str = "", version: str = "1.0.0"
+) -> None:
+    """
+    Generate doc of referenced Hapic instance and write it in given file.
+    :param reference: "module:attribute" reference of Hapic instance
+    :param out: path of written doc file, YAML if it ends with .yml or
+    .yaml, else JSON
+    :param title: Title of generated doc
+    :param description: Description of generated doc
+    :param version: Version of generated doc
+    """
+    hapic = get_hapic(reference)
+    cached_doc = hapic.get_cached_doc(title=title, description=description, version=version)
+    cached_doc.save_in_file(out)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m hapic.doc", description="Hapic doc tools")
+    subparsers = parser.add_subparsers(dest="command")
+
+    build_parser = subparsers.add_parser(
+        "build", help="Generate OpenAPI doc file, to be served with load_doc_file"
+    )
+    build_parser.add_argument("hapic", help='Hapic instance reference, eg. "myapp:hapic"')
+    build_parser.add_argument(
+        "--out", required=True, help="Doc file path, YAML if .yml or .yaml, else JSON"
+    )
+    build_parser.add_argument("--title", default="", help="Doc title")
+    build_parser.add_argument("--description", default="", help="Doc description")
+    build_parser.add_argument("--version", default="1.0.0", help="Doc version")
+
+    args = parser.parse_args(argv)
+    if args.command != "build":
+        parser.print_help()
+        return 1
+
+    # Permit to import application modules from working directory
+    if "" not in sys.path:
+        sys.path.insert(0, "")
+
+    build(
+        args.hapic,
+        args.out,
+        title=args.title,
+        description=args.description,
+        version=args.version,
+    )
+    return 0
@@ -1,17 +1,17 @@
 # coding: utf-8
-import json
 import typing
 
 from apispec import APISpec
 from apispec import BasePlugin
 from apispec.core import VALID_METHODS_OPENAPI_V2
 from apispec.exceptions import DuplicateComponentNameError
-import yaml
 
 from hapic.context import ContextInterface
 from hapic.context import RouteRepresentation
 from hapic.decorator import DecoratedController
 from hapic.description import ControllerDescription
+from hapic.doc.cache import CachedDoc  # noqa: F401
+from hapic.doc.cache import dump_doc_yaml
 from hapic.doc.schema import SchemaUsage
 
 if typing.TYPE_CHECKING:
@@ -259,6 +259,9 @@ class DocGenerator(object):
         all OpenAPI v2 valid methods will be used.
         :return: a apispec documentation dict
         """
+        # Routes may have changed since previous doc generation: routes index
+        # is built once for this generation
+        context.invalidate_route_index()
         main_plugin = hapic.processor_class.create_apispec_plugin()
 
         plugins = (main_plugin,)
@@ -352,12 +355,7 @@ class DocGenerator(object):
             description=description,
             version=version,
         )
-        json_doc = json.dumps(dict_doc)
-
-        # We dump then load with json to use real scalar dict.
-        # If not, yaml dump dict-like objects
-        clean_dict_doc = json.loads(json_doc)
-        return yaml.dump(clean_dict_doc, default_flow_style=False)
+        return dump_doc_yaml(dict_doc)
 
     def save_in_file(
         self,
@@ -41,6 +41,17 @@ class ErrorBuilderInterface(metaclass=abc.ABCMeta):
         Must return schema of produced errors
         """
 
+    def get_static_error_key(
+        self, exception: Exception, include_traceback: bool = False
+    ) -> typing.Optional[typing.Hashable]:
+        """
+        Return a key identifying error built from given exception if this
+        error is always the same for the same key (eg. exception type and
+        message). Encoded errors can then be cached by this key.
+        Return None (default) if error can't be cached.
+        """
+        return None
+
 
 class DefaultErrorBuilder(ErrorBuilderInterface):
     def build_from_exception(self, exception: Exception, include_traceback: bool = False) -> dict:
@@ -65,6 +76,34 @@ class DefaultErrorBuilder(ErrorBuilderInterface):
         """
         return {"message": error.message, "details": error.details, "code": None}
 
+    def get_static_error_key(
+        self, exception: Exception, include_traceback: bool = False
+    ) -> typing.Optional[typing.Hashable]:
+        """
+        See hapic.error.ErrorBuilderInterface#get_static_error_key docstring.
+        Error is static when it only depends on exception type and message,
+        so only when build_from_exception is not overridden: overridden
+        versions may use other data, subclasses must then override this
+        method too to permit cache.
+        """
+        if type(self).build_from_exception is not DefaultErrorBuilder.build_from_exception:
+            return None
+
+        return self._get_default_static_error_key(exception, include_traceback)
+
+    @classmethod
+    def _get_default_static_error_key(
+        cls, exception: Exception, include_traceback: bool = False
+    ) -> typing.Optional[typing.Hashable]:
+        """
+        Return static error key of errors built by
+        DefaultErrorBuilder.build_from_exception.
+        """
+        if include_traceback or getattr(exception, "error_detail", None):
+            return None
+
+        return type(exception), str(exception)
+
     @abc.abstractmethod
     def get_schema(self) -> TYPE_SCHEMA:
         """
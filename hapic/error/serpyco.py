@@ -29,6 +29,18 @@ class SerpycoDefaultErrorBuilder(DefaultErrorBuilder):
             message=error_dict["message"], details=error_dict["details"], code=error_dict["code"]
         )
 
+    def get_static_error_key(
+        self, exception: Exception, include_traceback: bool = False
+    ) -> typing.Optional[typing.Hashable]:
+        """
+        See hapic.error.DefaultErrorBuilder#get_static_error_key docstring.
+        build_from_exception only wraps the default error dict.
+        """
+        if type(self).build_from_exception is not SerpycoDefaultErrorBuilder.build_from_exception:
+            return None
+
+        return self._get_default_static_error_key(exception, include_traceback)
+
     def build_from_validation_error(self, error: ProcessValidationError) -> DefaultErrorSchema:
         """
         See hapic.error.ErrorBuilderInterface#build_from_validation_error
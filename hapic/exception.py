@@ -45,6 +45,10 @@ class OutputValidationException(OutputWorkflowException, ValidationException):
     pass
 
 
+class UploadTooLargeException(InputValidationException):
+    """Raised when an uploaded file or request body exceeds an UploadPolicy limit"""
+
+
 class DocumentationException(HapicException):
     pass
 
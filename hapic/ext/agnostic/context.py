@@ -1,6 +1,5 @@
 # flask regular expression to locate url parameters
 from http import HTTPStatus
-import json
 import re
 import typing
 
@@ -9,12 +8,16 @@ from multidict import MultiDict
 from hapic.context import BaseContext
 from hapic.context import HandledException
 from hapic.context import RouteRepresentation
-from hapic.decorator import DECORATION_ATTRIBUTE_NAME
+from hapic.data import HapicFile
 from hapic.decorator import DecoratedController
 from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
 from hapic.exception import RouteNotFound
+from hapic.json_backend import JsonBackend
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
+from hapic.router import Route
+from hapic.router import Router
+from hapic.util import get_swagger_path
 
 PATH_URL_REGEX = re.compile(r"<([^:<>]+)(?::[^<>]+)?>")
 
@@ -22,21 +25,46 @@ PATH_URL_REGEX = re.compile(r"<([^:<>]+)(?::[^<>]+)?>")
 class AgnosticApp(object):
     """
     Framework Agnostic App for AgnosticContext. Cannot
-    be run as a true wsgi app.
+    be run as a true wsgi app, but can find route of a request path, see
+    AgnosticContext.dispatch.
     """
 
     def __init__(self):
         self.routes = []  # type: typing.List[RouteRepresentation]
+        self._router = None  # type: typing.Optional[Router]
 
     def route(self, rule: str, method: str, callback: typing.Callable):
         self.routes.append(RouteRepresentation(rule, method, callback))
+        self._router = None
+
+    @property
+    def router(self) -> Router:
+        """
+        Routes tree, built from routes at first use. Rules use bottle
+        syntax, see hapic.router.
+        """
+        if self._router is None:
+            router = Router()
+            for route in self.routes:
+                router.add(route.rule, route.method, route.original_route_object)
+            self._router = router
+        return self._router
+
+    def match(
+        self, method: str, path: str
+    ) -> typing.Tuple[typing.Optional[Route], typing.Dict[str, typing.Any], typing.Set[str]]:
+        """
+        See hapic.router.Router#match
+        """
+        return self.router.match(method.upper(), path)
 
 
 class AgnosticResponse(object):
-    def __init__(self, response, http_code, mimetype):
+    def __init__(self, response, http_code, mimetype, headers=None):
         self.response = response
         self.http_code = http_code
         self.mimetype = mimetype
+        self.headers = headers or {}
 
     @property
     def status_code(self):
@@ -44,6 +72,10 @@ class AgnosticResponse(object):
 
     @property
     def body(self):
+        # NOTE: keep a str body for agnostic responses, JSON responses are
+        # given as bytes by hapic
+        if isinstance(self.response, bytes):
+            return self.response.decode("utf-8")
         return self.response
 
 
@@ -53,8 +85,7 @@ class AgnosticContext(BaseContext):
     This handle:
     - Documentation
     - View-Based-Exception
-    This does not handle:
-    - Context-Based-Exception
+    - Context-Based-Exception, for requests sent with dispatch
     """
 
     def __init__(
@@ -69,8 +100,9 @@ class AgnosticContext(BaseContext):
         files_parameters=None,
         debug=False,
         path_url_regex=PATH_URL_REGEX,
+        json_backend: typing.Optional[JsonBackend] = None,
     ) -> None:
-        super().__init__(default_error_builder=default_error_builder)
+        super().__init__(default_error_builder=default_error_builder, json_backend=json_backend)
         self.debug = debug
         self._handled_exceptions = []  # type: typing.List[HandledException]
         self.app = app
@@ -97,7 +129,7 @@ class AgnosticContext(BaseContext):
         self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
     ) -> typing.Any:
         return self.get_response(
-            response=json.dumps(
+            response=self.json_backend.dumps(
                 {
                     "original_error": {"details": error.details, "message": error.message},
                     "http_code": http_code,
@@ -115,27 +147,70 @@ class AgnosticContext(BaseContext):
         return self._handled_exceptions
 
     def find_route(self, decorated_controller: "DecoratedController"):
-        reference = decorated_controller.reference
-        for route in self.app.routes:
-            route_token = getattr(route.original_route_object, DECORATION_ATTRIBUTE_NAME, None)
-
-            match_with_wrapper = route.original_route_object == reference.wrapper
-            match_with_wrapped = route.original_route_object == reference.wrapped
-            match_with_token = route_token == reference.token
-
-            if match_with_wrapper or match_with_wrapped or match_with_token:
-                return RouteRepresentation(
-                    rule=self.get_swagger_path(route.rule),
-                    method=route.method.lower(),
-                    original_route_object=route,
-                )
+        for route in self._find_routes(decorated_controller):
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route.rule),
+                method=route.method.lower(),
+                original_route_object=route,
+            )
         # TODO BS 20171010: Raise exception or print error ? see #10
         raise RouteNotFound(
             'Decorated route "{}" was not found in bottle routes'.format(decorated_controller.name)
         )
 
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        for route in self.app.routes:
+            yield route.original_route_object, route
+
     def get_swagger_path(self, contextualised_rule: str) -> str:
-        return self.path_url_regex.sub(r"{\1}", contextualised_rule)
+        return get_swagger_path(self.path_url_regex, contextualised_rule)
+
+    def dispatch(
+        self,
+        method: str,
+        path: str,
+        query_parameters: typing.Optional[MultiDict] = None,
+        body_parameters: typing.Optional[dict] = None,
+        form_parameters: typing.Optional[MultiDict] = None,
+        header_parameters: typing.Optional[dict] = None,
+        files_parameters: typing.Optional[dict] = None,
+    ) -> typing.Any:
+        """
+        Call controller of given request, like a web framework would do:
+        path parameters are read from path and other parameters are used
+        as request parameters. Handled exceptions become error responses.
+        :return: controller response, or a 404 or 405 AgnosticResponse if
+        no route match
+        """
+        route, path_parameters, allowed_methods = self.app.match(method, path)
+        if route is None:
+            if allowed_methods:
+                return AgnosticResponse(
+                    "Method Not Allowed",
+                    HTTPStatus.METHOD_NOT_ALLOWED,
+                    "text/plain",
+                    {"Allow": ", ".join(sorted(allowed_methods))},
+                )
+            return AgnosticResponse("Not Found", HTTPStatus.NOT_FOUND, "text/plain")
+
+        self.path_parameters = path_parameters
+        self.query_parameters = query_parameters or MultiDict()
+        self.body_parameters = body_parameters or {}
+        self.form_parameters = form_parameters or MultiDict()
+        self.header_parameters = header_parameters or {}
+        self.files_parameters = files_parameters or {}
+        try:
+            return route.callback()
+        except Exception as exc:
+            # Most specific handled exception class is used
+            handled_exception = self._handled_exception_resolver.resolve(type(exc))
+            if handled_exception is None:
+                raise
+
+            self.global_exception_caught(exc)
+            return self.get_response(
+                self._get_encoded_error_from_exception_error(exc), handled_exception.http_code
+            )
 
     def by_pass_output_wrapping(self, response: typing.Any) -> bool:
         if isinstance(response, AgnosticResponse):
@@ -145,11 +220,38 @@ class AgnosticContext(BaseContext):
     def get_response(
         self,
         # TODO BS 20171228: rename into response_content
-        response: str,
+        response: typing.Union[str, bytes],
         http_code: int,
         mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ):
+        response, headers = self._compress_response(response, http_code, mimetype, headers)
+        return AgnosticResponse(response, http_code, mimetype, headers)
+
+    def _get_accept_encoding(self) -> typing.Optional[str]:
+        for header_name, header_value in self.header_parameters.items():
+            if header_name.lower() == "accept-encoding":
+                return header_value
+        return None
+
+    def get_file_response(self, file_response: HapicFile, http_code: int):
+        # NOTE: agnostic response only carry the file, it is not read
+        return AgnosticResponse(
+            file_response.file_object or file_response.file_path,
+            http_code,
+            file_response.get_mimetype(),
+            file_response.get_headers(),
+        )
+
+    def get_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        http_code: int,
+        mimetype: str = "text/plain; charset=utf-8",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
     ):
-        return AgnosticResponse(response, http_code, mimetype)
+        stream, headers = self._compress_stream_response(stream, mimetype, headers)
+        return AgnosticResponse(stream, http_code, mimetype, headers)
 
     def is_debug(self) -> bool:
         return self.debug
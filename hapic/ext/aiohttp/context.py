@@ -1,38 +1,56 @@
 # coding: utf-8
+import asyncio
+import functools
 from http import HTTPStatus
-import json
 import re
 import typing
 
+from aiohttp import BodyPartReader
 from aiohttp import web
+from aiohttp.hdrs import ACCEPT_ENCODING
+from aiohttp.hdrs import CONTENT_TYPE
 from aiohttp.web_request import FileField
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from multidict import MultiDict
 
+from hapic.compression import CompressionPolicy
+from hapic.compression import StreamCompressor  # noqa: F401
+from hapic.compression import get_compressed_headers
+from hapic.conditional import evaluate_file_request
 from hapic.context import BaseContext
 from hapic.context import HandledException
 from hapic.context import RouteRepresentation
 from hapic.data import HapicFile
-from hapic.decorator import DECORATION_ATTRIBUTE_NAME
 from hapic.decorator import DecoratedController
 from hapic.error.main import ErrorBuilderInterface
 from hapic.exception import NoRoutesException
 from hapic.exception import RouteNotFound
 from hapic.exception import WorkflowException
+from hapic.json_backend import JsonBackend
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
+from hapic.upload import UploadedFile
+from hapic.upload import UploadPolicy
 from hapic.util import LowercaseKeysDict
+from hapic.util import get_swagger_path
+
+# Above this size in bytes, response bodies are compressed in an executor
+COMPRESSION_EXECUTOR_SIZE = 1024 * 1024
 
 # Aiohttp regular expression to locate url parameters
 AIOHTTP_RE_PATH_URL = re.compile(r"{([^:<>]+)(?::[^<>]+)?}")
 
 
 class AiohttpRequestParameters(RequestParameters):
-    def __init__(self, request: Request) -> None:
+    def __init__(self, request: Request, json_backend: JsonBackend) -> None:
         self._request = request
+        self._json_backend = json_backend
         self._parsed_body = None
+        self._query_parameters = None  # type: typing.Optional[MultiDict]
+        self._header_parameters = None  # type: typing.Optional[LowercaseKeysDict]
+        self._streamed_files = None  # type: typing.Optional[typing.Dict[str, UploadedFile]]
 
     @property
     async def body_parameters(self) -> dict:
@@ -41,19 +59,25 @@ class AiohttpRequestParameters(RequestParameters):
             is_json = content_type.lower() == "application/json"
 
             if is_json:
-                self._parsed_body = await self._request.json()
+                self._parsed_body = await self._request.json(loads=self._json_backend.loads)
             else:
                 self._parsed_body = await self._request.post()
 
         return self._parsed_body
 
+    @property
+    def body_size(self) -> typing.Optional[int]:
+        return self._request.content_length
+
     @property
     def path_parameters(self):
         return dict(self._request.match_info)
 
     @property
     def query_parameters(self):
-        return MultiDict(self._request.query.items())
+        if self._query_parameters is None:
+            self._query_parameters = MultiDict(self._request.query.items())
+        return self._query_parameters
 
     @property
     def form_parameters(self):
@@ -63,7 +87,74 @@ class AiohttpRequestParameters(RequestParameters):
     @property
     def header_parameters(self) -> LowercaseKeysDict:
         # NOTE BS 2019-01-21: headers can be read as lowercase
-        return LowercaseKeysDict([(k.lower(), v) for k, v in self._request.headers.items()])
+        if self._header_parameters is None:
+            self._header_parameters = LowercaseKeysDict(
+                [(k.lower(), v) for k, v in self._request.headers.items()]
+            )
+        return self._header_parameters
+
+    async def stream_files_parameters(
+        self, upload_policy: UploadPolicy
+    ) -> typing.Dict[str, UploadedFile]:
+        """
+        Read multipart body part by part: files are written chunk by chunk
+        as defined by given UploadPolicy and other fields become
+        body parameters.
+        :raise UploadTooLargeException: as soon as a size limit is exceeded
+        """
+        if self._streamed_files is not None:
+            return self._streamed_files
+
+        files = {}  # type: typing.Dict[str, UploadedFile]
+        content_type = self.header_parameters.get("content-type", "")
+        if not content_type.lower().startswith("multipart/"):
+            self._streamed_files = files
+            return files
+
+        upload_policy.check_total_size(self.body_size)
+        forms = MultiDict()
+        read_size = 0
+        reader = await self._request.multipart()
+        try:
+            async for part in reader:
+                if not isinstance(part, BodyPartReader):
+                    continue
+
+                if part.filename is None:
+                    value = bytearray()
+                else:
+                    if part.name in files:
+                        # Only last file of a field is kept: previous one is dropped
+                        await files.pop(part.name).abort()
+                    uploaded_file = upload_policy.open_file(
+                        part.name, part.filename, part.headers.get(CONTENT_TYPE), part.headers
+                    )
+                    files[part.name] = uploaded_file
+
+                while True:
+                    chunk = await part.read_chunk(upload_policy.chunk_size)
+                    if not chunk:
+                        break
+                    read_size += len(chunk)
+                    upload_policy.check_total_size(read_size)
+                    if part.filename is None:
+                        value.extend(chunk)
+                    else:
+                        await uploaded_file.write(chunk)
+                        upload_policy.check_file_size(part.name, uploaded_file.size)
+
+                if part.filename is None:
+                    forms.add(part.name, value.decode(part.get_charset(default="utf-8")))
+                else:
+                    await uploaded_file.finish()
+        except Exception:
+            for uploaded_file in files.values():
+                await uploaded_file.abort()
+            raise
+
+        self._parsed_body = forms
+        self._streamed_files = files
+        return files
 
     @property
     async def files_parameters(self):
@@ -77,6 +168,148 @@ class AiohttpRequestParameters(RequestParameters):
         return files_parameters
 
 
+class AiohttpFileResponse(web.StreamResponse):
+    """
+    Stream response of a HapicFile: conditional and Range request headers are
+    evaluated when response is prepared. A whole file given by path and not
+    compressed is sent with kernel sendfile, like aiohttp FileResponse.
+    Else only needed parts of file are read (and compressed if a
+    CompressionPolicy is given), in an executor.
+    """
+
+    def __init__(
+        self,
+        file_response: HapicFile,
+        status: int = HTTPStatus.OK,
+        compression_policy: typing.Optional[CompressionPolicy] = None,
+    ) -> None:
+        super().__init__(status=status)
+        self._file_response = file_response
+        self._compression_policy = compression_policy
+
+    async def prepare(self, request: Request) -> typing.Any:
+        conditional_response = evaluate_file_request(
+            self._file_response, request.headers, self.status
+        )
+        chunks = conditional_response.iter_body()
+        headers = conditional_response.headers
+        if self._compression_policy is not None and conditional_response.is_whole_file:
+            chunks, headers = self._compression_policy.compress_stream_response(
+                chunks,
+                headers.get("Content-Type"),
+                headers,
+                request.headers.get(ACCEPT_ENCODING),
+                size=conditional_response.content_length,
+                flush=False,
+            )
+        elif self._compression_policy is not None:
+            headers = self._compression_policy.get_uncompressed_headers(
+                headers.get("Content-Type"), headers
+            )
+
+        self.set_status(conditional_response.http_code)
+        self.headers.update(headers)
+        writer = await super().prepare(request)
+        if request.method == "HEAD" or not conditional_response.with_body:
+            return writer
+
+        if (
+            conditional_response.is_whole_file
+            and self._file_response.file_path
+            and conditional_response.content_length
+            and "Content-Encoding" not in headers
+        ):
+            return await self._sendfile(request, writer, conditional_response.content_length)
+
+        await self._write_chunks(chunks)
+        return writer
+
+    async def _sendfile(self, request: Request, writer: typing.Any, count: int) -> typing.Any:
+        loop = asyncio.get_event_loop()
+        file_object = await loop.run_in_executor(None, open, self._file_response.file_path, "rb")
+        try:
+            transport = request.transport
+            if transport is None:
+                raise ConnectionResetError("Connection lost")
+
+            await writer.drain()
+            # Event loop fall back on reads and writes if transport (eg. SSL)
+            # doesn't support sendfile
+            await loop.sendfile(transport, file_object, 0, count)
+        finally:
+            file_object.close()
+
+        await super().write_eof()
+        return writer
+
+    async def _write_chunks(self, chunks: typing.Iterator[bytes]) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                await self.write(chunk)
+        finally:
+            chunks.close()
+
+
+class AiohttpCompressedResponse(Response):
+    """
+    Response whose body is compressed when response is prepared, as defined
+    by given CompressionPolicy and request Accept-Encoding header.
+    """
+
+    def __init__(self, compression_policy: CompressionPolicy, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._compression_policy = compression_policy
+
+    async def prepare(self, request: Request) -> typing.Any:
+        if self.prepared or not isinstance(self.body, bytes):
+            return await super().prepare(request)
+
+        compress_response = functools.partial(
+            self._compression_policy.compress_response,
+            self.body,
+            self.content_type,
+            dict(self.headers),
+            request.headers.get(ACCEPT_ENCODING),
+        )
+        if len(self.body) < COMPRESSION_EXECUTOR_SIZE:
+            body, headers = compress_response()
+        else:
+            body, headers = await asyncio.get_event_loop().run_in_executor(None, compress_response)
+
+        if body is not self.body:
+            self.body = body
+        if headers is not None:
+            self.headers.clear()
+            self.headers.update(headers)
+        return await super().prepare(request)
+
+
+class AiohttpStreamResponse(web.StreamResponse):
+    """
+    Stream response who compress written data with its stream_compressor,
+    if any. Each write is flushed so client receive items immediately.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stream_compressor = None  # type: typing.Optional[StreamCompressor]
+
+    async def write(self, data: bytes) -> None:
+        if self.stream_compressor is not None:
+            data = self.stream_compressor.compress(data) + self.stream_compressor.flush()
+        await super().write(data)
+
+    async def write_eof(self, data: bytes = b"") -> None:
+        if self.stream_compressor is not None:
+            data = self.stream_compressor.compress(data) + self.stream_compressor.finish()
+            self.stream_compressor = None
+        await super().write_eof(data)
+
+
 class AiohttpContext(BaseContext):
     def __init__(
         self,
@@ -84,8 +317,9 @@ class AiohttpContext(BaseContext):
         processor_class: typing.Optional[typing.Type[Processor]] = None,
         default_error_builder: ErrorBuilderInterface = None,
         debug: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
     ) -> None:
-        super().__init__(processor_class, default_error_builder)
+        super().__init__(processor_class, default_error_builder, json_backend)
         self._app = app
         self._debug = debug
 
@@ -108,13 +342,16 @@ class AiohttpContext(BaseContext):
                 response = await handler(request)
                 return response
             except Exception as exc:
-                # Parse each managed exceptions to manage it if must be
-                for handled_exception in self._handled_exceptions:
-                    if isinstance(exc, handled_exception.exception_class):
-                        self.global_exception_caught(exc, request)
-                        err = self._get_dumped_error_from_exception_error(exc)
-                        return self.get_response(json.dumps(err), handled_exception.http_code)
-                raise exc
+                # Most specific handled exception class is used
+                handled_exception = self._handled_exception_resolver.resolve(type(exc))
+                if handled_exception is None:
+                    raise exc
+
+                self.global_exception_caught(exc, request)
+                return self.get_response(
+                    self._get_encoded_error_from_exception_error(exc),
+                    handled_exception.http_code,
+                )
 
         self._handled_exceptions = []  # type: typing.List[HandledException]
         self._error_middleware = error_middleware
@@ -127,39 +364,42 @@ class AiohttpContext(BaseContext):
     def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
         for arg in args:
             if isinstance(arg, Request):
-                return AiohttpRequestParameters(arg)
+                return AiohttpRequestParameters(arg, self.json_backend)
 
         raise WorkflowException("Unable to get aiohttp request object")
 
     def get_file_response(self, file_response: HapicFile, http_code: int) -> "Response":
-        if file_response.file_path:
-            # TODO - G.M - 2019-03-27 - add support for others parameters of
-            # file_response
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
-            return web.FileResponse(path=file_response.file_path)
-        else:
-            # TODO - G.M - 2019-03-27 - add support for file object case
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
-            raise NotImplementedError()
+        return AiohttpFileResponse(file_response, http_code, self.compression_policy)
 
     def get_response(
-        self, response: str, http_code: int, mimetype: str = "application/json"
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
     ) -> typing.Any:
-        # A 204 no content response should not have content type header
-        if http_code == HTTPStatus.NO_CONTENT:
+        # A 204 no content or 304 not modified response should not have
+        # content type header
+        if http_code in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
             mimetype = None
-            response = ""
-
-        return Response(body=response, status=http_code, content_type=mimetype)
+            response = b""
+        elif self.compression_policy is not None:
+            return AiohttpCompressedResponse(
+                self.compression_policy,
+                body=response,
+                status=http_code,
+                content_type=mimetype,
+                headers=headers,
+            )
+
+        return Response(body=response, status=http_code, content_type=mimetype, headers=headers)
 
     def get_validation_error_response(
         self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
     ) -> typing.Any:
         dumped_error = self._get_dumped_error_from_validation_error(error)
         return web.Response(
-            text=json.dumps(dumped_error),
+            body=self.json_backend.dumps(dumped_error),
             headers=[("Content-Type", "application/json")],
             status=int(http_code),
         )
@@ -168,38 +408,40 @@ class AiohttpContext(BaseContext):
         if not len(self.app.router.routes()):
             raise NoRoutesException("There is no routes in your aiohttp app")
 
-        reference = decorated_controller.reference
+        head_route = None
 
-        for route in self.app.router.routes():
-            route_token = getattr(route.handler, DECORATION_ATTRIBUTE_NAME, None)
-
-            match_with_wrapper = route.handler == reference.wrapper
-            match_with_wrapped = route.handler == reference.wrapped
-            match_with_token = route_token == reference.token
-
-            # TODO BS 2018-07-27: token is set in HEAD view to, must solve this
-            # case
-            if (
-                not match_with_wrapper
-                and not match_with_wrapped
-                and match_with_token
-                and route.method.lower() == "head"
-            ):
+        for route in self._find_routes(decorated_controller):
+            # NOTE BS 2018-07-27: aiohttp add a HEAD route with same
+            # handler for each GET route. Use it only if no other route
+            # match.
+            if route.method.lower() == "head":
+                head_route = head_route or route
                 continue
 
-            if match_with_wrapper or match_with_wrapped or match_with_token:
-                return RouteRepresentation(
-                    rule=self.get_swagger_path(route.resource.canonical),
-                    method=route.method.lower(),
-                    original_route_object=route,
-                )
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route.resource.canonical),
+                method=route.method.lower(),
+                original_route_object=route,
+            )
+
+        if head_route is not None:
+            return RouteRepresentation(
+                rule=self.get_swagger_path(head_route.resource.canonical),
+                method=head_route.method.lower(),
+                original_route_object=head_route,
+            )
+
         # TODO BS 20171010: Raise exception or print error ? see #10
         raise RouteNotFound(
             'Decorated route "{}" was not found in aiohttp routes'.format(decorated_controller.name)
         )
 
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        for route in self.app.router.routes():
+            yield route.handler, route
+
     def get_swagger_path(self, contextualised_rule: str) -> str:
-        return AIOHTTP_RE_PATH_URL.sub(r"{\1}", contextualised_rule)
+        return get_swagger_path(AIOHTTP_RE_PATH_URL, contextualised_rule)
 
     def by_pass_output_wrapping(self, response: typing.Any) -> bool:
         return isinstance(response, web.Response)
@@ -215,7 +457,9 @@ class AiohttpContext(BaseContext):
     def is_debug(self,) -> bool:
         return self._debug
 
-    def handle_exception(self, exception_class: typing.Type[Exception], http_code: int) -> None:
+    def _add_exception_class_to_catch(
+        self, exception_class: typing.Type[Exception], http_code: int
+    ) -> None:
         """
         Manage an exception class (and it's children) by associating an http
         status code
@@ -229,32 +473,38 @@ class AiohttpContext(BaseContext):
         # middleware
         if not self._error_middleware_installed:
             self.app.middlewares.append(self._error_middleware)
+            self._error_middleware_installed = True
 
-    def handle_exceptions(
-        self, exception_classes: typing.List[typing.Type[Exception]], http_code: int
-    ) -> None:
-        """
-        Manage exception classes (and theirs children) by associating an http
-        status code
-        :param exception_classes: exception class list to manage
-        :param http_code: HTTP status code associated
-        """
-        for exception_class in exception_classes:
-            self.handle_exception(exception_class, http_code)
+    def _get_handled_exception_class_and_http_codes(self) -> typing.List[HandledException]:
+        return self._handled_exceptions
 
     async def get_stream_response_object(
         self, func_args, func_kwargs, http_code: HTTPStatus = HTTPStatus.OK, headers: dict = None
     ) -> web.StreamResponse:
         headers = headers or {"Content-Type": "text/plain; charset=utf-8"}
 
-        response = web.StreamResponse(status=http_code, headers=headers)
-
         try:
             request = func_args[0]
         except IndexError:
             raise WorkflowException("Unable to get aiohttp request object")
         request = typing.cast(Request, request)
 
+        compressor = None
+        if self.compression_policy is not None:
+            compressor = self.compression_policy.get_compressor(
+                request.headers.get(ACCEPT_ENCODING), headers.get("Content-Type"), headers
+            )
+        if compressor is not None:
+            headers = get_compressed_headers(headers, compressor.encoding)
+        elif self.compression_policy is not None:
+            headers = self.compression_policy.get_uncompressed_headers(
+                headers.get("Content-Type"), headers
+            )
+
+        response = AiohttpStreamResponse(status=http_code, headers=headers)
+        if compressor is not None:
+            response.stream_compressor = compressor.get_stream_compressor()
+
         await response.prepare(request)
 
         return response
@@ -262,8 +512,14 @@ class AiohttpContext(BaseContext):
     async def feed_stream_response(
         self, stream_response: web.StreamResponse, serialized_item: dict
     ) -> None:
-        await stream_response.write(
-            # FIXME BS 2018-07-25: need \n :/
-            json.dumps(serialized_item).encode("utf-8")
-            + b"\n"
+        await self.write_stream_response(
+            stream_response, self.get_stream_item_bytes(serialized_item)
         )
+
+    async def write_stream_response(self, stream_response: web.StreamResponse, data: bytes) -> None:
+        """
+        Write given encoded items in stream response
+        :param stream_response: stream response object
+        :param data: encoded items
+        """
+        await stream_response.write(data)
@@ -0,0 +1,763 @@
+# coding: utf-8
+import asyncio
+import functools
+from http import HTTPStatus
+import inspect
+import os
+import re
+import typing
+from urllib.parse import parse_qsl
+
+from multidict import MultiDict
+
+from hapic.compression import CompressionPolicy
+from hapic.compression import StreamCompressor  # noqa: F401
+from hapic.compression import get_compressed_headers
+from hapic.conditional import evaluate_file_request
+from hapic.context import BaseContext
+from hapic.context import HandledException
+from hapic.context import RouteRepresentation
+from hapic.data import HapicFile
+from hapic.decorator import DecoratedController
+from hapic.error.main import ErrorBuilderInterface
+from hapic.exception import NoRoutesException
+from hapic.exception import RouteNotFound
+from hapic.exception import WorkflowException
+from hapic.json_backend import JsonBackend
+from hapic.processor.main import Processor
+from hapic.processor.main import ProcessValidationError
+from hapic.processor.main import RequestParameters
+from hapic.upload import MultipartParser
+from hapic.upload import UploadedFile
+from hapic.upload import UploadPolicy
+from hapic.upload import get_header_parameter
+from hapic.util import LowercaseKeysDict
+from hapic.util import get_swagger_path
+
+# Above this size in bytes, response bodies are compressed in an executor
+COMPRESSION_EXECUTOR_SIZE = 1024 * 1024
+
+# Regular expression to locate url parameters, like "{name}" or
+# "{name:regex}" (same syntax as aiohttp)
+ASGI_RE_PATH_URL = re.compile(r"{([^:<>{}]+)(?::([^<>]+))?}")
+
+
+class AsgiHttpError(Exception):
+    """
+    Raised while reading request to answer an http error response, like
+    bottle HTTPError.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+    def get_response(self) -> "AsgiResponse":
+        return AsgiResponse(self.message, self.status, content_type="text/plain")
+
+
+class AsgiRequest(object):
+    """
+    Request built from an ASGI http scope. Body is read from ASGI receive
+    callable only when needed, and chunk by chunk if wanted.
+    """
+
+    def __init__(
+        self,
+        scope: typing.Dict[str, typing.Any],
+        receive: typing.Callable[[], typing.Awaitable[dict]],
+        send: typing.Callable[[dict], typing.Awaitable[None]],
+    ) -> None:
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        # Filled by AsgiApp with url parameters of matched route
+        self.match_info = {}  # type: typing.Dict[str, str]
+        # Shared by hapic decorators, see AsgiContext.get_request_parameters
+        self.request_parameters = None  # type: typing.Optional[AsgiRequestParameters]
+        self._headers = None  # type: typing.Optional[LowercaseKeysDict]
+        self._body = None  # type: typing.Optional[bytes]
+        self._more_body = True
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def path(self) -> str:
+        return self.scope["path"]
+
+    @property
+    def query_string(self) -> str:
+        return self.scope.get("query_string", b"").decode("latin-1")
+
+    @property
+    def headers(self) -> LowercaseKeysDict:
+        if self._headers is None:
+            headers = {}  # type: typing.Dict[str, str]
+            for raw_name, raw_value in self.scope.get("headers", []):
+                name = raw_name.decode("latin-1").lower()
+                value = raw_value.decode("latin-1")
+                # Repeated headers are same as one comma separated header
+                headers[name] = "{}, {}".format(headers[name], value) if name in headers else value
+            self._headers = LowercaseKeysDict(headers)
+        return self._headers
+
+    @property
+    def content_length(self) -> typing.Optional[int]:
+        try:
+            return int(self.headers["content-length"])
+        except (KeyError, ValueError):
+            return None
+
+    async def read_chunk(self) -> typing.Optional[bytes]:
+        """
+        Read next chunk of request body from ASGI receive callable.
+        :return: chunk, or None if whole body was read
+        :raise ConnectionResetError: if client is disconnected
+        """
+        while self._more_body:
+            message = await self.receive()
+            if message["type"] == "http.disconnect":
+                raise ConnectionResetError("Client disconnected while sending request body")
+
+            self._more_body = message.get("more_body", False)
+            chunk = message.get("body", b"")
+            if chunk:
+                return chunk
+
+        return None
+
+    async def body(self) -> bytes:
+        """
+        :return: whole request body, which is kept in memory
+        :raise WorkflowException: if body was already read chunk by chunk
+        """
+        if self._body is None:
+            if not self._more_body:
+                raise WorkflowException("Request body was already read by chunks")
+
+            chunks = []
+            while True:
+                chunk = await self.read_chunk()
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+            self._body = b"".join(chunks)
+
+        return self._body
+
+
+class AsgiRequestParameters(RequestParameters):
+    def __init__(self, request: AsgiRequest, json_backend: JsonBackend) -> None:
+        self._request = request
+        self._json_backend = json_backend
+        self._parsed_body = None
+        self._query_parameters = None  # type: typing.Optional[MultiDict]
+        self._streamed_files = None  # type: typing.Optional[typing.Dict[str, UploadedFile]]
+
+    @property
+    async def body_parameters(self) -> dict:
+        if self._parsed_body is None:
+            content_type = self.header_parameters.get("Content-Type", "")
+            content_type = content_type.split(";")[0].strip().lower()
+
+            if content_type == "application/json":
+                try:
+                    self._parsed_body = self._json_backend.loads(await self._request.body())
+                except ValueError as exc:
+                    raise AsgiHttpError(HTTPStatus.BAD_REQUEST, "Invalid JSON") from exc
+            elif content_type.startswith("multipart/"):
+                # Files are read as defined by endpoint upload policy
+                await self.stream_files_parameters(self.upload_policy or UploadPolicy())
+            elif content_type.startswith("application/x-www-form-urlencoded"):
+                body = (await self._request.body()).decode("utf-8")
+                self._parsed_body = MultiDict(parse_qsl(body, keep_blank_values=True))
+            else:
+                self._parsed_body = MultiDict()
+
+        return self._parsed_body
+
+    @property
+    def body_size(self) -> typing.Optional[int]:
+        return self._request.content_length
+
+    @property
+    def path_parameters(self):
+        return dict(self._request.match_info)
+
+    @property
+    def query_parameters(self):
+        if self._query_parameters is None:
+            self._query_parameters = MultiDict(
+                parse_qsl(self._request.query_string, keep_blank_values=True)
+            )
+        return self._query_parameters
+
+    @property
+    def form_parameters(self):
+        return self.body_parameters
+
+    @property
+    def header_parameters(self) -> LowercaseKeysDict:
+        return self._request.headers
+
+    async def stream_files_parameters(
+        self, upload_policy: UploadPolicy
+    ) -> typing.Dict[str, UploadedFile]:
+        """
+        Read multipart body chunk by chunk from ASGI receive callable: files
+        are written as defined by given UploadPolicy and other fields
+        become body parameters.
+        :raise UploadTooLargeException: as soon as a size limit is exceeded
+        """
+        if self._streamed_files is not None:
+            return self._streamed_files
+
+        files = {}  # type: typing.Dict[str, UploadedFile]
+        content_type = self.header_parameters.get("content-type", "")
+        if not content_type.lower().startswith("multipart/"):
+            self._streamed_files = files
+            return files
+
+        upload_policy.check_total_size(self.body_size)
+        forms = MultiDict()
+        read_size = 0
+        name = value = uploaded_file = None
+        try:
+            parser = MultipartParser.from_content_type(content_type)
+            while True:
+                chunk = await self._request.read_chunk()
+                if chunk is None:
+                    break
+                read_size += len(chunk)
+                upload_policy.check_total_size(read_size)
+
+                for event, event_value in parser.feed(chunk):
+                    if event == MultipartParser.PART_BEGIN:
+                        disposition = event_value.get("content-disposition", "")
+                        name = get_header_parameter(disposition, "name")
+                        filename = get_header_parameter(disposition, "filename")
+                        if filename is None:
+                            value = bytearray()
+                            uploaded_file = None
+                        else:
+                            if name in files:
+                                # Only last file of a field is kept: previous
+                                # one is dropped
+                                await files.pop(name).abort()
+                            uploaded_file = upload_policy.open_file(
+                                name, filename, event_value.get("content-type"), event_value
+                            )
+                            files[name] = uploaded_file
+                    elif event == MultipartParser.PART_DATA:
+                        if uploaded_file is None:
+                            value.extend(event_value)
+                        else:
+                            await uploaded_file.write(event_value)
+                            upload_policy.check_file_size(name, uploaded_file.size)
+                    elif uploaded_file is None:
+                        forms.add(name, value.decode("utf-8"))
+                    else:
+                        await uploaded_file.finish()
+            parser.close()
+        except Exception as exc:
+            for uploaded_file in files.values():
+                await uploaded_file.abort()
+            if isinstance(exc, ValueError):
+                raise AsgiHttpError(HTTPStatus.BAD_REQUEST, "Invalid multipart body") from exc
+            raise
+
+        self._parsed_body = forms
+        self._streamed_files = files
+        return files
+
+    @property
+    async def files_parameters(self):
+        return await self.stream_files_parameters(self.upload_policy or UploadPolicy())
+
+
+class AsgiResponse(object):
+    """
+    Response sent by AsgiApp through ASGI send callable. Body is compressed
+    when response is sent if a CompressionPolicy is given, as defined by
+    request Accept-Encoding header.
+    """
+
+    def __init__(
+        self,
+        body: typing.Union[str, bytes] = b"",
+        status: int = HTTPStatus.OK,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        content_type: typing.Optional[str] = None,
+        compression_policy: typing.Optional[CompressionPolicy] = None,
+    ) -> None:
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.status = int(status)
+        self.headers = dict(headers or {})
+        if content_type is not None:
+            self.headers["Content-Type"] = content_type
+        self._compression_policy = compression_policy
+
+    @staticmethod
+    def get_raw_headers(headers: typing.Dict[str, str]) -> typing.List[typing.List[bytes]]:
+        return [
+            [name.lower().encode("latin-1"), str(value).encode("latin-1")]
+            for name, value in headers.items()
+        ]
+
+    async def send_start(self, request: AsgiRequest, headers: typing.Dict[str, str]) -> None:
+        await request.send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": self.get_raw_headers(headers),
+            }
+        )
+
+    async def send_response(self, request: AsgiRequest) -> None:
+        """
+        Send whole response to client
+        """
+        body, headers = self.body, self.headers
+        if self._compression_policy is not None:
+            compress_response = functools.partial(
+                self._compression_policy.compress_response,
+                body,
+                headers.get("Content-Type"),
+                headers,
+                request.headers.get("accept-encoding"),
+            )
+            if len(body) < COMPRESSION_EXECUTOR_SIZE:
+                body, headers = compress_response()
+            else:
+                body, headers = await asyncio.get_event_loop().run_in_executor(
+                    None, compress_response
+                )
+
+        if self.status not in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            headers = dict(headers, **{"Content-Length": str(len(body))})
+        await self.send_start(request, headers)
+        await request.send(
+            {"type": "http.response.body", "body": b"" if request.method == "HEAD" else body}
+        )
+
+
+class AsgiStreamResponse(AsgiResponse):
+    """
+    Response whose body is sent chunk by chunk: prepare() send status and
+    headers, then each write() send a chunk, compressed with
+    stream_compressor if any.
+    """
+
+    def __init__(
+        self,
+        status: int = HTTPStatus.OK,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        content_type: typing.Optional[str] = None,
+    ) -> None:
+        super().__init__(b"", status, headers, content_type)
+        self.stream_compressor = None  # type: typing.Optional[StreamCompressor]
+        self._request = None  # type: typing.Optional[AsgiRequest]
+        self._eof_sent = False
+
+    @property
+    def prepared(self) -> bool:
+        return self._request is not None
+
+    async def prepare(self, request: AsgiRequest) -> None:
+        self._request = request
+        await self.send_start(request, self.headers)
+
+    async def write(self, data: bytes) -> None:
+        if self._request is None:
+            raise WorkflowException("Stream response must be prepared before write")
+
+        if self.stream_compressor is not None:
+            data = self.stream_compressor.compress(data) + self.stream_compressor.flush()
+        if data and self._request.method != "HEAD":
+            await self._request.send(
+                {"type": "http.response.body", "body": data, "more_body": True}
+            )
+
+    async def write_eof(self, data: bytes = b"") -> None:
+        if self._eof_sent:
+            return
+
+        if self.stream_compressor is not None:
+            data = self.stream_compressor.compress(data) + self.stream_compressor.finish()
+            self.stream_compressor = None
+        if self._request.method == "HEAD":
+            data = b""
+        self._eof_sent = True
+        await self._request.send({"type": "http.response.body", "body": data})
+
+    async def send_response(self, request: AsgiRequest) -> None:
+        if not self.prepared:
+            await self.prepare(request)
+        await self.write_eof()
+
+
+class AsgiFileResponse(AsgiResponse):
+    """
+    Response of a HapicFile: conditional and Range request headers are
+    evaluated when response is sent, then only needed parts of file are
+    read (and compressed if a CompressionPolicy is given), in an executor.
+    """
+
+    def __init__(
+        self,
+        file_response: HapicFile,
+        status: int = HTTPStatus.OK,
+        compression_policy: typing.Optional[CompressionPolicy] = None,
+    ) -> None:
+        super().__init__(b"", status, compression_policy=compression_policy)
+        self._file_response = file_response
+
+    async def send_response(self, request: AsgiRequest) -> None:
+        conditional_response = evaluate_file_request(
+            self._file_response, request.headers, self.status
+        )
+        chunks = conditional_response.iter_body()
+        headers = conditional_response.headers
+        if self._compression_policy is not None and conditional_response.is_whole_file:
+            chunks, headers = self._compression_policy.compress_stream_response(
+                chunks,
+                headers.get("Content-Type"),
+                headers,
+                request.headers.get("accept-encoding"),
+                size=conditional_response.content_length,
+                flush=False,
+            )
+        elif self._compression_policy is not None:
+            headers = self._compression_policy.get_uncompressed_headers(
+                headers.get("Content-Type"), headers
+            )
+
+        self.status = conditional_response.http_code
+        self.headers.update(headers)
+        await self.send_start(request, self.headers)
+        if request.method == "HEAD" or not conditional_response.with_body:
+            chunks.close()
+            await request.send({"type": "http.response.body", "body": b""})
+            return
+
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                await request.send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            chunks.close()
+
+        await request.send({"type": "http.response.body", "body": b""})
+
+
+class AsgiRoute(object):
+    """
+    Route of an AsgiApp. Path can contain parameters, like "/users/{id}"
+    or "/users/{id:\\d+}".
+    """
+
+    def __init__(
+        self, method: str, path: str, handler: typing.Callable[[AsgiRequest], typing.Any]
+    ) -> None:
+        self.method = method.upper()
+        self.path = path
+        self.handler = handler
+        self.is_static = ASGI_RE_PATH_URL.search(path) is None
+
+        pattern = []
+        position = 0
+        for match in ASGI_RE_PATH_URL.finditer(path):
+            parameter_start = match.start()
+            pattern.append(re.escape(path[position:parameter_start]))
+            pattern.append("(?P<{}>{})".format(match.group(1), match.group(2) or "[^/]+"))
+            position = match.end()
+        pattern.append(re.escape(path[position:]))
+        self.regex = re.compile("^{}$".format("".join(pattern)))
+
+
+class AsgiApp(object):
+    """
+    Minimal ASGI application, to serve hapic controllers with any ASGI
+    server (uvicorn, hypercorn, ...) or to mount in an other ASGI
+    application. Handlers are called with an AsgiRequest and must return
+    an AsgiResponse.
+    """
+
+    def __init__(self) -> None:
+        self.routes = []  # type: typing.List[AsgiRoute]
+        self._static_routes = {}  # type: typing.Dict[typing.Tuple[str, str], AsgiRoute]
+        # Called with request and exception raised by a handler, must
+        # return a response or raise
+        self.exception_handler = None  # type: typing.Optional[typing.Callable[..., AsgiResponse]]
+
+    def add_route(
+        self, method: str, path: str, handler: typing.Callable[[AsgiRequest], typing.Any]
+    ) -> AsgiRoute:
+        route = AsgiRoute(method, path, handler)
+        self.routes.append(route)
+        if route.is_static:
+            self._static_routes.setdefault((route.method, route.path), route)
+        return route
+
+    def add_static(self, prefix: str, directory: str) -> AsgiRoute:
+        """
+        Serve files of given directory under given route prefix
+        """
+        directory = os.path.abspath(directory)
+
+        def static_handler(request: AsgiRequest) -> AsgiResponse:
+            file_path = os.path.abspath(os.path.join(directory, request.match_info["filename"]))
+            if not file_path.startswith(directory + os.sep) or not os.path.isfile(file_path):
+                return AsgiResponse(b"Not Found", HTTPStatus.NOT_FOUND, content_type="text/plain")
+            return AsgiFileResponse(HapicFile(file_path=file_path))
+
+        return self.add_route(
+            "GET", "{}/{{filename:.+}}".format(prefix.rstrip("/")), static_handler
+        )
+
+    def match_route(
+        self, method: str, path: str
+    ) -> typing.Tuple[typing.Optional[AsgiRoute], typing.Dict[str, str], typing.Set[str]]:
+        """
+        :return: matched route (or None), its url parameters and allowed
+        methods for this path
+        """
+        for route_method in (method, "GET") if method == "HEAD" else (method,):
+            route = self._static_routes.get((route_method, path))
+            if route is not None:
+                return route, {}, set()
+
+        allowed_methods = set()
+        for route in self.routes:
+            match = route.regex.match(path)
+            if match is None:
+                continue
+            if route.method == method or (method == "HEAD" and route.method == "GET"):
+                return route, match.groupdict(), set()
+            allowed_methods.add(route.method)
+
+        return None, {}, allowed_methods
+
+    async def handle(self, request: AsgiRequest) -> AsgiResponse:
+        route, match_info, allowed_methods = self.match_route(request.method, request.path)
+        if route is None:
+            if allowed_methods:
+                return AsgiResponse(
+                    b"Method Not Allowed",
+                    HTTPStatus.METHOD_NOT_ALLOWED,
+                    headers={"Allow": ", ".join(sorted(allowed_methods))},
+                    content_type="text/plain",
+                )
+            return AsgiResponse(b"Not Found", HTTPStatus.NOT_FOUND, content_type="text/plain")
+
+        request.match_info = match_info
+        try:
+            response = route.handler(request)
+            if inspect.isawaitable(response):
+                response = await response
+        except AsgiHttpError as exc:
+            response = exc.get_response()
+        except Exception as exc:
+            if self.exception_handler is None:
+                raise
+            response = self.exception_handler(request, exc)
+
+        if not isinstance(response, AsgiResponse):
+            raise WorkflowException(
+                'Handler of "{} {}" must return an AsgiResponse'.format(route.method, route.path)
+            )
+        return response
+
+    async def __call__(
+        self,
+        scope: typing.Dict[str, typing.Any],
+        receive: typing.Callable[[], typing.Awaitable[dict]],
+        send: typing.Callable[[dict], typing.Awaitable[None]],
+    ) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if scope["type"] != "http":
+            raise WorkflowException('Unsupported ASGI scope type "{}"'.format(scope["type"]))
+
+        request = AsgiRequest(scope, receive, send)
+        response = await self.handle(request)
+        await response.send_response(request)
+
+
+class AsgiContext(BaseContext):
+    def __init__(
+        self,
+        app: typing.Optional[AsgiApp] = None,
+        processor_class: typing.Optional[typing.Type[Processor]] = None,
+        default_error_builder: ErrorBuilderInterface = None,
+        debug: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
+    ) -> None:
+        super().__init__(processor_class, default_error_builder, json_backend)
+        self._app = app if app is not None else AsgiApp()
+        self._debug = debug
+        self._handled_exceptions = []  # type: typing.List[HandledException]
+
+    @property
+    def app(self) -> AsgiApp:
+        return self._app
+
+    def _get_request(self, args: typing.Iterable[typing.Any]) -> AsgiRequest:
+        for arg in args:
+            if isinstance(arg, AsgiRequest):
+                return arg
+
+        raise WorkflowException("Unable to get asgi request object")
+
+    def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
+        request = self._get_request(args)
+        # Request body can be read only once: parameters are shared by
+        # decorators of the controller
+        if request.request_parameters is None:
+            request.request_parameters = AsgiRequestParameters(request, self.json_backend)
+        return request.request_parameters
+
+    def get_file_response(self, file_response: HapicFile, http_code: int) -> AsgiFileResponse:
+        return AsgiFileResponse(file_response, http_code, self.compression_policy)
+
+    def get_response(
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> AsgiResponse:
+        # A 204 no content or 304 not modified response should not have
+        # content type header
+        if http_code in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            return AsgiResponse(b"", http_code, headers)
+
+        return AsgiResponse(response, http_code, headers, mimetype, self.compression_policy)
+
+    def get_validation_error_response(
+        self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
+    ) -> AsgiResponse:
+        dumped_error = self._get_dumped_error_from_validation_error(error)
+        return AsgiResponse(
+            self.json_backend.dumps(dumped_error), http_code, content_type="application/json"
+        )
+
+    def find_route(self, decorated_controller: DecoratedController) -> RouteRepresentation:
+        if not self.app.routes:
+            raise NoRoutesException("There is no routes in your asgi app")
+
+        for route in self._find_routes(decorated_controller):
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route.path),
+                method=route.method.lower(),
+                original_route_object=route,
+            )
+
+        raise RouteNotFound(
+            'Decorated route "{}" was not found in asgi routes'.format(decorated_controller.name)
+        )
+
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        for route in self.app.routes:
+            yield route.handler, route
+
+    def get_swagger_path(self, contextualised_rule: str) -> str:
+        return get_swagger_path(ASGI_RE_PATH_URL, contextualised_rule)
+
+    def by_pass_output_wrapping(self, response: typing.Any) -> bool:
+        return isinstance(response, AsgiResponse)
+
+    def add_view(
+        self, route: str, http_method: str, view_func: typing.Callable[..., typing.Any]
+    ) -> None:
+        self.app.add_route(http_method, route, view_func)
+
+    def serve_directory(self, route_prefix: str, directory_path: str) -> None:
+        self.app.add_static(route_prefix, directory_path)
+
+    def is_debug(self) -> bool:
+        return self._debug
+
+    def _handle_app_exception(self, request: AsgiRequest, exc: Exception) -> AsgiResponse:
+        """
+        Exception handler installed in asgi app: return an hapic response
+        if raised exception is handled, else raise it again.
+        """
+        # Most specific handled exception class is used
+        handled_exception = self._handled_exception_resolver.resolve(type(exc))
+        if handled_exception is None:
+            raise exc
+
+        self.global_exception_caught(exc, request)
+        return self.get_response(
+            self._get_encoded_error_from_exception_error(exc), handled_exception.http_code
+        )
+
+    def _add_exception_class_to_catch(
+        self, exception_class: typing.Type[Exception], http_code: int
+    ) -> None:
+        """
+        Manage an exception class (and it's children) by associating an http
+        status code
+        :param exception_class: exception class to manage
+        :param http_code: HTTP status code associated
+        """
+        self._handled_exceptions.append(HandledException(exception_class, http_code))
+        self.app.exception_handler = self._handle_app_exception
+
+    def _get_handled_exception_class_and_http_codes(self) -> typing.List[HandledException]:
+        return self._handled_exceptions
+
+    async def get_stream_response_object(
+        self, func_args, func_kwargs, http_code: HTTPStatus = HTTPStatus.OK, headers: dict = None
+    ) -> AsgiStreamResponse:
+        headers = headers or {"Content-Type": "text/plain; charset=utf-8"}
+        request = self._get_request(func_args)
+
+        compressor = None
+        if self.compression_policy is not None:
+            compressor = self.compression_policy.get_compressor(
+                request.headers.get("accept-encoding"), headers.get("Content-Type"), headers
+            )
+        if compressor is not None:
+            headers = get_compressed_headers(headers, compressor.encoding)
+        elif self.compression_policy is not None:
+            headers = self.compression_policy.get_uncompressed_headers(
+                headers.get("Content-Type"), headers
+            )
+
+        response = AsgiStreamResponse(http_code, headers)
+        if compressor is not None:
+            response.stream_compressor = compressor.get_stream_compressor()
+
+        await response.prepare(request)
+
+        return response
+
+    async def feed_stream_response(
+        self, stream_response: AsgiStreamResponse, serialized_item: dict
+    ) -> None:
+        await self.write_stream_response(
+            stream_response, self.get_stream_item_bytes(serialized_item)
+        )
+
+    async def write_stream_response(self, stream_response: AsgiStreamResponse, data: bytes) -> None:
+        """
+        Write given encoded items in stream response
+        :param stream_response: stream response object
+        :param data: encoded items
+        """
+        await stream_response.write(data)
@@ -1,24 +1,25 @@
 # -*- coding: utf-8 -*-
-import json
 import re
 import typing
 
 import bottle
 from multidict import MultiDict
 
+from hapic.conditional import evaluate_file_request
 from hapic.context import BaseContext
 from hapic.context import HandledException
 from hapic.context import RouteRepresentation
 from hapic.data import HapicFile
-from hapic.decorator import DECORATION_ATTRIBUTE_NAME
 from hapic.decorator import DecoratedController
 from hapic.error.main import ErrorBuilderInterface
 from hapic.exception import NoRoutesException
 from hapic.exception import RouteNotFound
+from hapic.json_backend import JsonBackend
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
 from hapic.util import LowercaseKeysDict
+from hapic.util import get_swagger_path
 
 try:  # Python 3.5+
     from http import HTTPStatus
@@ -30,6 +31,77 @@ except ImportError:
 BOTTLE_RE_PATH_URL = re.compile(r"<([^:<>]+)(?::[^<>]+)?>")
 
 
+class BottleRequestParameters(RequestParameters):
+    """
+    Bottle request parameters. Each parameter group is read from request only
+    on first access.
+    """
+
+    def __init__(self, request: bottle.BaseRequest, json_backend: JsonBackend) -> None:
+        self._request = request
+        self._json_backend = json_backend
+        self._path_parameters = None  # type: typing.Optional[dict]
+        self._query_parameters = None  # type: typing.Optional[MultiDict]
+        self._body_parameters = None  # type: typing.Optional[dict]
+        self._form_parameters = None  # type: typing.Optional[MultiDict]
+        self._header_parameters = None  # type: typing.Optional[LowercaseKeysDict]
+        self._files_parameters = None  # type: typing.Optional[dict]
+
+    @property
+    def body_size(self) -> typing.Optional[int]:
+        # bottle give -1 if Content-Length is missing
+        content_length = self._request.content_length
+        return content_length if content_length >= 0 else None
+
+    @property
+    def path_parameters(self) -> dict:
+        if self._path_parameters is None:
+            self._path_parameters = dict(self._request.url_args)
+        return self._path_parameters
+
+    @property
+    def query_parameters(self) -> MultiDict:
+        if self._query_parameters is None:
+            self._query_parameters = MultiDict(self._request.query.allitems())
+        return self._query_parameters
+
+    @property
+    def body_parameters(self) -> dict:
+        if self._body_parameters is None:
+            # Same behaviour than bottle BaseRequest.json
+            content_type = self._request.content_type.lower().split(";")[0]
+            json_body = None
+            if content_type in ("application/json", "application/json-rpc"):
+                raw_body = self._request.body.read()
+                if raw_body:
+                    try:
+                        json_body = self._json_backend.loads(raw_body)
+                    except ValueError as exc:
+                        raise bottle.HTTPError(400, "Invalid JSON") from exc
+            self._body_parameters = dict(json_body or {})
+        return self._body_parameters
+
+    @property
+    def form_parameters(self) -> MultiDict:
+        if self._form_parameters is None:
+            self._form_parameters = MultiDict(self._request.forms.allitems())
+        return self._form_parameters
+
+    @property
+    def header_parameters(self) -> LowercaseKeysDict:
+        if self._header_parameters is None:
+            self._header_parameters = LowercaseKeysDict(
+                [(k.lower(), v) for k, v in self._request.headers.items()]
+            )
+        return self._header_parameters
+
+    @property
+    def files_parameters(self) -> dict:
+        if self._files_parameters is None:
+            self._files_parameters = dict(self._request.files)
+        return self._files_parameters
+
+
 class BottleContext(BaseContext):
     def __init__(
         self,
@@ -37,58 +109,73 @@ class BottleContext(BaseContext):
         processor_class: typing.Optional[typing.Type[Processor]] = None,
         default_error_builder: ErrorBuilderInterface = None,
         debug: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
     ):
-        super().__init__(processor_class, default_error_builder)
+        super().__init__(processor_class, default_error_builder, json_backend)
         self._handled_exceptions = []  # type: typing.List[HandledException]
         self._exceptions_handler_installed = False
         self.app = app
         self.debug = debug
 
     def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
-        path_parameters = dict(bottle.request.url_args)
-        query_parameters = MultiDict(bottle.request.query.allitems())
-        body_parameters = dict(bottle.request.json or {})
-        form_parameters = MultiDict(bottle.request.forms.allitems())
-        header_parameters = LowercaseKeysDict(
-            [(k.lower(), v) for k, v in bottle.request.headers.items()]
-        )
-        files_parameters = dict(bottle.request.files)
-
-        return RequestParameters(
-            path_parameters=path_parameters,
-            query_parameters=query_parameters,
-            body_parameters=body_parameters,
-            form_parameters=form_parameters,
-            header_parameters=header_parameters,
-            files_parameters=files_parameters,
-        )
+        return BottleRequestParameters(bottle.request, self.json_backend)
+
+    def _get_accept_encoding(self) -> typing.Optional[str]:
+        return bottle.request.headers.get("Accept-Encoding")
 
     def get_file_response(self, file_response: HapicFile, http_code: int) -> bottle.HTTPResponse:
-        if file_response.file_path:
-            # TODO - G.M - 2019-03-27 - add support for others parameters of
-            # file_response
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
-            return bottle.static_file(file_response.file_path, root="/")
+        conditional_response = evaluate_file_request(
+            file_response, bottle.request.headers, http_code
+        )
+        compressed_body = self._compress_file_response(conditional_response)
+        if compressed_body is not None:
+            body = compressed_body
+        elif conditional_response.is_whole_file:
+            # INFO - bottle send file like body with wsgi.file_wrapper of
+            # server when available, or else chunk by chunk
+            if file_response.file_path:
+                body = open(file_response.file_path, "rb")
+            else:
+                body = file_response.file_object
         else:
-            # TODO - G.M - 2019-03-27 - add support for file object case
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
-            raise NotImplementedError()
+            # Not modified, partial content or range not satisfiable
+            body = conditional_response.iter_body()
 
-    def get_response(
-        self, response: str, http_code: int, mimetype: str = "application/json"
-    ) -> bottle.HTTPResponse:
         return bottle.HTTPResponse(
-            body=response, headers=[("Content-Type", mimetype)], status=http_code
+            body=body, status=conditional_response.http_code, headers=conditional_response.headers
         )
 
+    def get_response(
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> bottle.HTTPResponse:
+        response, headers = self._compress_response(response, http_code, mimetype, headers)
+        response_headers = [("Content-Type", mimetype)]
+        response_headers.extend((headers or {}).items())
+        return bottle.HTTPResponse(body=response, headers=response_headers, status=http_code)
+
+    def get_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        http_code: int,
+        mimetype: str = "text/plain; charset=utf-8",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> bottle.HTTPResponse:
+        # bottle send iterable bodies chunk by chunk
+        stream, headers = self._compress_stream_response(stream, mimetype, headers)
+        response_headers = [("Content-Type", mimetype)]
+        response_headers.extend((headers or {}).items())
+        return bottle.HTTPResponse(body=stream, headers=response_headers, status=http_code)
+
     def get_validation_error_response(
         self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
     ) -> typing.Any:
         dumped_error = self._get_dumped_error_from_validation_error(error)
         return bottle.HTTPResponse(
-            body=json.dumps(dumped_error),
+            body=self.json_backend.dumps(dumped_error),
             headers=[("Content-Type", "application/json")],
             status=int(http_code),
         )
@@ -97,27 +184,23 @@ class BottleContext(BaseContext):
         if not self.app.routes:
             raise NoRoutesException("There is no routes in your bottle app")
 
-        reference = decorated_controller.reference
-        for route in self.app.routes:
-            route_token = getattr(route.callback, DECORATION_ATTRIBUTE_NAME, None)
-
-            match_with_wrapper = route.callback == reference.wrapper
-            match_with_wrapped = route.callback == reference.wrapped
-            match_with_token = route_token == reference.token
-
-            if match_with_wrapper or match_with_wrapped or match_with_token:
-                return RouteRepresentation(
-                    rule=self.get_swagger_path(route.rule),
-                    method=route.method.lower(),
-                    original_route_object=route,
-                )
+        for route in self._find_routes(decorated_controller):
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route.rule),
+                method=route.method.lower(),
+                original_route_object=route,
+            )
         # TODO BS 20171010: Raise exception or print error ? see #10
         raise RouteNotFound(
             'Decorated route "{}" was not found in bottle routes'.format(decorated_controller.name)
         )
 
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        for route in self.app.routes:
+            yield route.callback, route
+
     def get_swagger_path(self, contextualised_rule: str) -> str:
-        return BOTTLE_RE_PATH_URL.sub(r"{\1}", contextualised_rule)
+        return get_swagger_path(BOTTLE_RE_PATH_URL, contextualised_rule)
 
     def by_pass_output_wrapping(self, response: typing.Any) -> bool:
         if isinstance(response, bottle.HTTPResponse):
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import json
 import re
 import typing
 
@@ -7,16 +6,18 @@ from flask import Flask
 from flask import send_file
 from flask import send_from_directory
 
+from hapic.conditional import evaluate_file_request
 from hapic.context import BaseContext
 from hapic.context import RouteRepresentation
 from hapic.data import HapicFile
-from hapic.decorator import DECORATION_ATTRIBUTE_NAME
 from hapic.decorator import DecoratedController
 from hapic.error.main import ErrorBuilderInterface
+from hapic.json_backend import JsonBackend
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
 from hapic.util import LowercaseKeysDict
+from hapic.util import get_swagger_path
 
 try:  # Python 3.5+
     from http import HTTPStatus
@@ -25,6 +26,7 @@ except ImportError:
 
 
 if typing.TYPE_CHECKING:
+    from flask import Request
     from flask import Response
     from hapic.context import HandledException  # noqa: F401
 
@@ -32,6 +34,65 @@ if typing.TYPE_CHECKING:
 FLASK_RE_PATH_URL = re.compile(r"<(?:[^:<>]+:)?([^<>]+)>")
 
 
+class FlaskRequestParameters(RequestParameters):
+    """
+    Flask request parameters. Each parameter group is read from request only
+    on first access.
+    """
+
+    def __init__(self, request: "Request", json_backend: JsonBackend) -> None:
+        self._request = request
+        self._json_backend = json_backend
+        self._query_parameters = None  # type: typing.Optional[dict]
+        self._body_parameters = None  # type: typing.Optional[dict]
+        self._header_parameters = None  # type: typing.Optional[LowercaseKeysDict]
+
+    @property
+    def body_size(self) -> typing.Optional[int]:
+        return self._request.content_length
+
+    @property
+    def path_parameters(self) -> dict:
+        return self._request.view_args
+
+    @property
+    def query_parameters(self) -> dict:
+        if self._query_parameters is None:
+            self._query_parameters = dict(self._request.args)
+        return self._query_parameters
+
+    @property
+    def body_parameters(self) -> dict:
+        if self._body_parameters is None:
+            if self._request.is_json:
+                from werkzeug.exceptions import BadRequest
+
+                try:
+                    self._body_parameters = self._json_backend.loads(self._request.get_data())
+                except ValueError as exc:
+                    # Same behaviour than flask Request.get_json
+                    raise BadRequest("Failed to decode JSON object: {}".format(exc)) from exc
+            else:
+                self._body_parameters = {}
+        return self._body_parameters
+
+    @property
+    def form_parameters(self):
+        return self._request.form
+
+    @property
+    def header_parameters(self) -> LowercaseKeysDict:
+        if self._header_parameters is None:
+            self._header_parameters = LowercaseKeysDict(
+                [(k.lower(), v) for k, v in self._request.headers.items()]
+            )
+        return self._header_parameters
+
+    @property
+    def files_parameters(self):
+        return self._request.files
+
+
 class FlaskContext(BaseContext):
     def __init__(
         self,
@@ -39,8 +100,9 @@ class FlaskContext(BaseContext):
         processor_class: typing.Optional[typing.Type[Processor]] = None,
         default_error_builder: ErrorBuilderInterface = None,
         debug: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
     ):
-        super().__init__(processor_class, default_error_builder)
+        super().__init__(processor_class, default_error_builder, json_backend)
         self._handled_exceptions = []  # type: typing.List[HandledException]
         self.app = app
         self.debug = debug
@@ -48,43 +110,81 @@ class FlaskContext(BaseContext):
     def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
         from flask import request
 
-        return RequestParameters(
-            path_parameters=request.view_args,
-            query_parameters=dict(request.args),
-            body_parameters=request.get_json() if request.is_json else {},
-            form_parameters=request.form,
-            header_parameters=LowercaseKeysDict(
-                [(k.lower(), v) for k, v in request.headers.items()]
-            ),
-            files_parameters=request.files,
-        )
+        return FlaskRequestParameters(request, self.json_backend)
+
+    def _get_accept_encoding(self) -> typing.Optional[str]:
+        from flask import has_request_context
+        from flask import request
+
+        if not has_request_context():
+            return None
+        return request.headers.get("Accept-Encoding")
 
     def get_file_response(self, file_response: HapicFile, http_code: int) -> "Response":
-        if file_response.file_path:
-            # TODO - G.M - 2019-03-27 - add support for others parameters of
-            # file_response
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
-            return send_file(filename_or_fp=file_response.file_path)
-        else:
-            # TODO - G.M - 2019-03-27 - add support for file object case
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
-            raise NotImplementedError()
+        from flask import Response
+        from flask import request
+
+        conditional_response = evaluate_file_request(file_response, request.headers, http_code)
+        compressed_body = self._compress_file_response(conditional_response)
+        if compressed_body is not None:
+            return Response(
+                compressed_body,
+                status=conditional_response.http_code,
+                headers=conditional_response.headers,
+                direct_passthrough=True,
+            )
+
+        if not conditional_response.is_whole_file:
+            # Not modified, partial content or range not satisfiable
+            return Response(
+                conditional_response.iter_body(),
+                status=conditional_response.http_code,
+                headers=conditional_response.headers,
+                direct_passthrough=True,
+            )
+
+        # INFO - send_file use wsgi.file_wrapper of server when available
+        # (sendfile for paths) and read file objects chunk by chunk
+        response = send_file(
+            file_response.file_path or file_response.file_object,
+            mimetype=conditional_response.headers["Content-Type"],
+            conditional=False,
+        )
+        response.status_code = conditional_response.http_code
+        response.headers.pop("ETag", None)
+        response.headers.update(conditional_response.headers)
+        return response
 
     def get_response(
-        self, response: str, http_code: int, mimetype: str = "application/json"
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
     ) -> "Response":
         from flask import Response
 
-        response = Response(response=response, mimetype=mimetype, status=http_code)
+        response, headers = self._compress_response(response, http_code, mimetype, headers)
+        response = Response(response=response, mimetype=mimetype, status=http_code, headers=headers)
         # INFO - G.M - 2019-04-01 - Response object of flask always setup content-type
         # even when http_code is 204 NO-CONTENT
         # this is a fix to have correct behaviour with 204 response.
-        if http_code == 204:
+        if http_code in (204, 304):
             del response.headers["content-type"]
         return response
 
+    def get_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        http_code: int,
+        mimetype: str = "text/plain; charset=utf-8",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> "Response":
+        from flask import Response
+
+        stream, headers = self._compress_stream_response(stream, mimetype, headers)
+        return Response(response=stream, content_type=mimetype, status=http_code, headers=headers)
+
     def get_validation_error_response(
         self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
     ) -> typing.Any:
@@ -92,35 +192,33 @@ class FlaskContext(BaseContext):
 
         dumped_error = self._get_dumped_error_from_validation_error(error)
         return Response(
-            response=json.dumps(dumped_error), mimetype="application/json", status=int(http_code)
+            response=self.json_backend.dumps(dumped_error),
+            mimetype="application/json",
+            status=int(http_code),
         )
 
     def find_route(self, decorated_controller: "DecoratedController"):
-        reference = decorated_controller.reference
-        for route in self.app.url_map.iter_rules():
-            if route.endpoint not in self.app.view_functions:
-                continue
-            route_callback = self.app.view_functions[route.endpoint]
-            route_token = getattr(route_callback, DECORATION_ATTRIBUTE_NAME, None)
-            match_with_wrapper = route_callback == reference.wrapper
-            match_with_wrapped = route_callback == reference.wrapped
-            match_with_token = route_token == reference.token
-
+        for route in self._find_routes(decorated_controller):
             # FIXME - G.M - 2017-12-04 - return list instead of one method
             # This fix, return only 1 allowed method, change this when
             # RouteRepresentation is adapted to return multiples methods.
             method = [x for x in route.methods if x not in ["OPTIONS", "HEAD"]][0]
 
-            if match_with_wrapper or match_with_wrapped or match_with_token:
-                return RouteRepresentation(
-                    rule=self.get_swagger_path(route.rule),
-                    method=method,
-                    original_route_object=route,
-                )
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route.rule),
+                method=method,
+                original_route_object=route,
+            )
+
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        for route in self.app.url_map.iter_rules():
+            if route.endpoint not in self.app.view_functions:
+                continue
+            yield self.app.view_functions[route.endpoint], route
 
     def get_swagger_path(self, contextualised_rule: str) -> str:
         # TODO - G.M - 2017-12-05 Check if all route path are handled correctly
-        return FLASK_RE_PATH_URL.sub(r"{\1}", contextualised_rule)
+        return get_swagger_path(FLASK_RE_PATH_URL, contextualised_rule)
 
     def by_pass_output_wrapping(self, response: typing.Any) -> bool:
         from flask import Response
@@ -146,8 +244,7 @@ class FlaskContext(BaseContext):
     ) -> None:
         def return_response_error(exc):
             self.global_exception_caught(exc)
-            dumped_error = self._get_dumped_error_from_exception_error(exc)
-            return self.get_response(json.dumps(dumped_error), http_code)
+            return self.get_response(self._get_encoded_error_from_exception_error(exc), http_code)
 
         self.app.register_error_handler(exception_class, return_response_error)
 
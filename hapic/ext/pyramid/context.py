@@ -1,17 +1,18 @@
 # -*- coding: utf-8 -*-
 import cgi
-import json
 import logging
 import re
 import traceback
 import typing
 
+from hapic.conditional import FILE_CHUNK_SIZE
+from hapic.conditional import evaluate_file_request
 from hapic.context import BaseContext
 from hapic.context import RouteRepresentation
 from hapic.data import HapicFile
-from hapic.decorator import DECORATION_ATTRIBUTE_NAME
 from hapic.decorator import DecoratedController
 from hapic.error.main import ErrorBuilderInterface
+from hapic.json_backend import JsonBackend
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
@@ -25,6 +26,7 @@ except ImportError:
 
 
 if typing.TYPE_CHECKING:
+    from pyramid.request import Request
     from pyramid.response import Response
     from pyramid.config import Configurator
     from hapic.context import HandledException  # noqa: F401
@@ -33,6 +35,75 @@ if typing.TYPE_CHECKING:
 PYRAMID_RE_PATH_URL = re.compile(r"")
 
 
+class PyramidRequestParameters(RequestParameters):
+    """
+    Pyramid request parameters. Each parameter group is read from request
+    only on first access.
+    """
+
+    def __init__(self, request: "Request", json_backend: JsonBackend) -> None:
+        self._request = request
+        self._json_backend = json_backend
+        self._body_parameters = None  # type: typing.Optional[dict]
+        self._header_parameters = None  # type: typing.Optional[LowercaseKeysDict]
+        self._files_parameters = None  # type: typing.Optional[dict]
+
+    @property
+    def body_size(self) -> typing.Optional[int]:
+        return self._request.content_length
+
+    @property
+    def path_parameters(self) -> dict:
+        return self._request.matchdict
+
+    @property
+    def query_parameters(self):
+        return self._request.GET
+
+    @property
+    def body_parameters(self) -> dict:
+        if self._body_parameters is None:
+            req = self._request
+            # TODO : move this code to check_json
+            # same idea as in : https://bottlepy.org/docs/dev/_modules/bottle.html#BaseRequest.json
+            if req.content_type in ("application/json", "application/json-rpc"):
+                try:
+                    json_body = self._json_backend.loads(req.body)
+                # TODO - G.M - 2019-06-06 -  raise exception if not correct ,
+                # return 400 if uncorrect instead ?
+                except Exception:
+                    json_body = {}
+
+            else:
+                json_body = {}
+            self._body_parameters = json_body
+
+        return self._body_parameters
+
+    @property
+    def form_parameters(self):
+        return self._request.POST
+
+    @property
+    def header_parameters(self) -> LowercaseKeysDict:
+        if self._header_parameters is None:
+            self._header_parameters = LowercaseKeysDict(
+                [(k.lower(), v) for k, v in self._request.headers.items()]
+            )
+        return self._header_parameters
+
+    @property
+    def files_parameters(self) -> dict:
+        if self._files_parameters is None:
+            files_parameters = {}
+            for name, item in self._request.POST.items():
+                if isinstance(item, cgi.FieldStorage):
+                    files_parameters[name] = item
+            self._files_parameters = files_parameters
+
+        return self._files_parameters
+
+
 class PyramidContext(BaseContext):
     def __init__(
         self,
@@ -40,97 +111,93 @@ class PyramidContext(BaseContext):
         processor_class: typing.Optional[typing.Type[Processor]] = None,
         default_error_builder: ErrorBuilderInterface = None,
         debug: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
     ):
-        super().__init__(processor_class, default_error_builder)
+        super().__init__(processor_class, default_error_builder, json_backend)
         self._handled_exceptions = []  # type: typing.List[HandledException]
         self.configurator = configurator
         self.debug = debug
 
     def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
         req = args[-1]  # TODO : Check
-        # TODO : move this code to check_json
-        # same idea as in : https://bottlepy.org/docs/dev/_modules/bottle.html#BaseRequest.json
-        if req.content_type in ("application/json", "application/json-rpc"):
-            try:
-                json_body = req.json_body
-            # TODO - G.M - 2019-06-06 -  raise exception if not correct ,
-            # return 400 if uncorrect instead ?
-            except Exception:
-                json_body = {}
+        return PyramidRequestParameters(req, self.json_backend)
 
-        else:
-            json_body = {}
+    def _get_accept_encoding(self) -> typing.Optional[str]:
+        from pyramid.threadlocal import get_current_request
 
-        forms_parameters = {}
-        files_parameters = {}
-        for name, item in req.POST.items():
-            if isinstance(item, cgi.FieldStorage):
-                files_parameters[name] = item
-            else:
-                forms_parameters[name] = item
-
-        return RequestParameters(
-            path_parameters=req.matchdict,
-            query_parameters=req.GET,
-            body_parameters=json_body,
-            form_parameters=req.POST,
-            header_parameters=LowercaseKeysDict([(k.lower(), v) for k, v in req.headers.items()]),
-            files_parameters=files_parameters,
-        )
+        request = get_current_request()
+        if request is None:
+            return None
+        return request.headers.get("Accept-Encoding")
 
     def get_response(
-        self, response: str, http_code: int, mimetype: str = "application/json"
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
     ) -> "Response":
         # INFO - G.M - 20-04-2018 - No message_body for some http code,
         # no Content-Type needed if no content
         # see: https://tools.ietf.org/html/rfc2616#section-4.3
+        response, headers = self._compress_response(response, http_code, mimetype, headers)
         if http_code in [204, 304] or (100 <= http_code <= 199):
-            headers = []
+            response_headers = []
         else:
-            headers = [("Content-Type", mimetype)]
+            response_headers = [("Content-Type", mimetype)]
+        response_headers.extend((headers or {}).items())
         from pyramid.response import Response
 
-        return Response(body=response, headers=headers, status=http_code)
+        return Response(body=response, headers=response_headers, status=http_code)
 
-    def get_file_response(self, file_response: HapicFile, http_code: int):
-        if file_response.file_path:
-            from pyramid.response import FileResponse
+    def get_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        http_code: int,
+        mimetype: str = "text/plain; charset=utf-8",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> "Response":
+        from pyramid.response import Response
+
+        stream, headers = self._compress_stream_response(stream, mimetype, headers)
+        response_headers = [("Content-Type", mimetype)]
+        response_headers.extend((headers or {}).items())
+        return Response(app_iter=stream, headers=response_headers, status=http_code)
 
-            # TODO - G.M - 2019-03-27 - add support for overriding parameters of
-            # file_response like content_length
-            # Extended support for file response:
-            # https://github.com/algoo/hapic/issues/171
+    def get_file_response(self, file_response: HapicFile, http_code: int):
+        from pyramid.response import FileIter
+        from pyramid.response import FileResponse
+        from pyramid.response import Response
+        from pyramid.threadlocal import get_current_request
+
+        request = get_current_request()
+        conditional_response = evaluate_file_request(file_response, request.headers, http_code)
+        compressed_body = self._compress_file_response(conditional_response)
+        if compressed_body is not None:
+            response = Response(app_iter=compressed_body)
+        elif conditional_response.is_whole_file and file_response.file_path:
             response = FileResponse(
                 path=file_response.file_path,
-                # INFO - G.M - 2018-09-13 - If content_type is no, mimetype
-                # is automatically guessed
-                content_type=file_response.mimetype or None,
+                # INFO - Given current request allow to send file with
+                # wsgi.file_wrapper of server when available (eg. sendfile)
+                request=request,
+                content_type=conditional_response.headers["Content-Type"],
             )
+        elif conditional_response.is_whole_file:
+            response = Response(app_iter=FileIter(file_response.file_object, FILE_CHUNK_SIZE))
         else:
-            from pyramid.response import FileIter
-            from pyramid.response import Response
-
-            response = Response(status=http_code)
-            response.content_type = file_response.mimetype
-            response.app_iter = FileIter(file_response.file_object)
-
-        response.conditional_response = file_response.use_conditional_response
-        if file_response.content_length:
-            response.content_length = file_response.content_length
-        if file_response.last_modified:
-            response.last_modified = file_response.last_modified
-        if file_response.etag:
-            response.etag = file_response.etag
-
-        response.status_code = http_code
-
-        # INFO - G.M - 2020-06-03 - Accept bytes range if conditional_response
-        # is accepted.
-        if file_response.use_conditional_response:
-            response.accept_ranges = "bytes"
-        else:
-            response.accept_ranges = "none"
-        response.content_disposition = file_response.get_content_disposition_header_value()
+            # Not modified, partial content or range not satisfiable
+            response = Response(app_iter=conditional_response.iter_body())
+
+        # Conditional and Range headers are already evaluated
+        response.conditional_response = False
+        response.status_code = conditional_response.http_code
+        # INFO - G.M - 20-04-2018 - No message_body for some http code,
+        # no Content-Type needed if no content
+        if "Content-Type" not in conditional_response.headers:
+            del response.content_type
+        for header_name, header_value in conditional_response.headers.items():
+            response.headers[header_name] = header_value
 
         return response
 
@@ -141,37 +208,30 @@ class PyramidContext(BaseContext):
 
         dumped_error = self._get_dumped_error_from_validation_error(error)
         return Response(
-            body=json.dumps(dumped_error),
+            body=self.json_backend.dumps(dumped_error),
             headers=[("Content-Type", "application/json")],
             status=int(http_code),
         )
 
     def find_route(self, decorated_controller: DecoratedController) -> RouteRepresentation:
+        for route_intr in self._find_routes(decorated_controller):
+            # TODO BS 20171107: C'est une liste de route sous pyramid !!!
+            # Mais de toute maniere les framework womme pyramid, flask
+            # peuvent avoir un controlleur pour plusieurs routes doc
+            # .find_route doit retourner une liste au lieu d'une seule
+            # route
+            route_pattern = route_intr[0].get("pattern")
+            route_method = route_intr[0].get("request_methods")[0]
+
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route_pattern),
+                method=route_method,
+                original_route_object=route_intr[0],
+            )
+
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
         for category in self.configurator.introspector.get_category("views"):
-            view_intr = category["introspectable"]
-            route_intr = category["related"]
-
-            reference = decorated_controller.reference
-            route_token = getattr(view_intr.get("callable"), DECORATION_ATTRIBUTE_NAME, None)
-
-            match_with_wrapper = view_intr.get("callable") == reference.wrapper
-            match_with_wrapped = view_intr.get("callable") == reference.wrapped
-            match_with_token = route_token == reference.token
-
-            if match_with_wrapper or match_with_wrapped or match_with_token:
-                # TODO BS 20171107: C'est une liste de route sous pyramid !!!
-                # Mais de toute maniere les framework womme pyramid, flask
-                # peuvent avoir un controlleur pour plusieurs routes doc
-                # .find_route doit retourner une liste au lieu d'une seule
-                # route
-                route_pattern = route_intr[0].get("pattern")
-                route_method = route_intr[0].get("request_methods")[0]
-
-                return RouteRepresentation(
-                    rule=self.get_swagger_path(route_pattern),
-                    method=route_method,
-                    original_route_object=route_intr[0],
-                )
+            yield category["introspectable"].get("callable"), category["related"]
 
     def get_swagger_path(self, contextualised_rule: str) -> str:
         # TODO BS 20171110: Pyramid allow route like '/{foo:\d+}', so adapt
@@ -221,7 +281,7 @@ class PyramidContext(BaseContext):
                 error_body = error_builder.build_from_exception(
                     exc, include_traceback=self.is_debug()
                 )
-                return self.get_response(json.dumps(error_body), http_code)
+                return self.get_response(self.json_backend.dumps(error_body), http_code)
 
             return view_func
 
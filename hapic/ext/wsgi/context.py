@@ -0,0 +1,608 @@
+# coding: utf-8
+from http import HTTPStatus
+import io
+import os
+import typing
+from urllib.parse import parse_qsl
+
+from multidict import MultiDict
+
+from hapic.compression import CompressionPolicy
+from hapic.conditional import evaluate_file_request
+from hapic.context import BaseContext
+from hapic.context import HandledException
+from hapic.context import RouteRepresentation
+from hapic.data import HapicFile
+from hapic.decorator import DecoratedController
+from hapic.error.main import ErrorBuilderInterface
+from hapic.exception import ConfigurationException
+from hapic.exception import NoRoutesException
+from hapic.exception import RouteNotFound
+from hapic.exception import WorkflowException
+from hapic.json_backend import JsonBackend
+from hapic.processor.main import Processor
+from hapic.processor.main import ProcessValidationError
+from hapic.processor.main import RequestParameters
+from hapic.router import Route
+from hapic.router import Router
+from hapic.upload import MultipartParser
+from hapic.upload import UploadedFile
+from hapic.upload import UploadPolicy
+from hapic.upload import get_header_parameter
+from hapic.util import LowercaseKeysDict
+
+# Size of chunks read from request body
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+class WsgiHttpError(Exception):
+    """
+    Raised while reading request to answer an http error response, like
+    bottle HTTPError.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+    def get_response(self) -> "WsgiResponse":
+        return WsgiResponse(self.message, self.status)
+
+
+class WsgiRequest(object):
+    """
+    Request built from a WSGI environ. Body is read from wsgi.input only
+    when needed, and chunk by chunk if wanted.
+    """
+
+    def __init__(self, environ: typing.Dict[str, typing.Any]) -> None:
+        self.environ = environ
+        # Filled by WsgiApp with url parameters of matched route
+        self.match_info = {}  # type: typing.Dict[str, str]
+        # Shared by hapic decorators, see WsgiContext.get_request_parameters
+        self.request_parameters = None  # type: typing.Optional[WsgiRequestParameters]
+        self._headers = None  # type: typing.Optional[LowercaseKeysDict]
+        self._body = None  # type: typing.Optional[bytes]
+        self._body_read = False
+
+    @property
+    def method(self) -> str:
+        return self.environ["REQUEST_METHOD"].upper()
+
+    @property
+    def path(self) -> str:
+        # PEP 3333: environ strings are bytes decoded as latin-1
+        return self.environ.get("PATH_INFO", "").encode("latin-1").decode("utf-8", "replace")
+
+    @property
+    def query_string(self) -> str:
+        return self.environ.get("QUERY_STRING", "").encode("latin-1").decode("utf-8", "replace")
+
+    @property
+    def headers(self) -> LowercaseKeysDict:
+        if self._headers is None:
+            headers = []
+            for key, value in self.environ.items():
+                if key.startswith("HTTP_"):
+                    headers.append((key[5:].replace("_", "-").lower(), value))
+                elif key in ("CONTENT_TYPE", "CONTENT_LENGTH") and value:
+                    headers.append((key.replace("_", "-").lower(), value))
+            self._headers = LowercaseKeysDict(headers)
+        return self._headers
+
+    @property
+    def content_length(self) -> typing.Optional[int]:
+        try:
+            return int(self.environ["CONTENT_LENGTH"])
+        except (KeyError, ValueError):
+            return None
+
+    def iter_body(self, chunk_size: int = BODY_CHUNK_SIZE) -> typing.Iterator[bytes]:
+        """
+        Read request body chunk by chunk from wsgi.input. Body can be read
+        only once.
+        """
+        if self._body_read:
+            raise WorkflowException("Request body was already read")
+        self._body_read = True
+
+        stream = self.environ.get("wsgi.input") or io.BytesIO()
+        remaining = self.content_length
+        if remaining is None and not self.environ.get("wsgi.input_terminated"):
+            # PEP 3333: body must not be read after Content-Length
+            return
+
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    def body(self) -> bytes:
+        """
+        :return: whole request body, which is kept in memory
+        """
+        if self._body is None:
+            self._body = b"".join(self.iter_body())
+        return self._body
+
+
+class WsgiRequestParameters(RequestParameters):
+    """
+    WSGI request parameters. Each parameter group is read from request only
+    on first access.
+    """
+
+    def __init__(self, request: WsgiRequest, json_backend: JsonBackend) -> None:
+        self._request = request
+        self._json_backend = json_backend
+        self._query_parameters = None  # type: typing.Optional[MultiDict]
+        self._body_parameters = None  # type: typing.Optional[dict]
+        self._form_parameters = None  # type: typing.Optional[MultiDict]
+        self._files_parameters = None  # type: typing.Optional[typing.Dict[str, UploadedFile]]
+
+    @property
+    def body_size(self) -> typing.Optional[int]:
+        return self._request.content_length
+
+    @property
+    def path_parameters(self) -> dict:
+        return dict(self._request.match_info)
+
+    @property
+    def query_parameters(self) -> MultiDict:
+        if self._query_parameters is None:
+            self._query_parameters = MultiDict(
+                parse_qsl(self._request.query_string, keep_blank_values=True)
+            )
+        return self._query_parameters
+
+    @property
+    def body_parameters(self) -> dict:
+        if self._body_parameters is None:
+            content_type = self.header_parameters.get("content-type", "").lower().split(";")[0]
+            json_body = None
+            if content_type in ("application/json", "application/json-rpc"):
+                raw_body = self._request.body()
+                if raw_body:
+                    try:
+                        json_body = self._json_backend.loads(raw_body)
+                    except ValueError as exc:
+                        raise WsgiHttpError(HTTPStatus.BAD_REQUEST, "Invalid JSON") from exc
+            self._body_parameters = json_body if json_body is not None else {}
+        return self._body_parameters
+
+    @property
+    def form_parameters(self) -> MultiDict:
+        if self._form_parameters is None:
+            content_type = self.header_parameters.get("content-type", "").lower()
+            if content_type.startswith("multipart/"):
+                self._read_multipart()
+            elif content_type.startswith("application/x-www-form-urlencoded"):
+                body = self._request.body().decode("utf-8")
+                self._form_parameters = MultiDict(parse_qsl(body, keep_blank_values=True))
+            else:
+                self._form_parameters = MultiDict()
+        return self._form_parameters
+
+    @property
+    def header_parameters(self) -> LowercaseKeysDict:
+        return self._request.headers
+
+    @property
+    def files_parameters(self) -> typing.Dict[str, UploadedFile]:
+        if self._files_parameters is None:
+            content_type = self.header_parameters.get("content-type", "").lower()
+            if content_type.startswith("multipart/"):
+                self._read_multipart()
+            else:
+                self._files_parameters = {}
+        return self._files_parameters
+
+    def _read_multipart(self) -> None:
+        """
+        Read multipart body chunk by chunk: files are written in spooled
+        temporary files as defined by endpoint UploadPolicy (default one if
+        endpoint has no input files policy), other fields become form
+        parameters.
+        :raise UploadTooLargeException: as soon as a size limit is exceeded
+        """
+        upload_policy = self.upload_policy or UploadPolicy()
+        if upload_policy.sink_factory is not None:
+            raise ConfigurationException("UploadSink is async and can't be used with WSGI")
+
+        upload_policy.check_total_size(self.body_size)
+        forms = MultiDict()
+        files = {}  # type: typing.Dict[str, UploadedFile]
+        read_size = 0
+        name = value = uploaded_file = None
+        try:
+            parser = MultipartParser.from_content_type(self.header_parameters.get("content-type"))
+            for chunk in self._request.iter_body(upload_policy.chunk_size):
+                read_size += len(chunk)
+                upload_policy.check_total_size(read_size)
+
+                for event, event_value in parser.feed(chunk):
+                    if event == MultipartParser.PART_BEGIN:
+                        disposition = event_value.get("content-disposition", "")
+                        name = get_header_parameter(disposition, "name")
+                        filename = get_header_parameter(disposition, "filename")
+                        if filename is None:
+                            value = bytearray()
+                            uploaded_file = None
+                        else:
+                            if name in files:
+                                # Only last file of a field is kept: previous
+                                # one is dropped
+                                files.pop(name).close()
+                            uploaded_file = upload_policy.open_file(
+                                name, filename, event_value.get("content-type"), event_value
+                            )
+                            files[name] = uploaded_file
+                    elif event == MultipartParser.PART_DATA:
+                        if uploaded_file is None:
+                            value.extend(event_value)
+                        else:
+                            uploaded_file.file.write(event_value)
+                            uploaded_file.size += len(event_value)
+                            upload_policy.check_file_size(name, uploaded_file.size)
+                    elif uploaded_file is None:
+                        forms.add(name, value.decode("utf-8"))
+                    else:
+                        uploaded_file.file.seek(0)
+            parser.close()
+        except Exception as exc:
+            for uploaded_file in files.values():
+                uploaded_file.close()
+            if isinstance(exc, ValueError):
+                raise WsgiHttpError(HTTPStatus.BAD_REQUEST, "Invalid multipart body") from exc
+            raise
+
+        self._form_parameters = forms
+        self._files_parameters = files
+
+
+class WsgiResponse(object):
+    """
+    Response returned by WsgiApp. Body is compressed when response is sent
+    if a CompressionPolicy is given, as defined by request Accept-Encoding
+    header.
+    """
+
+    def __init__(
+        self,
+        body: typing.Union[str, bytes] = b"",
+        status: int = HTTPStatus.OK,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        content_type: typing.Optional[str] = "text/plain; charset=utf-8",
+        compression_policy: typing.Optional[CompressionPolicy] = None,
+    ) -> None:
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.status = int(status)
+        self.headers = dict(headers or {})
+        if content_type is not None:
+            self.headers["Content-Type"] = content_type
+        self._compression_policy = compression_policy
+
+    @property
+    def status_line(self) -> str:
+        try:
+            return "{} {}".format(self.status, HTTPStatus(self.status).phrase)
+        except ValueError:
+            return "{} Unknown".format(self.status)
+
+    def start(
+        self, start_response: typing.Callable[..., typing.Any], headers: typing.Dict[str, str]
+    ) -> None:
+        start_response(self.status_line, [(name, str(value)) for name, value in headers.items()])
+
+    def __call__(
+        self, request: WsgiRequest, start_response: typing.Callable[..., typing.Any]
+    ) -> typing.Iterable[bytes]:
+        """
+        Start response and return its body as WSGI iterable
+        """
+        body, headers = self.body, self.headers
+        if self._compression_policy is not None:
+            body, headers = self._compression_policy.compress_response(
+                body, headers.get("Content-Type"), headers, request.headers.get("accept-encoding")
+            )
+
+        if self.status not in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            headers = dict(headers, **{"Content-Length": str(len(body))})
+        self.start(start_response, headers)
+        return [] if request.method == "HEAD" else [body]
+
+
+class WsgiStreamResponse(WsgiResponse):
+    """
+    Response whose body is an iterable of bytes, sent chunk by chunk and
+    compressed as a stream if a CompressionPolicy is given.
+    """
+
+    def __init__(
+        self,
+        stream: typing.Iterable[bytes],
+        status: int = HTTPStatus.OK,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        content_type: typing.Optional[str] = None,
+        compression_policy: typing.Optional[CompressionPolicy] = None,
+    ) -> None:
+        super().__init__(b"", status, headers, content_type, compression_policy)
+        self.stream = stream
+
+    def __call__(
+        self, request: WsgiRequest, start_response: typing.Callable[..., typing.Any]
+    ) -> typing.Iterable[bytes]:
+        stream, headers = self.stream, self.headers
+        if self._compression_policy is not None:
+            stream, headers = self._compression_policy.compress_stream_response(
+                stream, headers.get("Content-Type"), headers, request.headers.get("accept-encoding")
+            )
+
+        self.start(start_response, headers)
+        if request.method == "HEAD":
+            if hasattr(stream, "close"):
+                stream.close()
+            return []
+        return stream
+
+
+class WsgiFileResponse(WsgiResponse):
+    """
+    Response of a HapicFile: conditional and Range request headers are
+    evaluated when response is sent, then only needed parts of file are
+    read. Whole files are sent with wsgi.file_wrapper of server if any.
+    """
+
+    def __init__(
+        self,
+        file_response: HapicFile,
+        status: int = HTTPStatus.OK,
+        compression_policy: typing.Optional[CompressionPolicy] = None,
+    ) -> None:
+        super().__init__(b"", status, content_type=None, compression_policy=compression_policy)
+        self._file_response = file_response
+
+    def __call__(
+        self, request: WsgiRequest, start_response: typing.Callable[..., typing.Any]
+    ) -> typing.Iterable[bytes]:
+        conditional_response = evaluate_file_request(
+            self._file_response, request.headers, self.status
+        )
+        chunks = conditional_response.iter_body()
+        body, headers = chunks, conditional_response.headers
+        if self._compression_policy is not None and conditional_response.is_whole_file:
+            body, headers = self._compression_policy.compress_stream_response(
+                chunks,
+                headers.get("Content-Type"),
+                headers,
+                request.headers.get("accept-encoding"),
+                size=conditional_response.content_length,
+                flush=False,
+            )
+        elif self._compression_policy is not None:
+            headers = self._compression_policy.get_uncompressed_headers(
+                headers.get("Content-Type"), headers
+            )
+
+        file_wrapper = request.environ.get("wsgi.file_wrapper")
+        if body is chunks and conditional_response.is_whole_file and file_wrapper is not None:
+            # Server can send whole (not compressed) file efficiently
+            chunks.close()
+            if self._file_response.file_path:
+                body = file_wrapper(open(self._file_response.file_path, "rb"))
+            else:
+                body = file_wrapper(self._file_response.file_object)
+
+        self.status = conditional_response.http_code
+        self.start(start_response, headers)
+        if request.method == "HEAD" or not conditional_response.with_body:
+            if hasattr(body, "close"):
+                body.close()
+            return []
+        return body
+
+
+class WsgiApp(object):
+    """
+    Minimal WSGI application, to serve hapic controllers without web
+    framework. Route callbacks are called with a WsgiRequest and must
+    return a WsgiResponse.
+    """
+
+    def __init__(self) -> None:
+        self.router = Router()
+        # Called with request and exception raised by a callback, must
+        # return a response or raise
+        self.exception_handler = None  # type: typing.Optional[typing.Callable[..., WsgiResponse]]
+
+    @property
+    def routes(self) -> typing.List[Route]:
+        return self.router.routes
+
+    def route(
+        self, rule: str, method: str, callback: typing.Callable[[WsgiRequest], typing.Any]
+    ) -> Route:
+        """
+        :param rule: route rule, like "/users/<user_id>", see hapic.router
+        """
+        return self.router.add(rule, method, callback)
+
+    def add_static(self, prefix: str, directory: str) -> Route:
+        """
+        Serve files of given directory under given route prefix
+        """
+        directory = os.path.abspath(directory)
+
+        def static_callback(request: WsgiRequest) -> WsgiResponse:
+            file_path = os.path.abspath(os.path.join(directory, request.match_info["filename"]))
+            if not file_path.startswith(directory + os.sep) or not os.path.isfile(file_path):
+                return WsgiResponse(b"Not Found", HTTPStatus.NOT_FOUND, content_type="text/plain")
+            return WsgiFileResponse(HapicFile(file_path=file_path))
+
+        return self.route("{}/<filename:path>".format(prefix.rstrip("/")), "GET", static_callback)
+
+    def handle(self, request: WsgiRequest) -> WsgiResponse:
+        route, match_info, allowed_methods = self.router.match(request.method, request.path)
+        if route is None:
+            if allowed_methods:
+                return WsgiResponse(
+                    b"Method Not Allowed",
+                    HTTPStatus.METHOD_NOT_ALLOWED,
+                    headers={"Allow": ", ".join(sorted(allowed_methods))},
+                    content_type="text/plain",
+                )
+            return WsgiResponse(b"Not Found", HTTPStatus.NOT_FOUND, content_type="text/plain")
+
+        request.match_info = match_info
+        try:
+            response = route.callback(request)
+        except WsgiHttpError as exc:
+            response = exc.get_response()
+        except Exception as exc:
+            if self.exception_handler is None:
+                raise
+            response = self.exception_handler(request, exc)
+
+        if not isinstance(response, WsgiResponse):
+            raise WorkflowException(
+                'Callback of "{} {}" must return a WsgiResponse'.format(route.method, route.rule)
+            )
+        return response
+
+    def __call__(
+        self,
+        environ: typing.Dict[str, typing.Any],
+        start_response: typing.Callable[..., typing.Any],
+    ) -> typing.Iterable[bytes]:
+        request = WsgiRequest(environ)
+        return self.handle(request)(request, start_response)
+
+
+class WsgiContext(BaseContext):
+    def __init__(
+        self,
+        app: typing.Optional[WsgiApp] = None,
+        processor_class: typing.Optional[typing.Type[Processor]] = None,
+        default_error_builder: ErrorBuilderInterface = None,
+        debug: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
+    ) -> None:
+        super().__init__(processor_class, default_error_builder, json_backend)
+        self.app = app if app is not None else WsgiApp()
+        self.debug = debug
+        self._handled_exceptions = []  # type: typing.List[HandledException]
+
+    def _get_request(self, args: typing.Iterable[typing.Any]) -> WsgiRequest:
+        for arg in args:
+            if isinstance(arg, WsgiRequest):
+                return arg
+
+        raise WorkflowException("Unable to get wsgi request object")
+
+    def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
+        request = self._get_request(args)
+        # Request body can be read only once: parameters are shared by
+        # decorators of the controller
+        if request.request_parameters is None:
+            request.request_parameters = WsgiRequestParameters(request, self.json_backend)
+        return request.request_parameters
+
+    def get_file_response(self, file_response: HapicFile, http_code: int) -> WsgiFileResponse:
+        return WsgiFileResponse(file_response, http_code, self.compression_policy)
+
+    def get_response(
+        self,
+        response: typing.Union[str, bytes],
+        http_code: int,
+        mimetype: str = "application/json",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> WsgiResponse:
+        # A 204 no content or 304 not modified response should not have
+        # content type header
+        if http_code in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            return WsgiResponse(b"", http_code, headers, content_type=None)
+
+        return WsgiResponse(response, http_code, headers, mimetype, self.compression_policy)
+
+    def get_stream_response(
+        self,
+        stream: typing.Iterable[bytes],
+        http_code: int,
+        mimetype: str = "text/plain; charset=utf-8",
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> WsgiStreamResponse:
+        return WsgiStreamResponse(stream, http_code, headers, mimetype, self.compression_policy)
+
+    def get_validation_error_response(
+        self, error: ProcessValidationError, http_code: HTTPStatus = HTTPStatus.BAD_REQUEST
+    ) -> WsgiResponse:
+        dumped_error = self._get_dumped_error_from_validation_error(error)
+        return WsgiResponse(
+            self.json_backend.dumps(dumped_error), http_code, content_type="application/json"
+        )
+
+    def find_route(self, decorated_controller: DecoratedController) -> RouteRepresentation:
+        if not self.app.routes:
+            raise NoRoutesException("There is no routes in your wsgi app")
+
+        for route in self._find_routes(decorated_controller):
+            return RouteRepresentation(
+                rule=self.get_swagger_path(route.rule),
+                method=route.method.lower(),
+                original_route_object=route,
+            )
+
+        raise RouteNotFound(
+            'Decorated route "{}" was not found in wsgi routes'.format(decorated_controller.name)
+        )
+
+    def _get_routes(self) -> typing.Iterable[typing.Tuple[typing.Callable, typing.Any]]:
+        for route in self.app.routes:
+            yield route.callback, route
+
+    def get_swagger_path(self, contextualised_rule: str) -> str:
+        return self.app.router.get_swagger_path(contextualised_rule)
+
+    def by_pass_output_wrapping(self, response: typing.Any) -> bool:
+        return isinstance(response, WsgiResponse)
+
+    def add_view(
+        self, route: str, http_method: str, view_func: typing.Callable[..., typing.Any]
+    ) -> None:
+        self.app.route(route, http_method, view_func)
+
+    def serve_directory(self, route_prefix: str, directory_path: str) -> None:
+        self.app.add_static(route_prefix, directory_path)
+
+    def is_debug(self) -> bool:
+        return self.debug
+
+    def _handle_app_exception(self, request: WsgiRequest, exc: Exception) -> WsgiResponse:
+        """
+        Exception handler installed in wsgi app: return an hapic response
+        if raised exception is handled, else raise it again.
+        """
+        # Most specific handled exception class is used
+        handled_exception = self._handled_exception_resolver.resolve(type(exc))
+        if handled_exception is None:
+            raise exc
+
+        self.global_exception_caught(exc, request)
+        return self.get_response(
+            self._get_encoded_error_from_exception_error(exc), handled_exception.http_code
+        )
+
+    def _add_exception_class_to_catch(
+        self, exception_class: typing.Type[Exception], http_code: int
+    ) -> None:
+        self._handled_exceptions.append(HandledException(exception_class, http_code))
+        self.app.exception_handler = self._handle_app_exception
+
+    def _get_handled_exception_class_and_http_codes(self) -> typing.List[HandledException]:
+        return self._handled_exceptions
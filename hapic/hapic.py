@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
+import collections
 import functools
 import logging
 import os
+import time
 import typing
 import uuid
 
 from hapic.buffer import DecorationBuffer
+from hapic.compression import CompressionPolicy
 from hapic.context import ContextInterface
 from hapic.decorator import DECORATION_ATTRIBUTE_NAME
+from hapic.decorator import AsyncControllerPipeline
 from hapic.decorator import AsyncExceptionHandlerControllerWrapper
 from hapic.decorator import AsyncInputBodyControllerWrapper
 from hapic.decorator import AsyncInputFilesControllerWrapper
@@ -16,6 +20,7 @@ from hapic.decorator import AsyncInputQueryControllerWrapper
 from hapic.decorator import AsyncOutputBodyControllerWrapper
 from hapic.decorator import AsyncOutputFileControllerWrapper
 from hapic.decorator import AsyncOutputStreamControllerWrapper
+from hapic.decorator import ControllerPipeline
 from hapic.decorator import ControllerReference
 from hapic.decorator import DecoratedController
 from hapic.decorator import ExceptionHandlerControllerWrapper
@@ -28,6 +33,8 @@ from hapic.decorator import InputQueryControllerWrapper
 from hapic.decorator import OutputBodyControllerWrapper
 from hapic.decorator import OutputFileControllerWrapper
 from hapic.decorator import OutputHeadersControllerWrapper
+from hapic.decorator import OutputStreamControllerWrapper
+from hapic.description import ControllerDescription
 from hapic.description import ErrorDescription
 from hapic.description import InputBodyDescription
 from hapic.description import InputFilesDescription
@@ -39,10 +46,16 @@ from hapic.description import OutputBodyDescription
 from hapic.description import OutputFileDescription
 from hapic.description import OutputHeadersDescription
 from hapic.description import OutputStreamDescription
-from hapic.doc.main import DocGenerator
+from hapic.doc.cache import CachedDoc
 from hapic.error.main import ErrorBuilderInterface
 from hapic.exception import ConfigurationException
+from hapic.instrumentation import Instrumentation
+from hapic.json_backend import JsonBackend
+from hapic.processor.main import OffloadPolicy
+from hapic.processor.main import OutputValidationPolicy
 from hapic.processor.main import Processor
+from hapic.stream import StreamBatchPolicy
+from hapic.upload import UploadPolicy
 from hapic.util import LOGGER_NAME
 
 try:  # Python 3.5+
@@ -50,6 +63,9 @@ try:  # Python 3.5+
 except ImportError:
     from http import client as HTTPStatus
 
+if typing.TYPE_CHECKING:
+    # INFO - Documentation dependencies are imported at first use
+    from hapic.doc.main import DocGenerator  # noqa: F401
 
 # TODO: Gérer les cas ou c'est une liste la réponse (items, item_nb), see #12
 # TODO: Confusion nommage body/json/forms, see #13
@@ -57,14 +73,45 @@ except ImportError:
 
 class Hapic(object):
     def __init__(
-        self, processor_class: typing.Optional[typing.Type[Processor]] = None, async_: bool = False
+        self,
+        processor_class: typing.Optional[typing.Type[Processor]] = None,
+        async_: bool = False,
+        json_backend: typing.Optional[JsonBackend] = None,
+        output_validation_policy: typing.Optional[OutputValidationPolicy] = None,
+        instrumentation: typing.Optional[Instrumentation] = None,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
+        compression_policy: typing.Optional[CompressionPolicy] = None,
     ) -> None:
+        """
+        :param processor_class: Processor class to use by default
+        :param async_: True to produce async views wrappers
+        :param json_backend: JsonBackend to set on the context. If not
+            given, the context JsonBackend is used.
+        :param output_validation_policy: default OutputValidationPolicy of
+            output processors. If not given, processors validate all outputs.
+        :param instrumentation: Instrumentation to set on the context. If
+            not given, the context Instrumentation is used.
+        :param offload_policy: default OffloadPolicy of async input body,
+            output body and output stream wrappers. If not given, load and
+            dump always run in event loop.
+        :param compression_policy: CompressionPolicy to set on the context.
+            If not given, the context CompressionPolicy is used (by default,
+            responses are not compressed).
+        """
         self._buffer = DecorationBuffer()
+        self._json_backend = json_backend
+        self._instrumentation = instrumentation
+        self._offload_policy = offload_policy
+        self._compression_policy = compression_policy
+        self._output_validation_policy = output_validation_policy
         self._controllers = []  # type: typing.List[DecoratedController]
         self._context = None  # type: ContextInterface
         self._error_builder = None  # type: ErrorBuilderInterface
         self._async = async_
-        self.doc_generator = DocGenerator()
+        self._doc_generator = None  # type: typing.Optional[DocGenerator]
+        self._cached_docs = {}  # type: typing.Dict[typing.Tuple[str, str, str], CachedDoc]
+        self._cached_docs_controllers_count = 0
+        self._loaded_doc = None  # type: typing.Optional[CachedDoc]
 
         self.logger = logging.getLogger(LOGGER_NAME)
         self.logger.debug("Create new Hapic instance")
@@ -85,6 +132,23 @@ class Hapic(object):
         self._context_getter = context_getter
         self._error_builder_getter = error_builder_getter
 
+    @property
+    def doc_generator(self) -> "DocGenerator":
+        """
+        :return: DocGenerator used to generate documentation. It is built
+        at first use: documentation dependencies (apispec, yaml) are only
+        imported when documentation is generated.
+        """
+        if self._doc_generator is None:
+            from hapic.doc.main import DocGenerator
+
+            self._doc_generator = DocGenerator()
+        return self._doc_generator
+
+    @doc_generator.setter
+    def doc_generator(self, doc_generator: "DocGenerator") -> None:
+        self._doc_generator = doc_generator
+
     @property
     def ready(self) -> bool:
         """
@@ -107,35 +171,100 @@ class Hapic(object):
     def context(self) -> ContextInterface:
         return self._context
 
-    def set_context(self, context: ContextInterface) -> None:
+    def set_context(self, context: ContextInterface, warm_up: bool = False) -> None:
+        """
+        Set context used by hapic decorators and documentation.
+        :param context: ContextInterface instance
+        :param warm_up: if True, call warm_up when context is set
+        """
         assert not self._context
         self._context = context
+        self.invalidate_doc()
         self._context.set_processor_class(self.processor_class)
 
+        if self._json_backend is not None:
+            self._context.json_backend = self._json_backend
+
+        if self._instrumentation is not None:
+            self._context.instrumentation = self._instrumentation
+
+        if self._compression_policy is not None:
+            self._context.compression_policy = self._compression_policy
+
         try:
             self._context.default_error_builder
         except ConfigurationException:
             self._context.default_error_builder = self.processor_class.get_default_error_builder()
 
+        if warm_up:
+            self.warm_up()
+
+    def warm_up(self) -> typing.Dict[str, float]:
+        """
+        Build processors and error processors of decorated controllers and
+        their schemas serializers now, so first requests of each endpoint
+        don't pay it. Must be called when context is set. A failing warm up
+        is logged and left to first request.
+        :return: cumulated build duration in seconds by schema name
+        """
+        build_durations = collections.OrderedDict()  # type: typing.Dict[str, float]
+        for controller in self._controllers:
+            for wrapper in controller.description.wrappers:
+                started_at = time.perf_counter()
+                try:
+                    processor = wrapper.warm_up()
+                except Exception:
+                    self.logger.exception(
+                        'Warm up of controller "{}" failed'.format(controller.name)
+                    )
+                    continue
+                duration = time.perf_counter() - started_at
+
+                try:
+                    schema = processor.schema
+                except ConfigurationException:
+                    continue
+
+                schema_name = schema.__name__ if isinstance(schema, type) else type(schema).__name__
+                build_durations[schema_name] = build_durations.get(schema_name, 0.0) + duration
+
+        for schema_name, duration in build_durations.items():
+            self.logger.debug('Schema "{}" warmed up in {:.6f}s'.format(schema_name, duration))
+
+        return build_durations
+
     def reset_context(self) -> None:
         self._context = None
+        self.invalidate_doc()
 
     def set_processor_class(self, processor_class: typing.Type[Processor]) -> None:
         self._processor_class = processor_class
 
+    @property
+    def output_validation_policy(self) -> typing.Optional[OutputValidationPolicy]:
+        return self._output_validation_policy
+
     def _get_processor_factory(
-        self, schema: typing.Any, processor: Processor = None
+        self,
+        schema: typing.Any,
+        processor: Processor = None,
+        output_validation_policy: typing.Optional[OutputValidationPolicy] = None,
     ) -> typing.Callable[[], Processor]:
         """
         :param schema: Schema to be give to final processor instance
         :param processor: Optional Processor instance. If no given,
             use hapic default processor class instance
+        :param output_validation_policy: Optional OutputValidationPolicy
+            to set on processor. If not given, given processor keep its own
+            policy and hapic default processor use hapic default policy.
         :return: A callable able to return an Processor instance
         """
         if processor is not None:
 
             def get_processor():
                 processor.set_schema(schema)
+                if output_validation_policy is not None:
+                    processor.set_output_validation_policy(output_validation_policy)
                 return processor
 
             return get_processor
@@ -143,6 +272,9 @@ class Hapic(object):
         def get_default_processor():
             processor_ = self._processor_class()
             processor_.set_schema(schema)
+            policy = output_validation_policy or self._output_validation_policy
+            if policy is not None:
+                processor_.set_output_validation_policy(policy)
             return processor_
 
         return get_default_processor
@@ -170,9 +302,14 @@ class Hapic(object):
         tags = tags or []  # FDV
 
         def decorator(func):
-            @functools.wraps(func)
-            def wrapper(*args, **kwargs):
-                return func(*args, **kwargs)
+            description = self._buffer.get_description()
+            wrapper = self._get_pipeline_wrapper(func, description)
+
+            if wrapper is None:
+
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    return func(*args, **kwargs)
 
             token = uuid.uuid4().hex
             self.logger.debug(
@@ -183,7 +320,6 @@ class Hapic(object):
             setattr(wrapper, DECORATION_ATTRIBUTE_NAME, token)
             setattr(func, DECORATION_ATTRIBUTE_NAME, token)
 
-            description = self._buffer.get_description()
             description.tags = tags
             description.disable_doc = disable_doc
             description.deprecated = deprecated
@@ -194,10 +330,35 @@ class Hapic(object):
             )
             self._buffer.clear()
             self._controllers.append(decorated_controller)
+            self.invalidate_doc()
             return wrapper
 
         return decorator
 
+    def _get_pipeline_wrapper(
+        self, func: typing.Callable[..., typing.Any], description: ControllerDescription
+    ) -> typing.Optional[typing.Callable[..., typing.Any]]:
+        """
+        Collapse the hapic decorators chain of given function into one
+        wrapper running all stages in a single frame.
+        :param func: function returned by the outermost hapic decorator
+        :param description: description of the decorated controller
+        :return: the fused wrapper or None if given function is not only
+            made of hapic decorators (eg. a foreign decorator is present
+            between them)
+        """
+        wrappers, view = ControllerPipeline.unwrap(func)
+        described_wrappers = description.wrappers
+        if not wrappers or len(wrappers) != len(described_wrappers):
+            return None
+
+        if self._async:
+            pipeline = AsyncControllerPipeline(wrappers)
+        else:
+            pipeline = ControllerPipeline(wrappers)
+
+        return pipeline.get_wrapper(view)
+
     def output_body(
         self,
         schema: typing.Any,
@@ -205,8 +366,25 @@ class Hapic(object):
         context: ContextInterface = None,
         error_http_code: HTTPStatus = HTTPStatus.INTERNAL_SERVER_ERROR,
         default_http_code: HTTPStatus = HTTPStatus.OK,
+        output_validation_policy: typing.Optional[OutputValidationPolicy] = None,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
     ) -> typing.Callable[[typing.Callable[..., typing.Any]], typing.Any]:
-        processor_factory = self._get_processor_factory(schema, processor)
+        """
+        Decorate with a wrapper who check and serialize controller response.
+
+        :param schema: Schema of output body
+        :param processor: Processor object to process with given
+        schema
+        :param context: Context to use here
+        :param error_http_code: http code in case of error
+        :param default_http_code: http code in case of success
+        :param output_validation_policy: OutputValidationPolicy to use for
+        this endpoint instead of the default one
+        :param offload_policy: OffloadPolicy to use for this endpoint
+        instead of the default one (async only)
+        :return: decorator
+        """
+        processor_factory = self._get_processor_factory(schema, processor, output_validation_policy)
         context = context or self._context_getter
 
         if self._async:
@@ -215,6 +393,7 @@ class Hapic(object):
                 processor_factory=processor_factory,
                 error_http_code=error_http_code,
                 default_http_code=default_http_code,
+                offload_policy=offload_policy or self._offload_policy,
             )
         else:
             decoration = OutputBodyControllerWrapper(
@@ -238,10 +417,16 @@ class Hapic(object):
         error_http_code: HTTPStatus = HTTPStatus.INTERNAL_SERVER_ERROR,
         default_http_code: HTTPStatus = HTTPStatus.OK,
         ignore_on_error: bool = True,
+        output_validation_policy: typing.Optional[OutputValidationPolicy] = None,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
+        batch_policy: typing.Optional[StreamBatchPolicy] = None,
     ) -> typing.Callable[[typing.Callable[..., typing.Any]], typing.Any]:
         """
         Decorate with a wrapper who check and serialize each items in output
-        stream.
+        stream. With a sync context, view must return an iterable (eg. a
+        generator): items are serialized lazily while framework streaming
+        response is sent. With async context, view must be an async
+        generator.
 
         :param item_schema: Schema of output stream items
         :param processor: Processor object to process with given
@@ -251,9 +436,18 @@ class Hapic(object):
         :param default_http_code: http code in case of success
         :param ignore_on_error: if set, an error of serialization will be
         ignored: stream will not send this failed object
+        :param output_validation_policy: OutputValidationPolicy to use for
+        this endpoint instead of the default one
+        :param offload_policy: OffloadPolicy to use for this endpoint
+        instead of the default one (async only)
+        :param batch_policy: StreamBatchPolicy to coalesce serialized items
+        into fewer writes (max items, max bytes, max delay). If not given,
+        each item is written alone (async only).
         :return: decorator
         """
-        processor_factory = self._get_processor_factory(item_schema, processor)
+        processor_factory = self._get_processor_factory(
+            item_schema, processor, output_validation_policy
+        )
         context = context or self._context_getter
 
         if self._async:
@@ -263,10 +457,17 @@ class Hapic(object):
                 error_http_code=error_http_code,
                 default_http_code=default_http_code,
                 ignore_on_error=ignore_on_error,
+                offload_policy=offload_policy or self._offload_policy,
+                batch_policy=batch_policy,
             )
         else:
-            # TODO BS 2018-07-25: To do
-            raise NotImplementedError("todo")
+            decoration = OutputStreamControllerWrapper(
+                context=context,
+                processor_factory=processor_factory,
+                error_http_code=error_http_code,
+                default_http_code=default_http_code,
+                ignore_on_error=ignore_on_error,
+            )
 
         def decorator(func):
             self._buffer.output_stream = OutputStreamDescription(decoration)
@@ -429,6 +630,7 @@ class Hapic(object):
         context: ContextInterface = None,
         error_http_code: HTTPStatus = HTTPStatus.BAD_REQUEST,
         default_http_code: HTTPStatus = HTTPStatus.OK,
+        offload_policy: typing.Optional[OffloadPolicy] = None,
     ) -> typing.Callable[[typing.Callable[..., typing.Any]], typing.Any]:
         processor_factory = self._get_processor_factory(schema, processor)
         context = context or self._context_getter
@@ -439,6 +641,7 @@ class Hapic(object):
                 processor_factory=processor_factory,
                 error_http_code=error_http_code,
                 default_http_code=default_http_code,
+                offload_policy=offload_policy or self._offload_policy,
             )
         else:
             decoration = InputBodyControllerWrapper(
@@ -485,7 +688,22 @@ class Hapic(object):
         context: ContextInterface = None,
         error_http_code: HTTPStatus = HTTPStatus.BAD_REQUEST,
         default_http_code: HTTPStatus = HTTPStatus.OK,
+        upload_policy: typing.Optional[UploadPolicy] = None,
     ) -> typing.Callable[[typing.Callable[..., typing.Any]], typing.Any]:
+        """
+        Decorate with a wrapper who check input files.
+
+        :param schema: Schema of files
+        :param processor: Processor object to process with given schema
+        :param context: Context to use here
+        :param error_http_code: http code in case of validation error
+        :param default_http_code: http code in case of success
+        :param upload_policy: UploadPolicy defining size limits of files
+        (413 response if exceeded). With async context, multipart body is
+        also streamed: each file is spooled to a temporary file (or given
+        sink) and given in hapic_data.files as UploadedFile.
+        :return: decorator
+        """
         processor_factory = self._get_processor_factory(schema, processor)
         context = context or self._context_getter
 
@@ -495,6 +713,7 @@ class Hapic(object):
                 processor_factory=processor_factory,
                 error_http_code=error_http_code,
                 default_http_code=default_http_code,
+                upload_policy=upload_policy,
             )
         else:
             decoration = InputFilesControllerWrapper(
@@ -502,6 +721,7 @@ class Hapic(object):
                 processor_factory=processor_factory,
                 error_http_code=error_http_code,
                 default_http_code=default_http_code,
+                upload_policy=upload_policy,
             )
 
         def decorator(func):
@@ -565,8 +785,12 @@ class Hapic(object):
         :param wildcard_method_replacement: If wild card found as method in
         operations consider these given methods as replacement. If not provided
         all OpenAPI v2 valid methods will be used.
-        :return: dict containing apispec doc
+        :return: dict containing apispec doc, or loaded doc if a doc file
+        was loaded with load_doc_file
         """
+        if self._loaded_doc is not None:
+            return self._loaded_doc.doc
+
         return self.doc_generator.get_doc(
             self,
             self._controllers,
@@ -577,6 +801,53 @@ class Hapic(object):
             wildcard_method_replacement=wildcard_method_replacement,
         )
 
+    def get_cached_doc(
+        self, title: str = "", description: str = "", version: str = "1.0.0"
+    ) -> CachedDoc:
+        """
+        Return generated doc with its encoded versions. Doc is generated at
+        first call then kept until controllers change, a view is added with
+        add_view or invalidate_doc call (routes added directly in framework
+        after that first call need an invalidate_doc call).
+        :param title: Title of generated doc
+        :param description: Description of generated doc
+        :param version: Version of generated doc
+        :return: CachedDoc instance
+        """
+        if self._loaded_doc is not None:
+            return self._loaded_doc
+
+        # Controllers list can be modified by hand
+        if self._cached_docs_controllers_count != len(self._controllers):
+            self.invalidate_doc()
+
+        doc_key = (title, description, version)
+        try:
+            return self._cached_docs[doc_key]
+        except KeyError:
+            cached_doc = CachedDoc(
+                self.generate_doc(title=title, description=description, version=version)
+            )
+            self._cached_docs[doc_key] = cached_doc
+            return cached_doc
+
+    def load_doc_file(self, file_path: str) -> None:
+        """
+        Use a previously generated doc file (eg. with
+        `python -m hapic.doc build`) instead of generating doc. Doc views and
+        generate_doc will return this doc.
+        :param file_path: path of a JSON or YAML (.yml, .yaml) doc file
+        """
+        self._loaded_doc = CachedDoc.from_file(file_path)
+
+    def invalidate_doc(self) -> None:
+        """
+        Drop cached docs. They will be generated again at next
+        get_cached_doc call.
+        """
+        self._cached_docs = {}
+        self._cached_docs_controllers_count = len(self._controllers)
+
     def save_doc_in_file(self, file_path: str, title: str = "", description: str = "") -> None:
         """
         See hapic.doc.DocGenerator#get_doc docstring
@@ -593,7 +864,37 @@ class Hapic(object):
             description=description,
         )
 
-    def add_documentation_view(self, route: str, title: str = "", description: str = "") -> None:
+    def add_view(
+        self, route: str, http_method: str, view_func: typing.Callable[..., typing.Any]
+    ) -> None:
+        """
+        Add a view in context, see ContextInterface.add_view. Cached docs
+        are dropped: they must document this new route.
+        :param route: The route depending of framework format, ex "/foo"
+        :param http_method: HTTP method like GET, POST, etc ...
+        :param view_func: The view callable
+        """
+        self.context.add_view(route=route, http_method=http_method, view_func=view_func)
+        self.invalidate_doc()
+
+    def add_documentation_view(
+        self,
+        route: str,
+        title: str = "",
+        description: str = "",
+        doc_file_path: typing.Optional[str] = None,
+    ) -> None:
+        """
+        Add swagger ui views and doc views (spec.yml, spec.json).
+        :param route: route prefix of documentation views
+        :param title: Title of generated doc
+        :param description: Description of generated doc
+        :param doc_file_path: optional previously generated doc file to
+        serve instead of generated doc, see load_doc_file
+        """
+        if doc_file_path is not None:
+            self.load_doc_file(doc_file_path)
+
         # Ensure "/" at end of route, else web browser will not consider it as
         # a path
         if not route.endswith("/"):
@@ -603,14 +904,24 @@ class Hapic(object):
             os.path.dirname(os.path.abspath(__file__)), "static", "swaggerui"
         )
 
-        # Documentation file view
-        doc_yaml = self.doc_generator.get_doc_yaml(
-            hapic=self,
-            controllers=self._controllers,
-            context=self.context,
-            title=title,
-            description=description,
-        )
+        # Documentation file views. Doc is generated at first request.
+        def get_spec_response(
+            args: tuple, kwargs: dict, mimetype: str, encoded_doc_getter: typing.Callable
+        ) -> typing.Any:
+            cached_doc = self.get_cached_doc(title=title, description=description)
+            headers = {"ETag": cached_doc.etag}
+            request_parameters = self.context.get_request_parameters(*args, **kwargs)
+            if cached_doc.match_etag(request_parameters.header_parameters.get("If-None-Match")):
+                return self.context.get_response(
+                    b"", mimetype=mimetype, http_code=HTTPStatus.NOT_MODIFIED, headers=headers
+                )
+
+            return self.context.get_response(
+                encoded_doc_getter(cached_doc),
+                mimetype=mimetype,
+                http_code=HTTPStatus.OK,
+                headers=headers,
+            )
 
         def spec_yaml_view(*args, **kwargs):
             """
@@ -621,9 +932,14 @@ class Hapic(object):
             As frameworks have different arguments patterns, we should
             allow any arguments patterns (args, kwargs).
             """
-            return self.context.get_response(
-                doc_yaml, mimetype="text/x-yaml", http_code=HTTPStatus.OK
-            )
+            return get_spec_response(args, kwargs, "text/x-yaml", lambda doc: doc.yaml)
+
+        def spec_json_view(*args, **kwargs):
+            """
+            Method to return swagger generated json spec file.
+            See spec_yaml_view docstring about arguments.
+            """
+            return get_spec_response(args, kwargs, "application/json", lambda doc: doc.json)
 
         # Prepare views html content
         doc_index_path = os.path.join(swaggerui_path, "index.html")
@@ -646,12 +962,15 @@ class Hapic(object):
             )
 
         # Add a view to generate the html index page of swagger-ui
-        self.context.add_view(route=route, http_method="GET", view_func=api_doc_view)
+        self.add_view(route=route, http_method="GET", view_func=api_doc_view)
 
-        # Add a doc yaml view
-        self.context.add_view(
+        # Add doc yaml and json views
+        self.add_view(
             route=os.path.join(route, "spec.yml"), http_method="GET", view_func=spec_yaml_view
         )
+        self.add_view(
+            route=os.path.join(route, "spec.json"), http_method="GET", view_func=spec_json_view
+        )
 
         # Add swagger directory as served static dir
         self.context.serve_directory(route, swaggerui_path)
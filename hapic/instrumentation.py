@@ -0,0 +1,120 @@
+# coding: utf-8
+import logging
+import typing
+
+from hapic.util import LOGGER_NAME
+
+# Stages measured by hapic during request processing
+STAGE_REQUEST_PARAMETERS = "request_parameters"
+STAGE_LOAD = "load"
+STAGE_VIEW = "view"
+STAGE_DUMP = "dump"
+STAGE_ENCODE = "encode"
+STAGE_RESPONSE = "response"
+
+
+class Instrumentation(object):
+    """
+    Instrumentation receive duration of each stage of request processing:
+    request parameters extraction, input loading, view execution, output
+    dumping, JSON encoding and response building. It can be given to
+    `hapic.hapic.Hapic` or set on the context.
+
+    This base class is the default instrumentation: it is disabled and
+    observe nothing. When `enabled` is False, hapic don't measure stages at
+    all. Subclasses must set `enabled` to True and implement observe_stage.
+    """
+
+    enabled = False
+
+    def observe_stage(
+        self,
+        stage: str,
+        duration: float,
+        controller_name: str,
+        decorator_name: typing.Optional[str],
+        payload_size: typing.Optional[int] = None,
+    ) -> None:
+        """
+        Called after each measured stage.
+        :param stage: stage name, one of hapic.instrumentation.STAGE_*
+        :param duration: stage duration in seconds
+        :param controller_name: qualified name of the view
+        :param decorator_name: name of the ControllerWrapper class who run
+            the stage, None for view stage
+        :param payload_size: size in bytes of produced payload if known
+        """
+        pass
+
+
+class LoggingInstrumentation(Instrumentation):
+    """
+    Instrumentation writing one log record per measured stage.
+    """
+
+    enabled = True
+
+    def __init__(
+        self, logger: typing.Optional[logging.Logger] = None, level: int = logging.DEBUG
+    ) -> None:
+        """
+        :param logger: logger to use, hapic logger if not given
+        :param level: level of log records
+        """
+        self._logger = logger or logging.getLogger(LOGGER_NAME)
+        self._level = level
+
+    def observe_stage(
+        self,
+        stage: str,
+        duration: float,
+        controller_name: str,
+        decorator_name: typing.Optional[str],
+        payload_size: typing.Optional[int] = None,
+    ) -> None:
+        if not self._logger.isEnabledFor(self._level):
+            return
+
+        self._logger.log(
+            self._level,
+            'Stage "%s" of "%s" (%s) took %.6fs (payload size: %s)',
+            stage,
+            controller_name,
+            decorator_name or "view",
+            duration,
+            payload_size,
+        )
+
+
+class HistogramInstrumentation(Instrumentation):
+    """
+    Instrumentation feeding Prometheus-style histograms: given histograms
+    must provide `labels(**labels)` returning an object with an
+    `observe(value)` method, like `prometheus_client.Histogram` declared
+    with "stage", "controller" and "decorator" label names.
+    """
+
+    enabled = True
+
+    def __init__(self, duration_histogram: typing.Any, payload_size_histogram: typing.Any = None):
+        """
+        :param duration_histogram: histogram receiving durations in seconds
+        :param payload_size_histogram: optional histogram receiving payload
+            sizes in bytes
+        """
+        self._duration_histogram = duration_histogram
+        self._payload_size_histogram = payload_size_histogram
+
+    def observe_stage(
+        self,
+        stage: str,
+        duration: float,
+        controller_name: str,
+        decorator_name: typing.Optional[str],
+        payload_size: typing.Optional[int] = None,
+    ) -> None:
+        labels = {"stage": stage, "controller": controller_name, "decorator": decorator_name or ""}
+        self._duration_histogram.labels(**labels).observe(duration)
+
+        if payload_size is not None and self._payload_size_histogram is not None:
+            self._payload_size_histogram.labels(**labels).observe(payload_size)
@@ -0,0 +1,121 @@
+# coding: utf-8
+import abc
+import json
+import typing
+
+
+class JsonBackend(metaclass=abc.ABCMeta):
+    """
+    JsonBackend encode response contents into JSON bytes and decode JSON
+    request bodies. It is used by contexts and wrappers and can be given to
+    `hapic.hapic.Hapic` or to the context constructor.
+    """
+
+    @abc.abstractmethod
+    def dumps(self, data: typing.Any) -> bytes:
+        """
+        Encode given data into UTF-8 JSON bytes
+        :param data: data to encode (dict, list, str, ...)
+        :return: JSON bytes
+        """
+
+    @abc.abstractmethod
+    def loads(self, raw_data: typing.Union[str, bytes]) -> typing.Any:
+        """
+        Decode given JSON document. Must raise ValueError if document
+        is not valid JSON.
+        :param raw_data: JSON str or bytes
+        :return: decoded data
+        """
+
+
+class StdlibJsonBackend(JsonBackend):
+    """
+    JsonBackend using python json module. This is the default backend.
+    """
+
+    def dumps(self, data: typing.Any) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    def loads(self, raw_data: typing.Union[str, bytes]) -> typing.Any:
+        return json.loads(raw_data)
+
+
+class OrjsonJsonBackend(JsonBackend):
+    """
+    JsonBackend using orjson package (must be installed).
+    """
+
+    def __init__(self, option: typing.Optional[int] = None) -> None:
+        """
+        :param option: orjson dumps option. Default permit non str dict keys
+            like python json module.
+        """
+        import orjson
+
+        self._orjson = orjson
+        self._option = orjson.OPT_NON_STR_KEYS if option is None else option
+
+    def __reduce__(self) -> tuple:
+        # Module can't be pickled (backend can be sent to an executor)
+        return type(self), (self._option,)
+
+    def dumps(self, data: typing.Any) -> bytes:
+        return self._orjson.dumps(data, option=self._option)
+
+    def loads(self, raw_data: typing.Union[str, bytes]) -> typing.Any:
+        return self._orjson.loads(raw_data)
+
+
+class UjsonJsonBackend(JsonBackend):
+    """
+    JsonBackend using ujson package (must be installed).
+    """
+
+    def __init__(self) -> None:
+        import ujson
+
+        self._ujson = ujson
+
+    def __reduce__(self) -> tuple:
+        return type(self), ()
+
+    def dumps(self, data: typing.Any) -> bytes:
+        return self._ujson.dumps(data).encode("utf-8")
+
+    def loads(self, raw_data: typing.Union[str, bytes]) -> typing.Any:
+        return self._ujson.loads(raw_data)
+
+
+class RapidjsonJsonBackend(JsonBackend):
+    """
+    JsonBackend using python-rapidjson package (must be installed).
+    """
+
+    def __init__(self) -> None:
+        import rapidjson
+
+        self._rapidjson = rapidjson
+
+    def __reduce__(self) -> tuple:
+        return type(self), ()
+
+    def dumps(self, data: typing.Any) -> bytes:
+        return self._rapidjson.dumps(data).encode("utf-8")
+
+    def loads(self, raw_data: typing.Union[str, bytes]) -> typing.Any:
+        return self._rapidjson.loads(raw_data)
+
+
+def get_fastest_json_backend() -> JsonBackend:
+    """
+    :return: fastest installed JsonBackend: orjson, then rapidjson, then
+        ujson. Python json module based backend if none are installed.
+    """
+    for backend_class in (OrjsonJsonBackend, RapidjsonJsonBackend, UjsonJsonBackend):
+        try:
+            return backend_class()
+        except ImportError:
+            pass
+
+    return StdlibJsonBackend()
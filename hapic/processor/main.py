@@ -1,18 +1,25 @@
 import abc
+import asyncio
+from concurrent.futures import Executor
 from datetime import datetime
+import functools
+import itertools
 import os
 import typing
 
-from apispec import BasePlugin
 from multidict import MultiDict
 
 from hapic.data import HapicFile
 from hapic.doc.schema import SchemaUsage
 from hapic.exception import ConfigurationException
+from hapic.exception import ProcessException
 
 if typing.TYPE_CHECKING:
+    from apispec import BasePlugin  # noqa: F401
+
     from hapic.type import TYPE_SCHEMA  # noqa: F401
     from hapic.error.main import ErrorBuilderInterface
+    from hapic.upload import UploadPolicy  # noqa: F401
 
 
 class RequestParameters(object):
@@ -61,6 +68,12 @@ class RequestParameters(object):
         self.header_parameters = header_parameters
         self.files_parameters = files_parameters
 
+    # Size in bytes of request body if known by context, else None
+    body_size = None  # type: typing.Optional[int]
+    # UploadPolicy of endpoint input files, to use when context read a
+    # multipart body (even to get form parameters). Default policy if None.
+    upload_policy = None  # type: typing.Optional[UploadPolicy]
+
 
 class ProcessValidationError(object):
     def __init__(
@@ -71,9 +84,163 @@ class ProcessValidationError(object):
         self.original_exception = original_exception
 
 
+class ProcessLoadResult(object):
+    """
+    Result of a processor load: loaded data or, if validation failed, the
+    validation error and the exception who describe it.
+    """
+
+    def __init__(
+        self,
+        data: typing.Any = None,
+        error: typing.Optional[ProcessValidationError] = None,
+        exception: typing.Optional[ProcessException] = None,
+    ) -> None:
+        self.data = data
+        self.error = error
+        self.exception = exception
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+
+class OutputValidationPolicy(object):
+    """
+    Define when processors validate the data they dump:
+      - full: each dumped data is validated (default)
+      - sampled: one dump on sample_rate is validated and, if sample_items is
+        given, only the sample_items first items of dumped lists are validated
+      - off: dumped data is never validated
+    """
+
+    FULL = "full"
+    SAMPLED = "sampled"
+    OFF = "off"
+    MODES = (FULL, SAMPLED, OFF)
+
+    def __init__(
+        self, mode: str = FULL, sample_rate: int = 1, sample_items: typing.Optional[int] = None
+    ) -> None:
+        """
+        :param mode: one of "full", "sampled" or "off"
+        :param sample_rate: in sampled mode, validate one dump on sample_rate
+        :param sample_items: in sampled mode, validate only this count of first
+            items of dumped lists
+        """
+        if mode not in self.MODES:
+            raise ConfigurationException(
+                'Unknown output validation mode "{}", must be one of {}'.format(
+                    mode, ", ".join(self.MODES)
+                )
+            )
+        if sample_rate < 1:
+            raise ConfigurationException("Output validation sample_rate must be 1 or greater")
+
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.sample_items = sample_items
+        self.skipped_count = 0
+        self._dump_counter = itertools.count()
+
+    def must_validate(self) -> bool:
+        """
+        Must be called for each dump to know if dumped data must be validated.
+        Increment skipped_count if not.
+        :return: True if dumped data must be validated
+        """
+        if self.mode == self.FULL:
+            return True
+
+        if self.mode == self.SAMPLED and next(self._dump_counter) % self.sample_rate == 0:
+            return True
+
+        self.skipped_count += 1
+        return False
+
+    def get_items_to_validate(self, dumped_items: list) -> list:
+        """
+        :param dumped_items: dumped list to validate
+        :return: dumped items who must be validated
+        """
+        if self.mode == self.SAMPLED and self.sample_items is not None:
+            return dumped_items[: self.sample_items]
+        return dumped_items
+
+
+class OffloadPolicy(object):
+    """
+    Define when async wrappers must run processor load/dump (and JSON
+    encoding of response) in an executor instead of in the event loop:
+    large payloads are offloaded, small ones keep running inline. Only the
+    processor, the json backend and the data are sent to executor, response
+    is built back in the event loop.
+    """
+
+    def __init__(
+        self,
+        executor: typing.Optional[Executor] = None,
+        min_body_size: int = 256 * 1024,
+        min_items_count: int = 1000,
+    ) -> None:
+        """
+        :param executor: Executor to use, event loop default executor (a
+            ThreadPoolExecutor) if not given. A ProcessPoolExecutor can be
+            given if used schemas (and so their classes) and data can be
+            pickled. Processors are then pickled: a sampled
+            OutputValidationPolicy counts dumps of each worker process
+            separately, its state changed in workers is not sent back.
+        :param min_body_size: request body size in bytes from which input
+            body loading is offloaded
+        :param min_items_count: items count of output list from which
+            output dumping is offloaded. For output streams, items following
+            the first min_items_count ones are dumped in executor.
+        """
+        if min_body_size < 0 or min_items_count < 0:
+            raise ConfigurationException("min_body_size and min_items_count must be positive")
+
+        self.executor = executor
+        self.min_body_size = min_body_size
+        self.min_items_count = min_items_count
+
+    def must_offload_body(self, body_size: typing.Optional[int]) -> bool:
+        """
+        :param body_size: request body size in bytes, None if unknown
+        :return: True if body of this size must be loaded in executor
+        """
+        return body_size is not None and body_size >= self.min_body_size
+
+    def must_offload_data(self, data: typing.Any) -> bool:
+        """
+        :param data: data to dump
+        :return: True if given data must be dumped in executor
+        """
+        return isinstance(data, (list, tuple)) and len(data) >= self.min_items_count
+
+    def must_offload_stream(self, items_count: int) -> bool:
+        """
+        :param items_count: count of items already sent in stream
+        :return: True if next stream item must be dumped in executor
+        """
+        return items_count >= self.min_items_count
+
+    async def run(self, func: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any:
+        """
+        Run given function with given arguments in executor and return its
+        result.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+
 class Processor(metaclass=abc.ABCMeta):
-    def __init__(self, schema: typing.Optional["TYPE_SCHEMA"] = None) -> None:
+    def __init__(
+        self,
+        schema: typing.Optional["TYPE_SCHEMA"] = None,
+        output_validation_policy: typing.Optional[OutputValidationPolicy] = None,
+    ) -> None:
         self._schema = schema
+        self.output_validation_policy = output_validation_policy or OutputValidationPolicy()
 
     def set_schema(self, schema: typing.Any) -> None:
         """
@@ -82,24 +249,31 @@ class Processor(metaclass=abc.ABCMeta):
         """
         self._schema = schema
 
+    def set_output_validation_policy(self, policy: OutputValidationPolicy) -> None:
+        """
+        Set policy who define when dumped data must be validated
+        :param policy: OutputValidationPolicy instance
+        """
+        self.output_validation_policy = policy
+
     @classmethod
     @abc.abstractmethod
     def create_apispec_plugin(
         cls, schema_name_resolver: typing.Optional[typing.Callable] = None
-    ) -> BasePlugin:
+    ) -> "BasePlugin":
         """
         Must return instance of matching apispec plugin to use for generate
         OpenAPI documentation.
         """
 
     @abc.abstractmethod
-    def generate_schema_ref(self, main_plugin: BasePlugin) -> dict:
+    def generate_schema_ref(self, main_plugin: "BasePlugin") -> dict:
         """
         Must return OpenApi $ref in a dict,
         eg. {"$ref": "#/definitions/MySchema"}
         """
 
-    def schema_class_resolver(self, main_plugin: BasePlugin) -> SchemaUsage:
+    def schema_class_resolver(self, main_plugin: "BasePlugin") -> SchemaUsage:
         """
         Return schema class with adaptation if needed.
         :param main_plugin: associated Apispec plugin
@@ -109,6 +283,13 @@ class Processor(metaclass=abc.ABCMeta):
         """
         return SchemaUsage(self.schema)
 
+    def warm_up(self) -> None:
+        """
+        Build processor internal objects (eg. compiled serializer) now
+        instead of at first processed request. Do nothing by default.
+        """
+        pass
+
     @property
     def schema(self):
         if not self._schema:
@@ -165,10 +346,24 @@ class Processor(metaclass=abc.ABCMeta):
         :return: updated data (like with default values)
         """
 
+    def load_with_result(self, data: typing.Any) -> ProcessLoadResult:
+        """
+        Use schema to validate given data and return a ProcessLoadResult
+        containing loaded data or validation error. Override it to produce
+        validation error without a second validation of data.
+        :param data: data to validate and process
+        :return: ProcessLoadResult instance
+        """
+        try:
+            return ProcessLoadResult(data=self.load(data))
+        except ProcessException as exc:
+            return ProcessLoadResult(error=self.get_input_validation_error(data), exception=exc)
+
     @abc.abstractmethod
     def dump(self, data: typing.Any) -> typing.Any:
         """
         Must use schema to validate given data and return dumped data.
+        Validation must respect output_validation_policy.
         If validation fail, must raise InputValidationException
         :param data: data to validate and dump
         :return: dumped data
@@ -183,6 +378,21 @@ class Processor(metaclass=abc.ABCMeta):
         :return: original data if ok
         """
 
+    def load_files_input_with_result(self, input_data: typing.Any) -> ProcessLoadResult:
+        """
+        Use schema to validate input data files and return a
+        ProcessLoadResult containing loaded data or validation error. Override
+        it to produce validation error without a second validation of data.
+        :param input_data: input data to validate and update to give to view
+        :return: ProcessLoadResult instance
+        """
+        try:
+            return ProcessLoadResult(data=self.load_files_input(input_data))
+        except ProcessException as exc:
+            return ProcessLoadResult(
+                error=self.get_input_files_validation_error(input_data), exception=exc
+            )
+
     @abc.abstractmethod
     def dump_output_file(self, output_file: typing.Any) -> typing.Any:
         """
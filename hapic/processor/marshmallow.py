@@ -1,18 +1,21 @@
 import typing
 
-from apispec import BasePlugin
-from apispec_marshmallow_advanced import MarshmallowAdvancedPlugin
-from apispec_marshmallow_advanced.common import generate_schema_name
-from apispec_marshmallow_advanced.common import schema_class_resolver as schema_class_resolver_
+import marshmallow
 
 from hapic.doc.schema import SchemaUsage
 from hapic.error.main import ErrorBuilderInterface
 from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
 from hapic.exception import OutputValidationException
 from hapic.exception import ValidationException
+from hapic.processor.main import ProcessLoadResult
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 
+if typing.TYPE_CHECKING:
+    # INFO - Documentation dependencies are imported at first use
+    from apispec import BasePlugin  # noqa: F401
+    from apispec_marshmallow_advanced import MarshmallowAdvancedPlugin  # noqa: F401
+
 
 class MarshmallowProcessor(Processor):
     """
@@ -22,18 +25,23 @@ class MarshmallowProcessor(Processor):
     @classmethod
     def create_apispec_plugin(
         cls, schema_name_resolver: typing.Optional[typing.Callable] = None
-    ) -> BasePlugin:
+    ) -> "BasePlugin":
+        from apispec_marshmallow_advanced import MarshmallowAdvancedPlugin
+        from apispec_marshmallow_advanced.common import generate_schema_name
+
         schema_name_resolver = schema_name_resolver or generate_schema_name
 
         return MarshmallowAdvancedPlugin(schema_name_resolver=schema_name_resolver)
 
-    def generate_schema_ref(self, main_plugin: MarshmallowAdvancedPlugin) -> dict:
+    def generate_schema_ref(self, main_plugin: "MarshmallowAdvancedPlugin") -> dict:
         """
         Return OpenApi $ref in a dict,
         eg. {"$ref": "#/definitions/MySchema"} or
             {'type': 'array', 'items': {"$ref": "#/definitions/MySchema"}}
         """
-        schema_class = schema_class_resolver_(main_plugin, self.schema)
+        from apispec_marshmallow_advanced.common import schema_class_resolver
+
+        schema_class = schema_class_resolver(main_plugin, self.schema)
         ref = {"$ref": "#/definitions/{}".format(main_plugin.schema_name_resolver(schema_class))}
 
         if self.schema.many:
@@ -41,14 +49,32 @@ class MarshmallowProcessor(Processor):
 
         return ref
 
-    def schema_class_resolver(self, main_plugin: MarshmallowAdvancedPlugin) -> SchemaUsage:
+    def schema_class_resolver(self, main_plugin: "MarshmallowAdvancedPlugin") -> SchemaUsage:
         """
         Return schema class with adaptation if needed.
         :param main_plugin: Apispec plugin associated for marshmallow
         :return: schema generated from given schema or original schema if
             no change required.
         """
-        return SchemaUsage(schema_class_resolver_(main_plugin, self.schema))
+        from apispec_marshmallow_advanced.common import schema_class_resolver
+
+        return SchemaUsage(schema_class_resolver(main_plugin, self.schema))
+
+    def warm_up(self) -> None:
+        """see hapic.processor.main.Processor#warm_up"""
+        # Only nested schemas are built: a dry dump would run user hooks
+        # (pre_dump, post_dump, method fields) on fake data
+        if self._schema is not None:
+            self._warm_up_schema(self._schema, set())
+
+    @classmethod
+    def _warm_up_schema(cls, schema: marshmallow.Schema, seen: typing.Set[int]) -> None:
+        seen.add(id(schema))
+        for field in schema.fields.values():
+            if isinstance(field, marshmallow.fields.List):
+                field = field.container
+            if isinstance(field, marshmallow.fields.Nested) and id(field.schema) not in seen:
+                cls._warm_up_schema(field.schema, seen)
 
     def clean_data(self, data: typing.Any) -> dict:
         """
@@ -125,12 +151,32 @@ class MarshmallowProcessor(Processor):
         :param data: data to validate and process
         :return: updated data (like with default values)
         """
+        load_result = self.load_with_result(data)
+        if not load_result.valid:
+            raise load_result.exception
+
+        return load_result.data
+
+    def load_with_result(self, data: typing.Any) -> ProcessLoadResult:
+        """
+        Use schema to validate given data and return a ProcessLoadResult
+        containing updated data (like with default values) or validation error.
+        :param data: data to validate and process
+        :return: ProcessLoadResult instance
+        """
         clean_data = self.clean_data(data)
         unmarshall = self.schema.load(clean_data)
         if unmarshall.errors:
-            raise ValidationException("Error when loading: {}".format(str(unmarshall.errors)))
+            return ProcessLoadResult(
+                error=ProcessValidationError(
+                    message="Validation error of input data", details=unmarshall.errors
+                ),
+                exception=ValidationException(
+                    "Error when loading: {}".format(str(unmarshall.errors))
+                ),
+            )
 
-        return unmarshall.data
+        return ProcessLoadResult(data=unmarshall.data)
 
     def dump(self, data: typing.Any) -> typing.Any:
         """
@@ -143,30 +189,68 @@ class MarshmallowProcessor(Processor):
         dump_data = self.schema.dump(clean_data).data
 
         # Re-validate with dumped data
-        errors = self.schema.load(dump_data).errors
+        errors = self._get_dumped_data_errors(dump_data)
         if errors:
             raise ValidationException("Error when dumping: {}".format(str(errors)))
 
         return dump_data
 
+    def _get_dumped_data_errors(self, dump_data: typing.Any) -> typing.Any:
+        """
+        Validate dumped data by loading it, if output validation policy
+        require it.
+        :param dump_data: data dumped by schema
+        :return: marshmallow errors, empty if valid or not validated
+        """
+        if not self.output_validation_policy.must_validate():
+            return {}
+
+        if self.schema.many and isinstance(dump_data, list):
+            return self.schema.load(
+                self.output_validation_policy.get_items_to_validate(dump_data)
+            ).errors
+
+        return self.schema.load(dump_data).errors
+
     def load_files_input(self, input_data: typing.Any) -> typing.Any:
         """
         Validate input files and raise OutputValidationException if validation errors.
         :param input_data: input data containing files
         :return:
         """
+        load_result = self.load_files_input_with_result(input_data)
+        if not load_result.valid:
+            raise load_result.exception
+
+        return load_result.data
+
+    def load_files_input_with_result(self, input_data: typing.Any) -> ProcessLoadResult:
+        """
+        Validate input files and return a ProcessLoadResult containing data
+        or validation error.
+        :param input_data: input data containing files
+        :return: ProcessLoadResult instance
+        """
         clean_data = self.clean_data(input_data)
         unmarshall = self.schema.load(clean_data)
         additional_errors = self._get_input_files_errors(unmarshall.data)
 
         if unmarshall.errors or additional_errors:
-            raise OutputValidationException(
+            exception = OutputValidationException(
                 "Error when validate ouput: {}".format(
                     ", ".join([str(unmarshall.errors), str(additional_errors)])
                 )
             )
+            errors = dict(unmarshall.errors)
+            errors.update(additional_errors)
+            return ProcessLoadResult(
+                error=ProcessValidationError(
+                    message="Validation error of input data", details=errors
+                ),
+                exception=exception,
+            )
 
-        return unmarshall.data
+        return ProcessLoadResult(data=unmarshall.data)
 
     def _get_input_files_errors(self, validated_data: dict) -> typing.Dict[str, str]:
         """
@@ -197,7 +281,7 @@ class MarshmallowProcessor(Processor):
         dump_data = self.schema.dump(clean_data).data
 
         # Validate
-        errors = self.schema.load(dump_data).errors
+        errors = self._get_dumped_data_errors(dump_data)
         if errors:
             raise OutputValidationException("Error when validate input: {}".format(str(errors)))
 
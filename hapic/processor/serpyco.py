@@ -1,10 +1,8 @@
 import dataclasses
 import logging
+import threading
 import typing
 
-from apispec import BasePlugin
-from apispec_serpyco import SerpycoPlugin
-from apispec_serpyco.utils import schema_name_resolver as schema_name_resolver_
 from multidict import MultiDict
 from multidict import MultiDictProxy
 import serpyco
@@ -17,11 +15,73 @@ from hapic.error.serpyco import SerpycoDefaultErrorBuilder
 from hapic.exception import OutputValidationException
 from hapic.exception import ValidationException
 from hapic.exception import WorkflowException
+from hapic.processor.main import OutputValidationPolicy
+from hapic.processor.main import ProcessLoadResult
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.type import TYPE_SCHEMA
 from hapic.util import LOGGER_NAME
 
+if typing.TYPE_CHECKING:
+    # INFO - Documentation dependencies are imported at first use
+    from apispec import BasePlugin  # noqa: F401
+    from apispec_serpyco import SerpycoPlugin  # noqa: F401
+
+
+class SerializerPool(object):
+    """
+    Process-wide registry of serpyco serializers. Building a serializer
+    compile its dataclass, so processors using same dataclass with same
+    parameters share one serializer instead of compiling it again.
+    """
+
+    def __init__(self) -> None:
+        self._serializers = {}  # type: typing.Dict[tuple, Serializer]
+        self._lock = threading.Lock()
+
+    def get_serializer(
+        self,
+        schema: TYPE_SCHEMA,
+        only: typing.Optional[typing.List[str]] = None,
+        exclude: typing.Optional[typing.List[str]] = None,
+        omit_none: bool = False,
+    ) -> Serializer:
+        """
+        Return serializer for given parameters, build it if not yet built.
+        :param schema: dataclass to serialize
+        :param only: field names to keep
+        :param exclude: field names to exclude
+        :param omit_none: True to not dump None values
+        :return: shared Serializer instance
+        """
+        key = (
+            schema,
+            tuple(sorted(only)) if only else None,
+            tuple(sorted(exclude)) if exclude else None,
+            omit_none,
+        )
+        try:
+            return self._serializers[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if key not in self._serializers:
+                self._serializers[key] = serpyco.Serializer(
+                    schema, only=only, exclude=exclude, omit_none=omit_none
+                )
+            return self._serializers[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._serializers.clear()
+
+    def __len__(self) -> int:
+        return len(self._serializers)
+
+
+serializer_pool = SerializerPool()
+
 
 class SerpycoProcessor(Processor):
     def __init__(
@@ -30,22 +90,42 @@ class SerpycoProcessor(Processor):
         only: typing.Optional[typing.List[str]] = None,
         exclude: typing.Optional[typing.List[str]] = None,
         many: bool = False,
+        output_validation_policy: typing.Optional[OutputValidationPolicy] = None,
     ) -> None:
-        super().__init__(schema)
+        super().__init__(schema, output_validation_policy)
         self._logger = logging.getLogger(LOGGER_NAME)
         self._serializer = None  # type: Serializer
         self._only = only
         self._exclude = exclude
         self._many = many
 
+    def __getstate__(self) -> dict:
+        # Serializer and logger can't be pickled (eg. to be sent to a process
+        # pool executor): serializer is built again when needed
+        state = self.__dict__.copy()
+        state["_serializer"] = None
+        del state["_logger"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._logger = logging.getLogger(LOGGER_NAME)
+
+    def set_schema(self, schema: typing.Any) -> None:
+        super().set_schema(schema)
+        self._serializer = None
+
     @classmethod
     def create_apispec_plugin(
         cls, schema_name_resolver: typing.Optional[typing.Callable] = None
-    ) -> BasePlugin:
-        schema_name_resolver = schema_name_resolver or schema_name_resolver_
+    ) -> "BasePlugin":
+        from apispec_serpyco import SerpycoPlugin
+        from apispec_serpyco.utils import schema_name_resolver as default_schema_name_resolver
+
+        schema_name_resolver = schema_name_resolver or default_schema_name_resolver
         return SerpycoPlugin(schema_name_resolver=schema_name_resolver)
 
-    def generate_schema_ref(self, main_plugin: SerpycoPlugin) -> dict:
+    def generate_schema_ref(self, main_plugin: "SerpycoPlugin") -> dict:
         """
         Return OpenApi $ref in a dict,
         eg. {"$ref": "#/definitions/MySchema"}
@@ -61,7 +141,7 @@ class SerpycoProcessor(Processor):
 
         return ref
 
-    def schema_class_resolver(self, main_plugin: SerpycoPlugin) -> SchemaUsage:
+    def schema_class_resolver(self, main_plugin: "SerpycoPlugin") -> SchemaUsage:
         """
         Return schema class with adaptation if needed.
         :param main_plugin: Apispec plugin associated for marshmallow
@@ -88,19 +168,22 @@ class SerpycoProcessor(Processor):
     @property
     def serializer(self) -> Serializer:
         """
-        Return cached (create id if not yet created) serializer
+        Return cached (take it from serializer pool if not yet taken)
+        serializer
         :return: serializer instance
         """
         if self._serializer is None:
-            self._serializer = serpyco.Serializer(
-                self.schema,
-                only=self._only,
-                exclude=self._exclude,
-                omit_none=False,
+            self._serializer = serializer_pool.get_serializer(
+                self.schema, only=self._only, exclude=self._exclude, omit_none=False
             )
 
         return self._serializer
 
+    def warm_up(self) -> None:
+        """see hapic.processor.main.Processor#warm_up"""
+        if self._schema is not None:
+            self.serializer
+
     def clean_data(self, raw_data: typing.Any) -> dict:
         """
         Return given data. Update this method if potential "None" value must be adapted fo serpyco
@@ -197,18 +280,53 @@ class SerpycoProcessor(Processor):
         :param data: data to validate and process
         :return: schema dataclass instance
         """
+        load_result = self.load_with_result(data)
+        if not load_result.valid:
+            raise load_result.exception
+
+        return load_result.data
+
+    def load_with_result(self, data: typing.Any) -> ProcessLoadResult:
+        """
+        Use schema to validate given data and return a ProcessLoadResult
+        containing dataclass instance or validation error.
+        :param data: data to validate and process
+        :return: ProcessLoadResult instance
+        """
         # Prevent serpyco error when Rrequest context give us a MultiDictProxy
         if isinstance(data, (MultiDictProxy, MultiDict)):
             data = dict(data)
 
         try:
-            return self.serializer.load(data, many=self._many)
+            return ProcessLoadResult(data=self.serializer.load(data, many=self._many))
         except ValidationError as exc:
-            raise ValidationException("Error when loading: {}".format(exc.args[0])) from exc
+            exception = ValidationException("Error when loading: {}".format(exc.args[0]))
+            exception.__cause__ = exc
+            return ProcessLoadResult(
+                error=ProcessValidationError(
+                    message='Validation error of input data: "{}"'.format(exc.args[0]),
+                    details=exc.args[1],
+                    original_exception=exc,
+                ),
+                exception=exception,
+            )
         except Exception as exc:
-            raise ValidationException(
+            self._logger.exception(
+                'Unknown error during serpyco load: "{}": "{}"'.format(type(exc).__name__, str(exc))
+            )
+            exception = ValidationException(
                 'Unknown error when serpyco load: "{}": "{}"'.format(type(exc).__name__, str(exc))
-            ) from exc
+            )
+            exception.__cause__ = exc
+            return ProcessLoadResult(
+                error=ProcessValidationError(
+                    message="Unknown error during validation "
+                    'of input data: "{}": "{}"'.format(type(exc).__name__, str(exc)),
+                    details={},
+                    original_exception=exc,
+                ),
+                exception=exception,
+            )
 
     def dump(self, data: typing.Any) -> typing.Any:
         """
@@ -219,6 +337,15 @@ class SerpycoProcessor(Processor):
         :return: dumped data
         """
         try:
+            if not self.output_validation_policy.must_validate():
+                return self.serializer.dump(data, validate=False, many=self._many)
+
+            if self._many and isinstance(data, list):
+                items_to_validate = self.output_validation_policy.get_items_to_validate(data)
+                if len(items_to_validate) < len(data):
+                    self.serializer.dump(items_to_validate, validate=True, many=True)
+                    return self.serializer.dump(data, validate=False, many=True)
+
             return self.serializer.dump(data, validate=True, many=self._many)
         except ValidationError as exc:
             raise ValidationException("Error when dumping: {}".format(exc.args[0])) from exc
@@ -237,6 +364,21 @@ class SerpycoProcessor(Processor):
         :param input_data: input data containing files
         :return: original data
         """
+        load_result = self.load_files_input_with_result(input_data)
+        if not load_result.valid:
+            raise load_result.exception
+
+        return load_result.data
+
+    def load_files_input_with_result(
+        self, input_data: typing.Dict[str, typing.Any]
+    ) -> ProcessLoadResult:
+        """
+        Validate input files and return a ProcessLoadResult containing
+        dataclass instance or validation error.
+        :param input_data: input data containing files
+        :return: ProcessLoadResult instance
+        """
         missing_names = []
 
         for field in dataclasses.fields(self.schema):
@@ -249,11 +391,17 @@ class SerpycoProcessor(Processor):
                 missing_names.append(field.name)
 
         if missing_names:
-            raise OutputValidationException(
-                '"{}" files are missing'.format('", "'.join(missing_names))
+            return ProcessLoadResult(
+                error=ProcessValidationError(
+                    message="Validation error of input data",
+                    details={name: "data is missing" for name in missing_names},
+                ),
+                exception=OutputValidationException(
+                    '"{}" files are missing'.format('", "'.join(missing_names))
+                ),
             )
 
-        return self.schema(**input_data)
+        return ProcessLoadResult(data=self.schema(**input_data))
 
     def dump_output_file(self, output_file: typing.Any) -> typing.Any:
         """
@@ -0,0 +1,220 @@
+# coding: utf-8
+"""
+Route dispatching for contexts without web framework. Rules use bottle
+syntax: "/users/<user_id>", "/users/<user_id:int>" or "/static/<path:path>".
+"""
+import re
+import typing
+
+from hapic.exception import ConfigurationException
+from hapic.util import get_swagger_path
+
+# Regular expression to locate url parameters, like "<name>" or
+# "<name:filter>"
+RULE_PARAMETER_REGEX = re.compile(r"<([^:<>]+)(?::([^<>]+))?>")
+# Regular expressions of url parameters filters, "re:<regex>" filter is also
+# available
+FILTER_PATTERNS = {None: r"[^/]+", "int": r"-?\d+", "float": r"-?[\d.]+", "path": r".+"}
+# Converters of url parameters values by filter, other values are str
+FILTER_CONVERTERS = {"int": int, "float": float}  # type: typing.Dict[str, typing.Callable]
+
+
+# Pattern of a rule segment with converters of its parameters, and its node
+TYPE_DYNAMIC_CHILD = typing.Tuple[typing.Pattern, typing.Dict[str, typing.Callable], "RouteNode"]
+
+
+class Route(object):
+    def __init__(self, rule: str, method: str, callback: typing.Callable[..., typing.Any]) -> None:
+        self.rule = rule
+        self.method = method.upper()
+        self.callback = callback
+
+    @property
+    def is_static(self) -> bool:
+        return RULE_PARAMETER_REGEX.search(self.rule) is None
+
+
+class RouteNode(object):
+    """
+    Node of routes tree: a node by rule segment (part between "/"). Static
+    segments are dict keys, segments containing parameters are regular
+    expressions (with converters of their parameters) tried in declaration
+    order.
+    """
+
+    def __init__(self) -> None:
+        self.routes = {}  # type: typing.Dict[str, Route]
+        self.static_children = {}  # type: typing.Dict[str, RouteNode]
+        self.dynamic_children = []  # type: typing.List[TYPE_DYNAMIC_CHILD]
+        # Child matching all remaining segments ("path" filter)
+        self.tail_child = None  # type: typing.Optional[typing.Tuple[str, RouteNode]]
+
+    def get_dynamic_child(
+        self, pattern: typing.Pattern, converters: typing.Dict[str, typing.Callable]
+    ) -> "RouteNode":
+        for child_pattern, child_converters, child in self.dynamic_children:
+            if child_pattern.pattern == pattern.pattern and child_converters == converters:
+                return child
+
+        child = RouteNode()
+        self.dynamic_children.append((pattern, converters, child))
+        return child
+
+
+class Router(object):
+    """
+    Find route of a request path: rules without parameters are found with a
+    dict lookup, others by walking routes tree segment by segment, without
+    trying each rule.
+    """
+
+    def __init__(self) -> None:
+        self.routes = []  # type: typing.List[Route]
+        self._static_routes = {}  # type: typing.Dict[str, typing.Dict[str, Route]]
+        self._root = RouteNode()
+
+    def add(self, rule: str, method: str, callback: typing.Callable[..., typing.Any]) -> Route:
+        """
+        :raise ConfigurationException: if rule is invalid
+        """
+        route = Route(rule, method, callback)
+        if route.is_static:
+            self._static_routes.setdefault(rule, {}).setdefault(route.method, route)
+        else:
+            node = self._root
+            segments = rule.split("/")
+            for index, segment in enumerate(segments):
+                node = self._get_child(node, segment, index == len(segments) - 1)
+            node.routes.setdefault(route.method, route)
+
+        self.routes.append(route)
+        return route
+
+    def _get_child(self, node: RouteNode, segment: str, is_last: bool) -> RouteNode:
+        parameters = list(RULE_PARAMETER_REGEX.finditer(segment))
+        if not parameters:
+            return node.static_children.setdefault(segment, RouteNode())
+
+        if any(parameter.group(2) == "path" for parameter in parameters):
+            if len(parameters) != 1 or parameters[0].group(0) != segment or not is_last:
+                raise ConfigurationException(
+                    'Parameter "{}" with path filter must be whole end of rule'.format(segment)
+                )
+            if node.tail_child is None:
+                node.tail_child = (parameters[0].group(1), RouteNode())
+            return node.tail_child[1]
+
+        pattern = []
+        converters = {}
+        position = 0
+        for parameter in parameters:
+            if parameter.group(2) in FILTER_CONVERTERS:
+                converters[parameter.group(1)] = FILTER_CONVERTERS[parameter.group(2)]
+            parameter_start = parameter.start()
+            pattern.append(re.escape(segment[position:parameter_start]))
+            pattern.append(
+                "(?P<{}>{})".format(
+                    parameter.group(1), self._get_filter_pattern(parameter.group(2))
+                )
+            )
+            position = parameter.end()
+        pattern.append(re.escape(segment[position:]))
+        return node.get_dynamic_child(re.compile("^{}$".format("".join(pattern))), converters)
+
+    def _get_filter_pattern(self, filter_: typing.Optional[str]) -> str:
+        if filter_ is not None and filter_.startswith("re:"):
+            return filter_[3:]
+        try:
+            return FILTER_PATTERNS[filter_]
+        except KeyError:
+            raise ConfigurationException('Unknown url parameter filter "{}"'.format(filter_))
+
+    def match(
+        self, method: str, path: str
+    ) -> typing.Tuple[typing.Optional[Route], typing.Dict[str, typing.Any], typing.Set[str]]:
+        """
+        Find route of given request. HEAD requests use GET routes if there is
+        no HEAD route.
+        :return: matched route (or None), its url parameters (converted if
+        they have int or float filter) and, if path match only routes of
+        other methods, allowed methods of path
+        """
+        allowed_methods = set()  # type: typing.Set[str]
+        routes = self._static_routes.get(path)
+        if routes is not None:
+            route = self._get_method_route(routes, method, allowed_methods)
+            if route is not None:
+                return route, {}, set()
+
+        parameters = {}  # type: typing.Dict[str, typing.Any]
+        route = self._match_node(
+            self._root, method, path.split("/"), 0, parameters, allowed_methods
+        )
+        if route is None:
+            return None, {}, allowed_methods
+        return route, parameters, set()
+
+    def _get_method_route(
+        self, routes: typing.Dict[str, Route], method: str, allowed_methods: typing.Set[str]
+    ) -> typing.Optional[Route]:
+        route = routes.get(method)
+        if route is None and method == "HEAD":
+            route = routes.get("GET")
+        if route is None:
+            allowed_methods.update(routes)
+        return route
+
+    def _match_node(
+        self,
+        node: RouteNode,
+        method: str,
+        segments: typing.List[str],
+        index: int,
+        parameters: typing.Dict[str, typing.Any],
+        allowed_methods: typing.Set[str],
+    ) -> typing.Optional[Route]:
+        """
+        Walk routes tree from given node, static segments first.
+        :return: route of given method whose rule match remaining segments
+        """
+        if index == len(segments):
+            return self._get_method_route(node.routes, method, allowed_methods)
+
+        segment = segments[index]
+        child = node.static_children.get(segment)
+        if child is not None:
+            route = self._match_node(
+                child, method, segments, index + 1, parameters, allowed_methods
+            )
+            if route is not None:
+                return route
+
+        for pattern, converters, child in node.dynamic_children:
+            match = pattern.match(segment)
+            if match is None:
+                continue
+            try:
+                segment_parameters = {
+                    name: converters[name](value) if name in converters else value
+                    for name, value in match.groupdict().items()
+                }
+            except ValueError:
+                continue
+            route = self._match_node(
+                child, method, segments, index + 1, parameters, allowed_methods
+            )
+            if route is not None:
+                parameters.update(segment_parameters)
+                return route
+
+        if node.tail_child is not None and segment:
+            name, child = node.tail_child
+            route = self._get_method_route(child.routes, method, allowed_methods)
+            if route is not None:
+                parameters[name] = "/".join(segments[index:])
+                return route
+
+        return None
+
+    def get_swagger_path(self, rule: str) -> str:
+        return get_swagger_path(RULE_PARAMETER_REGEX, rule)
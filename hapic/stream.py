@@ -0,0 +1,116 @@
+# coding: utf-8
+import asyncio
+import typing
+
+from hapic.exception import ConfigurationException
+
+
+class StreamBatchPolicy(object):
+    """
+    Define how output stream items are coalesced before being written in
+    stream response: buffered items are written in one write when one of
+    given limit is reached, and at end of stream.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1000,
+        max_bytes: int = 64 * 1024,
+        max_delay: typing.Optional[float] = 0.1,
+    ) -> None:
+        """
+        :param max_items: count of buffered items who trigger a write
+        :param max_bytes: size in bytes of buffered items who trigger a write
+        :param max_delay: max duration in seconds an item can stay in buffer
+            before being written, None to wait for other limits
+        """
+        if max_items < 1 or max_bytes < 1:
+            raise ConfigurationException("max_items and max_bytes must be greater than 0")
+        if max_delay is not None and max_delay < 0:
+            raise ConfigurationException("max_delay must be positive")
+
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+
+
+class StreamBatcher(object):
+    """
+    Buffer encoded stream items and write them by batch, as defined by given
+    StreamBatchPolicy. Must be used in a running event loop and closed at end
+    of stream.
+    """
+
+    def __init__(
+        self,
+        write: typing.Callable[[bytes], typing.Awaitable[None]],
+        policy: StreamBatchPolicy,
+    ) -> None:
+        """
+        :param write: coroutine function writing given bytes in stream
+        :param policy: StreamBatchPolicy to apply
+        """
+        self._write = write
+        self._policy = policy
+        self._chunks = []  # type: typing.List[bytes]
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._timer = None  # type: typing.Optional[asyncio.TimerHandle]
+        self._delayed_flush = None  # type: typing.Optional[asyncio.Future]
+
+    async def add(self, data: bytes) -> None:
+        """
+        Add encoded item in buffer. Write buffer if a limit is reached.
+        :param data: encoded item
+        """
+        self._chunks.append(data)
+        self._size += len(data)
+
+        if len(self._chunks) >= self._policy.max_items or self._size >= self._policy.max_bytes:
+            await self.flush()
+        elif self._timer is None and self._policy.max_delay is not None:
+            self._timer = asyncio.get_event_loop().call_later(
+                self._policy.max_delay, self._flush_on_deadline
+            )
+
+    def _flush_on_deadline(self) -> None:
+        self._timer = None
+        # Only one deadline flush at a time: a running one writes items
+        # buffered during its write before ending
+        if self._delayed_flush is None or self._delayed_flush.done():
+            self._delayed_flush = asyncio.ensure_future(self._flush_buffered())
+
+    async def _flush_buffered(self) -> None:
+        while self._chunks:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Write buffered items, if any.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._chunks:
+            return
+
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self._size = 0
+
+        # Lock keep writes ordered with a flush started on deadline
+        async with self._lock:
+            await self._write(data)
+
+    async def close(self) -> None:
+        """
+        Wait for pending deadline flush and write remaining buffered items.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._delayed_flush is not None:
+            delayed_flush, self._delayed_flush = self._delayed_flush, None
+            await delayed_flush
+        await self.flush()
@@ -0,0 +1,324 @@
+# coding: utf-8
+from email.message import Message
+from email.utils import collapse_rfc2231_value
+import tempfile
+import typing
+
+from hapic.exception import ConfigurationException
+from hapic.exception import UploadTooLargeException
+
+
+class UploadSink(object):
+    """
+    Destination of an uploaded file content, to use instead of a temporary
+    file (eg. to write it directly in an object storage).
+    """
+
+    async def write(self, data: bytes) -> None:
+        """
+        :param data: next chunk of uploaded file content
+        """
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        """
+        Called when whole file content is written.
+        """
+        pass
+
+    async def abort(self) -> None:
+        """
+        Called when upload is aborted (request body is invalid, too large or
+        rejected by validation), even if sink was already closed: written
+        content should be dropped. Default implementation only close sink.
+        """
+        await self.close()
+
+
+class UploadedFile(object):
+    """
+    Lightweight handle of an uploaded file given in HapicData.files when
+    files are streamed: content is in a spooled temporary file (in memory
+    under UploadPolicy.spool_max_size, else on disk) or in given UploadSink.
+    Attributes names are same as aiohttp FileField.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        filename: str,
+        content_type: str,
+        headers: typing.Mapping[str, str],
+        file: typing.Optional[typing.IO[bytes]] = None,
+        sink: typing.Optional[UploadSink] = None,
+    ) -> None:
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers
+        self.file = file
+        self.sink = sink
+        self.size = 0
+        self._aborted = False
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.sink is not None:
+            await self.sink.write(data)
+        else:
+            self.file.write(data)
+
+    async def finish(self) -> None:
+        """
+        Called when whole file content is written: make file readable from
+        its start or close sink.
+        """
+        if self.sink is not None:
+            await self.sink.close()
+        else:
+            self.file.seek(0)
+
+    async def abort(self) -> None:
+        """
+        Called when upload is aborted: close file or abort sink (once).
+        """
+        self.close()
+        if self.sink is not None and not self._aborted:
+            self._aborted = True
+            await self.sink.abort()
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def close(self) -> None:
+        """
+        Close file. Sink is async and can't be closed here: use abort (or
+        finish) for it.
+        """
+        if self.file is not None:
+            self.file.close()
+
+
+class UploadPolicy(object):
+    """
+    Define how input files are received: content of each file is written
+    chunk by chunk in a spooled temporary file (or an UploadSink) and size
+    limits are checked while reading request body.
+    """
+
+    def __init__(
+        self,
+        spool_max_size: int = 1024 * 1024,
+        max_file_size: typing.Optional[int] = None,
+        max_total_size: typing.Optional[int] = None,
+        spool_directory: typing.Optional[str] = None,
+        sink_factory: typing.Optional[typing.Callable[[str, str, str], UploadSink]] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> None:
+        """
+        :param spool_max_size: size in bytes above which a file is written
+            on disk instead of memory
+        :param max_file_size: max size in bytes of each file, None for
+            no limit
+        :param max_total_size: max size in bytes of request body, None for
+            no limit
+        :param spool_directory: directory of temporary files, default is
+            system temporary directory
+        :param sink_factory: if given, called with field name, filename and
+            content type to build the UploadSink receiving file content
+            instead of a temporary file
+        :param chunk_size: size of chunks read from request body, must be
+            larger than multipart boundary
+        """
+        for size in (max_file_size, max_total_size):
+            if size is not None and size < 0:
+                raise ConfigurationException("Size limits must be positive")
+        if spool_max_size < 0 or chunk_size < 1:
+            raise ConfigurationException("spool_max_size and chunk_size must be positive")
+
+        self.spool_max_size = spool_max_size
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.spool_directory = spool_directory
+        self.sink_factory = sink_factory
+        self.chunk_size = chunk_size
+
+    def check_total_size(self, size: typing.Optional[int]) -> None:
+        """
+        :param size: request body size (or read size of it), None if unknown
+        :raise UploadTooLargeException: if size is above max_total_size
+        """
+        if size is not None and self.max_total_size is not None and size > self.max_total_size:
+            raise UploadTooLargeException(
+                "Request body is larger than {} bytes".format(self.max_total_size)
+            )
+
+    def check_file_size(self, name: str, size: typing.Optional[int]) -> None:
+        """
+        :param name: field name of file
+        :param size: file size (or read size of it), None if unknown
+        :raise UploadTooLargeException: if size is above max_file_size
+        """
+        if size is not None and self.max_file_size is not None and size > self.max_file_size:
+            raise UploadTooLargeException(
+                'File "{}" is larger than {} bytes'.format(name, self.max_file_size)
+            )
+
+    def open_file(
+        self, name: str, filename: str, content_type: str, headers: typing.Mapping[str, str]
+    ) -> UploadedFile:
+        """
+        :return: UploadedFile ready to receive file content
+        """
+        if self.sink_factory is not None:
+            sink = self.sink_factory(name, filename, content_type)
+            return UploadedFile(name, filename, content_type, headers, sink=sink)
+
+        file = tempfile.SpooledTemporaryFile(max_size=self.spool_max_size, dir=self.spool_directory)
+        return UploadedFile(name, filename, content_type, headers, file=file)
+
+
+def get_file_size(file: typing.Any) -> typing.Optional[int]:
+    """
+    Return size of a file received by a framework (eg. werkzeug FileStorage,
+    bottle FileUpload, cgi.FieldStorage)
+    :return: size in bytes or None if it can't be known
+    """
+    for file_object in (getattr(file, "file", None), getattr(file, "stream", None), file):
+        try:
+            position = file_object.tell()
+            size = file_object.seek(0, 2)
+            file_object.seek(position)
+            return size
+        except (AttributeError, OSError, ValueError):
+            continue
+    return None
+
+
+def get_header_parameter(value: str, parameter: str) -> typing.Optional[str]:
+    """
+    Return a parameter of a header value like Content-Type or
+    Content-Disposition (eg. "boundary" or "filename").
+    :return: parameter value or None if header has not this parameter
+    """
+    message = Message()
+    message["header"] = value
+    parameter_value = message.get_param(parameter, header="header")
+    if parameter_value is None:
+        return None
+    return collapse_rfc2231_value(parameter_value)
+
+
+class MultipartParser(object):
+    """
+    Incremental multipart/form-data parser for frameworks without one (ASGI,
+    WSGI): body is given chunk by chunk to feed() who return parsed events.
+    Only part headers and chunks tails are buffered, so memory usage does
+    not depend of body size.
+    """
+
+    PART_BEGIN = "begin"  # value is part headers, with lowercase names
+    PART_DATA = "data"  # value is a chunk of part content
+    PART_END = "end"  # value is None
+
+    _PREAMBLE = "preamble"
+    _DELIMITER = "delimiter"
+    _HEADERS = "headers"
+    _CONTENT = "content"
+    _EPILOGUE = "epilogue"
+
+    def __init__(self, boundary: str, max_headers_size: int = 16 * 1024) -> None:
+        """
+        :param boundary: boundary parameter of request Content-Type
+        :param max_headers_size: max size in bytes of each part headers
+        """
+        self._delimiter = b"\r\n--" + boundary.encode("latin-1")
+        self._max_headers_size = max_headers_size
+        # First delimiter is at body start, without CRLF before it
+        self._buffer = b"\r\n"
+        self._state = self._PREAMBLE
+
+    @classmethod
+    def from_content_type(cls, content_type: str) -> "MultipartParser":
+        """
+        :raise ValueError: if content type has no boundary
+        """
+        boundary = get_header_parameter(content_type, "boundary")
+        if not boundary:
+            raise ValueError("Multipart content type without boundary")
+        return cls(boundary)
+
+    def feed(self, data: bytes) -> typing.List[typing.Tuple[str, typing.Any]]:
+        """
+        :param data: next chunk of request body
+        :return: list of (event, value) parsed from given chunk
+        :raise ValueError: if body is malformed
+        """
+        buffer = self._buffer + data
+        events = []  # type: typing.List[typing.Tuple[str, typing.Any]]
+
+        while True:
+            if self._state in (self._PREAMBLE, self._CONTENT):
+                index = buffer.find(self._delimiter)
+                if index < 0:
+                    # End of buffer can be start of delimiter
+                    data_size = max(len(buffer) - len(self._delimiter) + 1, 0)
+                    if self._state == self._CONTENT and data_size:
+                        events.append((self.PART_DATA, buffer[:data_size]))
+                    buffer = buffer[data_size:]
+                    break
+
+                if self._state == self._CONTENT:
+                    if index:
+                        events.append((self.PART_DATA, buffer[:index]))
+                    events.append((self.PART_END, None))
+                delimiter_end = index + len(self._delimiter)
+                buffer = buffer[delimiter_end:]
+                self._state = self._DELIMITER
+
+            elif self._state == self._DELIMITER:
+                if len(buffer) < 2:
+                    break
+                if buffer.startswith(b"--"):
+                    self._state = self._EPILOGUE
+                elif buffer.startswith(b"\r\n"):
+                    buffer = buffer[2:]
+                    self._state = self._HEADERS
+                else:
+                    raise ValueError("Malformed multipart delimiter")
+
+            elif self._state == self._HEADERS:
+                index = buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(buffer) > self._max_headers_size:
+                        raise ValueError("Multipart part headers are too large")
+                    break
+
+                events.append((self.PART_BEGIN, self._parse_headers(buffer[:index])))
+                content_start = index + 4
+                buffer = buffer[content_start:]
+                self._state = self._CONTENT
+
+            else:
+                buffer = b""
+                break
+
+        self._buffer = buffer
+        return events
+
+    def close(self) -> None:
+        """
+        Called when whole body is given
+        :raise ValueError: if body was incomplete
+        """
+        if self._state != self._EPILOGUE:
+            raise ValueError("Incomplete multipart body")
+
+    def _parse_headers(self, raw_headers: bytes) -> typing.Dict[str, str]:
+        headers = {}
+        for line in raw_headers.decode("latin-1").split("\r\n"):
+            name, separator, value = line.partition(":")
+            if not separator:
+                raise ValueError("Malformed multipart part header")
+            headers[name.strip().lower()] = value.strip()
+        return headers
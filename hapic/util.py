@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
+import functools
 import typing
 
 from hapic.exception import NotLowercaseCaseException
@@ -83,3 +85,56 @@ class LowercaseKeysDict(dict):
             self.check_key(key)
 
         return super().update(seq)
+
+
+class LruCache(object):
+    """
+    Simple least recently used cache. Oldest used values are dropped when
+    more than max_size values are stored.
+    """
+
+    def __init__(self, max_size: int = 128) -> None:
+        self._max_size = max_size
+        self._values = OrderedDict()  # type: typing.Dict[typing.Hashable, typing.Any]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: typing.Hashable, default_value: typing.Any = None) -> typing.Any:
+        """
+        Return value for given key and mark it as recently used.
+        """
+        try:
+            self._values.move_to_end(key)
+            return self._values[key]
+        except KeyError:
+            return default_value
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        """
+        Store value for given key and drop least recently used values if
+        cache is full.
+        """
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self._max_size:
+            try:
+                self._values.popitem(last=False)
+            except KeyError:
+                break
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+@functools.lru_cache(maxsize=1024)
+def get_swagger_path(path_url_regex: typing.Pattern, rule: str) -> str:
+    """
+    Return OpenAPI path of given route rule. Results are memoized because
+    each route is converted every time controllers routes are resolved.
+    :param path_url_regex: regular expression locating url parameters in
+        rule, with parameter name as first group
+    :param rule: route rule of a context
+    :return: rule with "{name}" url parameters
+    """
+    return path_url_regex.sub(r"{\1}", rule)
@@ -23,3 +23,12 @@ def get_func_with_output_stream_and_error(hapic, schema, ignore_on_error=True):
         yield {"name": "Hello, franck"}
 
     return hello
+
+
+def get_func_with_batched_output_stream(hapic, schema, batch_policy, items_count):
+    @hapic.output_stream(schema(), batch_policy=batch_policy)
+    async def hello(request):
+        for i in range(items_count):
+            yield {"name": "Hello, {}".format(i)}
+
+    return hello
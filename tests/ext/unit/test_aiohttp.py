@@ -1,9 +1,14 @@
 # coding: utf-8
+from concurrent.futures import ProcessPoolExecutor
+import dataclasses
+import functools
 from http import HTTPStatus
 import io
 import json
 import sys
+import threading
 
+from aiohttp import FormData
 from aiohttp import hdrs
 from aiohttp import web
 from aiohttp.web_request import FileField
@@ -17,9 +22,28 @@ from hapic import Hapic
 from hapic import HapicData
 from hapic import MarshmallowProcessor
 from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
+from hapic.error.serpyco import SerpycoDefaultErrorBuilder
 from hapic.exception import ProcessException
 from hapic.ext.aiohttp.context import AiohttpContext
+from hapic.instrumentation import Instrumentation
+from hapic.processor.main import OffloadPolicy
 from hapic.processor.main import RequestParameters
+from hapic.processor.serpyco import SerpycoProcessor
+from hapic.stream import StreamBatchPolicy
+from hapic.upload import UploadedFile
+from hapic.upload import UploadPolicy
+from hapic.upload import UploadSink
+
+
+class OffloadedNameSchema(marshmallow.Schema):
+    # INFO - Defined at module level to be picklable by process pools
+    name = marshmallow.fields.String(required=True)
+
+
+@dataclasses.dataclass
+class OffloadedNameDataclass(object):
+    # INFO - Defined at module level to be picklable by process pools
+    name: str
 
 
 class TestAiohttpExt(object):
@@ -516,6 +540,35 @@ class TestAiohttpExt(object):
             "code": None,
         } == json
 
+    async def test_unit__general_exception_handling__ok__most_specific_class(
+        self, aiohttp_client, loop
+    ):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+
+        @hapic.with_api_doc()
+        async def zero(request):
+            return 1 / 0
+
+        @hapic.with_api_doc()
+        async def key(request):
+            return dict()["foo"]
+
+        app = web.Application(debug=True)
+        app.router.add_get("/a", zero)
+        app.router.add_get("/b", key)
+        context = AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        context.handle_exception(Exception, 500)
+        context.handle_exception(ZeroDivisionError, 400)
+        hapic.set_context(context)
+
+        client = await aiohttp_client(app)
+
+        resp = await client.get("/a")
+        assert resp.status == 400
+        resp = await client.get("/b")
+        assert resp.status == 500
+        assert 1 == app.middlewares.count(context._error_middleware)
+
     async def test_unit__general_exception_handling__ok__exception_list(self, aiohttp_client, loop):
         hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
 
@@ -606,6 +659,191 @@ class TestAiohttpExt(object):
             "code": None,
         } == json_
 
+    async def test_unit__post_file__ok__streamed(self, aiohttp_client, loop):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=UploadPolicy(spool_max_size=10))
+        async def update_avatar(request: Request, hapic_data: HapicData):
+            avatar = hapic_data.files["avatar"]
+            assert isinstance(avatar, UploadedFile)
+            assert "avatar.txt" == avatar.filename
+            assert 20 == avatar.size
+            # Content is larger than spool_max_size: it is on disk
+            assert avatar.file._rolled
+            assert b"text content of file" == avatar.read()
+            # Other fields are read while streaming files
+            forms = await hapic_data.request_parameters.form_parameters
+            return Response(body=forms["name"])
+
+        app = web.Application(debug=True)
+        app.router.add_put("/avatar", update_avatar)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        data = FormData()
+        data.add_field("name", "bob")
+        data.add_field("avatar", b"text content of file", filename="avatar.txt")
+        resp = await client.put("/avatar", data=data)
+        assert "bob" == await resp.text()
+        assert resp.status == 200
+
+    async def test_unit__post_file__ok__sink(self, aiohttp_client, loop):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+        received = []
+
+        class MemorySink(UploadSink):
+            async def write(self, data):
+                received.append(data)
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        upload_policy = UploadPolicy(sink_factory=lambda *args: MemorySink())
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=upload_policy)
+        async def update_avatar(request: Request, hapic_data: HapicData):
+            assert 20 == hapic_data.files["avatar"].size
+            return Response(body="ok")
+
+        app = web.Application(debug=True)
+        app.router.add_put("/avatar", update_avatar)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        data = FormData()
+        data.add_field("avatar", b"text content of file", filename="avatar.txt")
+        resp = await client.put("/avatar", data=data)
+        assert resp.status == 200
+        assert b"text content of file" == b"".join(received)
+
+    async def test_unit__post_file__ok__sink_aborted_on_rejected_upload(self, aiohttp_client, loop):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+        events = []
+
+        class MemorySink(UploadSink):
+            async def write(self, data):
+                events.append("write")
+
+            async def close(self):
+                events.append("close")
+
+            async def abort(self):
+                events.append("abort")
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        upload_policy = UploadPolicy(max_file_size=10, sink_factory=lambda *args: MemorySink())
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=upload_policy)
+        async def update_avatar(request: Request, hapic_data: HapicData):
+            raise AssertionError("Test should no pass here")
+
+        app = web.Application(debug=True)
+        app.router.add_put("/avatar", update_avatar)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        data = FormData()
+        data.add_field("avatar", b"text content of file", filename="avatar.txt")
+        resp = await client.put("/avatar", data=data)
+        assert resp.status == 413
+        assert ["write", "abort"] == events
+
+        # Files are fully received but rejected by schema
+        events.clear()
+        data = FormData()
+        data.add_field("other", b"content", filename="other.txt")
+        resp = await client.put("/avatar", data=data)
+        assert resp.status == 400
+        assert ["write", "close", "abort"] == events
+
+    async def test_unit__post_file__ok__sink_of_repeated_field_aborted(self, aiohttp_client, loop):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+        events = []
+
+        class MemorySink(UploadSink):
+            def __init__(self, filename):
+                self.filename = filename
+
+            async def write(self, data):
+                events.append(("write", self.filename))
+
+            async def close(self):
+                events.append(("close", self.filename))
+
+            async def abort(self):
+                events.append(("abort", self.filename))
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        upload_policy = UploadPolicy(
+            sink_factory=lambda name, filename, *args: MemorySink(filename)
+        )
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=upload_policy)
+        async def update_avatar(request: Request, hapic_data: HapicData):
+            return Response(body=hapic_data.files["avatar"].filename)
+
+        app = web.Application(debug=True)
+        app.router.add_put("/avatar", update_avatar)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        data = FormData()
+        data.add_field("avatar", b"first", filename="first.txt")
+        data.add_field("avatar", b"second", filename="second.txt")
+        resp = await client.put("/avatar", data=data)
+        assert resp.status == 200
+        assert "second.txt" == await resp.text()
+        assert [
+            ("write", "first.txt"),
+            ("close", "first.txt"),
+            ("abort", "first.txt"),
+            ("write", "second.txt"),
+            ("close", "second.txt"),
+        ] == events
+
+    async def test_unit__post_file__err__too_large(self, aiohttp_client, loop):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=UploadPolicy(max_file_size=10))
+        async def update_avatar(request: Request, hapic_data: HapicData):
+            raise AssertionError("Test should no pass here")
+
+        app = web.Application(debug=True)
+        app.router.add_put("/avatar", update_avatar)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        data = FormData()
+        data.add_field("avatar", b"text content of file", filename="avatar.txt")
+        resp = await client.put("/avatar", data=data)
+        assert resp.status == 413
+        assert 'File "avatar" is larger than 10 bytes' == (await resp.json())["message"]
+
     async def test_request_header__ok__lowercase_key(self, aiohttp_client):
         hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
 
@@ -813,3 +1051,236 @@ class TestAiohttpExt(object):
 
         assert 1 == len(doc["paths"]["/"])
         assert "head" in doc["paths"]["/"]
+
+    async def test_unit__offload_policy__ok__large_payloads_in_executor(self, aiohttp_client):
+        threads = []
+        hapic = Hapic(
+            async_=True,
+            processor_class=MarshmallowProcessor,
+            offload_policy=OffloadPolicy(min_body_size=20, min_items_count=2),
+        )
+
+        class NameSchema(marshmallow.Schema):
+            name = marshmallow.fields.String()
+
+            @marshmallow.post_load
+            def record_load_thread(self, data):
+                threads.append(threading.current_thread())
+                return data
+
+            @marshmallow.post_dump
+            def record_dump_thread(self, data):
+                threads.append(threading.current_thread())
+                return data
+
+        @hapic.with_api_doc()
+        @hapic.input_body(NameSchema())
+        @hapic.output_body(NameSchema(many=True))
+        async def hello(request, hapic_data: HapicData):
+            return [hapic_data.body] * hapic_data.body["name"].count("o")
+
+        app = web.Application(debug=True)
+        app.router.add_post("/", hello)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        resp = await client.post("/", json={"name": "bob"})
+        assert 200 == resp.status
+        assert [{"name": "bob"}] == await resp.json()
+        assert threads
+        assert {threading.main_thread()} == set(threads)
+
+        threads.clear()
+        resp = await client.post("/", json={"name": "bob and bobby"})
+        assert 200 == resp.status
+        assert [{"name": "bob and bobby"}] * 2 == await resp.json()
+        assert threads
+        assert threading.main_thread() not in threads
+
+    async def test_unit__offload_policy__ok__process_pool_executor(self, aiohttp_client):
+        executor = ProcessPoolExecutor(max_workers=1)
+        hapic = Hapic(
+            async_=True,
+            processor_class=MarshmallowProcessor,
+            offload_policy=OffloadPolicy(executor, min_body_size=0, min_items_count=0),
+        )
+
+        @hapic.with_api_doc()
+        @hapic.input_body(OffloadedNameSchema())
+        @hapic.output_body(OffloadedNameSchema(many=True))
+        async def hello(request, hapic_data: HapicData):
+            return [hapic_data.body, {"age": 42}][: len(hapic_data.body["name"]) - 2]
+
+        app = web.Application(debug=True)
+        app.router.add_post("/", hello)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        try:
+            resp = await client.post("/", json={"name": "bob"})
+            assert 200 == resp.status
+            assert [{"name": "bob"}] == await resp.json()
+
+            resp = await client.post("/", json={})
+            assert 400 == resp.status
+
+            resp = await client.post("/", json={"name": "bobby"})
+            assert 500 == resp.status
+        finally:
+            executor.shutdown()
+
+    async def test_unit__offload_policy__ok__serpyco_process_pool_executor(self, aiohttp_client):
+        executor = ProcessPoolExecutor(max_workers=1)
+        hapic = Hapic(
+            async_=True,
+            processor_class=SerpycoProcessor,
+            offload_policy=OffloadPolicy(executor, min_body_size=0, min_items_count=0),
+        )
+
+        @hapic.with_api_doc()
+        @hapic.input_body(OffloadedNameDataclass)
+        @hapic.output_body(OffloadedNameDataclass)
+        async def hello(request, hapic_data: HapicData):
+            return hapic_data.body
+
+        app = web.Application(debug=True)
+        app.router.add_post("/", hello)
+        # INFO - Warm up build serializers of processors before they are pickled
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=SerpycoDefaultErrorBuilder()), warm_up=True
+        )
+        client = await aiohttp_client(app)
+
+        try:
+            resp = await client.post("/", json={"name": "bob"})
+            assert 200 == resp.status
+            assert {"name": "bob"} == await resp.json()
+
+            resp = await client.post("/", json={})
+            assert 400 == resp.status
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python3.7 or higher")
+    async def test_unit__offload_policy__ok__stream_items_after_count(self, aiohttp_client):
+        threads = []
+        hapic = Hapic(
+            async_=True,
+            processor_class=MarshmallowProcessor,
+            offload_policy=OffloadPolicy(min_items_count=2),
+        )
+
+        class OuputStreamItemSchema(marshmallow.Schema):
+            name = marshmallow.fields.String()
+
+            @marshmallow.post_dump
+            def record_dump_thread(self, data):
+                threads.append(threading.current_thread())
+                return data
+
+        from .py37.stream import get_func_with_batched_output_stream
+
+        hello = get_func_with_batched_output_stream(
+            hapic, OuputStreamItemSchema, None, items_count=4
+        )
+
+        app = web.Application()
+        app.router.add_get("/", hello)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        resp = await client.get("/")
+        assert resp.status == 200
+        assert 4 == len((await resp.read()).splitlines())
+        assert [True, True, False, False] == [
+            thread is threading.main_thread() for thread in threads
+        ]
+
+    @pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python3.7 or higher")
+    async def test_aiohttp_output_stream__ok__batched_writes(self, aiohttp_client):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+
+        class OuputStreamItemSchema(marshmallow.Schema):
+            name = marshmallow.fields.String()
+
+        from .py37.stream import get_func_with_batched_output_stream
+
+        hello = get_func_with_batched_output_stream(
+            hapic, OuputStreamItemSchema, StreamBatchPolicy(max_items=4), items_count=10
+        )
+
+        app = web.Application()
+        app.router.add_get("/", hello)
+        context = AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        hapic.set_context(context)
+        client = await aiohttp_client(app)
+
+        written = []
+        write_stream_response = context.write_stream_response
+
+        async def record_write_stream_response(stream_response, data):
+            written.append(data)
+            await write_stream_response(stream_response, data)
+
+        context.write_stream_response = record_write_stream_response
+        resp = await client.get("/")
+        assert resp.status == 200
+
+        body = await resp.read()
+        assert [
+            '{{"name": "Hello, {}"}}'.format(i).encode("utf-8") for i in range(10)
+        ] == body.splitlines()
+        assert [4, 4, 2] == [data.count(b"\n") for data in written]
+
+    async def test_unit__instrumentation__ok__nested_decorators_view(self, aiohttp_client, loop):
+        class RecordInstrumentation(Instrumentation):
+            enabled = True
+
+            def __init__(self) -> None:
+                self.stages = []
+
+            def observe_stage(
+                self, stage, duration, controller_name, decorator_name, payload_size=None
+            ):
+                self.stages.append((stage, controller_name, decorator_name))
+
+        def foreign_decorator(func):
+            @functools.wraps(func)
+            async def foreign_wrapper(*args, **kwargs):
+                return await func(*args, **kwargs)
+
+            return foreign_wrapper
+
+        instrumentation = RecordInstrumentation()
+        hapic = Hapic(
+            async_=True, processor_class=MarshmallowProcessor, instrumentation=instrumentation
+        )
+
+        class NameSchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        # A foreign decorator between hapic ones prevent decorators fusion
+        @hapic.with_api_doc()
+        @hapic.input_path(NameSchema())
+        @foreign_decorator
+        @hapic.output_body(NameSchema())
+        async def hello(request, hapic_data: HapicData):
+            return {"name": hapic_data.path["name"]}
+
+        app = web.Application(debug=True)
+        app.router.add_get("/{name}", hello)
+        hapic.set_context(
+            AiohttpContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+        client = await aiohttp_client(app)
+
+        resp = await client.get("/bob")
+        assert resp.status == 200
+        assert ("view", hello.__qualname__, None) in instrumentation.stages
+        assert 1 == [stage for stage, _, _ in instrumentation.stages].count("view")
@@ -0,0 +1,413 @@
+# coding: utf-8
+import gzip
+import io
+import json
+import typing
+
+import marshmallow
+
+from hapic import Hapic
+from hapic import HapicData
+from hapic import MarshmallowProcessor
+from hapic.compression import CompressionPolicy
+from hapic.data import HapicFile
+from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
+from hapic.ext.asgi.context import AsgiApp
+from hapic.ext.asgi.context import AsgiContext
+from hapic.ext.asgi.context import AsgiRequest
+from hapic.ext.asgi.context import AsgiResponse
+from hapic.upload import UploadedFile
+from hapic.upload import UploadPolicy
+
+
+class AsgiTestResponse(object):
+    def __init__(self, status: int, headers: typing.Dict[str, str], chunks: typing.List[bytes]):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+        self.body = b"".join(chunks)
+
+    @property
+    def json(self) -> typing.Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+async def call_app(
+    app: AsgiApp,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: typing.Optional[typing.Dict[str, str]] = None,
+    chunk_size: int = 1024,
+) -> AsgiTestResponse:
+    path, _, query_string = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query_string.encode("latin-1"),
+        "headers": [
+            [name.lower().encode("latin-1"), value.encode("latin-1")]
+            for name, value in (headers or {}).items()
+        ],
+    }
+    body_chunks = [body[i:][:chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    messages = []
+
+    async def receive():
+        chunk = body_chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(body_chunks)}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+
+    assert "http.response.start" == messages[0]["type"]
+    assert not messages[-1].get("more_body", False)
+    response_headers = {
+        name.decode("latin-1"): value.decode("latin-1") for name, value in messages[0]["headers"]
+    }
+    chunks = [message["body"] for message in messages[1:] if message["body"]]
+    return AsgiTestResponse(messages[0]["status"], response_headers, chunks)
+
+
+def get_multipart_body(boundary: str, fields: typing.List[typing.Tuple[str, str, bytes]]) -> bytes:
+    parts = []
+    for name, filename, content in fields:
+        disposition = 'form-data; name="{}"'.format(name)
+        if filename:
+            disposition += '; filename="{}"'.format(filename)
+        parts.append(
+            "--{}\r\nContent-Disposition: {}\r\n\r\n".format(boundary, disposition).encode()
+            + content
+            + b"\r\n"
+        )
+    return b"".join(parts) + "--{}--\r\n".format(boundary).encode()
+
+
+class UserSchema(marshmallow.Schema):
+    name = marshmallow.fields.String(required=True)
+    age = marshmallow.fields.Integer(required=False)
+
+
+class PathSchema(marshmallow.Schema):
+    user_id = marshmallow.fields.Integer(required=True)
+
+
+class QuerySchema(marshmallow.Schema):
+    verbose = marshmallow.fields.Boolean(missing=False)
+
+
+def get_hapic(**kwargs) -> Hapic:
+    return Hapic(async_=True, processor_class=MarshmallowProcessor, **kwargs)
+
+
+def get_context(app: AsgiApp) -> AsgiContext:
+    return AsgiContext(app, default_error_builder=MarshmallowDefaultErrorBuilder())
+
+
+class TestAsgiExt(object):
+    async def test_unit__asgi_only__ok__routing(self, loop):
+        async def hello(request):
+            return AsgiResponse("Hello, {}".format(request.match_info["name"]))
+
+        app = AsgiApp()
+        app.add_route("GET", "/hello/{name}", hello)
+        app.add_route("GET", "/hello", hello)
+
+        resp = await call_app(app, "GET", "/hello/bob")
+        assert 200 == resp.status
+        assert b"Hello, bob" == resp.body
+        assert "10" == resp.headers["content-length"]
+
+        resp = await call_app(app, "HEAD", "/hello/bob")
+        assert 200 == resp.status
+        assert b"" == resp.body
+
+        assert 404 == (await call_app(app, "GET", "/bye")).status
+        resp = await call_app(app, "POST", "/hello/bob")
+        assert 405 == resp.status
+        assert "GET" == resp.headers["allow"]
+
+    async def test_unit__asgi_only__ok__lifespan(self, loop):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await AsgiApp()({"type": "lifespan"}, receive, send)
+        assert ["lifespan.startup.complete", "lifespan.shutdown.complete"] == sent
+
+    async def test_unit__input_path_and_query__ok__nominal_case(self, loop):
+        hapic = get_hapic()
+
+        @hapic.with_api_doc()
+        @hapic.input_path(PathSchema())
+        @hapic.input_query(QuerySchema())
+        @hapic.output_body(UserSchema())
+        async def get_user(request: AsgiRequest, hapic_data: HapicData):
+            assert isinstance(request, AsgiRequest)
+            name = "bob" if hapic_data.query["verbose"] else "b"
+            return {"name": name, "age": hapic_data.path["user_id"]}
+
+        app = AsgiApp()
+        app.add_route("GET", r"/users/{user_id:\d+}", get_user)
+        hapic.set_context(get_context(app))
+
+        resp = await call_app(app, "GET", "/users/42?verbose=1")
+        assert 200 == resp.status
+        assert "application/json" == resp.headers["content-type"]
+        assert {"name": "bob", "age": 42} == resp.json
+
+        assert {"name": "b", "age": 42} == (await call_app(app, "GET", "/users/42")).json
+        assert 404 == (await call_app(app, "GET", "/users/bob")).status
+
+    async def test_unit__input_body__ok__chunked_body_and_error(self, loop):
+        hapic = get_hapic()
+
+        @hapic.with_api_doc()
+        @hapic.input_body(UserSchema())
+        @hapic.output_body(UserSchema())
+        async def create_user(request: AsgiRequest, hapic_data: HapicData):
+            return hapic_data.body
+
+        app = AsgiApp()
+        app.add_route("POST", "/users", create_user)
+        hapic.set_context(get_context(app))
+        headers = {"Content-Type": "application/json"}
+
+        body = json.dumps({"name": "bob" * 100, "age": 42}).encode()
+        resp = await call_app(app, "POST", "/users", body, headers, chunk_size=10)
+        assert 200 == resp.status
+        assert {"name": "bob" * 100, "age": 42} == resp.json
+
+        resp = await call_app(app, "POST", "/users", b'{"age": 42}', headers)
+        assert 400 == resp.status
+        assert {"name": ["Missing data for required field."]} == resp.json["details"]
+
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        resp = await call_app(app, "POST", "/users", b'{"name": "bob"}', headers)
+        assert 200 == resp.status
+        assert {"name": "bob"} == resp.json
+
+        assert 400 == (await call_app(app, "POST", "/users", b"{", headers)).status
+
+    async def test_unit__output_stream__ok__compressed_chunks(self, loop):
+        hapic = get_hapic(compression_policy=CompressionPolicy(encodings=["gzip"]))
+
+        class AsyncGenerator(object):
+            def __init__(self):
+                self._iterator = iter([{"name": "user {}".format(i)} for i in range(3)])
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    return next(self._iterator)
+                except StopIteration:
+                    raise StopAsyncIteration()
+
+        @hapic.with_api_doc()
+        @hapic.output_stream(UserSchema())
+        async def get_users(request: AsgiRequest):
+            return AsyncGenerator()
+
+        app = AsgiApp()
+        app.add_route("GET", "/users", get_users)
+        hapic.set_context(get_context(app))
+
+        resp = await call_app(app, "GET", "/users")
+        assert 200 == resp.status
+        assert 3 == len(resp.chunks)
+        assert b'{"name": "user 0"}\n' == resp.chunks[0]
+
+        resp = await call_app(app, "GET", "/users", headers={"Accept-Encoding": "gzip"})
+        assert "gzip" == resp.headers["content-encoding"]
+        lines = gzip.decompress(resp.body).decode().splitlines()
+        assert ['{"name": "user 0"}', '{"name": "user 1"}', '{"name": "user 2"}'] == lines
+
+    async def test_unit__output_file__ok__range(self, loop):
+        hapic = get_hapic()
+
+        @hapic.with_api_doc()
+        @hapic.output_file(["text/plain"])
+        async def get_file(request: AsgiRequest):
+            return HapicFile(
+                file_object=io.BytesIO(b"0123456789"),
+                mimetype="text/plain",
+                content_length=10,
+                etag="abc",
+            )
+
+        app = AsgiApp()
+        app.add_route("GET", "/file", get_file)
+        hapic.set_context(get_context(app))
+
+        resp = await call_app(app, "GET", "/file")
+        assert 200 == resp.status
+        assert b"0123456789" == resp.body
+        assert '"abc"' == resp.headers["etag"]
+
+        resp = await call_app(app, "GET", "/file", headers={"Range": "bytes=2-4"})
+        assert 206 == resp.status
+        assert b"234" == resp.body
+
+        resp = await call_app(app, "GET", "/file", headers={"If-None-Match": '"abc"'})
+        assert 304 == resp.status
+        assert b"" == resp.body
+
+    async def test_unit__handle_exception__ok__most_specific_class(self, loop):
+        hapic = get_hapic()
+
+        @hapic.with_api_doc()
+        @hapic.handle_exception(ZeroDivisionError, http_code=400)
+        async def divide(request: AsgiRequest):
+            1 / 0
+
+        async def fail(request: AsgiRequest):
+            raise KeyError("key")
+
+        app = AsgiApp()
+        app.add_route("GET", "/divide", divide)
+        app.add_route("GET", "/fail", fail)
+        context = get_context(app)
+        hapic.set_context(context)
+        context.handle_exceptions([Exception], 500)
+        context.handle_exception(ArithmeticError, 409)
+
+        resp = await call_app(app, "GET", "/divide")
+        assert 400 == resp.status
+        assert "division by zero" == resp.json["message"]
+
+        resp = await call_app(app, "GET", "/fail")
+        assert 500 == resp.status
+        assert "'key'" == resp.json["message"]
+
+    async def test_unit__input_files__ok__streamed(self, loop):
+        hapic = get_hapic()
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=UploadPolicy(max_file_size=100))
+        async def update_avatar(request: AsgiRequest, hapic_data: HapicData):
+            avatar = hapic_data.files["avatar"]
+            assert isinstance(avatar, UploadedFile)
+            assert "avatar.txt" == avatar.filename
+            forms = await hapic_data.request_parameters.form_parameters
+            return AsgiResponse("{} {}".format(forms["name"], avatar.read().decode()))
+
+        app = AsgiApp()
+        app.add_route("PUT", "/avatar", update_avatar)
+        hapic.set_context(get_context(app))
+        headers = {"Content-Type": "multipart/form-data; boundary=xyz"}
+
+        body = get_multipart_body(
+            "xyz", [("name", "", b"bob"), ("avatar", "avatar.txt", b"text content of file")]
+        )
+        resp = await call_app(app, "PUT", "/avatar", body, headers, chunk_size=7)
+        assert 200 == resp.status
+        assert b"bob text content of file" == resp.body
+
+        body = get_multipart_body("xyz", [("avatar", "avatar.txt", b"0" * 101)])
+        resp = await call_app(app, "PUT", "/avatar", body, headers)
+        assert 413 == resp.status
+
+        resp = await call_app(app, "PUT", "/avatar")
+        assert 400 == resp.status
+        assert {"avatar": ["Missing data for required field"]} == resp.json["details"]
+
+    async def test_unit__input_body__ok__multipart_with_files_upload_policy(self, loop):
+        hapic = get_hapic()
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.input_body(UserSchema())
+        @hapic.input_files(InputFilesSchema(), upload_policy=UploadPolicy(max_file_size=100))
+        async def update_avatar(request: AsgiRequest, hapic_data: HapicData):
+            avatar = hapic_data.files["avatar"]
+            return AsgiResponse("{} {}".format(hapic_data.body["name"], avatar.read().decode()))
+
+        app = AsgiApp()
+        app.add_route("PUT", "/avatar", update_avatar)
+        hapic.set_context(get_context(app))
+        headers = {"Content-Type": "multipart/form-data; boundary=xyz"}
+
+        body = get_multipart_body("xyz", [("name", "", b"bob"), ("avatar", "a.txt", b"content")])
+        resp = await call_app(app, "PUT", "/avatar", body, headers)
+        assert 200 == resp.status
+        assert b"bob content" == resp.body
+
+        # Body is read by input body, with upload policy of input files
+        body = get_multipart_body("xyz", [("name", "", b"bob"), ("avatar", "a.txt", b"0" * 101)])
+        resp = await call_app(app, "PUT", "/avatar", body, headers)
+        assert 413 == resp.status
+
+        resp = await call_app(app, "PUT", "/avatar", b"--xyz\r\nbroken", headers)
+        assert 400 == resp.status
+
+    async def test_unit__input_files__ok__repeated_field_closed(self, loop):
+        hapic = get_hapic()
+        opened_files = []
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        class RecordingUploadPolicy(UploadPolicy):
+            def open_file(self, *args, **kwargs):
+                opened_files.append(super().open_file(*args, **kwargs))
+                return opened_files[-1]
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=RecordingUploadPolicy())
+        async def update_avatar(request: AsgiRequest, hapic_data: HapicData):
+            return AsgiResponse(hapic_data.files["avatar"].read())
+
+        app = AsgiApp()
+        app.add_route("PUT", "/avatar", update_avatar)
+        hapic.set_context(get_context(app))
+        headers = {"Content-Type": "multipart/form-data; boundary=xyz"}
+
+        body = get_multipart_body(
+            "xyz", [("avatar", "a.txt", b"first"), ("avatar", "b.txt", b"second")]
+        )
+        resp = await call_app(app, "PUT", "/avatar", body, headers)
+        assert 200 == resp.status
+        assert b"second" == resp.body
+        assert 2 == len(opened_files)
+        assert opened_files[0].file.closed
+        assert not opened_files[1].file.closed
+
+    async def test_unit__documentation_view__ok__nominal_case(self, loop):
+        hapic = get_hapic()
+
+        @hapic.with_api_doc()
+        @hapic.input_path(PathSchema())
+        @hapic.output_body(UserSchema())
+        async def get_user(request: AsgiRequest, hapic_data: HapicData):
+            return {"name": "bob"}
+
+        app = AsgiApp()
+        app.add_route("GET", r"/users/{user_id:\d+}", get_user)
+        hapic.set_context(get_context(app))
+        hapic.add_documentation_view("/doc")
+
+        doc = hapic.generate_doc("asgi", "testing")
+        assert "/users/{user_id}" in doc["paths"]
+        assert "get" in doc["paths"]["/users/{user_id}"]
+
+        resp = await call_app(app, "GET", "/doc/spec.json")
+        assert 200 == resp.status
+        assert "/users/{user_id}" in resp.json["paths"]
+        assert 200 == (await call_app(app, "GET", "/doc/")).status
+        assert 200 == (await call_app(app, "GET", "/doc/swagger-ui.css")).status
+        assert 404 == (await call_app(app, "GET", "/doc/../context.py")).status
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 import bottle
+import marshmallow
 from webtest import TestApp
 
 import hapic
 from hapic import MarshmallowProcessor
 from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
 from hapic.ext.bottle import BottleContext
+from hapic.upload import UploadPolicy
 from tests.base import Base
 
 
@@ -101,3 +103,29 @@ class TestBottleExt(Base):
         response = test_app.get("/my-view", status="*")
 
         assert 400 == response.status_code
+
+    def test_unit__input_files__err__too_large(self):
+        hapic_ = hapic.Hapic(processor_class=MarshmallowProcessor)
+        app = bottle.Bottle()
+        hapic_.set_context(
+            BottleContext(app=app, default_error_builder=MarshmallowDefaultErrorBuilder())
+        )
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        @hapic_.with_api_doc()
+        @hapic_.input_files(InputFilesSchema(), upload_policy=UploadPolicy(max_file_size=10))
+        def update_avatar(hapic_data=None):
+            return "ok"
+
+        app.route("/avatar", method="POST", callback=update_avatar)
+        test_app = TestApp(app)
+
+        resp = test_app.post("/avatar", upload_files=[("avatar", "avatar.txt", b"small")])
+        assert "ok" == resp.text
+
+        resp = test_app.post(
+            "/avatar", upload_files=[("avatar", "avatar.txt", b"text content of file")], status=413
+        )
+        assert 'File "avatar" is larger than 10 bytes' == resp.json["message"]
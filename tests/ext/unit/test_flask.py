@@ -31,3 +31,14 @@ class TestFlaskExt:
     def test_unit__request_parameters__ok__nominal_case(self, flask_app: flask.Flask) -> None:
         client = flask_app.test_client()
         assert client.get("/resources/23").data == b"23"
+
+    def test_unit__request_parameters__ok__lazy_and_cached(self) -> None:
+        app = flask.Flask("test_flask")
+        context = FlaskContext(app)
+
+        with app.test_request_context("/?foo=bar", headers={"X-Foo": "bar"}):
+            request_parameters = context.get_request_parameters()
+            assert request_parameters._header_parameters is None
+            assert "bar" == request_parameters.header_parameters["x-foo"]
+            assert request_parameters.header_parameters is request_parameters.header_parameters
+            assert {"foo": "bar"} == request_parameters.query_parameters
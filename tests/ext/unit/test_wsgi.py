@@ -0,0 +1,290 @@
+# coding: utf-8
+import io
+
+import marshmallow
+from webtest import TestApp
+from webtest import Upload
+
+from hapic import Hapic
+from hapic import HapicData
+from hapic import MarshmallowProcessor
+from hapic.data import HapicFile
+from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
+from hapic.ext.wsgi.context import WsgiApp
+from hapic.ext.wsgi.context import WsgiContext
+from hapic.ext.wsgi.context import WsgiRequest
+from hapic.ext.wsgi.context import WsgiResponse
+from hapic.upload import UploadedFile
+from hapic.upload import UploadPolicy
+from tests.base import Base
+
+
+class UserSchema(marshmallow.Schema):
+    name = marshmallow.fields.String(required=True)
+    age = marshmallow.fields.Integer(required=False)
+
+
+class PathSchema(marshmallow.Schema):
+    user_id = marshmallow.fields.Integer(required=True)
+
+
+class QuerySchema(marshmallow.Schema):
+    verbose = marshmallow.fields.Boolean(missing=False)
+
+
+def get_hapic_and_context() -> (Hapic, WsgiContext):
+    hapic = Hapic(processor_class=MarshmallowProcessor)
+    context = WsgiContext(default_error_builder=MarshmallowDefaultErrorBuilder())
+    hapic.set_context(context)
+    return hapic, context
+
+
+class TestWsgiExt(Base):
+    def test_unit__wsgi_only__ok__routing(self):
+        app = WsgiApp()
+        app.route("/hello/<name>", "GET", lambda request: WsgiResponse(request.match_info["name"]))
+        test_app = TestApp(app)
+
+        resp = test_app.get("/hello/bob")
+        assert "200 OK" == resp.status
+        assert b"bob" == resp.body
+        assert b"" == test_app.head("/hello/bob").body
+
+        test_app.get("/bye", status=404)
+        resp = test_app.post("/hello/bob", status=405)
+        assert "GET" == resp.headers["Allow"]
+
+    def test_unit__input_path_and_query__ok__nominal_case(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.input_path(PathSchema())
+        @hapic.input_query(QuerySchema())
+        @hapic.output_body(UserSchema())
+        def get_user(request: WsgiRequest, hapic_data: HapicData):
+            name = "bob" if hapic_data.query["verbose"] else "b"
+            return {"name": name, "age": hapic_data.path["user_id"]}
+
+        context.app.route("/users/<user_id:int>", "GET", get_user)
+        test_app = TestApp(context.app)
+
+        assert {"name": "bob", "age": 42} == test_app.get("/users/42?verbose=1").json
+        assert {"name": "b", "age": 42} == test_app.get("/users/42").json
+        test_app.get("/users/bob", status=404)
+
+    def test_unit__input_body__ok__nominal_case_and_errors(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.input_body(UserSchema())
+        @hapic.output_body(UserSchema())
+        def create_user(request: WsgiRequest, hapic_data: HapicData):
+            return hapic_data.body
+
+        context.app.route("/users", "POST", create_user)
+        test_app = TestApp(context.app)
+
+        resp = test_app.post_json("/users", {"name": "bob", "age": 42})
+        assert {"name": "bob", "age": 42} == resp.json
+
+        resp = test_app.post_json("/users", {"age": 42}, status=400)
+        assert {"name": ["Missing data for required field."]} == resp.json["details"]
+
+        test_app.post("/users", b"{", content_type="application/json", status=400)
+
+    def test_unit__output_stream__ok__nominal_case(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.output_stream(UserSchema())
+        def get_users(request: WsgiRequest):
+            for i in range(3):
+                yield {"name": "user {}".format(i)}
+
+        context.app.route("/users", "GET", get_users)
+        resp = TestApp(context.app).get("/users")
+
+        assert [
+            '{"name": "user 0"}',
+            '{"name": "user 1"}',
+            '{"name": "user 2"}',
+        ] == resp.text.splitlines()
+
+    def test_unit__output_file__ok__range(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.output_file(["text/plain"])
+        def get_file(request: WsgiRequest):
+            return HapicFile(
+                file_object=io.BytesIO(b"0123456789"),
+                mimetype="text/plain",
+                content_length=10,
+                etag="abc",
+            )
+
+        context.app.route("/file", "GET", get_file)
+        test_app = TestApp(context.app)
+
+        resp = test_app.get("/file")
+        assert b"0123456789" == resp.body
+        assert '"abc"' == resp.headers["ETag"]
+
+        resp = test_app.get("/file", headers={"Range": "bytes=2-4"}, status=206)
+        assert b"234" == resp.body
+
+        test_app.get("/file", headers={"If-None-Match": '"abc"'}, status=304)
+
+    def test_unit__handle_exception__ok__most_specific_class(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.handle_exception(ZeroDivisionError, http_code=400)
+        def divide(request: WsgiRequest):
+            1 / 0
+
+        def fail(request: WsgiRequest):
+            raise KeyError("key")
+
+        context.app.route("/divide", "GET", divide)
+        context.app.route("/fail", "GET", fail)
+        context.handle_exceptions([Exception], 500)
+        context.handle_exception(ArithmeticError, 409)
+        test_app = TestApp(context.app)
+
+        assert "division by zero" == test_app.get("/divide", status=400).json["message"]
+        assert "'key'" == test_app.get("/fail", status=500).json["message"]
+
+    def test_unit__input_files__ok__multipart(self):
+        hapic, context = get_hapic_and_context()
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=UploadPolicy(max_file_size=100))
+        def update_avatar(request: WsgiRequest, hapic_data: HapicData):
+            avatar = hapic_data.files["avatar"]
+            assert isinstance(avatar, UploadedFile)
+            assert "avatar.txt" == avatar.filename
+            forms = hapic_data.request_parameters.form_parameters
+            return WsgiResponse("{} {}".format(forms["name"], avatar.read().decode()))
+
+        context.app.route("/avatar", "PUT", update_avatar)
+        test_app = TestApp(context.app)
+
+        resp = test_app.put(
+            "/avatar",
+            {"name": "bob", "avatar": Upload("avatar.txt", b"text content of file")},
+            content_type="multipart/form-data",
+        )
+        assert b"bob text content of file" == resp.body
+
+        test_app.put(
+            "/avatar",
+            {"avatar": Upload("avatar.txt", b"0" * 101)},
+            content_type="multipart/form-data",
+            status=413,
+        )
+
+        resp = test_app.put("/avatar", status=400)
+        assert {"avatar": ["Missing data for required field"]} == resp.json["details"]
+
+    def test_unit__input_forms__ok__multipart_with_files_upload_policy(self):
+        hapic, context = get_hapic_and_context()
+
+        class InputFormsSchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        upload_policy = UploadPolicy(spool_max_size=5, max_total_size=300)
+
+        @hapic.with_api_doc()
+        @hapic.input_forms(InputFormsSchema())
+        @hapic.input_files(InputFilesSchema(), upload_policy=upload_policy)
+        def update_avatar(request: WsgiRequest, hapic_data: HapicData):
+            # File is spooled on disk as defined by upload policy
+            assert hapic_data.files["avatar"].file._rolled
+            return WsgiResponse(hapic_data.forms["name"])
+
+        context.app.route("/avatar", "PUT", update_avatar)
+        test_app = TestApp(context.app)
+
+        params = {"name": "bob", "avatar": Upload("avatar.txt", b"0" * 10)}
+        resp = test_app.put("/avatar", params, content_type="multipart/form-data")
+        assert b"bob" == resp.body
+
+        # Body is read by input forms, with upload policy of input files
+        params = {"name": "bob", "avatar": Upload("avatar.txt", b"0" * 300)}
+        test_app.put("/avatar", params, content_type="multipart/form-data", status=413)
+
+    def test_unit__input_files__ok__repeated_field_closed(self):
+        hapic, context = get_hapic_and_context()
+        opened_files = []
+
+        class InputFilesSchema(marshmallow.Schema):
+            avatar = marshmallow.fields.Raw(required=True)
+
+        class RecordingUploadPolicy(UploadPolicy):
+            def open_file(self, *args, **kwargs):
+                opened_files.append(super().open_file(*args, **kwargs))
+                return opened_files[-1]
+
+        @hapic.with_api_doc()
+        @hapic.input_files(InputFilesSchema(), upload_policy=RecordingUploadPolicy())
+        def update_avatar(request: WsgiRequest, hapic_data: HapicData):
+            return WsgiResponse(hapic_data.files["avatar"].read())
+
+        context.app.route("/avatar", "PUT", update_avatar)
+        test_app = TestApp(context.app)
+
+        params = [("avatar", Upload("a.txt", b"first")), ("avatar", Upload("b.txt", b"second"))]
+        resp = test_app.put("/avatar", params, content_type="multipart/form-data")
+        assert b"second" == resp.body
+        assert 2 == len(opened_files)
+        assert opened_files[0].file.closed
+        assert not opened_files[1].file.closed
+
+    def test_unit__documentation_view__ok__nominal_case(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.input_path(PathSchema())
+        @hapic.output_body(UserSchema())
+        def get_user(request: WsgiRequest, hapic_data: HapicData):
+            return {"name": "bob"}
+
+        context.app.route("/users/<user_id:int>", "GET", get_user)
+        hapic.add_documentation_view("/doc")
+        test_app = TestApp(context.app)
+
+        doc = hapic.generate_doc("wsgi", "testing")
+        assert "get" in doc["paths"]["/users/{user_id}"]
+
+        assert "/users/{user_id}" in test_app.get("/doc/spec.json").json["paths"]
+        test_app.get("/doc/")
+        assert "text/css" == test_app.get("/doc/swagger-ui.css").content_type
+        test_app.get("/doc/../context.py", status=404)
+
+    def test_unit__documentation_view__ok__view_added_after_doc_request(self):
+        hapic, context = get_hapic_and_context()
+
+        @hapic.with_api_doc()
+        @hapic.output_body(UserSchema())
+        def get_user(request: WsgiRequest, hapic_data: HapicData):
+            return {"name": "bob"}
+
+        def get_me(request: WsgiRequest):
+            return WsgiResponse("bob")
+
+        context.app.route("/users/bob", "GET", get_user)
+        hapic.add_documentation_view("/doc")
+        test_app = TestApp(context.app)
+        assert "/users/bob" in test_app.get("/doc/spec.json").json["paths"]
+        cached_doc = hapic.get_cached_doc()
+
+        hapic.add_view("/me", "GET", get_me)
+        assert b"bob" == test_app.get("/me").body
+        assert cached_doc is not hapic.get_cached_doc()
@@ -0,0 +1,31 @@
+# coding: utf-8
+import io
+import json
+
+from benchmarks.run import compare
+from benchmarks.run import run
+from tests.base import Base
+
+
+class TestBenchmarks(Base):
+    def test_func__run__ok__all_scenarios(self):
+        output = io.StringIO()
+        results = run(
+            contexts=["agnostic", "bottle"],
+            processors=["marshmallow", "serpyco"],
+            requests_count=1,
+            warmup_count=0,
+            output=output,
+        )
+
+        assert 16 == len(results["results"])
+        result = json.loads(json.dumps(results))["results"][0]
+        assert "agnostic" == result["context"]
+        assert "marshmallow" == result["processor"]
+        assert "list_users_small" == result["scenario"]
+        assert 0 < result["requests_per_second"]
+        assert 0 < result["latency_p99_ms"]
+        assert 0 < result["allocated_bytes_per_request"]
+
+        compare(results, results, output=output)
+        assert "req/s   +0.0%" in output.getvalue()
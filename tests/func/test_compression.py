@@ -0,0 +1,225 @@
+# coding: utf-8
+import gzip
+import io
+import typing
+
+from aiohttp import web
+import bottle
+import flask
+import marshmallow
+from pyramid.config import Configurator
+import pytest
+from webob import Request
+from webob import Response
+
+from hapic import Hapic
+from hapic import MarshmallowProcessor
+from hapic.compression import CompressionPolicy
+from hapic.data import HapicFile
+from hapic.ext.aiohttp.context import AiohttpContext
+from hapic.ext.bottle import BottleContext
+from hapic.ext.flask import FlaskContext
+from hapic.ext.pyramid import PyramidContext
+from hapic.ext.wsgi.context import WsgiContext
+from tests.base import Base
+
+FILE_CONTENT = b"0123456789" * 1000
+ITEMS = [{"name": "item {}".format(i)} for i in range(100)]
+
+
+class ItemSchema(marshmallow.Schema):
+    name = marshmallow.fields.String(required=True)
+
+
+def get_hapic(async_: bool = False) -> Hapic:
+    return Hapic(
+        processor_class=MarshmallowProcessor,
+        async_=async_,
+        compression_policy=CompressionPolicy(encodings=["gzip"], min_size=100),
+    )
+
+
+def get_hapic_file() -> HapicFile:
+    return HapicFile(
+        file_object=io.BytesIO(FILE_CONTENT),
+        mimetype="text/plain",
+        content_length=len(FILE_CONTENT),
+        etag="abc",
+    )
+
+
+def get_test_app(context_name: str) -> typing.Callable[..., typing.Any]:
+    hapic = get_hapic()
+
+    @hapic.with_api_doc()
+    @hapic.output_body(ItemSchema(many=True))
+    def get_items(*args, **kwargs):
+        return ITEMS
+
+    @hapic.with_api_doc()
+    @hapic.output_body(ItemSchema())
+    def get_item(*args, **kwargs):
+        return ITEMS[0]
+
+    @hapic.with_api_doc()
+    @hapic.output_stream(ItemSchema())
+    def get_stream(*args, **kwargs):
+        yield from ITEMS
+
+    @hapic.with_api_doc()
+    @hapic.output_file(["text/plain"])
+    def get_file(*args, **kwargs):
+        return get_hapic_file()
+
+    views = [("/items", get_items), ("/item", get_item), ("/stream", get_stream)]
+    views.append(("/file", get_file))
+    if context_name == "bottle":
+        app = bottle.Bottle()
+        for path, view in views:
+            app.route(path, method="GET", callback=view)
+        hapic.set_context(BottleContext(app))
+        hapic.add_documentation_view("/doc")
+        return app
+
+    if context_name == "flask":
+        app = flask.Flask(__name__)
+        for path, view in views:
+            app.add_url_rule(path, view_func=view)
+        hapic.set_context(FlaskContext(app))
+        hapic.add_documentation_view("/doc")
+        return app
+
+    if context_name == "wsgi":
+        context = WsgiContext()
+        for path, view in views:
+            context.app.route(path, "GET", view)
+        hapic.set_context(context)
+        hapic.add_documentation_view("/doc")
+        return context.app
+
+    configurator = Configurator()
+    for path, view in views:
+        configurator.add_route(path, path, request_method="GET")
+        configurator.add_view(view, route_name=path)
+    hapic.set_context(PyramidContext(configurator))
+    hapic.add_documentation_view("/doc")
+    return configurator.make_wsgi_app()
+
+
+def get(app: typing.Callable[..., typing.Any], path: str, **headers) -> Response:
+    # INFO - webtest would decode compressed bodies
+    headers = {name.replace("_", "-"): value for name, value in headers.items()}
+    return Request.blank(path, headers=headers).get_response(app)
+
+
+@pytest.mark.parametrize("context_name", ["bottle", "flask", "pyramid", "wsgi"])
+class TestWsgiCompression(Base):
+    def test_func__compression__ok__body(self, context_name):
+        app = get_test_app(context_name)
+        resp = get(app, "/items", Accept_Encoding="gzip")
+
+        assert "gzip" == resp.headers["Content-Encoding"]
+        assert "Accept-Encoding" == resp.headers["Vary"]
+        assert b'"item 99"' in gzip.decompress(resp.body)
+
+    def test_func__compression__ok__not_accepted_or_small(self, context_name):
+        app = get_test_app(context_name)
+
+        resp = get(app, "/items")
+        assert "Content-Encoding" not in resp.headers
+        assert "Accept-Encoding" == resp.headers["Vary"]
+        assert ITEMS == resp.json
+
+        resp = get(app, "/items", Accept_Encoding="gzip;q=0, br")
+        assert "Content-Encoding" not in resp.headers
+
+        resp = get(app, "/item", Accept_Encoding="gzip")
+        assert "Content-Encoding" not in resp.headers
+        assert "Accept-Encoding" == resp.headers["Vary"]
+        assert ITEMS[0] == resp.json
+
+    def test_func__compression__ok__stream(self, context_name):
+        app = get_test_app(context_name)
+        resp = get(app, "/stream", Accept_Encoding="gzip")
+
+        assert "gzip" == resp.headers["Content-Encoding"]
+        lines = gzip.decompress(resp.body).decode("utf-8").splitlines()
+        assert 100 == len(lines)
+        assert '{"name": "item 0"}' == lines[0]
+
+    def test_func__compression__ok__file(self, context_name):
+        app = get_test_app(context_name)
+        resp = get(app, "/file", Accept_Encoding="gzip")
+
+        assert "gzip" == resp.headers["Content-Encoding"]
+        assert 'W/"abc"' == resp.headers["ETag"]
+        assert FILE_CONTENT == gzip.decompress(resp.body)
+
+        # Ranges are not compressed
+        resp = get(app, "/file", Accept_Encoding="gzip", Range="bytes=0-4")
+        assert 206 == resp.status_code
+        assert "Content-Encoding" not in resp.headers
+        assert "Accept-Encoding" == resp.headers["Vary"]
+        assert b"01234" == resp.body
+
+    def test_func__compression__ok__doc_spec(self, context_name):
+        app = get_test_app(context_name)
+        resp = get(app, "/doc/spec.json", Accept_Encoding="gzip")
+
+        assert "gzip" == resp.headers["Content-Encoding"]
+        assert b'"/items"' in gzip.decompress(resp.body)
+
+        etag = resp.headers["ETag"]
+        assert etag.startswith("W/")
+        assert (
+            304
+            == get(app, "/doc/spec.json", Accept_Encoding="gzip", If_None_Match=etag).status_code
+        )
+        # Compressed spec is cached
+        assert resp.body == get(app, "/doc/spec.json", Accept_Encoding="gzip").body
+
+
+class TestAiohttpCompression(object):
+    async def test_func__compression__ok__body_stream_and_file(self, aiohttp_client):
+        hapic = get_hapic(async_=True)
+
+        @hapic.with_api_doc()
+        @hapic.output_body(ItemSchema(many=True))
+        async def get_items(request):
+            return ITEMS
+
+        @hapic.with_api_doc()
+        @hapic.output_stream(ItemSchema())
+        async def get_stream(request):
+            for item in ITEMS:
+                yield item
+
+        @hapic.with_api_doc()
+        @hapic.output_file(["text/plain"])
+        async def get_file(request):
+            return get_hapic_file()
+
+        app = web.Application()
+        app.router.add_get("/items", get_items)
+        app.router.add_get("/stream", get_stream)
+        app.router.add_get("/file", get_file)
+        hapic.set_context(AiohttpContext(app))
+        client = await aiohttp_client(app)
+
+        # INFO - aiohttp client decompress bodies
+        resp = await client.get("/items", headers={"Accept-Encoding": "gzip"})
+        assert "gzip" == resp.headers["Content-Encoding"]
+        assert ITEMS == await resp.json()
+
+        resp = await client.get("/items", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in resp.headers
+        assert "Accept-Encoding" == resp.headers["Vary"]
+        assert ITEMS == await resp.json()
+
+        resp = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert "gzip" == resp.headers["Content-Encoding"]
+        assert 100 == len((await resp.read()).splitlines())
+
+        resp = await client.get("/file", headers={"Accept-Encoding": "gzip"})
+        assert "gzip" == resp.headers["Content-Encoding"]
+        assert FILE_CONTENT == await resp.read()
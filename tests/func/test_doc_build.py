@@ -0,0 +1,105 @@
+# coding: utf-8
+import json
+import subprocess
+import sys
+
+from bottle import Bottle
+import pytest
+from webtest import TestApp
+import yaml
+
+from hapic import Hapic
+from hapic import MarshmallowProcessor
+from hapic.doc.cli import main
+from hapic.ext.bottle import BottleContext
+from tests.base import Base
+
+DOC_APP_MODULE = """
+from bottle import Bottle
+import marshmallow
+
+from hapic import Hapic
+from hapic import MarshmallowProcessor
+from hapic.ext.bottle import BottleContext
+
+hapic = Hapic(processor_class=MarshmallowProcessor)
+app = Bottle()
+hapic.set_context(BottleContext(app))
+
+
+class MySchema(marshmallow.Schema):
+    name = marshmallow.fields.String(required=True)
+
+
+@hapic.with_api_doc()
+@hapic.output_body(MySchema())
+def my_controller():
+    return {"name": "test"}
+
+
+app.route("/test", method="GET", callback=my_controller)
+"""
+
+
+@pytest.fixture
+def doc_app_module(tmp_path, monkeypatch) -> str:
+    module_name = "hapic_doc_build_app_{}".format(tmp_path.name)
+    tmp_path.joinpath("{}.py".format(module_name)).write_text(DOC_APP_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield module_name
+    sys.modules.pop(module_name, None)
+
+
+class TestDocBuild(Base):
+    def test_func__build__ok__json_and_yaml(self, tmp_path, doc_app_module):
+        json_path = str(tmp_path.joinpath("spec.json"))
+        yaml_path = str(tmp_path.joinpath("spec.yml"))
+
+        assert 0 == main(["build", "{}:hapic".format(doc_app_module), "--out", json_path])
+        assert 0 == main(
+            ["build", "{}:hapic".format(doc_app_module), "--out", yaml_path, "--title", "DOC"]
+        )
+
+        with open(json_path) as json_file:
+            json_doc = json.load(json_file)
+        with open(yaml_path) as yaml_file:
+            yaml_doc = yaml.safe_load(yaml_file)
+
+        assert "/test" in json_doc["paths"]
+        assert "/test" in yaml_doc["paths"]
+        assert "DOC" == yaml_doc["info"]["title"]
+
+    def test_func__build__ok__module_entry_point(self, tmp_path, doc_app_module):
+        json_path = str(tmp_path.joinpath("spec.json"))
+        subprocess.check_call(
+            [
+                sys.executable,
+                "-m",
+                "hapic.doc",
+                "build",
+                "{}:hapic".format(doc_app_module),
+                "--out",
+                json_path,
+            ],
+            cwd=str(tmp_path),
+        )
+
+        with open(json_path) as json_file:
+            assert "/test" in json.load(json_file)["paths"]
+
+    def test_func__documentation_view__ok__serve_doc_file(self, tmp_path):
+        doc = {"swagger": "2.0", "info": {"title": "DOC"}, "paths": {"/foo": {}}}
+        doc_path = tmp_path.joinpath("spec.json")
+        doc_path.write_text(json.dumps(doc))
+
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+        app = Bottle()
+        hapic.set_context(BottleContext(app))
+        hapic.add_documentation_view("/doc/", doc_file_path=str(doc_path))
+        test_app = TestApp(app)
+
+        resp = test_app.get("/doc/spec.json")
+        assert doc_path.read_bytes() == resp.body
+        resp = test_app.get("/doc/spec.yml")
+        assert doc == yaml.safe_load(resp.body)
+        assert doc == hapic.generate_doc()
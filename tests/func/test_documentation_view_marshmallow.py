@@ -120,6 +120,16 @@ class TestDocumentationView(Base):
         resp = app.get("/doc/spec.yml")
         assert resp.status_int == 200
         assert resp.headers.get("Content-Type", "").startswith("text/x-yaml")
+        etag = resp.headers["ETag"]
+
+        resp = app.get("/doc/spec.json")
+        assert resp.status_int == 200
+        assert resp.headers.get("Content-Type", "").startswith("application/json")
+        assert "DOC" == resp.json["info"]["title"]
+        assert etag == resp.headers["ETag"]
+
+        resp = app.get("/doc/spec.yml", headers={"If-None-Match": etag})
+        assert resp.status_int == 304
 
     async def test_func__test_documentation_view_ok__aiohttp(self, test_client):
         """
@@ -137,3 +147,43 @@ class TestDocumentationView(Base):
         resp = await app.get("/doc/spec.yml")
         assert resp.status == 200
         assert resp.headers.get("Content-Type", "").startswith("text/x-yaml")
+        etag = resp.headers["ETag"]
+
+        resp = await app.get("/doc/spec.json")
+        assert resp.status == 200
+        assert "DOC" == (await resp.json())["info"]["title"]
+
+        resp = await app.get("/doc/spec.yml", headers={"If-None-Match": etag})
+        assert resp.status == 304
+
+    def test_func__test_documentation_view_ok__lazy_and_invalidated(self):
+        context = get_bottle_context()
+        hapic = context["hapic"]
+        app = context["app"]
+        hapic.add_documentation_view("/doc/", "DOC", "Generated doc")
+
+        class MySchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        # Controller added after documentation view registration
+        @hapic.with_api_doc()
+        @hapic.output_body(MySchema())
+        def my_other_controller():
+            return {"name": "test"}
+
+        app.route("/other", method="GET", callback=my_other_controller)
+        test_app = TestApp(app)
+
+        resp = test_app.get("/doc/spec.json")
+        assert "/other" in resp.json["paths"]
+        etag = resp.headers["ETag"]
+
+        @hapic.with_api_doc()
+        @hapic.output_body(MySchema())
+        def my_last_controller():
+            return {"name": "test"}
+
+        app.route("/last", method="GET", callback=my_last_controller)
+        resp = test_app.get("/doc/spec.json", headers={"If-None-Match": etag})
+        assert resp.status_int == 200
+        assert "/last" in resp.json["paths"]
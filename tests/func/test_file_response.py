@@ -0,0 +1,246 @@
+# coding: utf-8
+import asyncio
+from datetime import datetime
+import io
+
+from aiohttp import web
+import bottle
+import flask
+from pyramid.config import Configurator
+import pytest
+from webtest import TestApp
+
+from hapic import Hapic
+from hapic import MarshmallowProcessor
+from hapic.data import HapicFile
+from hapic.ext.aiohttp.context import AiohttpContext
+from hapic.ext.bottle import BottleContext
+from hapic.ext.flask import FlaskContext
+from hapic.ext.pyramid import PyramidContext
+from hapic.ext.wsgi.context import WsgiContext
+from tests.base import Base
+
+FILE_CONTENT = b"0123456789" * 1000
+LAST_MODIFIED = datetime(2020, 1, 1)
+
+
+def get_hapic_file(source: str, file_path: str, use_conditional_response: bool) -> HapicFile:
+    if source == "path":
+        return HapicFile(
+            file_path=file_path,
+            filename="data.txt",
+            as_attachment=True,
+            use_conditional_response=use_conditional_response,
+        )
+
+    return HapicFile(
+        file_object=io.BytesIO(FILE_CONTENT),
+        mimetype="text/plain",
+        filename="data.txt",
+        as_attachment=True,
+        content_length=len(FILE_CONTENT),
+        last_modified=LAST_MODIFIED,
+        etag="abc",
+        use_conditional_response=use_conditional_response,
+    )
+
+
+def get_test_app(context_name: str, file_path: str) -> TestApp:
+    hapic = Hapic(processor_class=MarshmallowProcessor)
+
+    @hapic.with_api_doc()
+    @hapic.output_file(["text/plain"])
+    def get_file(*args, **kwargs):
+        if context_name == "flask":
+            source, conditional = flask.request.path.split("/")[1:]
+        elif context_name == "bottle":
+            source, conditional = bottle.request.path.split("/")[1:]
+        else:
+            source, conditional = args[-1].path.split("/")[1:]
+        return get_hapic_file(source, file_path, conditional == "conditional")
+
+    paths = ["/{}/{}".format(s, c) for s in ("path", "object") for c in ("conditional", "raw")]
+    if context_name == "bottle":
+        app = bottle.Bottle()
+        for path in paths:
+            app.route(path, method="GET", callback=get_file)
+        hapic.set_context(BottleContext(app))
+        return TestApp(app)
+
+    if context_name == "flask":
+        app = flask.Flask(__name__)
+        for path in paths:
+            app.add_url_rule(path, view_func=get_file, endpoint=path)
+        hapic.set_context(FlaskContext(app))
+        return TestApp(app)
+
+    if context_name == "wsgi":
+        context = WsgiContext()
+        for path in paths:
+            context.app.route(path, "GET", get_file)
+        hapic.set_context(context)
+        return TestApp(context.app)
+
+    configurator = Configurator()
+    for path in paths:
+        configurator.add_route(path, path, request_method="GET")
+        configurator.add_view(get_file, route_name=path)
+    hapic.set_context(PyramidContext(configurator))
+    return TestApp(configurator.make_wsgi_app())
+
+
+@pytest.fixture
+def data_file_path(tmp_path) -> str:
+    path = tmp_path / "data.txt"
+    path.write_bytes(FILE_CONTENT)
+    return str(path)
+
+
+@pytest.mark.parametrize("context_name", ["bottle", "flask", "pyramid", "wsgi"])
+class TestWsgiFileResponse(Base):
+    @pytest.mark.parametrize("source", ["path", "object"])
+    @pytest.mark.parametrize("conditional", ["conditional", "raw"])
+    def test_func__file_response__ok__content_and_headers(
+        self, context_name, data_file_path, source, conditional
+    ):
+        app = get_test_app(context_name, data_file_path)
+        resp = app.get("/{}/{}".format(source, conditional))
+
+        assert 200 == resp.status_code
+        assert FILE_CONTENT == resp.body
+        assert resp.content_type == "text/plain"
+        assert str(len(FILE_CONTENT)) == resp.headers["Content-Length"]
+        assert resp.headers["Content-Disposition"].startswith('attachment; filename="data.txt"')
+        if conditional == "raw":
+            assert "none" == resp.headers["Accept-Ranges"]
+        if source == "object":
+            assert '"abc"' == resp.headers["ETag"]
+            assert "Wed, 01 Jan 2020 00:00:00 GMT" == resp.headers["Last-Modified"]
+
+    def test_func__file_response__ok__path_range(self, context_name, data_file_path):
+        app = get_test_app(context_name, data_file_path)
+        resp = app.get("/path/conditional", headers={"Range": "bytes=10-19"}, status=206)
+
+        assert FILE_CONTENT[10:20] == resp.body
+        assert "bytes" == resp.headers["Accept-Ranges"]
+
+    def test_func__file_response__ok__not_modified(self, context_name, data_file_path):
+        app = get_test_app(context_name, data_file_path)
+        resp = app.get("/object/conditional", headers={"If-None-Match": '"abc"'}, status=304)
+        assert b"" == resp.body
+        assert '"abc"' == resp.headers["ETag"]
+
+        last_modified = app.get("/path/conditional").headers["Last-Modified"]
+        app.get("/path/conditional", headers={"If-Modified-Since": last_modified}, status=304)
+        app.get("/path/raw", headers={"If-Modified-Since": last_modified}, status=200)
+
+    def test_func__file_response__ok__multiple_ranges(self, context_name, data_file_path):
+        app = get_test_app(context_name, data_file_path)
+        resp = app.get("/object/conditional", headers={"Range": "bytes=0-4,-5"}, status=206)
+
+        assert resp.content_type == "multipart/byteranges"
+        assert str(len(resp.body)) == resp.headers["Content-Length"]
+        assert b"Content-Range: bytes 0-4/10000\r\n\r\n01234\r\n" in resp.body
+        assert b"Content-Range: bytes 9995-9999/10000\r\n\r\n56789\r\n" in resp.body
+
+    def test_func__file_response__err__range_not_satisfiable(self, context_name, data_file_path):
+        app = get_test_app(context_name, data_file_path)
+        resp = app.get("/object/conditional", headers={"Range": "bytes=20000-"}, status=416)
+        assert "bytes */10000" == resp.headers["Content-Range"]
+
+        resp = app.get("/object/raw", headers={"Range": "bytes=20000-"}, status=200)
+        assert FILE_CONTENT == resp.body
+
+
+class TestAiohttpFileResponse(object):
+    @pytest.mark.parametrize("source", ["path", "object"])
+    @pytest.mark.parametrize("conditional", ["conditional", "raw"])
+    async def test_func__file_response__ok__content_and_headers(
+        self, aiohttp_client, data_file_path, source, conditional
+    ):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+
+        @hapic.with_api_doc()
+        @hapic.output_file(["text/plain"])
+        async def get_file(request):
+            return get_hapic_file(source, data_file_path, conditional == "conditional")
+
+        app = web.Application()
+        app.router.add_get("/", get_file)
+        hapic.set_context(AiohttpContext(app))
+        client = await aiohttp_client(app)
+
+        resp = await client.get("/")
+        assert 200 == resp.status
+        assert FILE_CONTENT == await resp.read()
+        assert resp.headers["Content-Type"].startswith("text/plain")
+        assert str(len(FILE_CONTENT)) == resp.headers["Content-Length"]
+        assert resp.headers["Content-Disposition"].startswith('attachment; filename="data.txt"')
+        if source == "object":
+            assert '"abc"' == resp.headers["ETag"]
+
+        if source == "path" and conditional == "conditional":
+            resp = await client.get("/", headers={"Range": "bytes=10-19"})
+            assert 206 == resp.status
+            assert FILE_CONTENT[10:20] == await resp.read()
+
+    async def test_func__file_response__ok__path_sent_with_sendfile(
+        self, aiohttp_client, data_file_path
+    ):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+        sendfile_counts = []
+        loop = asyncio.get_event_loop()
+        loop_sendfile = loop.sendfile
+
+        async def sendfile(transport, file, offset=0, count=None, **kwargs):
+            sendfile_counts.append(count)
+            return await loop_sendfile(transport, file, offset, count, **kwargs)
+
+        @hapic.with_api_doc()
+        @hapic.output_file(["text/plain"])
+        async def get_file(request):
+            return get_hapic_file("path", data_file_path, use_conditional_response=True)
+
+        app = web.Application()
+        app.router.add_get("/", get_file)
+        hapic.set_context(AiohttpContext(app))
+        client = await aiohttp_client(app)
+
+        loop.sendfile = sendfile
+        try:
+            resp = await client.get("/")
+            assert 200 == resp.status
+            assert FILE_CONTENT == await resp.read()
+            assert [len(FILE_CONTENT)] == sendfile_counts
+
+            resp = await client.get("/", headers={"Range": "bytes=10-19"})
+            assert FILE_CONTENT[10:20] == await resp.read()
+            assert [len(FILE_CONTENT)] == sendfile_counts
+        finally:
+            del loop.sendfile
+
+    async def test_func__file_response__ok__conditional(self, aiohttp_client):
+        hapic = Hapic(async_=True, processor_class=MarshmallowProcessor)
+
+        @hapic.with_api_doc()
+        @hapic.output_file(["text/plain"])
+        async def get_file(request):
+            return get_hapic_file("object", None, use_conditional_response=True)
+
+        app = web.Application()
+        app.router.add_get("/", get_file)
+        hapic.set_context(AiohttpContext(app))
+        client = await aiohttp_client(app)
+
+        resp = await client.get("/", headers={"If-None-Match": '"abc"'})
+        assert 304 == resp.status
+
+        resp = await client.get("/", headers={"Range": "bytes=2-3,6-7"})
+        assert 206 == resp.status
+        body = await resp.read()
+        assert str(len(body)) == resp.headers["Content-Length"]
+        assert b"Content-Range: bytes 2-3/10000\r\n\r\n23\r\n" in body
+        assert b"Content-Range: bytes 6-7/10000\r\n\r\n67\r\n" in body
+
+        resp = await client.get("/", headers={"Range": "bytes=20000-"})
+        assert 416 == resp.status
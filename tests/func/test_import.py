@@ -0,0 +1,85 @@
+# coding: utf-8
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.base import Base
+
+# Packages who must not be imported by "import hapic": documentation stack,
+# processors dependencies and frameworks are imported at first use
+LAZY_PACKAGES = (
+    "apispec",
+    "apispec_marshmallow_advanced",
+    "apispec_serpyco",
+    "yaml",
+    "marshmallow",
+    "serpyco",
+    "aiohttp",
+    "bottle",
+    "flask",
+    "pyramid",
+)
+# Cumulative import time budget of hapic package, in microseconds. Wall clock
+# measure depends on machine load: checked only if HAPIC_BENCHMARK is set, the
+# lazy packages check is the regression test of import time
+IMPORT_TIME_BUDGET = 300 * 1000
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable] + list(options) + ["-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+
+
+class TestImport(Base):
+    def test_func__import__ok__lazy_packages_not_imported(self):
+        process = run_python(
+            "import json, sys; import hapic; print(json.dumps(sorted(sys.modules)))"
+        )
+        imported_packages = {name.split(".")[0] for name in json.loads(process.stdout.decode())}
+
+        assert [] == [name for name in LAZY_PACKAGES if name in imported_packages]
+
+    def test_func__import__ok__lazy_attributes(self):
+        process = run_python(
+            "import sys; import hapic; hapic.with_api_doc; "
+            "from hapic import MarshmallowProcessor; "
+            "assert hapic.default_processor_class is MarshmallowProcessor; "
+            "assert hapic._hapic_default.processor_class is MarshmallowProcessor; "
+            "assert 'apispec' not in sys.modules"
+        )
+        assert b"" == process.stderr
+
+    def test_func__import__ok__load_doc_file_without_doc_stack(self, tmp_path):
+        doc_path = tmp_path / "doc.json"
+        doc_path.write_text(json.dumps({"swagger": "2.0", "paths": {}}))
+        process = run_python(
+            "import json, sys; from hapic import Hapic; hapic = Hapic(); "
+            "hapic.load_doc_file({!r}); hapic.get_cached_doc().json; "
+            "print(json.dumps(sorted(sys.modules)))".format(str(doc_path))
+        )
+        imported_packages = {name.split(".")[0] for name in json.loads(process.stdout.decode())}
+
+        assert [] == [name for name in ("apispec", "yaml") if name in imported_packages]
+
+    @pytest.mark.skipif(
+        not os.environ.get("HAPIC_BENCHMARK"), reason="benchmark, set HAPIC_BENCHMARK to run"
+    )
+    def test_func__import__ok__import_time_budget(self):
+        process = run_python("import hapic", "-X", "importtime")
+        # Last line is "import time: <self> | <cumulative> | hapic"
+        lines = [line for line in process.stderr.decode().splitlines() if line.endswith("| hapic")]
+        cumulative_time = int(lines[-1].split("|")[1])
+
+        if cumulative_time > IMPORT_TIME_BUDGET:
+            pytest.fail(
+                "import hapic took {} us, budget is {} us".format(
+                    cumulative_time, IMPORT_TIME_BUDGET
+                )
+            )
@@ -0,0 +1,122 @@
+# coding: utf-8
+import functools
+import logging
+
+from bottle import Bottle
+import marshmallow
+from webtest import TestApp
+
+from hapic import Hapic
+from hapic import MarshmallowProcessor
+from hapic.ext.bottle import BottleContext
+from hapic.instrumentation import HistogramInstrumentation
+from hapic.instrumentation import Instrumentation
+from hapic.instrumentation import LoggingInstrumentation
+from tests.base import Base
+
+
+class RecordInstrumentation(Instrumentation):
+    enabled = True
+
+    def __init__(self) -> None:
+        self.records = []
+
+    def observe_stage(self, stage, duration, controller_name, decorator_name, payload_size=None):
+        self.records.append((stage, controller_name, decorator_name, payload_size))
+        assert 0 <= duration
+
+
+class FakeHistogram(object):
+    def __init__(self) -> None:
+        self.observed = []
+
+    def labels(self, **labels):
+        histogram = self
+
+        class Child(object):
+            def observe(self, value):
+                histogram.observed.append((labels, value))
+
+        return Child()
+
+
+class NameSchema(marshmallow.Schema):
+    name = marshmallow.fields.String(required=True)
+
+
+def foreign_decorator(func):
+    @functools.wraps(func)
+    def foreign_wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return foreign_wrapper
+
+
+def get_test_app(instrumentation: Instrumentation, nested: bool = False) -> TestApp:
+    hapic = Hapic(processor_class=MarshmallowProcessor, instrumentation=instrumentation)
+    app = Bottle()
+    hapic.set_context(BottleContext(app))
+    # A foreign decorator between hapic ones prevent decorators fusion
+    decorator = foreign_decorator if nested else lambda func: func
+
+    @hapic.with_api_doc()
+    @hapic.input_path(NameSchema())
+    @decorator
+    @hapic.output_body(NameSchema())
+    def hello(name, hapic_data=None):
+        return {"name": hapic_data.path["name"]}
+
+    app.route("/hello/<name>", method="GET", callback=hello)
+    return TestApp(app)
+
+
+class TestInstrumentation(Base):
+    def test_func__observe_stages__ok__nominal_case(self):
+        instrumentation = RecordInstrumentation()
+        resp = get_test_app(instrumentation).get("/hello/bob")
+        payload_size = len(resp.body)
+        controller_name = "get_test_app.<locals>.hello"
+
+        assert [
+            ("request_parameters", controller_name, "InputPathControllerWrapper", None),
+            ("load", controller_name, "InputPathControllerWrapper", None),
+            ("view", controller_name, None, None),
+            ("dump", controller_name, "OutputBodyControllerWrapper", None),
+            ("encode", controller_name, "OutputBodyControllerWrapper", payload_size),
+            ("response", controller_name, "OutputBodyControllerWrapper", payload_size),
+        ] == instrumentation.records
+
+    def test_func__observe_stages__ok__nested_decorators(self):
+        instrumentation = RecordInstrumentation()
+        get_test_app(instrumentation, nested=True).get("/hello/bob")
+        controller_name = "get_test_app.<locals>.hello"
+
+        assert [("view", controller_name, None, None)] == [
+            record for record in instrumentation.records if "view" == record[0]
+        ]
+        assert "dump" == instrumentation.records[3][0]
+
+    def test_func__observe_stages__ok__histogram(self):
+        duration_histogram = FakeHistogram()
+        payload_size_histogram = FakeHistogram()
+        instrumentation = HistogramInstrumentation(duration_histogram, payload_size_histogram)
+        resp = get_test_app(instrumentation).get("/hello/bob")
+
+        assert 6 == len(duration_histogram.observed)
+        assert {
+            "stage": "view",
+            "controller": "get_test_app.<locals>.hello",
+            "decorator": "",
+        } == duration_histogram.observed[2][0]
+        assert [len(resp.body), len(resp.body)] == [
+            value for _, value in payload_size_histogram.observed
+        ]
+
+    def test_func__observe_stages__ok__logging(self, caplog):
+        logger = logging.getLogger("test_instrumentation")
+        instrumentation = LoggingInstrumentation(logger=logger, level=logging.INFO)
+        with caplog.at_level(logging.INFO, logger="test_instrumentation"):
+            get_test_app(instrumentation).get("/hello/bob")
+
+        assert 6 == len(caplog.records)
+        assert 'Stage "view" of "get_test_app.<locals>.hello" (view)' in caplog.records[2].message
@@ -0,0 +1,72 @@
+# coding: utf-8
+import bottle
+import flask
+import marshmallow
+from pyramid.config import Configurator
+import pytest
+from webtest import TestApp
+
+from hapic import Hapic
+from hapic import MarshmallowProcessor
+from hapic.ext.bottle import BottleContext
+from hapic.ext.flask import FlaskContext
+from hapic.ext.pyramid import PyramidContext
+from tests.base import Base
+
+
+class ItemSchema(marshmallow.Schema):
+    name = marshmallow.fields.String(required=True)
+
+
+def get_test_app(context_name: str, pulled: list, ignore_on_error: bool = True) -> TestApp:
+    hapic = Hapic(processor_class=MarshmallowProcessor)
+
+    @hapic.with_api_doc()
+    @hapic.output_stream(ItemSchema(), ignore_on_error=ignore_on_error)
+    def get_items(*args, **kwargs):
+        for i in range(3):
+            pulled.append(i)
+            if i == 1:
+                yield {"bad": "item"}
+            else:
+                yield {"name": "item {}".format(i)}
+
+    if context_name == "bottle":
+        app = bottle.Bottle()
+        app.route("/items", method="GET", callback=get_items)
+        hapic.set_context(BottleContext(app))
+        return TestApp(app)
+
+    if context_name == "flask":
+        app = flask.Flask(__name__)
+        app.add_url_rule("/items", view_func=get_items)
+        hapic.set_context(FlaskContext(app))
+        return TestApp(app)
+
+    configurator = Configurator()
+    configurator.add_route("items", "/items", request_method="GET")
+    configurator.add_view(get_items, route_name="items")
+    hapic.set_context(PyramidContext(configurator))
+    return TestApp(configurator.make_wsgi_app())
+
+
+@pytest.mark.parametrize("context_name", ["bottle", "flask", "pyramid"])
+class TestSyncOutputStream(Base):
+    def test_func__output_stream__ok__nominal_case(self, context_name):
+        pulled = []
+        app = get_test_app(context_name, pulled)
+        assert [] == pulled
+
+        resp = app.get("/items")
+        assert 200 == resp.status_code
+        assert resp.content_type.startswith("text/plain")
+        assert [b'{"name": "item 0"}', b'{"name": "item 2"}'] == resp.body.splitlines()
+        assert [0, 1, 2] == pulled
+
+    def test_func__output_stream__ok__stop_on_error(self, context_name):
+        pulled = []
+        resp = get_test_app(context_name, pulled, ignore_on_error=False).get("/items")
+
+        assert 200 == resp.status_code
+        assert [b'{"name": "item 0"}'] == resp.body.splitlines()
+        assert [0, 1] == pulled
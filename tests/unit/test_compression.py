@@ -0,0 +1,134 @@
+# coding: utf-8
+import gzip
+import zlib
+
+import pytest
+
+from hapic.compression import CompressionPolicy
+from hapic.compression import GzipCompressor
+from hapic.compression import get_compressed_headers
+from hapic.compression import parse_accept_encoding
+from hapic.exception import ConfigurationException
+from tests.base import Base
+
+CONTENT = b'{"name": "hapic"}' * 100
+
+
+class TestCompression(Base):
+    def test_unit__parse_accept_encoding__ok__qvalues(self):
+        assert {"gzip": 1.0, "br": 0.5, "zstd": 0.0, "*": 0.1} == parse_accept_encoding(
+            "GZIP, br;q=0.5 ,zstd;q=0, *;q=0.1"
+        )
+        assert {"gzip": 0.0} == parse_accept_encoding("gzip;q=invalid")
+
+    def test_unit__negotiate__ok__highest_qvalue_then_preference(self):
+        policy = CompressionPolicy(compressors=[GzipCompressor()])
+
+        assert "gzip" == policy.negotiate("br, gzip").encoding
+        assert "gzip" == policy.negotiate("*").encoding
+        assert policy.negotiate("gzip;q=0") is None
+        assert policy.negotiate("identity") is None
+        assert policy.negotiate("*, gzip;q=0") is None
+        assert policy.negotiate(None) is None
+
+    def test_unit__get_compressor__ok__size_mimetype_and_headers(self):
+        policy = CompressionPolicy(encodings=["gzip"], min_size=100)
+
+        assert "gzip" == policy.get_compressor("gzip", "application/json", size=100).encoding
+        assert "gzip" == policy.get_compressor("gzip", "text/plain; charset=utf-8").encoding
+        assert "gzip" == policy.get_compressor("gzip", "application/problem+json").encoding
+        assert policy.get_compressor("gzip", "application/json", size=99) is None
+        assert policy.get_compressor("gzip", "image/png", size=1000) is None
+        assert (
+            policy.get_compressor("gzip", "text/plain", headers={"content-encoding": "br"}) is None
+        )
+
+    def test_unit__compression_policy__err__unknown_or_missing_encoding(self):
+        with pytest.raises(ConfigurationException):
+            CompressionPolicy(encodings=["lzma"])
+
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            with pytest.raises(ConfigurationException):
+                CompressionPolicy(encodings=["br"])
+
+    def test_unit__compress_response__ok__gzip(self):
+        policy = CompressionPolicy(encodings=["gzip"])
+        body, headers = policy.compress_response(
+            CONTENT, "application/json", {"Content-Length": "1700"}, "gzip"
+        )
+
+        assert CONTENT == gzip.decompress(body)
+        assert {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"} == headers
+
+        # Not compressed but compressible: caches must vary on Accept-Encoding
+        body, headers = policy.compress_response(CONTENT, "application/json", None, None)
+        assert body is CONTENT
+        assert {"Vary": "Accept-Encoding"} == headers
+
+        body, headers = policy.compress_response(
+            b"{}", "application/json", {"Vary": "Origin"}, "gzip"
+        )
+        assert b"{}" == body
+        assert {"Vary": "Origin, Accept-Encoding"} == headers
+
+        body, headers = policy.compress_response(CONTENT, "image/png", None, "gzip")
+        assert body is CONTENT
+        assert headers is None
+
+    def test_unit__compress_response__ok__static_response_cached(self):
+        policy = CompressionPolicy(encodings=["gzip"])
+        first_body, headers = policy.compress_response(
+            CONTENT, "application/json", {"ETag": '"abc"'}, "gzip"
+        )
+        second_body, _ = policy.compress_response(
+            CONTENT, "application/json", {"ETag": '"abc"'}, "gzip"
+        )
+
+        assert first_body is second_body
+        assert 'W/"abc"' == headers["ETag"]
+        # Bodies are not kept as cache keys
+        assert all(CONTENT not in key for key in policy._compressed_static_bodies._values)
+
+    def test_unit__compress_response__ok__large_static_response_not_cached(self):
+        policy = CompressionPolicy(encodings=["gzip"], cache_max_body_size=100)
+        policy.compress_response(CONTENT, "application/json", {"ETag": '"abc"'}, "gzip")
+
+        assert 0 == len(policy._compressed_static_bodies)
+
+    def test_unit__compress_stream__ok__flushed_chunks(self):
+        policy = CompressionPolicy(encodings=["gzip"])
+        compressor = policy.negotiate("gzip")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        chunks = policy.compress_stream(iter([b"first\n", b"second\n"]), compressor)
+        # Each chunk can be decompressed as soon as it is received
+        assert b"first\n" == decompressor.decompress(next(chunks))
+        assert b"second\n" == decompressor.decompress(next(chunks))
+        assert b"" == decompressor.decompress(b"".join(chunks))
+        assert decompressor.eof
+
+    def test_unit__get_compressed_headers__ok__vary(self):
+        assert "Accept-Encoding" == get_compressed_headers({}, "gzip")["Vary"]
+        assert (
+            "Cookie, Accept-Encoding" == get_compressed_headers({"Vary": "Cookie"}, "gzip")["Vary"]
+        )
+        assert (
+            "accept-encoding" == get_compressed_headers({"vary": "accept-encoding"}, "gzip")["Vary"]
+        )
+
+    @pytest.mark.parametrize("encoding,module_name", [("br", "brotli"), ("zstd", "zstandard")])
+    def test_unit__compress__ok__optional_encodings(self, encoding, module_name):
+        module = pytest.importorskip(module_name)
+        policy = CompressionPolicy(encodings=[encoding])
+        compressor = policy.negotiate(encoding)
+
+        body = compressor.compress(CONTENT)
+        streamed_body = b"".join(policy.compress_stream([CONTENT[:50], CONTENT[50:]], compressor))
+        if module_name == "brotli":
+            assert CONTENT == module.decompress(body) == module.decompress(streamed_body)
+        else:
+            decompressor = module.ZstdDecompressor()
+            assert CONTENT == decompressor.decompress(body)
+            assert CONTENT == decompressor.decompressobj().decompress(streamed_body)
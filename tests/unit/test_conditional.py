@@ -0,0 +1,109 @@
+# coding: utf-8
+from datetime import datetime
+import io
+
+from hapic.conditional import evaluate_file_request
+from hapic.conditional import parse_range_header
+from hapic.data import HapicFile
+from tests.base import Base
+
+
+def get_hapic_file(**kwargs) -> HapicFile:
+    return HapicFile(
+        file_object=io.BytesIO(b"0123456789"),
+        mimetype="text/plain",
+        etag="abc",
+        last_modified=datetime(2020, 1, 1),
+        **kwargs
+    )
+
+
+class TestConditional(Base):
+    def test_unit__parse_range_header__ok__nominal_cases(self):
+        assert [(0, 4)] == parse_range_header("bytes=0-4", 10)
+        assert [(5, 9)] == parse_range_header("bytes=5-", 10)
+        assert [(7, 9)] == parse_range_header("bytes=-3", 10)
+        assert [(0, 9)] == parse_range_header("bytes=0-100", 10)
+        assert [(0, 6)] == parse_range_header("bytes=4-6,0-2,3-3", 10)
+        assert [] == parse_range_header("bytes=10-", 10)
+        assert [] == parse_range_header("bytes=-3", 0)
+
+    def test_unit__parse_range_header__ok__ignored(self):
+        assert parse_range_header(None, 10) is None
+        assert parse_range_header("items=0-4", 10) is None
+        assert parse_range_header("bytes=4-2", 10) is None
+        assert parse_range_header("bytes=a-b", 10) is None
+
+    def test_unit__evaluate_file_request__ok__not_modified(self):
+        hapic_file = get_hapic_file()
+        assert 304 == evaluate_file_request(hapic_file, {"If-None-Match": 'W/"abc"'}).http_code
+        assert 304 == evaluate_file_request(hapic_file, {"If-None-Match": "*"}).http_code
+        assert 200 == evaluate_file_request(hapic_file, {"If-None-Match": '"def"'}).http_code
+
+        response = evaluate_file_request(
+            hapic_file, {"If-Modified-Since": "Wed, 01 Jan 2020 00:00:00 GMT"}
+        )
+        assert 304 == response.http_code
+        assert not response.with_body
+        assert {
+            "ETag": '"abc"',
+            "Last-Modified": "Wed, 01 Jan 2020 00:00:00 GMT",
+        } == response.headers
+        response = evaluate_file_request(
+            hapic_file, {"If-Modified-Since": "Tue, 31 Dec 2019 23:59:59 GMT"}
+        )
+        assert 200 == response.http_code
+
+    def test_unit__evaluate_file_request__ok__ranges(self):
+        response = evaluate_file_request(get_hapic_file(), {"Range": "bytes=2-4"})
+        assert 206 == response.http_code
+        assert "bytes 2-4/10" == response.headers["Content-Range"]
+        assert "3" == response.headers["Content-Length"]
+        assert b"234" == b"".join(response.iter_body(chunk_size=2))
+
+        response = evaluate_file_request(get_hapic_file(), {"Range": "bytes=0-0,-1"})
+        body = b"".join(response.iter_body())
+        assert str(len(body)) == response.headers["Content-Length"]
+        assert response.headers["Content-Type"].startswith("multipart/byteranges; boundary=")
+        assert body.endswith(b"\r\n9\r\n--" + response._boundary.encode() + b"--\r\n")
+
+    def test_unit__evaluate_file_request__ok__ranges_from_file_position(self):
+        hapic_file = get_hapic_file()
+        hapic_file.file_object.seek(4)
+        response = evaluate_file_request(hapic_file, {"Range": "bytes=1-2,-1"})
+        assert 206 == response.http_code
+        body = b"".join(response.iter_body())
+        assert b"Content-Range: bytes 1-2/6\r\n\r\n56\r\n" in body
+        assert b"Content-Range: bytes 5-5/6\r\n\r\n9\r\n" in body
+
+    def test_unit__evaluate_file_request__ok__empty_file_suffix_range(self):
+        hapic_file = HapicFile(file_object=io.BytesIO(b""), mimetype="text/plain")
+        response = evaluate_file_request(hapic_file, {"Range": "bytes=-3"})
+        assert 416 == response.http_code
+        assert "bytes */0" == response.headers["Content-Range"]
+
+    def test_unit__evaluate_file_request__ok__if_range(self):
+        response = evaluate_file_request(
+            get_hapic_file(), {"Range": "bytes=2-4", "If-Range": '"abc"'}
+        )
+        assert 206 == response.http_code
+
+        response = evaluate_file_request(
+            get_hapic_file(), {"Range": "bytes=2-4", "If-Range": '"def"'}
+        )
+        assert 200 == response.http_code
+        assert response.is_whole_file
+
+        response = evaluate_file_request(
+            get_hapic_file(), {"Range": "bytes=2-4", "If-Range": "Wed, 01 Jan 2020 00:00:00 GMT"}
+        )
+        assert 206 == response.http_code
+
+    def test_unit__evaluate_file_request__ok__not_conditional(self):
+        response = evaluate_file_request(
+            get_hapic_file(use_conditional_response=False),
+            {"Range": "bytes=2-4", "If-None-Match": '"abc"'},
+        )
+        assert 200 == response.http_code
+        assert "none" == response.headers["Accept-Ranges"]
+        assert b"0123456789" == b"".join(response.iter_body())
@@ -0,0 +1,179 @@
+# coding: utf-8
+import pytest
+
+from hapic import Hapic
+from hapic.context import HandledException
+from hapic.context import HandledExceptionResolver
+from hapic.context import RouteIndex
+from hapic.decorator import DECORATION_ATTRIBUTE_NAME
+from hapic.decorator import ControllerReference
+from hapic.exception import RouteNotFound
+from hapic.ext.agnostic.context import AgnosticApp
+from hapic.ext.agnostic.context import AgnosticContext
+from hapic.processor.marshmallow import MarshmallowProcessor
+from tests.base import Base
+
+
+class TestRouteIndex(Base):
+    def test_unit__find__ok__by_callback_and_token(self):
+        def wrapped():
+            pass
+
+        def wrapper():
+            pass
+
+        def other_callback():
+            pass
+
+        def tokenized_callback():
+            pass
+
+        setattr(tokenized_callback, DECORATION_ATTRIBUTE_NAME, "my-token")
+        index = RouteIndex(
+            [
+                (other_callback, "other"),
+                (tokenized_callback, "by_token"),
+                (wrapper, "by_wrapper"),
+                (wrapped, "by_wrapped"),
+            ]
+        )
+
+        reference = ControllerReference(wrapper=wrapper, wrapped=wrapped, token="my-token")
+        assert ["by_token", "by_wrapper", "by_wrapped"] == index.find(reference)
+        reference = ControllerReference(wrapper=wrapper, wrapped=wrapped, token="unknown")
+        assert ["by_wrapper", "by_wrapped"] == index.find(reference)
+
+    def test_unit__find_route__ok__route_added_after_index_build(self):
+        app = AgnosticApp()
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+        context = AgnosticContext(app=app)
+        hapic.set_context(context)
+
+        @hapic.with_api_doc()
+        def controller_a():
+            pass
+
+        @hapic.with_api_doc()
+        def controller_b():
+            pass
+
+        app.route("/a", "GET", controller_a)
+        assert "/a" == context.find_route(hapic.controllers[0]).rule
+
+        app.route("/b", "POST", controller_b)
+        # Index is not built again for each missing controller
+        with pytest.raises(RouteNotFound):
+            context.find_route(hapic.controllers[1])
+
+        context.invalidate_route_index()
+        route = context.find_route(hapic.controllers[1])
+        assert "/b" == route.rule
+        assert "post" == route.method
+
+    def test_unit__generate_doc__ok__routes_index_built_once(self):
+        app = AgnosticApp()
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+        context = AgnosticContext(app=app)
+        hapic.set_context(context)
+        get_routes_calls = []
+        get_routes = context._get_routes
+
+        def counting_get_routes():
+            get_routes_calls.append(None)
+            return get_routes()
+
+        context._get_routes = counting_get_routes
+
+        @hapic.with_api_doc()
+        def controller_a():
+            pass
+
+        @hapic.with_api_doc()
+        def controller_b():
+            pass
+
+        app.route("/a", "GET", controller_a)
+        app.route("/b", "GET", controller_b)
+        assert {"/a", "/b"} == set(hapic.generate_doc()["paths"])
+        assert 1 == len(get_routes_calls)
+
+        # Routes changed since previous doc generation are found
+        app.route("/c", "GET", controller_a)
+        hapic.generate_doc()
+        assert 2 == len(get_routes_calls)
+
+
+class TestHandledExceptionResolver(Base):
+    def test_unit__resolve__ok__most_specific_class(self):
+        class ParentError(Exception):
+            pass
+
+        class ChildError(ParentError):
+            pass
+
+        class GrandChildError(ChildError):
+            pass
+
+        resolver = HandledExceptionResolver()
+        resolver.add(HandledException(ChildError, 400))
+        resolver.add(HandledException(Exception, 500))
+
+        assert 400 == resolver.resolve(ChildError).http_code
+        assert 400 == resolver.resolve(GrandChildError).http_code
+        assert 500 == resolver.resolve(ParentError).http_code
+        assert resolver.resolve(KeyboardInterrupt) is None
+
+        # Last added handled exception is used for a same class
+        resolver.add(HandledException(ChildError, 409))
+        assert 409 == resolver.resolve(GrandChildError).http_code
+
+    def test_unit__handle_exceptions_decorator_builder__ok__most_specific_class(self):
+        context = AgnosticContext(app=AgnosticApp())
+        context.set_processor_class(MarshmallowProcessor)
+        context.handle_exception(ZeroDivisionError, 400)
+        context.handle_exception(Exception, 500)
+
+        def zero():
+            return 1 / 0
+
+        def key():
+            return dict()["foo"]
+
+        assert 400 == context.handle_exceptions_decorator_builder(zero)().status_code
+        assert 500 == context.handle_exceptions_decorator_builder(key)().status_code
+
+
+class TestAgnosticDispatch(Base):
+    def test_unit__dispatch__ok__path_parameters_and_errors(self):
+        app = AgnosticApp()
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+        context = AgnosticContext(app=app)
+        hapic.set_context(context)
+        context.handle_exception(ZeroDivisionError, 400)
+
+        def get_user():
+            return context.get_response(
+                "{} {}".format(context.path_parameters, context.query_parameters["verbose"]), 200
+            )
+
+        def divide():
+            return 1 / 0
+
+        app.route("/users/<user_id:int>", "GET", get_user)
+        app.route("/divide", "POST", divide)
+
+        response = context.dispatch("GET", "/users/42", query_parameters={"verbose": "1"})
+        assert 200 == response.status_code
+        assert "{'user_id': 42} 1" == response.body
+
+        assert 404 == context.dispatch("GET", "/users/bob").status_code
+        response = context.dispatch("GET", "/divide")
+        assert 405 == response.status_code
+        assert "POST" == response.headers["Allow"]
+        assert 400 == context.dispatch("POST", "/divide").status_code
+
+        # Routes added after first dispatch are used
+        app.route("/users", "GET", get_user)
+        assert (
+            200 == context.dispatch("GET", "/users", query_parameters={"verbose": "1"}).status_code
+        )
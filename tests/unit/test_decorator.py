@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import functools
 import json
 import typing
 
@@ -8,6 +9,7 @@ from multidict import MultiDict
 import pytest
 
 from hapic.data import HapicData
+from hapic.decorator import ControllerPipeline
 from hapic.decorator import ExceptionHandlerControllerWrapper
 from hapic.decorator import InputControllerWrapper
 from hapic.decorator import InputOutputControllerWrapper
@@ -15,12 +17,14 @@ from hapic.decorator import InputQueryControllerWrapper
 from hapic.decorator import OutputControllerWrapper
 from hapic.error.main import ErrorBuilderInterface
 from hapic.error.marshmallow import MarshmallowDefaultErrorBuilder
+from hapic.error.serpyco import SerpycoDefaultErrorBuilder
 from hapic.exception import OutputValidationException
 from hapic.ext.agnostic.context import AgnosticContext
 from hapic.processor.main import Processor
 from hapic.processor.main import ProcessValidationError
 from hapic.processor.main import RequestParameters
 from hapic.processor.marshmallow import MarshmallowProcessor
+from hapic.processor.serpyco import SerpycoProcessor
 from tests.base import Base
 
 try:  # Python 3.5+
@@ -177,6 +181,46 @@ class TestInputControllerWrapper(Base):
         result = func(42)
         assert result == 42
 
+    def test_unit__input_data_wrapping__ok__error_from_single_load(self):
+        context = AgnosticContext(app=None, query_parameters=MultiDict((("foo", "bar"),)))
+        processor = MarshmallowProcessor(MySchema())
+        wrapper = InputQueryControllerWrapper(context, lambda: processor)
+
+        def get_input_validation_error(data_to_validate):
+            raise AssertionError("input must not be validated twice")
+
+        processor.get_input_validation_error = get_input_validation_error
+
+        @wrapper.get_wrapper
+        def func(hapic_data=None):
+            return "unreachable"
+
+        response = func()
+        assert HTTPStatus.BAD_REQUEST == response.status_code
+        error = json.loads(response.body)["original_error"]
+        assert {"name": ["Missing data for required field."]} == error["details"]
+
+    def test_unit__input_data_wrapping__ok__overridden_get_processed_data_error(self):
+        class MyInputQueryValidatingWrapper(InputQueryControllerWrapper):
+            def get_processed_data(self, request_parameters: RequestParameters) -> typing.Any:
+                data = super().get_processed_data(request_parameters)
+                return {"name": data["name"].upper()}
+
+        context = AgnosticContext(app=None, query_parameters=MultiDict((("name", "bob"),)))
+        wrapper = MyInputQueryValidatingWrapper(context, lambda: MarshmallowProcessor(MySchema()))
+
+        @wrapper.get_wrapper
+        def func(hapic_data=None):
+            return hapic_data.query
+
+        assert {"name": "BOB"} == func()
+
+        context.query_parameters = MultiDict((("foo", "bar"),))
+        response = func()
+        assert HTTPStatus.BAD_REQUEST == response.status_code
+        error = json.loads(response.body)["original_error"]
+        assert {"name": ["Missing data for required field."]} == error["details"]
+
     def test_unit__multi_query_param_values__ok__use_as_list(self):
         context = AgnosticContext(
             app=None, query_parameters=MultiDict((("user_id", "abc"), ("user_id", "def")))
@@ -213,6 +257,30 @@ class TestInputControllerWrapper(Base):
         result = func()
         assert result == "abc"
 
+    def test_unit__request_parameters__ok__shared_between_wrappers(self):
+        class MyContext(AgnosticContext):
+            built_count = 0
+
+            def get_request_parameters(self, *args, **kwargs) -> RequestParameters:
+                self.built_count += 1
+                return super().get_request_parameters(*args, **kwargs)
+
+        context = MyContext(app=None, query_parameters=MultiDict((("foo", "bar"),)))
+        processor = MyProcessor()
+        outer_wrapper = MyInputQueryControllerWrapper(context, lambda: processor)
+        inner_wrapper = MyInputQueryControllerWrapper(context, lambda: processor)
+
+        def func(hapic_data=None):
+            return hapic_data.query
+
+        decorated = outer_wrapper.get_wrapper(inner_wrapper.get_wrapper(func))
+        assert {"foo": "bar"} == decorated()
+        assert 1 == context.built_count
+
+        fused = ControllerPipeline([outer_wrapper, inner_wrapper]).get_wrapper(func)
+        assert {"foo": "bar"} == fused()
+        assert 2 == context.built_count
+
 
 class TestOutputControllerWrapper(Base):
     def test_unit__output_data_wrapping__ok__nominal_case(self):
@@ -305,6 +373,83 @@ class TestExceptionHandlerControllerWrapper(Base):
             "code": None,
         } == json.loads(response.body)
 
+    def test_unit__exception_handled__ok__static_error_cached(self):
+        context = AgnosticContext(app=None)
+        error_builder = MarshmallowDefaultErrorBuilder()
+        processors = []
+
+        def processor_factory(schema_):
+            processors.append(MarshmallowProcessor(schema_))
+            return processors[-1]
+
+        wrapper = ExceptionHandlerControllerWrapper(
+            ZeroDivisionError,
+            context,
+            error_builder=error_builder,
+            processor_factory=processor_factory,
+        )
+
+        @wrapper.get_wrapper
+        def func(message, error_detail=None):
+            exc = ZeroDivisionError(message)
+            if error_detail:
+                exc.error_detail = error_detail
+            raise exc
+
+        assert func("We are testing").body == func("We are testing").body
+        assert "Other" == json.loads(func("Other").body)["message"]
+        detail_response = func("We are testing", error_detail={"foo": "bar"})
+        assert {"foo": "bar"} == json.loads(detail_response.body)["details"]["error_detail"]
+        # Error processor built once, static errors encoded once
+        assert 1 == len(processors)
+        assert 2 == len(wrapper._encoded_errors)
+
+    def test_unit__exception_handled__ok__serpyco_static_error_cached(self):
+        context = AgnosticContext(app=None)
+        wrapper = ExceptionHandlerControllerWrapper(
+            ZeroDivisionError,
+            context,
+            error_builder=SerpycoDefaultErrorBuilder(),
+            processor_factory=lambda schema_: SerpycoProcessor(schema_),
+        )
+
+        @wrapper.get_wrapper
+        def func():
+            raise ZeroDivisionError("We are testing")
+
+        assert func().body == func().body
+        assert "We are testing" == json.loads(func().body)["message"]
+        assert 1 == len(wrapper._encoded_errors)
+
+    def test_unit__exception_handled__ok__overridden_builder_not_cached(self):
+        class CountingErrorBuilder(MarshmallowDefaultErrorBuilder):
+            count = 0
+
+            def build_from_exception(
+                self, exception: Exception, include_traceback: bool = False
+            ) -> dict:
+                self.count += 1
+                error = super().build_from_exception(exception, include_traceback)
+                error["code"] = self.count
+                return error
+
+        context = AgnosticContext(app=None)
+        error_builder = CountingErrorBuilder()
+        wrapper = ExceptionHandlerControllerWrapper(
+            ZeroDivisionError,
+            context,
+            error_builder=error_builder,
+            processor_factory=lambda schema_: MarshmallowProcessor(schema_),
+        )
+
+        @wrapper.get_wrapper
+        def func():
+            raise ZeroDivisionError("We are testing")
+
+        assert 1 == json.loads(func().body)["code"]
+        assert 2 == json.loads(func().body)["code"]
+        assert 0 == len(wrapper._encoded_errors)
+
     def test_unit__exception_handler__error__error_content_malformed(self):
         class MyException(Exception):
             pass
@@ -331,3 +476,104 @@ class TestExceptionHandlerControllerWrapper(Base):
         wrapper = wrapper.get_wrapper(raise_it)
         with pytest.raises(OutputValidationException):
             wrapper()
+
+
+class TestControllerPipeline(Base):
+    def test_unit__pipeline__ok__single_frame(self):
+        context = AgnosticContext(app=None, query_parameters=MultiDict((("foo", "bar"),)))
+        processor = MyProcessor()
+        input_wrapper = MyInputQueryControllerWrapper(context, lambda: processor)
+        output_wrapper = OutputControllerWrapper(context, lambda: processor)
+
+        def func(foo, hapic_data=None):
+            assert hapic_data.query == {"foo": "bar"}
+            return foo
+
+        decorated = output_wrapper.get_wrapper(input_wrapper.get_wrapper(func))
+        wrappers, view = ControllerPipeline.unwrap(decorated)
+        assert [output_wrapper, input_wrapper] == wrappers
+        assert func is view
+
+        fused = ControllerPipeline(wrappers).get_wrapper(view)
+        assert fused.__wrapped__ is func
+        assert "43" == fused(42).body
+        assert decorated(42).body == fused(42).body
+
+    def test_unit__pipeline__ok__replaced_response(self):
+        context = AgnosticContext(app=None)
+        processor = MyProcessor()
+        outer_wrapper = MyControllerWrapper(context, lambda: processor)
+        inner_wrapper = MyControllerWrapper(context, lambda: processor)
+
+        def func(foo, added_parameter=None):
+            return foo
+
+        fused = ControllerPipeline([outer_wrapper, inner_wrapper]).get_wrapper(func)
+        # inner after_wrapped_function is not applied on replacement response
+        # see MyControllerWrapper#before_wrapped_func
+        assert 168 == fused(42)
+
+    def test_unit__pipeline__ok__exception_handled(self):
+        context = AgnosticContext(app=None)
+        error_builder = MarshmallowDefaultErrorBuilder()
+        processor = MyProcessor()
+        exception_wrapper = ExceptionHandlerControllerWrapper(
+            ZeroDivisionError,
+            context,
+            error_builder=error_builder,
+            http_code=HTTPStatus.BAD_REQUEST,
+            processor_factory=lambda schema_: MarshmallowProcessor(error_builder.get_schema()),
+        )
+        output_wrapper = OutputControllerWrapper(context, lambda: processor)
+
+        def func(foo):
+            raise ZeroDivisionError("We are testing")
+
+        fused = ControllerPipeline([exception_wrapper, output_wrapper]).get_wrapper(func)
+        response = fused(42)
+        assert HTTPStatus.BAD_REQUEST == response.status_code
+        assert "We are testing" == json.loads(response.body)["message"]
+
+    def test_unit__pipeline__ok__exception_not_handled_by_inner_handler(self):
+        class MyControllerWrapperRaising(InputOutputControllerWrapper):
+            def after_wrapped_function(self, response: typing.Any) -> typing.Any:
+                raise ZeroDivisionError("We are testing")
+
+        context = AgnosticContext(app=None)
+        error_builder = MarshmallowDefaultErrorBuilder()
+        processor = MyProcessor()
+        exception_wrapper = ExceptionHandlerControllerWrapper(
+            ZeroDivisionError,
+            context,
+            error_builder=error_builder,
+            processor_factory=lambda schema_: MarshmallowProcessor(error_builder.get_schema()),
+        )
+        raising_wrapper = MyControllerWrapperRaising(context, lambda: processor)
+
+        def func(foo):
+            return foo
+
+        fused = ControllerPipeline([raising_wrapper, exception_wrapper]).get_wrapper(func)
+        with pytest.raises(ZeroDivisionError):
+            fused(42)
+
+    def test_unit__pipeline__ok__foreign_decorator_stop_unwrap(self):
+        context = AgnosticContext(app=None)
+        processor = MyProcessor()
+        outer_wrapper = OutputControllerWrapper(context, lambda: processor)
+        inner_wrapper = OutputControllerWrapper(context, lambda: processor)
+
+        def foreign_decorator(func):
+            @functools.wraps(func)
+            def foreign_wrapper(*args, **kwargs):
+                return func(*args, **kwargs)
+
+            return foreign_wrapper
+
+        def func(foo):
+            return foo
+
+        decorated = outer_wrapper.get_wrapper(foreign_decorator(inner_wrapper.get_wrapper(func)))
+        wrappers, view = ControllerPipeline.unwrap(decorated)
+        assert [outer_wrapper] == wrappers
+        assert func is not view
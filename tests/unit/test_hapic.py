@@ -1,6 +1,18 @@
 # -*- coding: utf-8 -*-
+import dataclasses
+from http import HTTPStatus
+import json
+
+import marshmallow
+
 from hapic import Hapic
 from hapic.decorator import DECORATION_ATTRIBUTE_NAME
+from hapic.error.serpyco import SerpycoDefaultErrorBuilder
+from hapic.ext.agnostic.context import AgnosticContext
+from hapic.processor.main import OutputValidationPolicy
+from hapic.processor.marshmallow import MarshmallowProcessor
+from hapic.processor.serpyco import SerpycoProcessor
+from hapic.processor.serpyco import serializer_pool
 from tests.base import Base
 
 
@@ -50,3 +62,155 @@ class TestHapic(Base):
         assert MyControllers.controller_a != reference.wrapped
         assert my_controllers.controller_a != reference.wrapper
         assert my_controllers.controller_a != reference.wrapped
+
+    def test_unit__decoration__ok__fused_wrappers(self):
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+
+        class MySchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        def controller_a(hapic_data=None):
+            return {"name": hapic_data.query["name"]}
+
+        decorated = hapic.with_api_doc()(
+            hapic.input_query(MySchema())(hapic.output_body(MySchema())(controller_a))
+        )
+        hapic.set_context(AgnosticContext(app=None, query_parameters={"name": "bob"}))
+
+        # All hapic decorators are collapsed in one wrapper
+        assert controller_a is decorated.__wrapped__
+        assert controller_a == hapic.controllers[0].reference.wrapped.__wrapped__.__wrapped__
+        response = decorated()
+        assert HTTPStatus.OK == response.status_code
+        assert {"name": "bob"} == json.loads(response.body)
+
+    def test_unit__output_validation_policy__ok__endpoint_override(self):
+        off_policy = OutputValidationPolicy(OutputValidationPolicy.OFF)
+        full_policy = OutputValidationPolicy(OutputValidationPolicy.FULL)
+        hapic = Hapic(processor_class=MarshmallowProcessor, output_validation_policy=off_policy)
+
+        class MySchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.output_body(MySchema())
+        def controller_a():
+            return {}
+
+        @hapic.with_api_doc()
+        @hapic.output_body(MySchema(), output_validation_policy=full_policy)
+        def controller_b():
+            return {}
+
+        hapic.set_context(AgnosticContext(app=None))
+
+        assert HTTPStatus.OK == controller_a().status_code
+        assert 1 == off_policy.skipped_count
+        assert HTTPStatus.INTERNAL_SERVER_ERROR == controller_b().status_code
+        assert 0 == full_policy.skipped_count
+
+    def test_unit__set_context__ok__warm_up(self):
+        hapic = Hapic(processor_class=SerpycoProcessor)
+
+        @dataclasses.dataclass
+        class WarmUpSchema(object):
+            name: str
+
+        @hapic.with_api_doc()
+        @hapic.handle_exception(ZeroDivisionError)
+        @hapic.output_body(WarmUpSchema)
+        def controller_a():
+            pass
+
+        serializer_pool.clear()
+        hapic.set_context(
+            AgnosticContext(default_error_builder=SerpycoDefaultErrorBuilder()), warm_up=True
+        )
+
+        # output schema and default error schema serializers
+        assert 2 == len(serializer_pool)
+        assert serializer_pool.get_serializer(WarmUpSchema) is (
+            hapic.controllers[0].description.output_body.wrapper.processor.serializer
+        )
+
+    def test_unit__warm_up__ok__report_schemas_build_durations(self):
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+
+        class WarmUpInputSchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        class WarmUpOutputSchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        @hapic.with_api_doc()
+        @hapic.handle_exception(ZeroDivisionError)
+        @hapic.input_body(WarmUpInputSchema())
+        @hapic.output_body(WarmUpOutputSchema(many=True))
+        @hapic.output_file(["image/png"])
+        def controller_a():
+            pass
+
+        hapic.set_context(AgnosticContext())
+        build_durations = hapic.warm_up()
+
+        assert ["WarmUpInputSchema", "WarmUpOutputSchema", "DefaultErrorSchema"] == list(
+            build_durations.keys()
+        )
+        assert all(0 <= duration for duration in build_durations.values())
+        description = hapic.controllers[0].description
+        assert description.input_body.wrapper._processor is not None
+
+    def test_unit__warm_up__ok__schema_hooks_not_called(self):
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+        calls = []
+
+        class WarmUpItemSchema(marshmallow.Schema):
+            name = marshmallow.fields.Method("get_name")
+
+            def get_name(self, data):
+                calls.append("method")
+                return data["name"]
+
+        class WarmUpHooksSchema(marshmallow.Schema):
+            items = marshmallow.fields.Nested(WarmUpItemSchema, many=True)
+
+            @marshmallow.pre_dump
+            def unwrap(self, data):
+                calls.append("pre_dump")
+                return data["x"]
+
+        @hapic.with_api_doc()
+        @hapic.output_body(WarmUpHooksSchema())
+        def controller_a():
+            return {"x": {"items": [{"name": "bob"}]}}
+
+        hapic.set_context(AgnosticContext(), warm_up=True)
+        assert [] == calls
+
+        assert HTTPStatus.OK == controller_a().status_code
+        assert ["pre_dump", "method"] == calls
+
+    def test_unit__warm_up__ok__failing_warm_up_logged(self, caplog):
+        hapic = Hapic(processor_class=MarshmallowProcessor)
+
+        class WarmUpInputSchema(marshmallow.Schema):
+            name = marshmallow.fields.String()
+
+        class WarmUpOutputSchema(marshmallow.Schema):
+            name = marshmallow.fields.String()
+
+        @hapic.with_api_doc()
+        @hapic.input_body(WarmUpInputSchema())
+        @hapic.output_body(WarmUpOutputSchema())
+        def controller_a():
+            pass
+
+        def failing_warm_up():
+            raise KeyError("x")
+
+        hapic.set_context(AgnosticContext())
+        hapic.controllers[0].description.output_body.wrapper.warm_up = failing_warm_up
+        build_durations = hapic.warm_up()
+
+        assert ["WarmUpInputSchema"] == list(build_durations.keys())
+        assert 'Warm up of controller "controller_a" failed' in caplog.text
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import json
+
+import marshmallow
+import pytest
+
+from hapic import Hapic
+from hapic.ext.agnostic.context import AgnosticContext
+from hapic.json_backend import OrjsonJsonBackend
+from hapic.json_backend import RapidjsonJsonBackend
+from hapic.json_backend import StdlibJsonBackend
+from hapic.json_backend import UjsonJsonBackend
+from hapic.json_backend import get_fastest_json_backend
+from hapic.processor.marshmallow import MarshmallowProcessor
+from tests.base import Base
+
+
+def get_backend(backend_class):
+    try:
+        return backend_class()
+    except ImportError:
+        pytest.skip("{} dependency is not installed".format(backend_class.__name__))
+
+
+@pytest.mark.parametrize(
+    "backend_class",
+    [StdlibJsonBackend, OrjsonJsonBackend, UjsonJsonBackend, RapidjsonJsonBackend],
+)
+class TestJsonBackend(Base):
+    def test_unit__dumps__ok__bytes(self, backend_class):
+        backend = get_backend(backend_class)
+        dumped = backend.dumps({"name": "bob", "items": [1, 2.5, None, True], "unicode": "é"})
+
+        assert isinstance(dumped, bytes)
+        assert {
+            "name": "bob",
+            "items": [1, 2.5, None, True],
+            "unicode": "é",
+        } == json.loads(dumped.decode("utf-8"))
+
+    def test_unit__loads__ok__str_and_bytes(self, backend_class):
+        backend = get_backend(backend_class)
+
+        assert {"name": "bob"} == backend.loads('{"name": "bob"}')
+        assert {"name": "é"} == backend.loads('{"name": "é"}'.encode("utf-8"))
+
+    def test_unit__loads__err__value_error(self, backend_class):
+        backend = get_backend(backend_class)
+
+        with pytest.raises(ValueError):
+            backend.loads(b"{not json")
+
+
+class TestJsonBackendUsage(Base):
+    def test_unit__get_fastest_json_backend__ok__nominal_case(self):
+        backend = get_fastest_json_backend()
+        assert {"a": 1} == backend.loads(backend.dumps({"a": 1}))
+
+    def test_unit__hapic_json_backend__ok__set_on_context(self):
+        class MyBackend(StdlibJsonBackend):
+            def dumps(self, data):
+                return b"dumped"
+
+        class MySchema(marshmallow.Schema):
+            name = marshmallow.fields.String(required=True)
+
+        hapic = Hapic(processor_class=MarshmallowProcessor, json_backend=MyBackend())
+        context = AgnosticContext(app=None)
+        hapic.set_context(context)
+
+        @hapic.with_api_doc()
+        @hapic.output_body(MySchema())
+        def controller():
+            return {"name": "bob"}
+
+        assert isinstance(context.json_backend, MyBackend)
+        assert "dumped" == controller().body
@@ -8,8 +8,10 @@ import marshmallow as marshmallow
 import pytest
 
 from hapic.data import HapicFile
+from hapic.exception import ConfigurationException
 from hapic.exception import ProcessException
 from hapic.exception import ValidationException
+from hapic.processor.main import OutputValidationPolicy
 from hapic.processor.marshmallow import MarshmallowProcessor
 from tests.base import Base
 
@@ -236,3 +238,56 @@ class TestProcessor(Base):
 
         data = processor.load(tested_data)
         assert {"first_name": "Alan", "last_name": "Doe"} == data
+
+    def test_unit__marshmallow_output_processor__ok__validation_policy_off(self):
+        policy = OutputValidationPolicy(OutputValidationPolicy.OFF)
+        processor = MarshmallowProcessor(output_validation_policy=policy)
+        processor.set_schema(MySchema())
+
+        # invalid data is not validated
+        assert {"last_name": "Turing"} == processor.dump({"last_name": "Turing"})
+        assert {"last_name": "Turing"} == processor.dump_output({"last_name": "Turing"})
+        assert 2 == policy.skipped_count
+
+    def test_unit__marshmallow_output_processor__ok__validation_policy_sampled_rate(self):
+        policy = OutputValidationPolicy(OutputValidationPolicy.SAMPLED, sample_rate=2)
+        processor = MarshmallowProcessor(output_validation_policy=policy)
+        processor.set_schema(MySchema())
+
+        with pytest.raises(ValidationException):
+            processor.dump({"last_name": "Turing"})
+        processor.dump({"last_name": "Turing"})
+        with pytest.raises(ValidationException):
+            processor.dump({"last_name": "Turing"})
+        assert 1 == policy.skipped_count
+
+    def test_unit__marshmallow_output_processor__ok__validation_policy_sampled_items(self):
+        policy = OutputValidationPolicy(OutputValidationPolicy.SAMPLED, sample_items=1)
+        processor = MarshmallowProcessor(output_validation_policy=policy)
+        processor.set_schema(MySchema(many=True))
+
+        # only first item is validated
+        data = processor.dump([{"first_name": "Alan"}, {"last_name": "Turing"}])
+        assert [{"first_name": "Alan"}, {"last_name": "Turing"}] == data
+
+        with pytest.raises(ValidationException):
+            processor.dump([{"last_name": "Turing"}, {"first_name": "Alan"}])
+
+    def test_unit__output_validation_policy__err__bad_parameters(self):
+        with pytest.raises(ConfigurationException):
+            OutputValidationPolicy("sometimes")
+        with pytest.raises(ConfigurationException):
+            OutputValidationPolicy(OutputValidationPolicy.SAMPLED, sample_rate=0)
+
+    def test_unit__marshmallow_input_processor__ok__load_with_result(self):
+        processor = MarshmallowProcessor()
+        processor.set_schema(MySchema())
+
+        load_result = processor.load_with_result({"first_name": "Alan"})
+        assert load_result.valid
+        assert {"first_name": "Alan", "last_name": "Doe"} == load_result.data
+
+        load_result = processor.load_with_result({"last_name": "Turing"})
+        assert not load_result.valid
+        assert isinstance(load_result.exception, ValidationException)
+        assert {"first_name": ["Missing data for required field."]} == load_result.error.details
@@ -0,0 +1,61 @@
+# coding: utf-8
+import pytest
+
+from hapic.exception import ConfigurationException
+from hapic.router import Router
+from tests.base import Base
+
+
+def get_router() -> Router:
+    router = Router()
+    router.add("/users", "GET", "list_users")
+    router.add("/users/me", "GET", "get_me")
+    router.add("/users/<user_id:int>", "GET", "get_user")
+    router.add("/users/<user_id>", "DELETE", "delete_user")
+    router.add("/users/<user_id>/avatar.<extension:re:png|jpg>", "GET", "get_avatar")
+    router.add("/static/<filename:path>", "GET", "get_static")
+    router.add("/points/<x:float>", "GET", "get_point")
+    return router
+
+
+class TestRouter(Base):
+    @pytest.mark.parametrize(
+        "method,path,callback,parameters",
+        [
+            ("GET", "/users", "list_users", {}),
+            ("GET", "/users/me", "get_me", {}),
+            ("GET", "/users/42", "get_user", {"user_id": 42}),
+            ("DELETE", "/users/me", "delete_user", {"user_id": "me"}),
+            ("GET", "/users/42/avatar.png", "get_avatar", {"user_id": "42", "extension": "png"}),
+            ("GET", "/static/css/main.css", "get_static", {"filename": "css/main.css"}),
+            ("HEAD", "/users/42", "get_user", {"user_id": 42}),
+            ("GET", "/points/1.5", "get_point", {"x": 1.5}),
+        ],
+    )
+    def test_unit__match__ok__nominal_cases(self, method, path, callback, parameters):
+        route, route_parameters, allowed_methods = get_router().match(method, path)
+
+        assert callback == route.callback
+        assert parameters == route_parameters
+        assert set() == allowed_methods
+
+    def test_unit__match__ok__not_found_and_not_allowed(self):
+        router = get_router()
+
+        assert (None, {}, set()) == router.match("GET", "/groups")
+        assert (None, {}, set()) == router.match("GET", "/users/42/avatar.gif")
+        assert (None, {}, set()) == router.match("GET", "/static/")
+        assert (None, {}, set()) == router.match("GET", "/points/1.2.3")
+        assert (None, {}, {"GET"}) == router.match("POST", "/users")
+        assert (None, {}, {"DELETE"}) == router.match("GET", "/users/bob")
+
+    def test_unit__add__err__invalid_rules(self):
+        with pytest.raises(ConfigurationException):
+            Router().add("/users/<user_id:uuid>", "GET", "get_user")
+        with pytest.raises(ConfigurationException):
+            Router().add("/static/<filename:path>/raw", "GET", "get_static")
+
+    def test_unit__get_swagger_path__ok__nominal_case(self):
+        assert "/users/{user_id}/avatar.{extension}" == Router().get_swagger_path(
+            "/users/<user_id:int>/avatar.<extension>"
+        )
@@ -6,7 +6,11 @@ import pytest
 from serpyco import ValidationError
 
 from hapic.exception import OutputValidationException
+from hapic.exception import ValidationException
+from hapic.processor.main import OutputValidationPolicy
+from hapic.processor.serpyco import SerializerPool
 from hapic.processor.serpyco import SerpycoProcessor
+from hapic.processor.serpyco import serializer_pool
 from tests.base import Base
 
 
@@ -104,3 +108,64 @@ class TestSerpycoProcessor(Base):
         # TODO BS 2019-03-27: Must be tested when
         #  https://gitlab.com/sgrignard/serpyco/issues/26 fixed
         # assert isinstance(validation_error.original_exception, ValidationError)
+
+    def test_unit__dump__ok__validation_policy_off(self) -> None:
+        policy = OutputValidationPolicy(OutputValidationPolicy.OFF)
+        processor = SerpycoProcessor(output_validation_policy=policy)
+        processor.set_schema(UserSchema)
+
+        assert {"name": 42} == processor.dump(UserSchema(name=42))
+        assert 1 == policy.skipped_count
+
+    def test_unit__dump__ok__validation_policy_sampled_items(self) -> None:
+        policy = OutputValidationPolicy(OutputValidationPolicy.SAMPLED, sample_items=1)
+        processor = SerpycoProcessor(many=True, output_validation_policy=policy)
+        processor.set_schema(UserSchema)
+
+        data = processor.dump([UserSchema(name="bob"), UserSchema(name=42)])
+        assert [{"name": "bob"}, {"name": 42}] == data
+
+        with pytest.raises(ValidationException):
+            processor.dump([UserSchema(name=42), UserSchema(name="bob")])
+
+    def test_unit__load_with_result__ok__error_transmitted(
+        self, serpyco_processor: SerpycoProcessor
+    ) -> None:
+        serpyco_processor.set_schema(UserSchema)
+        load_result = serpyco_processor.load_with_result({"name": 42})
+
+        assert not load_result.valid
+        assert isinstance(load_result.exception, ValidationException)
+        assert isinstance(load_result.error.original_exception, ValidationError)
+        assert load_result.error.details
+
+
+class TestSerializerPool(Base):
+    def test_unit__get_serializer__ok__shared_by_parameters(self) -> None:
+        pool = SerializerPool()
+        serializer = pool.get_serializer(UserSchema)
+
+        assert serializer is pool.get_serializer(UserSchema)
+        assert serializer is not pool.get_serializer(UserSchema, omit_none=True)
+        assert pool.get_serializer(TwoFileSchema, exclude=["file1", "file2"]) is (
+            pool.get_serializer(TwoFileSchema, exclude=["file2", "file1"])
+        )
+        assert 3 == len(pool)
+
+        pool.clear()
+        assert 0 == len(pool)
+
+    def test_unit__serializer__ok__shared_by_processors(self) -> None:
+        processor_a = SerpycoProcessor(UserSchema)
+        processor_b = SerpycoProcessor(only=["name"])
+        processor_b.set_schema(UserSchema)
+        processor_c = SerpycoProcessor(UserSchema, only=["name"])
+
+        assert processor_a.serializer is serializer_pool.get_serializer(UserSchema)
+        assert processor_b.serializer is processor_c.serializer
+        assert processor_a.serializer is not processor_b.serializer
+
+        processor_b.set_schema(OneFileSchema)
+        assert processor_b.serializer is serializer_pool.get_serializer(
+            OneFileSchema, only=["name"]
+        )
@@ -0,0 +1,84 @@
+# coding: utf-8
+import asyncio
+
+import pytest
+
+from hapic.exception import ConfigurationException
+from hapic.stream import StreamBatcher
+from hapic.stream import StreamBatchPolicy
+from tests.base import Base
+
+
+class TestStreamBatcher(Base):
+    def run(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_unit__add__ok__flush_on_max_bytes_and_close(self):
+        written = []
+
+        async def write(data):
+            written.append(data)
+
+        async def feed():
+            batcher = StreamBatcher(write, StreamBatchPolicy(max_bytes=5, max_delay=None))
+            await batcher.add(b"ab\n")
+            await batcher.add(b"cd\n")
+            await batcher.add(b"e\n")
+            assert [b"ab\ncd\n"] == written
+            await batcher.close()
+
+        self.run(feed())
+        assert [b"ab\ncd\n", b"e\n"] == written
+
+    def test_unit__add__ok__flush_on_deadline(self):
+        written = []
+
+        async def write(data):
+            written.append(data)
+
+        async def feed():
+            batcher = StreamBatcher(write, StreamBatchPolicy(max_delay=0.01))
+            await batcher.add(b"a\n")
+            await batcher.add(b"b\n")
+            await asyncio.sleep(0.05)
+            assert [b"a\nb\n"] == written
+            await batcher.add(b"c\n")
+            await batcher.close()
+
+        self.run(feed())
+        assert [b"a\nb\n", b"c\n"] == written
+
+    def test_unit__add__ok__slow_write_on_deadline(self):
+        written = []
+
+        async def write(data):
+            await asyncio.sleep(0.05)
+            written.append(data)
+
+        async def feed():
+            batcher = StreamBatcher(write, StreamBatchPolicy(max_delay=0.01))
+            await batcher.add(b"a\n")
+            await asyncio.sleep(0.02)
+            delayed_flush = batcher._delayed_flush
+            await batcher.add(b"b\n")
+            await asyncio.sleep(0.02)
+            await batcher.add(b"c\n")
+            await asyncio.sleep(0.02)
+            assert delayed_flush is batcher._delayed_flush
+            await batcher.close()
+            assert delayed_flush.done()
+            assert batcher._delayed_flush is None
+
+        self.run(feed())
+        assert [b"a\n", b"b\nc\n"] == written
+
+    def test_unit__policy__err__invalid_limits(self):
+        with pytest.raises(ConfigurationException):
+            StreamBatchPolicy(max_items=0)
+
+        with pytest.raises(ConfigurationException):
+            StreamBatchPolicy(max_delay=-1)
@@ -1,8 +1,12 @@
 # coding: utf-8
+import re
+
 import pytest
 
 from hapic.exception import NotLowercaseCaseException
 from hapic.util import LowercaseKeysDict
+from hapic.util import LruCache
+from hapic.util import get_swagger_path
 
 
 class TestUtils(object):
@@ -44,3 +48,27 @@ class TestUtils(object):
 
         with pytest.raises(NotLowercaseCaseException):
             lowercase_dict.update({"FOO": "bar"})
+
+
+class TestLruCache(object):
+    def test_unit__set__ok__drop_least_recently_used(self):
+        cache = LruCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert 1 == cache.get("a")
+        cache.set("c", 3)
+
+        assert 2 == len(cache)
+        assert 1 == cache.get("a")
+        assert cache.get("b") is None
+        assert 3 == cache.get("c")
+
+
+class TestGetSwaggerPath(object):
+    def test_unit__get_swagger_path__ok__memoized(self):
+        path_url_regex = re.compile(r"<([^:<>]+)(?::[^<>]+)?>")
+        assert "/users/{user_id}" == get_swagger_path(path_url_regex, "/users/<user_id:int>")
+
+        hits = get_swagger_path.cache_info().hits
+        assert "/users/{user_id}" == get_swagger_path(path_url_regex, "/users/<user_id:int>")
+        assert hits + 1 == get_swagger_path.cache_info().hits